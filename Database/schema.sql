@@ -10,6 +10,13 @@ CREATE TABLE public.backup_history (
   backup_type character varying,
   user_id integer,
   comments text,
+  parent_file character varying,
+  base_file character varying,
+  chain_length integer DEFAULT 0,
+  high_water_marks jsonb,
+  total_records bigint,
+  retention_tier character varying,
+  pruned_at timestamp with time zone,
   CONSTRAINT backup_history_pkey PRIMARY KEY (backup_id)
 );
 CREATE TABLE public.backup_schedule (
@@ -28,6 +35,14 @@ CREATE TABLE public.custom_holidays (
   description character varying,
   CONSTRAINT custom_holidays_pkey PRIMARY KEY (id)
 );
+CREATE TABLE public.holiday_week_calendar (
+  week_start date NOT NULL,
+  is_holiday_week smallint NOT NULL DEFAULT 0,
+  holiday_type text,
+  holiday_names text,
+  updated_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP,
+  CONSTRAINT holiday_week_calendar_pkey PRIMARY KEY (week_start)
+);
 CREATE TABLE public.ingredients (
   ingredient_id bigint NOT NULL DEFAULT nextval('ingredients_ingredient_id_seq'::regclass),
   ingredient_name text,
@@ -38,6 +53,18 @@ CREATE TABLE public.ingredients (
   is_gating boolean,
   CONSTRAINT ingredients_pkey PRIMARY KEY (ingredient_id)
 );
+CREATE TABLE public.ingredient_unit_cost (
+  ingredient_key text NOT NULL,
+  ingredient_name text NOT NULL,
+  avg_unit_cost double precision NOT NULL DEFAULT 0,
+  cost_unit text,
+  base_unit text NOT NULL,
+  cost_per_base_unit double precision NOT NULL DEFAULT 0,
+  unit_source text NOT NULL DEFAULT 'legacy'::text,
+  cost_source text NOT NULL,
+  updated_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP,
+  CONSTRAINT ingredient_unit_cost_pkey PRIMARY KEY (ingredient_key)
+);
 CREATE TABLE public.inventory (
   item_id bigint GENERATED ALWAYS AS IDENTITY NOT NULL,
   item_name character varying,
@@ -128,6 +155,7 @@ CREATE TABLE public.menu (
   menu_id integer NOT NULL DEFAULT nextval('menu_menu_id_seq'::regclass),
   portions_left text,
   itemcode text,
+  thumbnail_url text,
   CONSTRAINT menu_pkey PRIMARY KEY (menu_id)
 );
 CREATE TABLE public.menu_ingredients (
@@ -138,6 +166,15 @@ CREATE TABLE public.menu_ingredients (
   ingredient_id bigint GENERATED ALWAYS AS IDENTITY NOT NULL,
   CONSTRAINT menu_ingredients_ingredient_id_fkey FOREIGN KEY (ingredient_id) REFERENCES public.ingredients(ingredient_id)
 );
+CREATE TABLE public.menu_item_alias (
+  alias_id integer NOT NULL DEFAULT nextval('menu_item_alias_alias_id_seq'::regclass),
+  alias text NOT NULL,
+  alias_key text NOT NULL UNIQUE,
+  menu_id integer NOT NULL,
+  created_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP,
+  CONSTRAINT menu_item_alias_pkey PRIMARY KEY (alias_id),
+  CONSTRAINT menu_item_alias_menu_id_fkey FOREIGN KEY (menu_id) REFERENCES public.menu(menu_id)
+);
 CREATE TABLE public.notification (
   user_id bigint,
   type text,
@@ -146,6 +183,7 @@ CREATE TABLE public.notification (
   created_at text,
   details text,
   id bigint GENERATED ALWAYS AS IDENTITY NOT NULL,
+  updated_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP,
   CONSTRAINT notification_pkey PRIMARY KEY (id)
 );
 CREATE TABLE public.notification_settings (
@@ -159,6 +197,42 @@ CREATE TABLE public.notification_settings (
   transfer_method text DEFAULT '["inapp"]'::text,
   CONSTRAINT notification_settings_pkey PRIMARY KEY (user_id)
 );
+CREATE TABLE public.sales_daily_item (
+  sale_day date NOT NULL,
+  item_name text NOT NULL,
+  category text NOT NULL DEFAULT ''::text,
+  total_quantity bigint NOT NULL DEFAULT 0,
+  total_revenue double precision NOT NULL DEFAULT 0,
+  unit_price_sum double precision NOT NULL DEFAULT 0,
+  unit_price_count bigint NOT NULL DEFAULT 0,
+  row_count bigint NOT NULL DEFAULT 0,
+  updated_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP,
+  menu_id integer,
+  CONSTRAINT sales_daily_item_pkey PRIMARY KEY (sale_day, item_name)
+);
+CREATE TABLE public.sales_forecast_model (
+  item_key text NOT NULL DEFAULT ''::text,
+  category_key text NOT NULL DEFAULT ''::text,
+  horizon integer NOT NULL,
+  features jsonb NOT NULL,
+  intercept double precision NOT NULL,
+  coefficients jsonb NOT NULL,
+  first_week date NOT NULL,
+  last_week date NOT NULL,
+  n_weeks integer NOT NULL,
+  data_fingerprint text NOT NULL,
+  fitted_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP,
+  CONSTRAINT sales_forecast_model_pkey PRIMARY KEY (item_key, category_key, horizon)
+);
+CREATE TABLE public.sales_hourly (
+  sale_day date NOT NULL,
+  sale_hour smallint NOT NULL,
+  total_quantity bigint NOT NULL DEFAULT 0,
+  total_revenue double precision NOT NULL DEFAULT 0,
+  row_count bigint NOT NULL DEFAULT 0,
+  updated_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP,
+  CONSTRAINT sales_hourly_pkey PRIMARY KEY (sale_day, sale_hour)
+);
 CREATE TABLE public.sales_report (
   sales_id bigint GENERATED ALWAYS AS IDENTITY NOT NULL,
   quantity bigint,
@@ -180,7 +254,10 @@ CREATE TABLE public.sales_report (
   terminal_no character varying,
   member character varying,
   member_code character varying,
-  CONSTRAINT sales_report_pkey PRIMARY KEY (sales_id)
+  menu_id integer,
+  updated_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP,
+  CONSTRAINT sales_report_pkey PRIMARY KEY (sales_id),
+  CONSTRAINT sales_report_menu_id_fkey FOREIGN KEY (menu_id) REFERENCES public.menu(menu_id)
 );
 CREATE TABLE public.suppliers (
   supplier_id integer NOT NULL DEFAULT nextval('suppliers_supplier_id_seq'::regclass),
@@ -214,6 +291,7 @@ CREATE TABLE public.user_activity_log (
   user_name character varying,
   role character varying,
   activity_id integer NOT NULL DEFAULT nextval('user_activity_log_activity_id_seq'::regclass),
+  updated_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP,
   CONSTRAINT user_activity_log_pkey PRIMARY KEY (activity_id)
 );
 CREATE TABLE public.users (
@@ -3,7 +3,7 @@ try:
     from slowapi.util import get_remote_address
     from slowapi.errors import RateLimitExceeded
     from fastapi.responses import JSONResponse
-    from fastapi import FastAPI, Request
+    from fastapi import Depends, FastAPI, Request
     from fastapi.responses import JSONResponse
     from fastapi.exceptions import RequestValidationError
     from fastapi.middleware.cors import CORSMiddleware
@@ -51,8 +51,13 @@ try:
     from .routes.Menu import menu
     from .routes.Supplier import supplier
     from app.supabase import SessionLocal
+    from .utils.rbac import require_role
     from slowapi.middleware import SlowAPIMiddleware
 
+    from .utils.app_logging import configure_logging
+
+    configure_logging()
+
     app = FastAPI()
 
     import logging
@@ -170,10 +175,27 @@ try:
         asyncio.create_task(run_backup_scheduling())
         print("Backup scheduling started in background")
 
+    @app.on_event("startup")
+    async def warm_table_column_cache():
+        """Read report table columns once instead of per request"""
+        from .utils.keyset_pagination import table_columns
+
+        try:
+            async with SessionLocal() as session:
+                await table_columns.columns(session, "sales_report")
+        except Exception as e:
+            print(f"[Column Cache Warmup Error] {e}")
+
     @app.get("/health")
     async def health_check():
         return {"status": "ok"}
 
+    @app.get("/cache/stats")
+    async def response_cache_stats(user=Depends(require_role("Owner", "General Manager"))):
+        from .utils.response_cache import cache_stats
+
+        return cache_stats()
+
 except Exception as e:
     import traceback
     print(f"[Top-level Import/Init Error] {e}")
@@ -3,6 +3,9 @@ from datetime import date
 from app.models.custom_holiday import CustomHoliday
 from app.models.base import Base
 from app.supabase import get_db
+from app.utils.response_cache import invalidates
+from app.utils.holiday_calendar import holiday_calendar
+from app.utils.weekly_forecast_store import clear_holiday_weeks
 from pydantic import BaseModel
 from typing import List, Optional
 
@@ -36,6 +39,7 @@ async def get_custom_holidays(db: AsyncSession = Depends(get_db)):
 
 
 @router.post("/", response_model=CustomHolidayRead)
+@invalidates("sales")
 async def add_custom_holiday(
     holiday: CustomHolidayCreate, db: AsyncSession = Depends(get_db)
 ):
@@ -47,11 +51,15 @@ async def add_custom_holiday(
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
+    # Calendar and weekly forecast holiday features are rebuilt on next use
+    holiday_calendar.invalidate_custom()
+    await clear_holiday_weeks(db)
     # Ensure id is present and integer
     return CustomHolidayRead.from_orm(db_holiday)
 
 
 @router.put("/{holiday_id}", response_model=CustomHolidayRead)
+@invalidates("sales")
 async def update_custom_holiday(
     holiday_id: int, holiday: CustomHolidayCreate, db: AsyncSession = Depends(get_db)
 ):
@@ -71,11 +79,15 @@ async def update_custom_holiday(
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
+    # Calendar and weekly forecast holiday features are rebuilt on next use
+    holiday_calendar.invalidate_custom()
+    await clear_holiday_weeks(db)
 
     return CustomHolidayRead.from_orm(db_holiday)
 
 
 @router.delete("/{holiday_id}")
+@invalidates("sales")
 async def delete_custom_holiday(holiday_id: int, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(CustomHoliday).filter(CustomHoliday.id == holiday_id))
     holiday = result.scalar_one_or_none()
@@ -89,4 +101,7 @@ async def delete_custom_holiday(holiday_id: int, db: AsyncSession = Depends(get_
         await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
+    holiday_calendar.invalidate_custom()
+    await clear_holiday_weeks(db)
+
     return {"ok": True}
@@ -3,24 +3,312 @@ from slowapi.util import get_remote_address
 from slowapi import Limiter
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_, func, text, cast, Date, String
-from app.supabase import get_db
+from app.supabase import get_db, SessionLocal
 from app.models.inventory import Inventory
 from app.models.inventory_today import InventoryToday
 from app.models.inventory_surplus import InventorySurplus
 from app.models.notification_settings import NotificationSettings
 from app.models.inventory_spoilage import InventorySpoilage
+from app.utils.response_cache import cached_response
+from app.utils.inventory_forecaster import inventory_forecaster
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime, timedelta, timezone, date
-import pandas as pd
-from prophet import Prophet
-import matplotlib.pyplot as plt
+import asyncio
+import logging
 
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 limiter = Limiter(key_func=get_remote_address, default_limits=["10/minute"])
 
+
+# Columns shared by inventory, inventory_today and inventory_surplus; matches
+# the keys produced by the models' as_dict() (total_value is computed in SQL).
+INVENTORY_WIDGET_COLUMNS = """
+    item_id, item_name, stock_status, expiration_date, category, batch_date,
+    stock_quantity, unit_cost,
+    COALESCE(stock_quantity, 0) * COALESCE(unit_cost, 0) AS total_value
+"""
+
+
+def _inventory_row_to_dict(row):
+    d = dict(row._mapping)
+    d["unit_cost"] = float(d["unit_cost"]) if d.get("unit_cost") is not None else None
+    d["total_value"] = float(d["total_value"] or 0)
+    return d
+
+
+def format_widget_date(val):
+    if not val:
+        return "N/A"
+    if isinstance(val, str):
+        # Try several common formats
+        for fmt in [
+            "%Y-%m-%d",
+            "%Y-%m-%dT%H:%M:%S.%fZ",
+            "%Y-%m-%d %H:%M:%S%z",
+            "%Y-%m-%d %H:%M:%S",
+            "%Y-%m-%dT%H:%M:%S%z",
+            "%Y-%m-%dT%H:%M:%S",
+        ]:
+            try:
+                return datetime.strptime(val, fmt).strftime("%b %d, %Y")
+            except Exception:
+                continue
+        return "N/A"
+    elif isinstance(val, date):
+        return val.strftime("%b %d, %Y")
+    return "N/A"
+
+
+def map_spoilage_row(d, default_reason):
+    """Shape an InventorySpoilage.as_dict() for the dashboard tables."""
+    stock = d.get("quantity_spoiled")
+    if stock is None:
+        stock = d.get("quantity")
+    if stock is None:
+        stock = d.get("stock")
+    if stock is None:
+        stock = 0
+
+    return {
+        "id": d.get("spoilage_id"),
+        "item_id": d.get("item_id"),
+        "item_name": d.get("item_name") or "N/A",
+        "category": d.get("category") or "N/A",
+        "stock": stock,
+        "batch_date": format_widget_date(d.get("batch_date")),
+        "quantity_spoiled": d.get("quantity_spoiled") or d.get("quantity") or 0,
+        "expiration_date": format_widget_date(d.get("expiration_date")),
+        "spoilage_date": format_widget_date(d.get("spoilage_date")),
+        "reason": d.get("reason") or default_reason,
+        "created_at": d.get("created_at"),
+        "updated_at": d.get("updated_at"),
+    }
+
+
+async def fetch_low_stock(db: AsyncSession, skip: int, limit: int):
+    """
+    Low and Critical items from inventory_today AND master inventory.
+    Sorting (Critical first, then item_name) and pagination run in SQL.
+    """
+    stmt = text(f"""
+        SELECT * FROM (
+            SELECT {INVENTORY_WIDGET_COLUMNS}, 'today' AS source
+            FROM inventory_today
+            WHERE stock_status IN ('Low', 'Critical')
+            UNION ALL
+            SELECT {INVENTORY_WIDGET_COLUMNS}, 'master' AS source
+            FROM inventory
+            WHERE stock_status IN ('Low', 'Critical')
+        ) AS low_stock
+        ORDER BY CASE WHEN stock_status = 'Critical' THEN 0 ELSE 1 END, item_name
+        LIMIT :limit OFFSET :skip
+    """)
+    result = await db.execute(stmt, {"limit": limit, "skip": skip})
+    return [_inventory_row_to_dict(row) for row in result]
+
+
+async def get_expiration_alert_days(db: AsyncSession):
+    try:
+        stmt = select(NotificationSettings.expiration_days).limit(1)
+        result = await db.execute(stmt)
+        days = result.scalar_one_or_none()
+        return int(days) if days is not None else 7
+    except Exception:
+        return 7
+
+
+async def fetch_expiring(db: AsyncSession, skip: int, limit: int):
+    """Items from inventory and inventory_surplus expiring within the alert window."""
+    today = datetime.now(timezone.utc).date()
+    alert_days = await get_expiration_alert_days(db)
+    threshold_date = today + timedelta(days=alert_days)
+    stmt = text(f"""
+        SELECT * FROM (
+            SELECT {INVENTORY_WIDGET_COLUMNS}
+            FROM inventory
+            WHERE CAST(expiration_date AS DATE) > :today
+              AND CAST(expiration_date AS DATE) <= :threshold
+            UNION ALL
+            SELECT {INVENTORY_WIDGET_COLUMNS}
+            FROM inventory_surplus
+            WHERE CAST(expiration_date AS DATE) > :today
+              AND CAST(expiration_date AS DATE) <= :threshold
+        ) AS expiring
+        ORDER BY CAST(expiration_date AS DATE), item_name
+        LIMIT :limit OFFSET :skip
+    """)
+    result = await db.execute(
+        stmt,
+        {"today": today, "threshold": threshold_date, "limit": limit, "skip": skip},
+    )
+    return [_inventory_row_to_dict(row) for row in result]
+
+
+async def fetch_expired(db: AsyncSession, skip: int, limit: int):
+    stmt_spoilage = (
+        select(InventorySpoilage)
+        .where(
+            (cast(InventorySpoilage.reason, String) == "Expired"),
+        )
+        .order_by(cast(InventorySpoilage.expiration_date, Date))
+        .offset(skip)
+        .limit(limit)
+    )
+    result_spoilage = await db.execute(stmt_spoilage)
+
+    all_expired = []
+    seen = set()
+    for spoil in result_spoilage.scalars().all():
+        mapped = map_spoilage_row(spoil.as_dict(), "Expired")
+        dedup_key = (
+            mapped["item_id"],
+            mapped["batch_date"],
+            mapped["spoilage_date"],
+        )
+        if dedup_key in seen:
+            continue
+        seen.add(dedup_key)
+        all_expired.append(mapped)
+    return all_expired
+
+
+async def fetch_surplus(db: AsyncSession, skip: int, limit: int):
+    stmt = select(InventorySurplus).offset(skip).limit(limit)
+    result = await db.execute(stmt)
+    return [item.as_dict() for item in result.scalars().all()]
+
+
+async def fetch_out_of_stock(db: AsyncSession, table: str, skip: int, limit: int):
+    """
+    Items that are completely out of stock (aggregate across all batches).
+
+    Uses multi-batch logic:
+    - Groups by item_name
+    - Only includes items where SUM(stock_quantity) = 0 across ALL batches
+    - Shows all batches for each out-of-stock item
+    """
+    if table == "inventory_today":
+        # Use aggregate logic: only show items where ALL batches are depleted
+        stmt = text("""
+            WITH item_totals AS (
+                SELECT
+                    item_name,
+                    SUM(stock_quantity) as total_stock,
+                    COUNT(*) as batch_count
+                FROM inventory_today
+                GROUP BY item_name
+            )
+            SELECT
+                it.item_id,
+                it.item_name,
+                it.batch_date,
+                it.stock_quantity,
+                it.stock_status,
+                it.expiration_date,
+                it.category,
+                totals.total_stock,
+                totals.batch_count
+            FROM inventory_today it
+            INNER JOIN item_totals totals ON LOWER(it.item_name) = LOWER(totals.item_name)
+            WHERE totals.total_stock = 0
+            ORDER BY it.item_name, it.batch_date
+            LIMIT :limit OFFSET :skip
+        """)
+        result = await db.execute(stmt, {"limit": limit, "skip": skip})
+
+        items = []
+        for row in result:
+            items.append({
+                "item_id": row.item_id,
+                "item_name": row.item_name,
+                "batch_date": row.batch_date.isoformat() if row.batch_date else None,
+                "stock_quantity": float(row.stock_quantity),
+                "stock_status": row.stock_status,
+                "total_stock": float(row.total_stock),
+                "batch_count": row.batch_count,
+                "expiration_date": row.expiration_date.isoformat() if row.expiration_date else None,
+                "category": row.category
+            })
+        return items
+
+    # Original logic for master inventory (no batching in master inventory)
+    stmt = (
+        select(Inventory)
+        .where(Inventory.stock_status == "Out Of Stock")
+        .offset(skip)
+        .limit(limit)
+    )
+    result = await db.execute(stmt)
+    return [item.as_dict() for item in result.scalars().all()]
+
+
+async def fetch_spoilage(db: AsyncSession, skip: int, limit: int):
+    stmt = (
+        select(InventorySpoilage)
+        .order_by(InventorySpoilage.spoilage_date.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    result = await db.execute(stmt)
+    return [map_spoilage_row(spoil.as_dict(), "Spoilage") for spoil in result.scalars().all()]
+
+
+WIDGET_ERROR_MESSAGE = "Failed to load this widget"
+
+
+@limiter.limit("10/minute")
+@router.get("/dashboard/summary")
+@cached_response("dashboard:summary", ttl=30, cache_if=lambda summary: not summary.get("errors"))
+async def get_dashboard_summary(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+):
+    """
+    All dashboard widgets in one request.
+
+    Each widget runs on its own pooled session so the queries execute
+    concurrently; every list is bounded by skip/limit in SQL. A widget whose
+    query fails is returned as null and listed under "errors" (details are
+    only logged); the other widgets are still returned, and the partial
+    summary is not cached. Only when every widget fails is this a 500.
+    """
+
+    async def run_widget(fetch, *args):
+        async with SessionLocal() as session:
+            return await fetch(session, *args)
+
+    widgets = {
+        "low_stock": run_widget(fetch_low_stock, skip, limit),
+        "expiring": run_widget(fetch_expiring, skip, limit),
+        "expired": run_widget(fetch_expired, skip, limit),
+        "surplus": run_widget(fetch_surplus, skip, limit),
+        "out_of_stock": run_widget(fetch_out_of_stock, "inventory_today", skip, limit),
+        "spoilage": run_widget(fetch_spoilage, skip, limit),
+    }
+    results = await asyncio.gather(*widgets.values(), return_exceptions=True)
+
+    summary, errors = {}, {}
+    for name, result in zip(widgets, results):
+        if isinstance(result, Exception):
+            logger.exception("Dashboard widget %s failed", name, exc_info=result)
+            summary[name], errors[name] = None, WIDGET_ERROR_MESSAGE
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            summary[name] = result
+    if len(errors) == len(widgets):
+        raise HTTPException(status_code=500, detail="Failed to load the dashboard")
+    summary["errors"] = errors
+    return summary
+
+
 @limiter.limit("10/minute")
 @router.get("/dashboard/low-stock")
+@cached_response("dashboard:low-stock", ttl=30)
 async def get_low_stock_inventory(
     request: Request,
     db: AsyncSession = Depends(get_db),
@@ -32,67 +320,15 @@ async def get_low_stock_inventory(
     Returns items with status "Low" or "Critical" from both tables.
     """
     try:
-        # Query inventory_today for Low and Critical items
-        stmt_today = (
-            select(InventoryToday)
-            .where(or_(
-                InventoryToday.stock_status == "Low",
-                InventoryToday.stock_status == "Critical"
-            ))
-        )
-        result_today = await db.execute(stmt_today)
-        items_today = result_today.scalars().all()
-
-        # Query master inventory for Low and Critical items
-        stmt_master = (
-            select(Inventory)
-            .where(or_(
-                Inventory.stock_status == "Low",
-                Inventory.stock_status == "Critical"
-            ))
-        )
-        result_master = await db.execute(stmt_master)
-        items_master = result_master.scalars().all()
-
-        # Combine results from both tables
-        all_items = []
-
-        # Add items from inventory_today with source indicator
-        for item in items_today:
-            item_dict = item.as_dict()
-            item_dict['source'] = 'today'
-            all_items.append(item_dict)
-
-        # Add items from master inventory with source indicator
-        for item in items_master:
-            item_dict = item.as_dict()
-            item_dict['source'] = 'master'
-            all_items.append(item_dict)
-
-        # Sort by stock_status (Critical first, then Low) and item_name
-        all_items.sort(key=lambda x: (0 if x.get('stock_status') == 'Critical' else 1, x.get('item_name', '')))
-
-        # Apply pagination to combined results
-        paginated_items = all_items[skip:skip + limit]
-
-        return paginated_items
+        return await fetch_low_stock(db, skip, limit)
     except Exception as e:
         print("Error fetching low stock inventory:", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-async def get_expiration_alert_days(db: AsyncSession):
-    try:
-        stmt = select(NotificationSettings.expiration_days).limit(1)
-        result = await db.execute(stmt)
-        days = result.scalar_one_or_none()
-        return int(days) if days is not None else 7
-    except Exception:
-        return 7
-
-
 @limiter.limit("10/minute")
 @router.get("/dashboard/expiring-ingredients")
+@cached_response("dashboard:expiring", ttl=30)
 async def get_expiring_ingredients(
     request: Request,
     db: AsyncSession = Depends(get_db),
@@ -100,173 +336,35 @@ async def get_expiring_ingredients(
     limit: int = Query(50, ge=1, le=200),
 ):
     try:
-        today = datetime.now(timezone.utc).date()
-        alert_days = await get_expiration_alert_days(db)
-        threshold_date = today + timedelta(days=alert_days)
-        print(f"[DEBUG] Today: {today}, Threshold Date: {threshold_date}")
-        stmt_inventory = (
-            select(Inventory)
-            .where(
-                and_(
-                    cast(Inventory.expiration_date, Date) > today,
-                    cast(Inventory.expiration_date, Date) <= threshold_date,
-                )
-            )
-            .order_by(cast(Inventory.expiration_date, Date))
-            .offset(skip)
-            .limit(limit)
-        )
-
-        stmt_surplus = (
-            select(InventorySurplus)
-            .where(
-                and_(
-                    cast(InventorySurplus.expiration_date, Date) > today,
-                    cast(InventorySurplus.expiration_date, Date) <= threshold_date,
-                )
-            )
-            .order_by(cast(InventorySurplus.expiration_date, Date))
-            .offset(skip)
-            .limit(limit)
-        )
-        result_inventory = await db.execute(stmt_inventory)
-        result_surplus = await db.execute(stmt_surplus)
-        expiring_inventory = result_inventory.scalars().all()
-        expiring_surplus = result_surplus.scalars().all()
-        print(
-            f"[DEBUG] Expiring Inventory Items: {[str(item.expiration_date) for item in expiring_inventory]}"
-        )
-        print(
-            f"[DEBUG] Expiring Surplus Items: {[str(item.expiration_date) for item in expiring_surplus]}"
-        )
-        all_expiring = [
-            item.as_dict() for item in expiring_inventory + expiring_surplus
-        ]
-        all_expiring.sort(key=lambda x: x.get("expiration_date", ""))
-        print(
-            f"[DEBUG] All Expiring Returned: {[x.get('expiration_date', '') for x in all_expiring]}"
-        )
-        return all_expiring
+        return await fetch_expiring(db, skip, limit)
     except Exception as e:
         print("Error fetching expiring ingredients:", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/dashboard/expired-ingredients")
+@cached_response("dashboard:expired", ttl=30)
 async def get_expired_ingredients(
     db: AsyncSession = Depends(get_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
 ):
     try:
-        today = datetime.now(timezone.utc).date()
-        stmt_spoilage = (
-            select(InventorySpoilage)
-            .where(
-                (cast(InventorySpoilage.reason, String) == "Expired"),
-            )
-            .order_by(cast(InventorySpoilage.expiration_date, Date))
-            .offset(skip)
-            .limit(limit)
-        )
-
-        result_spoilage = await db.execute(stmt_spoilage)
-        expired_spoilage = result_spoilage.scalars().all()
-
-        all_expired = []
-        seen = set()
-
-        for spoil in expired_spoilage:
-            d = spoil.as_dict()
-            # Use spoilage fields exactly as in the database, but provide fallback values
-            item_name = d.get("item_name") or "N/A"
-            category = d.get("category") or "N/A"
-            batch_date = d.get("batch_date")
-            stock = d.get("quantity_spoiled")
-            if stock is None:
-                stock = d.get("quantity")
-            if stock is None:
-                stock = d.get("stock")
-            if stock is None:
-                stock = 0
-
-            def format_date(val):
-                if not val:
-                    return "N/A"
-                if isinstance(val, str):
-                    # Try several common formats
-                    for fmt in [
-                        "%Y-%m-%d",
-                        "%Y-%m-%dT%H:%M:%S.%fZ",
-                        "%Y-%m-%d %H:%M:%S%z",
-                        "%Y-%m-%d %H:%M:%S",
-                        "%Y-%m-%dT%H:%M:%S%z",
-                        "%Y-%m-%dT%H:%M:%S",
-                    ]:
-                        try:
-                            return datetime.strptime(val, fmt).strftime("%b %d, %Y")
-                        except Exception:
-                            continue
-                    return "N/A"
-                elif isinstance(val, date):
-                    return val.strftime("%b %d, %Y")
-                return "N/A"
-
-            batch_date_formatted = format_date(batch_date)
-            expiration_date = d.get("expiration_date")
-            expiration_date_formatted = format_date(expiration_date)
-            spoilage_date = d.get("spoilage_date")
-            spoilage_date_formatted = format_date(spoilage_date)
-
-            mapped = {
-                "id": d.get("spoilage_id"),
-                "item_id": d.get("item_id"),
-                "item_name": item_name,
-                "category": category,
-                "stock": stock,
-                "batch_date": batch_date_formatted,
-                "quantity_spoiled": d.get("quantity_spoiled") or d.get("quantity") or 0,
-                "expiration_date": expiration_date_formatted,
-                "spoilage_date": spoilage_date_formatted,
-                "reason": d.get("reason") or "Expired",
-                "created_at": d.get("created_at"),
-                "updated_at": d.get("updated_at"),
-            }
-            dedup_key = (
-                mapped["item_id"],
-                mapped["batch_date"],
-                mapped["spoilage_date"],
-            )
-            if dedup_key in seen:
-                continue
-            seen.add(dedup_key)
-            all_expired.append(mapped)
-
-        all_expired.sort(
-            key=lambda x: (
-                x["expiration_date"]
-                if isinstance(x["expiration_date"], date)
-                and x["expiration_date"] is not None
-                else datetime.min.date()
-            )
-        )
-        return all_expired
+        return await fetch_expired(db, skip, limit)
     except Exception as e:
         print("Error fetching expired ingredients:", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/dashboard/surplus-ingredients")
+@cached_response("dashboard:surplus", ttl=30)
 async def get_surplus_ingredients(
     db: AsyncSession = Depends(get_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
 ):
     try:
-        stmt = select(InventorySurplus).offset(skip).limit(limit)
-        result = await db.execute(stmt)
-        items = result.scalars().all()
-        return [item.as_dict() for item in items]
+        return await fetch_surplus(db, skip, limit)
     except Exception as e:
         print("Error fetching surplus ingredients:", e)
         raise HTTPException(status_code=500, detail=str(e))
@@ -274,6 +372,7 @@ async def get_surplus_ingredients(
 
 @limiter.limit("10/minute")
 @router.get("/dashboard/out-of-stock")
+@cached_response("dashboard:out-of-stock", ttl=30)
 async def get_out_of_stock_inventory(
     request: Request,
     db: AsyncSession = Depends(get_db),
@@ -284,71 +383,13 @@ async def get_out_of_stock_inventory(
     """
     Get items that are completely out of stock (aggregate across all batches).
 
-    Uses multi-batch logic:
-    - Groups by item_name
-    - Only includes items where SUM(stock_quantity) = 0 across ALL batches
-    - Shows all batches for each out-of-stock item
-
     Args:
         table: Which inventory table to query ("inventory_today" or "inventory")
         skip: Number of records to skip (pagination)
         limit: Maximum number of records to return
     """
     try:
-        if table == "inventory_today":
-            # Use aggregate logic: only show items where ALL batches are depleted
-            stmt = text("""
-                WITH item_totals AS (
-                    SELECT
-                        item_name,
-                        SUM(stock_quantity) as total_stock,
-                        COUNT(*) as batch_count
-                    FROM inventory_today
-                    GROUP BY item_name
-                )
-                SELECT
-                    it.item_id,
-                    it.item_name,
-                    it.batch_date,
-                    it.stock_quantity,
-                    it.stock_status,
-                    it.expiration_date,
-                    it.category,
-                    totals.total_stock,
-                    totals.batch_count
-                FROM inventory_today it
-                INNER JOIN item_totals totals ON LOWER(it.item_name) = LOWER(totals.item_name)
-                WHERE totals.total_stock = 0
-                ORDER BY it.item_name, it.batch_date
-                LIMIT :limit OFFSET :skip
-            """)
-            result = await db.execute(stmt, {"limit": limit, "skip": skip})
-
-            items = []
-            for row in result:
-                items.append({
-                    "item_id": row.item_id,
-                    "item_name": row.item_name,
-                    "batch_date": row.batch_date.isoformat() if row.batch_date else None,
-                    "stock_quantity": float(row.stock_quantity),
-                    "stock_status": row.stock_status,
-                    "total_stock": float(row.total_stock),
-                    "batch_count": row.batch_count,
-                    "expiration_date": row.expiration_date.isoformat() if row.expiration_date else None,
-                    "category": row.category
-                })
-            return items
-        else:
-            # Original logic for master inventory (no batching in master inventory)
-            stmt = (
-                select(Inventory)
-                .where(Inventory.stock_status == "Out Of Stock")
-                .offset(skip)
-                .limit(limit)
-            )
-            result = await db.execute(stmt)
-            items = result.scalars().all()
-            return [item.as_dict() for item in items]
+        return await fetch_out_of_stock(db, table, skip, limit)
     except Exception as e:
         print("Error fetching out of stock inventory:", e)
         raise HTTPException(status_code=500, detail=str(e))
@@ -356,6 +397,7 @@ async def get_out_of_stock_inventory(
 
 @limiter.limit("10/minute")
 @router.get("/dashboard/spoilage")
+@cached_response("dashboard:spoilage", ttl=30)
 async def get_spoilage_inventory(
     request: Request,
     db: AsyncSession = Depends(get_db),
@@ -363,73 +405,7 @@ async def get_spoilage_inventory(
     limit: int = Query(50, ge=1, le=200),
 ):
     try:
-        stmt = (
-            select(InventorySpoilage)
-            .order_by(InventorySpoilage.spoilage_date.desc())
-            .offset(skip)
-            .limit(limit)
-        )
-        result = await db.execute(stmt)
-        items = result.scalars().all()
-
-        def format_date(val):
-            if not val:
-                return "N/A"
-            if isinstance(val, str):
-                for fmt in [
-                    "%Y-%m-%d",
-                    "%Y-%m-%dT%H:%M:%S.%fZ",
-                    "%Y-%m-%d %H:%M:%S%z",
-                    "%Y-%m-%d %H:%M:%S",
-                    "%Y-%m-%dT%H:%M:%S%z",
-                    "%Y-%m-%dT%H:%M:%S",
-                ]:
-                    try:
-                        return datetime.strptime(val, fmt).strftime("%b %d, %Y")
-                    except Exception:
-                        continue
-                return "N/A"
-            elif isinstance(val, date):
-                return val.strftime("%b %d, %Y")
-            return "N/A"
-
-        formatted_items = []
-        for spoil in items:
-            d = spoil.as_dict()
-            item_name = d.get("item_name") or "N/A"
-            category = d.get("category") or "N/A"
-            batch_date = d.get("batch_date")
-            stock = d.get("quantity_spoiled")
-            if stock is None:
-                stock = d.get("quantity")
-            if stock is None:
-                stock = d.get("stock")
-            if stock is None:
-                stock = 0
-
-            batch_date_formatted = format_date(batch_date)
-            expiration_date = d.get("expiration_date")
-            expiration_date_formatted = format_date(expiration_date)
-            spoilage_date = d.get("spoilage_date")
-            spoilage_date_formatted = format_date(spoilage_date)
-
-            mapped = {
-                "id": d.get("spoilage_id"),
-                "item_id": d.get("item_id"),
-                "item_name": item_name,
-                "category": category,
-                "stock": stock,
-                "batch_date": batch_date_formatted,
-                "quantity_spoiled": d.get("quantity_spoiled") or d.get("quantity") or 0,
-                "expiration_date": expiration_date_formatted,
-                "spoilage_date": spoilage_date_formatted,
-                "reason": d.get("reason") or "Spoilage",
-                "created_at": d.get("created_at"),
-                "updated_at": d.get("updated_at"),
-            }
-            formatted_items.append(mapped)
-
-        return formatted_items
+        return await fetch_spoilage(db, skip, limit)
     except Exception as e:
         print("Error fetching spoilage inventory:", e)
         raise HTTPException(status_code=500, detail=str(e))
@@ -438,34 +414,33 @@ async def get_spoilage_inventory(
 @router.get("/inventory-forecast")
 async def inventory_forecast(
     item_id: int = Query(..., description="Item ID to forecast"),
-    periods: int = Query(30, description="Days to forecast"),
+    periods: int = Query(30, ge=1, le=365, description="Days to forecast"),
     db: AsyncSession = Depends(get_db),
 ):
-
-    print(f"[Inventory Forecast] Received item_id: {item_id}")
-    query = text(
-        "SELECT action_date, remaining_stock FROM inventory_log WHERE item_id = :item_id ORDER BY action_date"
+    # Cheap fingerprint of the item's log; a new row means the cached model is stale
+    result = await db.execute(
+        text(
+            "SELECT COUNT(*), COALESCE(MAX(log_id), 0) FROM inventory_log WHERE item_id = :item_id"
+        ),
+        {"item_id": item_id},
     )
-    result = await db.execute(query, {"item_id": item_id})
-    rows = result.fetchall()
-    print(f"[Inventory Forecast] Rows found for item_id {item_id}: {len(rows)}")
-    if not rows:
+    row_count, last_log_id = result.one()
+    if not row_count:
         raise HTTPException(status_code=404, detail="No data for this item_id")
-    df = pd.DataFrame(rows, columns=["action_date", "remaining_stock"])
-
-    df["ds"] = pd.to_datetime(df["action_date"]).dt.tz_localize(None)
-    df = df.sort_values("ds")
-    df["y"] = df["remaining_stock"]
-    # 3. Train Prophet model
-    model = Prophet()
-    model.fit(df[["ds", "y"]])
-
-    future = model.make_future_dataframe(periods=periods)
-    forecast = model.predict(future)
-
-    forecast_json = (
-        forecast[["ds", "yhat", "yhat_lower", "yhat_upper"]]
-        .tail(periods)
-        .to_dict(orient="records")
-    )
+    fingerprint = (int(row_count), int(last_log_id))
+
+    model = inventory_forecaster.cached_model(item_id, fingerprint)
+    if model is None:
+        result = await db.execute(
+            text(
+                "SELECT action_date, remaining_stock FROM inventory_log WHERE item_id = :item_id ORDER BY action_date"
+            ),
+            {"item_id": item_id},
+        )
+        rows = result.fetchall()
+        model = await run_in_threadpool(inventory_forecaster.fit, item_id, fingerprint, rows)
+        if model is None:
+            raise HTTPException(status_code=404, detail="No data for this item_id")
+
+    forecast_json = await run_in_threadpool(model.predict, periods)
     return {"item_id": item_id, "forecast": forecast_json}
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Query
 from datetime import date
-import holidays
+from app.utils.holiday_calendar import holiday_calendar
 from typing import List
 
 router = APIRouter(tags=["holidays"])
@@ -11,8 +11,4 @@ def get_philippines_holidays(year: int = Query(None, description="Year for holid
     """Return official Philippine holidays for a given year (default: current year)"""
     if not year:
         year = date.today().year
-    ph_holidays = holidays.country_holidays("PH", years=[year])
-    return [
-        {"date": str(day), "name": name, "type": "official"}
-        for day, name in ph_holidays.items()
-    ]
+    return holiday_calendar.official_list(year)
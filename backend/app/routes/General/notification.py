@@ -13,7 +13,11 @@ import os
 from app.supabase import postgrest_client
 from app.routes.Reports.UserActivity.userActivity import UserActivityLog
 from app.utils.rbac import require_role
+from app.utils.app_logging import log_payload
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -49,22 +53,18 @@ async def get_notification_settings(request: Request, user_id: int, db=Depends(g
     try:
         from app.models.notification_settings import NotificationSettings as NotificationSettingsModel
         from sqlalchemy import text
-        print(f"[DEBUG /notification-settings GET] user_id: {user_id}")
         result = await db.execute(
             text("SELECT * FROM notification_settings WHERE user_id = :user_id"), {"user_id": user_id}
         )
         row = result.fetchone()
-        print(f"[DEBUG /notification-settings GET] fetched row: {row}")
         if row:
             # Convert SQLAlchemy row to dict
             return dict(row._mapping) if hasattr(row, "_mapping") else dict(row)
         # Return defaults if not set
-        print(f"[DEBUG /notification-settings GET] returning defaults for user_id: {user_id}")
+        logger.debug("No notification settings for user %s, returning defaults", user_id)
         return NotificationSettings(user_id=user_id).dict()
-    except Exception as e:
-        import traceback
-        print("[ERROR /notification-settings GET]", str(e))
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Error fetching notification settings for user %s", user_id)
         raise HTTPException(status_code=500, detail="Failed to fetch notification settings.")
 
 
@@ -139,27 +139,22 @@ async def update_notification_settings(
             db.add(new_activity)
             await db.flush()
             await db.commit()
-            print("Notification settings update activity logged successfully.")
+            logger.debug("Notification settings update activity logged")
         except Exception as e:
-            print("Failed to record notification settings update activity:", e)
+            logger.warning("Failed to record notification settings update activity: %s", e)
 
         return {"status": "success"}
-    except Exception as e:
-        import traceback
-        print("[ERROR /notification-settings POST]", str(e))
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Error updating notification settings")
         raise HTTPException(status_code=500, detail="Failed to update notification settings.")
 
 
 def create_notification(user_id, type, message, details=None):
-    print(
-        f"create_notification called for user_id={user_id}, type={type}, message={message}"
-    )
+    fields = {"user_id": user_id, "type": type}
     try:
         now = datetime.utcnow().isoformat()
         today = now[:10]
 
-        print(f"[DEBUG] Checking for existing notifications for today: {today}")
         existing = (
             postgrest_client.table("notification")
             .select("id")
@@ -170,11 +165,10 @@ def create_notification(user_id, type, message, details=None):
             .lte("created_at", f"{today}T23:59:59.999999")
             .execute()
         )
-        print(f"[DEBUG] Existing notifications query result: {existing}")
-        print(f"[DEBUG] Existing notifications data: {existing.data}")
+        log_payload(logger, "Existing notifications", existing.data)
 
         if existing.data and len(existing.data) > 0:
-            print("Duplicate notification detected, not inserting.")
+            logger.debug("Duplicate notification skipped", extra={"fields": fields})
             return
 
         payload = {
@@ -187,22 +181,21 @@ def create_notification(user_id, type, message, details=None):
         if details is not None:
             payload["details"] = details
 
-        print(f"[DEBUG] Inserting notification with payload: {payload}")
+        log_payload(logger, "Notification payload", payload)
         # Insert (postgrest-py doesn't support .select() after .insert() in sync mode)
         result = postgrest_client.table("notification").insert(payload).execute()
-        print(f"[DEBUG] Insert result: {result}")
-        print(f"[DEBUG] Insert result data: {result.data}")
 
         if result.data and len(result.data) > 0 and "id" in result.data[0]:
-            print(f"[SUCCESS] Notification created successfully with id: {result.data[0]['id']}")
+            logger.info(
+                "Notification created",
+                extra={"fields": {**fields, "id": result.data[0]["id"]}},
+            )
         else:
-            print(f"[WARNING] Notification insert returned unexpected result: {result}")
+            logger.warning("Notification insert returned no id", extra={"fields": fields})
+            log_payload(logger, "Notification insert result", result.data)
 
-    except Exception as e:
-        import traceback
-        print(f"[ERROR] Error creating notification: {e}")
-        print(f"[ERROR] Traceback:")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Error creating notification", extra={"fields": fields})
         # Re-raise the exception so we can see it in the logs
         raise
 
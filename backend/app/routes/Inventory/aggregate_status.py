@@ -13,6 +13,7 @@ from typing import Literal
 import logging
 
 from app.supabase import get_db
+from app.utils.response_cache import invalidates, INVENTORY_CACHE_GROUPS
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -300,6 +301,7 @@ async def get_archived_inventory(
 
 
 @router.post("/inventory/recalculate-aggregate-status")
+@invalidates(*INVENTORY_CACHE_GROUPS)
 async def recalculate_all_aggregate_statuses(
     table: InventoryTable = Query("inventory_today", description="Which inventory table to recalculate"),
     db: AsyncSession = Depends(get_db)
@@ -8,6 +8,7 @@ from app.supabase import postgrest_client, get_db
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from app.routes.Inventory.master_inventory import CategoryEnum
+from app.utils.response_cache import invalidates, INVENTORY_CACHE_GROUPS
 
 router = APIRouter()
 limiter = Limiter(key_func=get_remote_address, default_limits=["10/minute"])
@@ -106,6 +107,7 @@ def get_inventory_settings(request: Request):
     response_model=InventorySettingOut,
     status_code=status.HTTP_201_CREATED,
 )
+@invalidates(*INVENTORY_CACHE_GROUPS)
 async def create_inventory_setting(
     request: Request,
     setting: InventorySettingCreate,
@@ -147,6 +149,7 @@ async def create_inventory_setting(
 
 
 @router.put("/inventory-settings/{setting_id}", response_model=InventorySettingOut)
+@invalidates(*INVENTORY_CACHE_GROUPS)
 async def update_inventory_setting(
     request: Request,
     setting_id: int,
@@ -190,6 +193,7 @@ async def update_inventory_setting(
 
 
 @router.delete("/inventory-settings/{setting_id}")
+@invalidates(*INVENTORY_CACHE_GROUPS)
 async def delete_inventory_setting(
     request: Request,
     setting_id: int,
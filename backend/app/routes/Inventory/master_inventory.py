@@ -12,6 +12,7 @@ from app.utils.rbac import require_role
 from typing import Optional, List
 from app.routes.Menu.menu import recalculate_stock_status
 from app.routes.General.notification import create_notification  # Import notification function
+from app.utils.response_cache import invalidates, INVENTORY_CACHE_GROUPS
 import asyncio
 import time
 import logging
@@ -469,6 +470,7 @@ async def get_inventory_item(request: Request, item_id: int):
 
 @limiter.limit("10/minute")
 @router.post("/inventory")
+@invalidates(*INVENTORY_CACHE_GROUPS)
 async def add_inventory_item(
     request: Request,
     item: InventoryItemCreate,
@@ -560,6 +562,7 @@ async def add_inventory_item(
 
 @limiter.limit("10/minute")
 @router.put("/inventory/{item_id}")
+@invalidates(*INVENTORY_CACHE_GROUPS)
 async def update_inventory_item(
     request: Request,
     item_id: int,
@@ -639,6 +642,7 @@ async def update_inventory_item(
 
 @limiter.limit("10/minute")
 @router.delete("/inventory/{item_id}")
+@invalidates(*INVENTORY_CACHE_GROUPS)
 async def delete_inventory_item(
     request: Request,
     item_id: int,
@@ -685,6 +689,7 @@ async def delete_inventory_item(
 
 @limiter.limit("10/minute")
 @router.post("/inventory/{item_id}/transfer-to-today")
+@invalidates(*INVENTORY_CACHE_GROUPS)
 async def transfer_to_today_inventory(
     request: Request,
     item_id: int,
@@ -843,6 +848,7 @@ async def transfer_to_today_inventory(
 
 @limiter.limit("10/minute")
 @router.post("/inventory-today/transfer")
+@invalidates(*INVENTORY_CACHE_GROUPS)
 async def transfer_to_today_inventory_v2(
     request: Request,
     req: TransferRequest,
@@ -1007,6 +1013,7 @@ async def transfer_to_today_inventory_v2(
 
 
 @router.post("/inventory/fifo-transfer-to-today")
+@invalidates(*INVENTORY_CACHE_GROUPS)
 async def fifo_transfer_to_today(
     request: Request,
     req: FIFOTransferRequest,
@@ -19,6 +19,7 @@ from app.routes.Inventory.master_inventory import (
 )
 from app.routes.Inventory.master_inventory import repeat_every
 from app.routes.General.notification import create_notification  # Import notification function
+from app.utils.response_cache import invalidates, INVENTORY_CACHE_GROUPS
 
 router = APIRouter()
 
@@ -211,6 +212,7 @@ async def get_spoilage_item(
 
 @limiter.limit("10/minute")
 @router.post("/inventory/{item_id}/{batch_date}/transfer-to-spoilage")
+@invalidates(*INVENTORY_CACHE_GROUPS)
 async def transfer_to_spoilage(
 	request: Request,
 	item_id: int,
@@ -336,6 +338,7 @@ async def transfer_to_spoilage(
 # Transfer from Today Inventory
 @limiter.limit("10/minute")
 @router.post("/inventory-today/{item_id}/{batch_date}/transfer-to-spoilage")
+@invalidates(*INVENTORY_CACHE_GROUPS)
 async def transfer_today_to_spoilage(
 	request: Request,
 	item_id: int,
@@ -453,6 +456,7 @@ async def transfer_today_to_spoilage(
 # Transfer from Surplus Inventory
 @limiter.limit("10/minute")
 @router.post("/inventory-surplus/{item_id}/{batch_date}/transfer-to-spoilage")
+@invalidates(*INVENTORY_CACHE_GROUPS)
 async def transfer_surplus_to_spoilage(
 	request: Request,
 	item_id: int,
@@ -569,6 +573,7 @@ async def transfer_surplus_to_spoilage(
 
 @limiter.limit("10/minute")
 @router.delete("/inventory-spoilage/{spoilage_id}")
+@invalidates(*INVENTORY_CACHE_GROUPS)
 async def delete_spoilage_item(
 	request: Request,
 	spoilage_id: int,
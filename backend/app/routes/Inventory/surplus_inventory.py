@@ -19,6 +19,7 @@ from app.routes.Inventory.master_inventory import (
     CategoryEnum,
     StockStatusEnum,
 )
+from app.utils.response_cache import invalidates, INVENTORY_CACHE_GROUPS
 
 router = APIRouter()
 
@@ -134,6 +135,7 @@ async def get_surplus_item(request: Request, item_id: int, batch_date: str):
 
 
 @router.delete("/inventory-surplus/{item_id}/{batch_date}")
+@invalidates(*INVENTORY_CACHE_GROUPS)
 async def delete_surplus_item(
     request: Request,
     item_id: int,
@@ -181,6 +183,7 @@ async def delete_surplus_item(
 
 @limiter.limit("10/minute")
 @router.post("/inventory-surplus")
+@invalidates(*INVENTORY_CACHE_GROUPS)
 async def add_surplus_item(
     request: Request,
     item: SurplusItemCreate,
@@ -240,6 +243,7 @@ async def add_surplus_item(
 
 @limiter.limit("10/minute")
 @router.put("/inventory-surplus/{item_id}/{batch_date}")
+@invalidates(*INVENTORY_CACHE_GROUPS)
 async def update_surplus_item(
     request: Request,
     item_id: int,
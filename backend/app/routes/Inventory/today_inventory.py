@@ -15,6 +15,7 @@ from app.routes.Inventory.master_inventory import (
     CategoryEnum,
     StockStatusEnum,
 )
+from app.utils.response_cache import invalidates, INVENTORY_CACHE_GROUPS
 import functools
 import asyncio
 
@@ -135,6 +136,7 @@ async def get_inventory_today_item(request: Request, item_id: int, batch_date: s
 
 @limiter.limit("10/minute")
 @router.delete("/inventory-today/{item_id}/{batch_date}")
+@invalidates(*INVENTORY_CACHE_GROUPS)
 async def delete_inventory_today_item(
     request: Request,
     item_id: int,
@@ -174,6 +176,7 @@ async def delete_inventory_today_item(
 
 @limiter.limit("10/minute")
 @router.put("/inventory-today/{item_id}/{batch_date}")
+@invalidates(*INVENTORY_CACHE_GROUPS)
 async def update_inventory_today_item(
     request: Request,
     item_id: int,
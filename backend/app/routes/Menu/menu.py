@@ -25,18 +25,95 @@ limiter = Limiter(key_func=get_remote_address, default_limits=["10/minute"])
     BackgroundTasks,
 )
 from typing import Optional
-from app.supabase import postgrest_client, supabase, get_db
+from app.supabase import postgrest_client, get_db
 from starlette.concurrency import run_in_threadpool
-import uuid
 from datetime import datetime
 from app.routes.Reports.UserActivity.userActivity import UserActivityLog
 from app.utils.rbac import require_role
+from app.utils.image_pipeline import upload_menu_image
+from app.utils.menu_resolver import normalize_item_key, backfill_sales_menu_ids, relink_sales_menu_ids
+from app.utils.response_cache import invalidates, SALES_CACHE_GROUPS
+from sqlalchemy import text
 import logging
 import math
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
+async def get_available_stock_map(db, ingredient_names):
+    """
+    Aggregate non-expired stock for the given ingredients across inventory,
+    inventory_surplus and inventory_today in ONE query.
+
+    Returns {ingredient_name_lower: available_stock}. This is the single
+    availability rule used by GET /menu and the stock recalculations. Each branch filters on
+    (LOWER(item_name), expiration_date), so the idx_*_item_exp indexes are used.
+    """
+    names = sorted({name.lower() for name in ingredient_names if name})
+    if not names:
+        return {}
+
+    result = await db.execute(
+        text(
+            """
+            SELECT name, SUM(stock_quantity) AS available_stock
+            FROM (
+                SELECT LOWER(item_name) AS name, stock_quantity
+                FROM inventory
+                WHERE LOWER(item_name) = ANY(:names)
+                  AND (expiration_date IS NULL OR CAST(expiration_date AS DATE) >= :today)
+                  AND stock_quantity > 0
+                UNION ALL
+                SELECT LOWER(item_name) AS name, stock_quantity
+                FROM inventory_surplus
+                WHERE LOWER(item_name) = ANY(:names)
+                  AND (expiration_date IS NULL OR CAST(expiration_date AS DATE) >= :today)
+                  AND stock_quantity > 0
+                UNION ALL
+                SELECT LOWER(item_name) AS name, stock_quantity
+                FROM inventory_today
+                WHERE LOWER(item_name) = ANY(:names)
+                  AND (expiration_date IS NULL OR CAST(expiration_date AS DATE) >= :today)
+                  AND stock_quantity > 0
+            ) AS available
+            GROUP BY name
+            """
+        ),
+        {"names": names, "today": datetime.now().date()},
+    )
+    return {row.name: float(row.available_stock or 0) for row in result}
+
+
+async def relink_menu_sales(db, menu_row, unlink=True):
+    """
+    Re-resolve sales rows after a menu item is created or edited: rows linked
+    through its old name/itemcode and unmatched rows with its new ones. A
+    failure is logged, never fails the menu write.
+    """
+    try:
+        await relink_sales_menu_ids(
+            db,
+            menu_row.get("menu_id"),
+            item_keys=[normalize_item_key(menu_row.get("dish_name"))],
+            itemcodes=[menu_row.get("itemcode")],
+            unlink=unlink,
+        )
+    except Exception as e:
+        await db.rollback()
+        logger.warning("Could not re-resolve sales rows for menu %s: %s", menu_row.get("menu_id"), e)
+
+
+def is_menu_in_stock(ingredients_list, stock_map):
+    """A dish is available only if every ingredient has non-expired stock."""
+    for ing in ingredients_list:
+        ing_name = (ing.get("name") or ing.get("ingredient_name") or "").lower()
+        if stock_map.get(ing_name, 0) <= 0:
+            return False
+    return True
+
+
 # Rate limited trigger endpoint for recalculation
 @limiter.limit("5/minute")
 @router.post("/menu/recalc")
@@ -75,6 +152,7 @@ class MenuItem:
 # Endpoint: create menu (with image) and its ingredients in one request
 @limiter.limit("10/minute")
 @router.post("/menu/create-with-image-and-ingredients")
+@invalidates(*SALES_CACHE_GROUPS)
 async def create_menu_with_ingredients(
     request: Request,
     itemcode: str = Form(...),
@@ -89,21 +167,7 @@ async def create_menu_with_ingredients(
     db=Depends(get_db),
 ):
     try:
-        ext = file.filename.split(".")[-1]
-        filename = f"menu/{uuid.uuid4()}.{ext}"
-        content = await file.read()
-        res = supabase.storage.from_("menu-images").upload(filename, content)
-        if hasattr(res, "error") and res.error:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Image upload failed: {getattr(res.error, 'message', res.error)}",
-            )
-        if hasattr(res, "data") and not res.data:
-            raise HTTPException(
-                status_code=400,
-                detail="Image upload failed: No data returned from upload.",
-            )
-        public_url = supabase.storage.from_("menu-images").get_public_url(filename)
+        images = await upload_menu_image(file)
 
         try:
             ingredients_list = json.loads(ingredients)
@@ -112,80 +176,12 @@ async def create_menu_with_ingredients(
                 status_code=400, detail=f"Invalid ingredients format: {str(e)}"
             )
 
-        # --- Stock status logic ---
-        all_in_stock = True
-        for ing in ingredients_list:
-            ing_name = ing.get("name") or ing.get("ingredient_name")
-            stock = 0
-            expired = False
-
-            # Check inventory
-            inv = (
-                postgrest_client.table("inventory")
-                .select("stock_quantity,expiration_date")
-                .ilike("item_name", ing_name)
-                .limit(1)
-                .execute()
-            )
-            if inv.data and len(inv.data) > 0:
-                stock += inv.data[0].get("stock_quantity", 0) or 0
-                expiry = inv.data[0].get("expiration_date")
-                if expiry:
-                    try:
-                        if (
-                            datetime.strptime(expiry, "%Y-%m-%d").date()
-                            < datetime.now().date()
-                        ):
-                            expired = True
-                    except Exception:
-                        pass
-
-            # Check inventory_surplus
-            surplus = (
-                postgrest_client.table("inventory_surplus")
-                .select("stock_quantity,expiration_date")
-                .ilike("item_name", ing_name)
-                .limit(1)
-                .execute()
-            )
-            if surplus.data and len(surplus.data) > 0:
-                stock += surplus.data[0].get("stock_quantity", 0) or 0
-                expiry = surplus.data[0].get("expiration_date")
-                if expiry:
-                    try:
-                        if (
-                            datetime.strptime(expiry, "%Y-%m-%d").date()
-                            < datetime.now().date()
-                        ):
-                            expired = True
-                    except Exception:
-                        pass
-
-            # Check inventory_today
-            today = (
-                postgrest_client.table("inventory_today")
-                .select("stock_quantity,expiration_date")
-                .ilike("item_name", ing_name)
-                .limit(1)
-                .execute()
-            )
-            if today.data and len(today.data) > 0:
-                stock += today.data[0].get("stock_quantity", 0) or 0
-                expiry = today.data[0].get("expiration_date")
-                if expiry:
-                    try:
-                        if (
-                            datetime.strptime(expiry, "%Y-%m-%d").date()
-                            < datetime.now().date()
-                        ):
-                            expired = True
-                    except Exception:
-                        pass
-
-            # If any ingredient is expired or out of stock, mark as not available
-            if expired or not stock or stock <= 0:
-                all_in_stock = False
-                break
+        # --- Stock status logic (single aggregated stock query) ---
+        stock_map = await get_available_stock_map(
+            db,
+            [ing.get("name") or ing.get("ingredient_name") for ing in ingredients_list],
+        )
+        all_in_stock = is_menu_in_stock(ingredients_list, stock_map)
 
         stock_status = "Available" if all_in_stock else "Out of Stock"
 
@@ -195,7 +191,8 @@ async def create_menu_with_ingredients(
         menu_data = {
             "itemcode": itemcode, 
             "dish_name": dish_name,
-            "image_url": public_url,
+            "image_url": images["image_url"],
+            "thumbnail_url": images["thumbnail_url"],
             "category": category,
             "price": float(price),
             "description": description,
@@ -333,6 +330,7 @@ async def create_menu_with_ingredients(
         except Exception as e:
             print("Failed to record menu add activity:", e)
 
+        await relink_menu_sales(db, menu_row, unlink=False)
         return menu_row
     except Exception as e:
         import traceback
@@ -343,11 +341,11 @@ async def create_menu_with_ingredients(
 
 # Endpoint: get all menu items (OPTIMIZED - Batch queries)
 @router.get("/menu")
-async def get_menu():
+async def get_menu(db=Depends(get_db)):
     import time
     start_time = time.time()
 
-    def sync_get_menu():
+    def sync_fetch_menu():
         # Fetch all menu items
         res = postgrest_client.table("menu").select("*").execute()
         error = (
@@ -365,16 +363,12 @@ async def get_menu():
             else res.get("data") if isinstance(res, dict) else None
         )
         if not data:
-            return []
+            return [], {}
 
         menu_ids = [item.get("id") or item.get("menu_id") for item in data]
         menu_ids = [mid for mid in menu_ids if mid is not None]
-
         if not menu_ids:
-            for item in data:
-                item["menu_id"] = item.get("menu_id", item.get("id"))
-                item["ingredients"] = []
-            return data
+            return data, None
 
         # Fetch all menu ingredients (1 query)
         ing_res = (
@@ -400,134 +394,62 @@ async def get_menu():
 
         # Build ingredient map per menu item
         ing_map = {}
-        all_ingredient_names = set()
         for ing in ing_data or []:
-            mid = ing.get("menu_id")
-            if mid not in ing_map:
-                ing_map[mid] = []
-            ing_map[mid].append(ing)
-            ing_name = ing.get("ingredient_name") or ing.get("name")
-            if ing_name:
-                all_ingredient_names.add(ing_name.lower())
-
-        # OPTIMIZATION: Batch fetch ALL inventory data in 3 queries instead of N×M×3
-        today_date = datetime.now().date()
-        stock_map = {}  # {ingredient_name_lower: total_available_stock}
-
-        if all_ingredient_names:
-            ingredient_names_list = list(all_ingredient_names)
-
-            # Query 1: inventory (batch)
-            try:
-                inv_res = postgrest_client.table("inventory").select("item_name,stock_quantity,expiration_date").execute()
-                for inv_item in (inv_res.data or []):
-                    item_name = (inv_item.get("item_name") or "").lower()
-                    if item_name not in all_ingredient_names:
-                        continue
-                    stock = inv_item.get("stock_quantity", 0) or 0
-                    expiry = inv_item.get("expiration_date")
-                    is_expired = False
-                    if expiry:
-                        try:
-                            exp_date = datetime.strptime(expiry, "%Y-%m-%d").date()
-                            if exp_date < today_date:
-                                is_expired = True
-                        except Exception:
-                            pass
-                    if not is_expired and stock > 0:
-                        stock_map[item_name] = stock_map.get(item_name, 0) + stock
-            except Exception as e:
-                print(f"Error fetching inventory: {e}")
+            ing_map.setdefault(ing.get("menu_id"), []).append(ing)
+        return data, ing_map
 
-            # Query 2: inventory_surplus (batch)
-            try:
-                surplus_res = postgrest_client.table("inventory_surplus").select("item_name,stock_quantity,expiration_date").execute()
-                for surplus_item in (surplus_res.data or []):
-                    item_name = (surplus_item.get("item_name") or "").lower()
-                    if item_name not in all_ingredient_names:
-                        continue
-                    stock = surplus_item.get("stock_quantity", 0) or 0
-                    expiry = surplus_item.get("expiration_date")
-                    is_expired = False
-                    if expiry:
-                        try:
-                            exp_date = datetime.strptime(expiry, "%Y-%m-%d").date()
-                            if exp_date < today_date:
-                                is_expired = True
-                        except Exception:
-                            pass
-                    if not is_expired and stock > 0:
-                        stock_map[item_name] = stock_map.get(item_name, 0) + stock
-            except Exception as e:
-                print(f"Error fetching inventory_surplus: {e}")
-
-            # Query 3: inventory_today (batch)
-            try:
-                today_res = postgrest_client.table("inventory_today").select("item_name,stock_quantity,expiration_date").execute()
-                for today_item in (today_res.data or []):
-                    item_name = (today_item.get("item_name") or "").lower()
-                    if item_name not in all_ingredient_names:
-                        continue
-                    stock = today_item.get("stock_quantity", 0) or 0
-                    expiry = today_item.get("expiration_date")
-                    is_expired = False
-                    if expiry:
-                        try:
-                            exp_date = datetime.strptime(expiry, "%Y-%m-%d").date()
-                            if exp_date < today_date:
-                                is_expired = True
-                        except Exception:
-                            pass
-                    if not is_expired and stock > 0:
-                        stock_map[item_name] = stock_map.get(item_name, 0) + stock
-            except Exception as e:
-                print(f"Error fetching inventory_today: {e}")
-
-        # Process each menu item using pre-fetched stock data (O(1) lookup)
-        items_to_update = []
-        for item in data:
-            mid = item.get("id") or item.get("menu_id")
-            item["menu_id"] = item.get("menu_id", item.get("id"))
-            item["ingredients"] = ing_map.get(mid, [])
-
-            all_in_stock = True
-            for ing in item["ingredients"]:
-                ing_name = (ing.get("ingredient_name") or ing.get("name") or "").lower()
-                available_stock = stock_map.get(ing_name, 0)
-
-                if not available_stock or available_stock <= 0:
-                    all_in_stock = False
-                    break
-
-            new_status = "Available" if all_in_stock else "Out of Stock"
-            if item.get("stock_status") != new_status:
-                pk_column = "id" if "id" in item else "menu_id"
-                pk_value = item.get("id") or item.get("menu_id")
-                items_to_update.append({
-                    "pk_column": pk_column,
-                    "pk_value": pk_value,
-                    "new_status": new_status,
-                    "dish_name": item.get("dish_name")
-                })
-            item["stock_status"] = new_status
-
-        # Batch update stock statuses (if needed)
+    def sync_update_statuses(items_to_update):
         for update_item in items_to_update:
             try:
                 postgrest_client.table("menu").update({"stock_status": update_item["new_status"]}).eq(update_item["pk_column"], update_item["pk_value"]).execute()
-                print(f"Updated {update_item['dish_name']} to {update_item['new_status']}")
+                logger.info("Updated %s to %s", update_item["dish_name"], update_item["new_status"])
             except Exception as e:
-                print(f"Failed to update {update_item['dish_name']}: {e}")
+                logger.warning("Failed to update %s: %s", update_item["dish_name"], e)
 
-        elapsed = time.time() - start_time
-        print(f"[PERFORMANCE] get_menu() took {elapsed:.3f}s - {len(data)} items, {len(all_ingredient_names)} unique ingredients")
+    data, ing_map = await run_in_threadpool(sync_fetch_menu)
+    if not data:
+        return []
 
-        return data
+    # Same availability rule as every other menu stock check: one aggregate query
+    ingredient_names = {
+        ing.get("ingredient_name") or ing.get("name")
+        for ingredients in (ing_map or {}).values()
+        for ing in ingredients
+    }
+    stock_map = await get_available_stock_map(db, ingredient_names)
+
+    items_to_update = []
+    for item in data:
+        mid = item.get("id") or item.get("menu_id")
+        item["menu_id"] = item.get("menu_id", item.get("id"))
+        item["ingredients"] = (ing_map or {}).get(mid, [])
+        # Listing renders small images; fall back to the full image for legacy rows
+        item["thumbnail_url"] = item.get("thumbnail_url") or item.get("image_url")
+        if ing_map is None:
+            continue
 
-    return await run_in_threadpool(sync_get_menu)
+        new_status = "Available" if is_menu_in_stock(item["ingredients"], stock_map) else "Out of Stock"
+        if item.get("stock_status") != new_status:
+            items_to_update.append({
+                "pk_column": "id" if "id" in item else "menu_id",
+                "pk_value": item.get("id") or item.get("menu_id"),
+                "new_status": new_status,
+                "dish_name": item.get("dish_name")
+            })
+        item["stock_status"] = new_status
+
+    if items_to_update:
+        await run_in_threadpool(sync_update_statuses, items_to_update)
+
+    logger.debug(
+        "get_menu() took %.3fs - %d items, %d unique ingredients",
+        time.time() - start_time, len(data), len(ingredient_names),
+    )
+    return data
 
 
 @router.patch("/menu/{menu_id}")
+@invalidates(*SALES_CACHE_GROUPS)
 async def update_menu(
     menu_id: int,
     menu_update: dict = Body(...),
@@ -554,6 +476,7 @@ async def update_menu(
         "description",
         "stock_status",
         "image_url",
+        "thumbnail_url",
         "updated_at",
     }
 
@@ -711,6 +634,8 @@ async def update_menu(
                 import traceback
                 print("Failed to record menu delete activity:", e)
                 print(traceback.format_exc())
+            if "dish_name" in update_data or "itemcode" in update_data:
+                await relink_menu_sales(db, menu_row)
         return menu_row or {"message": "Ingredients updated."}
     except Exception as e:
         import traceback
@@ -772,7 +697,131 @@ async def delete_menu(
     return {"message": "Menu item deleted successfully.", "menu": menu_row}
 
 
+@router.get("/menu-aliases")
+async def get_menu_aliases(
+    user=Depends(require_role("Owner", "General Manager", "Store Manager")),
+    db=Depends(get_db),
+):
+    result = await db.execute(
+        text(
+            """
+            SELECT a.alias_id, a.alias, a.menu_id, m.dish_name
+            FROM menu_item_alias a
+            JOIN menu m ON m.menu_id = a.menu_id
+            ORDER BY m.dish_name, a.alias
+            """
+        )
+    )
+    return [dict(row._mapping) for row in result.fetchall()]
+
+
+@router.post("/menu/{menu_id}/aliases")
+@invalidates(*SALES_CACHE_GROUPS)
+async def add_menu_alias(
+    menu_id: int,
+    alias_data: dict = Body(...),
+    user=Depends(require_role("Owner", "General Manager", "Store Manager")),
+    db=Depends(get_db),
+):
+    """
+    Map a POS item name spelling to this menu item. Existing unresolved sales
+    rows with that name are linked immediately.
+    """
+    alias = (alias_data.get("alias") or "").strip()
+    alias_key = normalize_item_key(alias)
+    if not alias_key:
+        raise HTTPException(status_code=400, detail="Alias is required.")
+
+    menu_res = await db.execute(
+        text("SELECT dish_name FROM menu WHERE menu_id = :menu_id"), {"menu_id": menu_id}
+    )
+    menu_row = menu_res.fetchone()
+    if not menu_row:
+        raise HTTPException(status_code=404, detail="Menu item not found.")
+
+    existing = await db.execute(
+        text("SELECT menu_id FROM menu_item_alias WHERE alias_key = :alias_key"),
+        {"alias_key": alias_key},
+    )
+    existing_row = existing.fetchone()
+    if existing_row and existing_row[0] != menu_id:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Alias '{alias}' is already mapped to another menu item.",
+        )
+
+    result = await db.execute(
+        text(
+            """
+            INSERT INTO menu_item_alias (alias, alias_key, menu_id)
+            VALUES (:alias, :alias_key, :menu_id)
+            ON CONFLICT (alias_key) DO UPDATE SET alias = EXCLUDED.alias
+            RETURNING alias_id
+            """
+        ),
+        {"alias": alias, "alias_key": alias_key, "menu_id": menu_id},
+    )
+    alias_id = result.scalar()
+    await db.commit()
+
+    linked = await backfill_sales_menu_ids(db, item_key=alias_key)
+
+    try:
+        user_row = getattr(user, "user_row", user)
+        new_activity = UserActivityLog(
+            user_id=user_row.get("user_id"),
+            action_type="add menu alias",
+            description=f"Mapped sales item name '{alias}' to menu item: {menu_row[0]}",
+            activity_date=datetime.utcnow(),
+            report_date=datetime.utcnow(),
+            user_name=user_row.get("name"),
+            role=user_row.get("user_role"),
+        )
+        db.add(new_activity)
+        await db.flush()
+        await db.commit()
+    except Exception as e:
+        print("Failed to record menu alias activity:", e)
+
+    return {
+        "alias_id": alias_id,
+        "alias": alias,
+        "menu_id": menu_id,
+        "linked_sales_rows": linked,
+    }
+
+
+@router.delete("/menu-aliases/{alias_id}")
+@invalidates(*SALES_CACHE_GROUPS)
+async def delete_menu_alias(
+    alias_id: int,
+    user=Depends(require_role("Owner", "General Manager", "Store Manager")),
+    db=Depends(get_db),
+):
+    """
+    Remove a POS spelling mapping. Sales rows that were linked through it are
+    resolved again (itemcode or dish name may still match), else unlinked.
+    """
+    result = await db.execute(
+        text(
+            "DELETE FROM menu_item_alias WHERE alias_id = :alias_id "
+            "RETURNING alias, alias_key, menu_id"
+        ),
+        {"alias_id": alias_id},
+    )
+    deleted = result.fetchone()
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Alias not found.")
+    await db.commit()
+
+    relinked = await relink_sales_menu_ids(
+        db, deleted.menu_id, item_keys=[deleted.alias_key], unlink_key=deleted.alias_key
+    )
+    return {"message": f"Alias '{deleted.alias}' deleted.", "relinked_sales_rows": relinked}
+
+
 @router.patch("/menu/{menu_id}/update-with-image-and-ingredients")
+@invalidates(*SALES_CACHE_GROUPS)
 async def update_menu_with_image_and_ingredients(
     menu_id: int,
     itemcode: Optional[str] = Form(None),
@@ -783,26 +832,27 @@ async def update_menu_with_image_and_ingredients(
     stock_status: Optional[str] = Form(None),
     file: Optional[UploadFile] = File(None),
     ingredients: str = Form(...),
+    db=Depends(get_db),
 ):
     try:
+        try:
+            ingredients_list = json.loads(ingredients)
+        except Exception as e:
+            raise HTTPException(
+                status_code=400, detail=f"Invalid ingredients format: {str(e)}"
+            )
+
+        # Recompute stock status from the submitted recipe (single aggregated stock query)
+        stock_map = await get_available_stock_map(
+            db,
+            [ing.get("name") or ing.get("ingredient_name") for ing in ingredients_list],
+        )
+        stock_status = (
+            "Available" if is_menu_in_stock(ingredients_list, stock_map) else "Out of Stock"
+        )
+
         # Handle image upload if a new file is provided
-        public_url = None
-        if file:
-            ext = file.filename.split(".")[-1]
-            filename = f"menu/{uuid.uuid4()}.{ext}"
-            content = await file.read()
-            res = supabase.storage.from_("menu-images").upload(filename, content)
-            if hasattr(res, "error") and res.error:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Image upload failed: {getattr(res.error, 'message', res.error)}",
-                )
-            if hasattr(res, "data") and not res.data:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Image upload failed: No data returned from upload.",
-                )
-            public_url = supabase.storage.from_("menu-images").get_public_url(filename)
+        images = await upload_menu_image(file) if file else None
 
         # Prepare update data
         update_data = {
@@ -815,8 +865,9 @@ async def update_menu_with_image_and_ingredients(
         }
         if itemcode is not None:  # <-- Add this block
             update_data["itemcode"] = itemcode
-        if public_url:
-            update_data["image_url"] = public_url
+        if images:
+            update_data["image_url"] = images["image_url"]
+            update_data["thumbnail_url"] = images["thumbnail_url"]
 
         # Update menu table
         res = (
@@ -841,14 +892,6 @@ async def update_menu_with_image_and_ingredients(
         menu_row = data[0]
         menu_row["menu_id"] = menu_row.get("id") or menu_row.get("menu_id")
 
-        # Update ingredients
-        try:
-            ingredients_list = json.loads(ingredients)
-        except Exception as e:
-            raise HTTPException(
-                status_code=400, detail=f"Invalid ingredients format: {str(e)}"
-            )
-
         # Remove all existing menu_ingredients for this menu
         postgrest_client.table("menu_ingredients").delete().eq("menu_id", menu_id).execute()
 
@@ -925,6 +968,7 @@ async def update_menu_with_image_and_ingredients(
                     detail=f"Ingredient insert failed: {getattr(err_ing, 'message', str(err_ing))}",
                 )
 
+        await relink_menu_sales(db, menu_row)
         return menu_row
     except Exception as e:
         import traceback
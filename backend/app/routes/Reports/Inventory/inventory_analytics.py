@@ -7,6 +7,7 @@ from app.supabase import get_db
 from decimal import Decimal
 from app.models.user_activity_log import UserActivityLog
 from app.utils.rbac import get_current_user
+from app.utils.response_cache import cached_response
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -18,6 +19,7 @@ class ExportLogRequest(BaseModel):
 
 
 @router.get("/inventory-analytics")
+@cached_response("inventory:analytics", ttl=120)
 async def get_inventory_analytics(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
@@ -10,9 +10,11 @@ from sqlalchemy import text
 from app.supabase import (
     get_db,
 )
-import pandas as pd
-from prophet import Prophet
-import matplotlib.pyplot as plt
+from app.utils.response_cache import invalidates, INVENTORY_CACHE_GROUPS
+from app.utils.inventory_forecaster import inventory_forecaster
+from app.utils.report_export import export_response, stream_query_batches, EXPORT_FORMATS
+from app.utils.rbac import require_role
+from app.models.user_activity_log import UserActivityLog
 
 
 router = APIRouter()
@@ -31,6 +33,7 @@ class InventoryLogEntry(BaseModel):
 
 
 @router.put("/inventory-log")
+@invalidates(*INVENTORY_CACHE_GROUPS)
 async def put_inventory_log(
     entries: List[InventoryLogEntry] = Body(...),
     db: AsyncSession = Depends(get_db),
@@ -92,6 +95,7 @@ async def put_inventory_log(
             )
         await db.commit()
         print("DB commit complete.")
+        inventory_forecaster.invalidate({entry.item_id for entry in entries})
         return {"message": "Inventory log(s) saved"}
     except Exception as e:
         import traceback
@@ -138,3 +142,94 @@ async def get_inventory_log(
     rows = result.fetchall()
     # Convert SQLAlchemy Row objects to dicts using ._mapping
     return [dict(row._mapping) for row in rows]
+
+
+# source -> (table, columns, date column used for start/end filtering)
+INVENTORY_EXPORT_SOURCES = {
+    "master": (
+        "inventory",
+        ["item_id", "item_name", "category", "stock_quantity", "unit_cost", "stock_status", "batch_date", "expiration_date", "created_at", "updated_at"],
+        "batch_date",
+    ),
+    "today": (
+        "inventory_today",
+        ["item_id", "item_name", "category", "stock_quantity", "unit_cost", "stock_status", "batch_date", "expiration_date", "created_at", "updated_at"],
+        "batch_date",
+    ),
+    "surplus": (
+        "inventory_surplus",
+        ["item_id", "item_name", "category", "stock_quantity", "unit_cost", "stock_status", "batch_date", "expiration_date", "created_at", "updated_at"],
+        "batch_date",
+    ),
+    "spoilage": (
+        "inventory_spoilage",
+        ["spoilage_id", "item_id", "item_name", "category", "quantity_spoiled", "unit_cost", "reason", "spoilage_date", "batch_date", "expiration_date"],
+        "spoilage_date",
+    ),
+    "log": (
+        "inventory_log",
+        ["log_id", "item_id", "item_name", "remaining_stock", "wastage", "status", "action_date", "batch_date", "user_id"],
+        "action_date",
+    ),
+}
+
+
+@router.get("/export-inventory")
+async def export_inventory(
+    source: str = Query("master", description="master, today, surplus, spoilage or log"),
+    format: str = Query("xlsx", description="Export format: csv or xlsx"),
+    start_date: Optional[str] = Query(None),
+    end_date: Optional[str] = Query(None),
+    user=Depends(require_role("Owner", "General Manager", "Store Manager")),
+    db: AsyncSession = Depends(get_db),
+):
+    """Stream an inventory table as CSV or XLSX (server-side cursor, no row cap)."""
+    if source not in INVENTORY_EXPORT_SOURCES:
+        raise HTTPException(status_code=400, detail=f"Unknown inventory source: {source}")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format: {format}")
+    table, columns, date_column = INVENTORY_EXPORT_SOURCES[source]
+
+    query = f"SELECT {', '.join(columns)} FROM {table}"
+    params = {}
+    try:
+        if start_date:
+            params["start_date"] = datetime.datetime.strptime(start_date, "%Y-%m-%d").date()
+        if end_date:
+            params["end_date"] = datetime.datetime.strptime(end_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD.")
+    filters = []
+    if "start_date" in params:
+        filters.append(f"CAST({date_column} AS DATE) >= :start_date")
+    if "end_date" in params:
+        filters.append(f"CAST({date_column} AS DATE) <= :end_date")
+    if filters:
+        query += " WHERE " + " AND ".join(filters)
+    query += f" ORDER BY {date_column} DESC, {columns[0]}"
+
+    try:
+        user_row = getattr(user, "user_row", user)
+        new_activity = UserActivityLog(
+            user_id=user_row.get("user_id"),
+            action_type="export inventory report",
+            description=f"Downloaded inventory {source} report ({format.upper()})",
+            activity_date=datetime.datetime.utcnow(),
+            report_date=datetime.datetime.utcnow(),
+            user_name=user_row.get("name"),
+            role=user_row.get("user_role"),
+        )
+        db.add(new_activity)
+        await db.flush()
+        await db.commit()
+    except Exception as e:
+        print(f"Failed to record user activity for inventory export: {e}")
+
+    return export_response(
+        format,
+        f"Inventory_{source}_{datetime.date.today().isoformat()}",
+        columns,
+        stream_query_batches(query, params),
+        sheet_name=f"Inventory {source}",
+    )
+
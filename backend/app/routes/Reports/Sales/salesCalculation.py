@@ -5,12 +5,14 @@ from app.routes.Menu.menu import recalculate_stock_status
 from app.supabase import postgrest_client
 from typing import Optional
 from app.utils.unit_converter import convert_units, normalize_unit, format_quantity_with_unit
+from app.utils.response_cache import invalidates, SALES_CACHE_GROUPS
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 @router.post("/sales/recalculate-inventory-today")
+@invalidates(*SALES_CACHE_GROUPS)
 async def recalculate_inventory_today_from_sales(
     request: Request,
     db=Depends(get_db),
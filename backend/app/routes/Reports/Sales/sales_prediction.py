@@ -4,13 +4,16 @@ from slowapi import Limiter
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from typing import List, Dict, Any
+import logging
 import pandas as pd
 from datetime import datetime, timedelta, date
 from app.supabase import get_db
+from app.utils.app_logging import log_payload, payload_logging_enabled
+from app.utils.sales_chart import build_chart_series
 
-# ML imports
-from sklearn.linear_model import LinearRegression
-import numpy as np
+from app.utils.batch_forecaster import fit_linear_trends, predict_period_totals
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 limiter = Limiter(key_func=get_remote_address, default_limits=["10/minute"])
@@ -21,7 +24,7 @@ async def get_sales_data(session: AsyncSession, days: int = 90, start_date: str
         # Convert string dates to date objects for asyncpg
         start_date_obj = datetime.strptime(start_date, "%Y-%m-%d").date()
         end_date_obj = datetime.strptime(end_date, "%Y-%m-%d").date()
-        print(f"[DEBUG] Fetching sales data from {start_date_obj} to {end_date_obj}")
+        logger.debug("Fetching sales data from %s to %s", start_date_obj, end_date_obj)
         query = text(
             """
             SELECT sr.item_name as item,
@@ -30,7 +33,7 @@ async def get_sales_data(session: AsyncSession, days: int = 90, start_date: str
                    SUM(sr.total_price) as revenue,
                    COALESCE(NULLIF(sr.category, ''), m.category, 'Uncategorized') as category
             FROM sales_report sr
-            LEFT JOIN menu m ON LOWER(REPLACE(TRIM(sr.item_name), ' ', '')) = LOWER(REPLACE(TRIM(m.dish_name), ' ', ''))
+            LEFT JOIN menu m ON m.menu_id = sr.menu_id
             WHERE DATE(sr.sale_date) >= :start_date AND DATE(sr.sale_date) <= :end_date
             GROUP BY sr.item_name, DATE(sr.sale_date), COALESCE(NULLIF(sr.category, ''), m.category, 'Uncategorized')
             ORDER BY DATE(sr.sale_date) DESC, SUM(sr.quantity) DESC
@@ -39,7 +42,7 @@ async def get_sales_data(session: AsyncSession, days: int = 90, start_date: str
         result = await session.execute(query, {"start_date": start_date_obj, "end_date": end_date_obj})
     else:
         since = datetime.utcnow() - timedelta(days=days)
-        print(f"[DEBUG] Fetching sales data since: {since}")
+        logger.debug("Fetching sales data since %s", since)
         query = text(
             """
             SELECT sr.item_name as item,
@@ -48,7 +51,7 @@ async def get_sales_data(session: AsyncSession, days: int = 90, start_date: str
                    SUM(sr.total_price) as revenue,
                    COALESCE(NULLIF(sr.category, ''), m.category, 'Uncategorized') as category
             FROM sales_report sr
-            LEFT JOIN menu m ON LOWER(REPLACE(TRIM(sr.item_name), ' ', '')) = LOWER(REPLACE(TRIM(m.dish_name), ' ', ''))
+            LEFT JOIN menu m ON m.menu_id = sr.menu_id
             WHERE sr.sale_date >= :since
             GROUP BY sr.item_name, DATE(sr.sale_date), COALESCE(NULLIF(sr.category, ''), m.category, 'Uncategorized')
             ORDER BY DATE(sr.sale_date) DESC, SUM(sr.quantity) DESC
@@ -56,18 +59,10 @@ async def get_sales_data(session: AsyncSession, days: int = 90, start_date: str
         )
         result = await session.execute(query, {"since": str(since)})
     rows = result.fetchall()
-    print(f"[DEBUG] Raw query results: {len(rows)} rows")
-
-    # Enhanced debugging - show all dates found
-    dates_found = set()
-    for row in rows:
-        dates_found.add(row.date.strftime("%Y-%m-%d"))
-    print(f"[DEBUG] Unique dates found: {sorted(dates_found)}")
-
-    for row in rows[:10]:  # Print first 10 rows for debugging
-        print(
-            f"[DEBUG] Row: {row.item}, {row.date}, {row.sales} sales, ₱{row.revenue} revenue, {row.category}"
-        )
+    logger.debug("Sales data query returned %d rows", len(rows))
+    if payload_logging_enabled(logger):
+        log_payload(logger, "Sales data dates", sorted({row.date.isoformat() for row in rows}))
+        log_payload(logger, "Sales data first rows", [tuple(row) for row in rows[:10]])
 
     return [
         {
@@ -81,87 +76,24 @@ async def get_sales_data(session: AsyncSession, days: int = 90, start_date: str
     ]
 
 
-def generate_simple_chart_data_with_all_dates(
-    item_name: str, sales_data: List[dict], timeframe: str, all_labels: List[str]
-) -> List[dict]:
-    """Generate chart data ensuring all dates are included with 0 for missing dates"""
-    print(f"[DEBUG] Generating chart data for {item_name} with timeframe: {timeframe}")
-
-    # Filter data for this specific item
-    item_data = [row for row in sales_data if row["item"] == item_name]
-    print(f"[DEBUG] Found {len(item_data)} rows for {item_name}")
-
-    if not item_data:
-        print(f"[DEBUG] No data for {item_name}, returning zeros for all dates")
-        return [{"ds": label, "yhat": 0.0} for label in all_labels]
-
-    df = pd.DataFrame(item_data)
-    df["date"] = pd.to_datetime(df["date"])
-
-    # Group by timeframe
-    if timeframe == "daily":
-        grouped = df.groupby(df["date"].dt.date)["sales"].sum()
-        # Create a mapping of dates to their formatted labels
-        date_to_label = {}
-        for date in grouped.index:
-            date_to_label[date.strftime("%b %d")] = float(grouped[date])
-        print(f"[DEBUG] Daily grouping for {item_name}: {date_to_label}")
-    elif timeframe == "weekly":
-        grouped = df.groupby(df["date"].dt.to_period("W"))["sales"].sum()
-        date_to_label = {}
-        for period in grouped.index:
-            label = f"Week of {period.start_time.strftime('%b %d')}"
-            date_to_label[label] = float(grouped[period])
-    elif timeframe == "monthly":
-        grouped = df.groupby(df["date"].dt.to_period("M"))["sales"].sum()
-        date_to_label = {}
-        for period in grouped.index:
-            label = period.strftime("%B %Y")
-            date_to_label[label] = float(grouped[period])
-    else:
-        grouped = df.groupby(df["date"].dt.date)["sales"].sum()
-        date_to_label = {}
-        for date in grouped.index:
-            date_to_label[date.strftime("%b %d")] = float(grouped[date])
-
-    # Create result with 0 for missing dates
-    result = []
-    for label in all_labels:
-        sales_value = date_to_label.get(label, 0.0)
-        result.append({"ds": label, "yhat": sales_value})
-
-    print(f"[DEBUG] Final chart data for {item_name}: {result}")
-    return result
-
-
 def generate_simple_chart_data(
     item_name: str, data: List[dict], timeframe: str = "daily"
 ):
     """Generate simple chart data for historical sales"""
-    print(f"[DEBUG] Generating chart data for {item_name}, timeframe: {timeframe}")
-    print(f"[DEBUG] Input data for {item_name}: {data}")
-
     df = pd.DataFrame(data)
     df = df[df["item"] == item_name]
-    print(f"[DEBUG] Filtered data for {item_name}: {len(df)} rows")
-
-    if len(df) > 0:
-        print(
-            f"[DEBUG] Date range for {item_name}: {df['date'].min()} to {df['date'].max()}"
-        )
+    logger.debug("Chart data for %s (%s): %d rows", item_name, timeframe, len(df))
 
     df["date"] = pd.to_datetime(df["date"])
     df = df.sort_values("date")
 
     if df.empty:
-        print(f"[DEBUG] No data for {item_name} after filtering")
         return []
 
     # Group by timeframe
     if timeframe == "daily":
         grouped = df.groupby(df["date"].dt.date)["sales"].sum()
         labels = [date.strftime("%b %d") for date in grouped.index]
-        print(f"[DEBUG] Daily grouping for {item_name}: {dict(grouped)}")
     elif timeframe == "weekly":
         grouped = df.groupby(df["date"].dt.to_period("W"))["sales"].sum()
         labels = [
@@ -182,7 +114,7 @@ def generate_simple_chart_data(
         for label, value in zip(labels, grouped.values)
     ]
 
-    print(f"[DEBUG] Final chart data for {item_name}: {result}")
+    log_payload(logger, f"Chart data for {item_name}", result)
     return result
 
 
@@ -349,8 +281,6 @@ async def predict_next_month_top_sales(
     df = pd.DataFrame(sales_data)
     df["date"] = pd.to_datetime(df["date"])
 
-    # Prepare prediction for each item
-    predictions = []
     next_month_start = (
         datetime.utcnow().replace(day=1) + pd.DateOffset(months=1)
     ).to_pydatetime()
@@ -359,31 +289,14 @@ async def predict_next_month_top_sales(
     ).to_pydatetime()
     days_in_next_month = (next_month_end - next_month_start).days + 1
 
-    for item in df["item"].unique():
-        item_df = df[df["item"] == item].copy()
-        if len(item_df) < 10:
-            continue  # Not enough data for this item
-        # Aggregate by day
-        daily = item_df.groupby("date")["sales"].sum().reset_index()
-        # Convert date to ordinal for regression
-        daily = daily.sort_values("date")
-        X = daily["date"].map(datetime.toordinal).values.reshape(-1, 1)
-        y = daily["sales"].values
-        # Fit linear regression
-        model = LinearRegression()
-        model.fit(X, y)
-        # Predict for each day in next month
-        future_dates = [
-            next_month_start + timedelta(days=i) for i in range(days_in_next_month)
-        ]
-        X_future = np.array([d.toordinal() for d in future_dates]).reshape(-1, 1)
-        y_pred = model.predict(X_future)
-        y_pred = np.clip(y_pred, 0, None)  # No negative sales
-        total_pred_sales = float(np.sum(y_pred))
-        predictions.append({"item": item, "predicted_sales": total_pred_sales})
-
-    # Sort and get top N
-    predictions = sorted(predictions, key=lambda x: x["predicted_sales"], reverse=True)
+    # One vectorized least-squares fit for every item (no per-item model)
+    trends = fit_linear_trends(df[["item", "date", "sales"]])
+    future_dates = [
+        (next_month_start + timedelta(days=i)).date() for i in range(days_in_next_month)
+    ]
+    predictions = predict_period_totals(trends, future_dates)
+
+    # Already sorted by predicted sales; take top N
     top_predictions = predictions[:top_n]
 
     return {
@@ -402,10 +315,8 @@ async def get_top_sales_historical(
 ):
     """Get historical sales data for top selling items"""
     sales_data = await get_sales_data(session)
-    print("[DEBUG] sales_data:", len(sales_data))
-
     if not sales_data:
-        print("[DEBUG] No sales data found in the last 90 days.")
+        logger.debug("No sales data found in the last 90 days")
         return []
 
     df = pd.DataFrame(sales_data)
@@ -419,28 +330,9 @@ async def get_top_sales_historical(
         .index.tolist()
     )
 
-    # Get all unique dates in the dataset to ensure consistent date range
+    # One item x period matrix for all top items, labelled over every period in the data
     df["date"] = pd.to_datetime(df["date"])
-
-    if timeframe == "daily":
-        all_dates = df["date"].dt.date.unique()
-        all_dates = sorted(all_dates)
-        all_labels = [date.strftime("%b %d") for date in all_dates]
-        print(f"[DEBUG] All dates for daily view: {all_dates}")
-    elif timeframe == "weekly":
-        all_periods = df["date"].dt.to_period("W").unique()
-        all_periods = sorted(all_periods)
-        all_labels = [
-            f"Week of {period.start_time.strftime('%b %d')}" for period in all_periods
-        ]
-    elif timeframe == "monthly":
-        all_periods = df["date"].dt.to_period("M").unique()
-        all_periods = sorted(all_periods)
-        all_labels = [period.strftime("%B %Y") for period in all_periods]
-    else:
-        all_dates = df["date"].dt.date.unique()
-        all_dates = sorted(all_dates)
-        all_labels = [date.strftime("%b %d") for date in all_dates]
+    all_labels, series = build_chart_series(df, top_items, timeframe)
 
     color_palette = [
         "#F87171",  # Red
@@ -459,28 +351,17 @@ async def get_top_sales_historical(
         item: color_palette[i % len(color_palette)] for i, item in enumerate(top_items)
     }
 
-    response = []
-    for item in top_items:
-        chart_data = generate_simple_chart_data_with_all_dates(
-            item, sales_data, timeframe, all_labels
-        )
-        print(
-            f"[DEBUG] {item}: chart_data = {len(chart_data)} points for {len(all_labels)} dates"
-        )
-
-        if chart_data:
-            item_data = {
-                "name": item,
-                "sales": [p["yhat"] for p in chart_data],
-                "week": all_labels,  # Use consistent date labels for all items
-                "color": colors[item],
-            }
-            print(
-                f"[DEBUG] Adding item_data: {item_data['name']} with {len(item_data['sales'])} sales points and {len(item_data['week'])} week labels"
-            )
-            response.append(item_data)
+    response = [
+        {
+            "name": item,
+            "sales": series[item],
+            "week": all_labels,  # Use consistent date labels for all items
+            "color": colors[item],
+        }
+        for item in top_items
+    ]
 
-    print(f"[DEBUG] Final response: {len(response)} items")
+    logger.debug("Top sales chart: %d items x %d labels", len(response), len(all_labels))
     return response
 
 
@@ -501,5 +382,5 @@ async def get_historical_analysis(
 
     analysis = analyze_historical_data(sales_data)
 
-    print(f"[DEBUG] Historical analysis completed for {len(sales_data)} data points")
+    logger.debug("Historical analysis completed for %d data points", len(sales_data))
     return analysis
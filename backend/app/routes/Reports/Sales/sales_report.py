@@ -11,20 +11,25 @@ from typing import List, Optional
 from datetime import datetime, timedelta
 from dateutil import parser as date_parser
 from app.supabase import get_db
-from sqlalchemy import select
-from app.models.custom_holiday import CustomHoliday
 from app.models.user_activity_log import UserActivityLog
 from app.routes.Inventory.master_inventory import require_role
+from app.utils.response_cache import cached_response, invalidates, SALES_CACHE_GROUPS
+from app.utils.sales_rollup import refresh_sales_rollups, refresh_sales_rollups_for
+from app.utils.menu_resolver import load_menu_resolver, backfill_sales_menu_ids
+from app.utils.ingredient_cost import ensure_ingredient_unit_costs, recipe_quantity_in_base_units
+from app.utils.app_logging import log_payload
+from app.utils.report_export import export_response, stream_query_batches, EXPORT_FORMATS
+from app.utils.weekly_forecast_store import get_or_fit_model, load_holiday_weeks
+from app.utils.keyset_pagination import InvalidCursor, decode_cursor, encode_cursor, parse_fields, table_columns
 
 from typing import Dict
-import numpy as np
-import pandas as pd
-from sklearn.linear_model import LinearRegression
-import holidays
+import logging
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 @router.post("/import-sales-json")
+@invalidates(*SALES_CACHE_GROUPS)
 async def import_sales_json(
     sales_data: list = Body(..., example=[{"sale_date": "02-Nov-25 11:09:12", "count": 1}]),
     session: AsyncSession = Depends(get_db),
@@ -35,6 +40,8 @@ async def import_sales_json(
     """
     inserted = 0
     errors = []
+    sale_dates = []
+    resolver = await load_menu_resolver(session)
     for entry in sales_data:
         try:
             dt = datetime.strptime(entry["sale_date"], "%d-%b-%y %H:%M:%S")
@@ -49,8 +56,8 @@ async def import_sales_json(
 
             await session.execute(
                 text("""
-                    INSERT INTO sales_report (sale_date, total_price, item_name, count, category)
-                    VALUES (:sale_date, :total_price, :item_name, :count, :category)
+                    INSERT INTO sales_report (sale_date, total_price, item_name, count, category, menu_id)
+                    VALUES (:sale_date, :total_price, :item_name, :count, :category, :menu_id)
                 """),
                 {
                     "sale_date": dt,
@@ -58,9 +65,11 @@ async def import_sales_json(
                     "item_name": item_name,
                     "count": entry.get("count", 1),
                     "category": category,
+                    "menu_id": resolver.resolve(itemcode, item_name),
                 },
             )
             inserted += 1
+            sale_dates.append(dt)
         except Exception as e:
             errors.append({"entry": entry, "error": str(e)})
     await session.commit()
@@ -75,22 +84,31 @@ async def import_sales_json(
     """)
     await session.execute(update_query)
     await session.commit()
+
+    await refresh_sales_rollups_for(session, sale_dates)
     return {"inserted": inserted, "errors": errors}
 
 @limiter.limit("10/minute")
 @router.get("/weekly-sales-forecast")
+@cached_response("sales:weekly-forecast", ttl=300)
 async def get_weekly_sales_forecast(
     request: Request,
-    weeks_ahead: int = Query(1, description="Number of weeks to forecast"),
+    weeks_ahead: int = Query(1, ge=1, le=52, description="Number of weeks to forecast"),
     item_name: Optional[str] = Query(None, description="Filter by item name"),
     category: Optional[str] = Query(None, description="Filter by category"),
     session: AsyncSession = Depends(get_db),
 ):
-    """Forecast total sales, or sales for a specific item/category, for the next N weeks using linear regression"""
+    """
+    Forecast total sales, or sales for a specific item/category, for the next N weeks using linear regression
+
+    Weekly totals come from the sales_daily_item rollup. Model coefficients
+    are stored per (item, category, horizon) and only refitted when the
+    weekly series changes; holiday features come from holiday_week_calendar.
+    """
     try:
         # Build dynamic SQL for filtering
-        filters = ["sale_date >= :start_date"]
-        params = {}
+        filters = ["sale_day >= :start_date"]
+        params = {"start_date": (datetime.utcnow() - timedelta(weeks=8)).date()}
         if item_name:
             filters.append("item_name = :item_name")
             params["item_name"] = item_name
@@ -100,174 +118,56 @@ async def get_weekly_sales_forecast(
         where_clause = " AND ".join(filters)
         query = text(
             f"""
-            SELECT DATE_TRUNC('week', sale_date::timestamp)::date as week, SUM(total_price) as total_sales
-            FROM sales_report
+            SELECT DATE_TRUNC('week', sale_day)::date as week, SUM(total_revenue) as total_sales
+            FROM sales_daily_item
             WHERE {where_clause}
             GROUP BY week
             ORDER BY week
             """
         )
-
-        start_date = (datetime.utcnow() - timedelta(weeks=8)).date()
-        # Convert start_date to ISO string if it's a date or datetime
-        if isinstance(start_date, (datetime,)):
-            params["start_date"] = start_date.isoformat()
-        else:
-            params["start_date"] = start_date.strftime("%Y-%m-%d")
         result = await session.execute(query, params)
-        rows = result.fetchall()
-        if not rows or len(rows) < 1:
-            return {"error": "Not enough historical data for weekly forecasting (need at least 1 week)."}
-
-        # Prepare data for regression with seasonality and holiday features
-        df = pd.DataFrame(rows, columns=["week", "total_sales"])
-        df["week"] = pd.to_datetime(df["week"])
-        df = df.sort_values("week")
-        df["week_num"] = (df["week"] - df["week"].min()).dt.days // 7
-
-        # Drop rows with NaN total_sales (prevents model.fit error)
-        df = df.dropna(subset=["total_sales"])
-        if df.empty or len(df) < 4:
+        rows = [(week, float(total)) for week, total in result.fetchall() if total is not None]
+        if len(rows) < 4:
             return {"error": "Not enough clean historical data for weekly forecasting."}
 
-        # Use holidays library for Philippine holidays
-        ph_holidays = holidays.country_holidays(
-            "PH", years=range(df["week"].min().year, df["week"].max().year + 3)
-        )
+        weeks = [week for week, _ in rows]
+        totals = [total for _, total in rows]
+        last_week = weeks[-1]
+        forecast_dates = [last_week + timedelta(weeks=i) for i in range(1, weeks_ahead + 1)]
 
-        # --- Fetch custom holidays from DB ---
-        custom_holiday_rows = await session.execute(select(CustomHoliday.date, CustomHoliday.name))
-        custom_holiday_dict = {row[0]: row[1] for row in custom_holiday_rows.fetchall()}
-        custom_holiday_dates = set(custom_holiday_dict.keys())
-
-        # Add seasonality features (month, week of year, etc.)
-        df["month"] = df["week"].dt.month
-        df["weekofyear"] = df["week"].dt.isocalendar().week.astype(int)
-
-        # Add holiday feature: 1 if week contains a holiday (official or custom), else 0
-        # Also return holiday_type and holiday_names
-        def get_holiday_info(week_start):
-            week_end = week_start + timedelta(days=6)
-            # Check official holidays
-            official_holidays = [
-                h for h in ph_holidays if week_start <= pd.to_datetime(h) <= week_end
-            ]
-            official_holiday_names = [ph_holidays[h] for h in official_holidays]
-
-            custom_holidays = [
-                h
-                for h in custom_holiday_dates
-                if week_start <= pd.to_datetime(h) <= week_end
-            ]
-            custom_holiday_names = [custom_holiday_dict[h] for h in custom_holidays]
-
-            if official_holidays and custom_holidays:
-                # If both, combine the names
-                all_names = official_holiday_names + custom_holiday_names
-                return 1, "official", ", ".join(all_names)
-            elif official_holidays:
-                return 1, "official", ", ".join(official_holiday_names)
-            elif custom_holidays:
-                return 1, "custom", ", ".join(custom_holiday_names)
-            else:
-                return 0, None, None
-
-        holiday_info = df["week"].apply(get_holiday_info)
-        df["is_holiday_week"] = holiday_info.apply(lambda x: x[0])
-        df["holiday_type"] = holiday_info.apply(lambda x: x[1])
-        df["holiday_names"] = holiday_info.apply(lambda x: x[2])
-
-        # Features: week_num, month, weekofyear, is_holiday_week
-        X = df[["week_num", "month", "weekofyear", "is_holiday_week"]].values
-        y = df["total_sales"].values
-
-        # Train linear regression model
-        model = LinearRegression()
-        model.fit(X, y)
+        holiday_weeks = await load_holiday_weeks(session, weeks + forecast_dates)
+        hist_flags = [holiday_weeks[w][0] for w in weeks]
+        forecast_flags = [holiday_weeks[w][0] for w in forecast_dates]
+
+        model, _ = await get_or_fit_model(
+            session, item_name, category, weeks_ahead, weeks, totals, hist_flags
+        )
 
         # Historical predictions (for chart/accuracy)
-        hist_X = df[["week_num", "month", "weekofyear", "is_holiday_week"]].values
-        hist_pred = model.predict(hist_X)
+        hist_pred = model.predict(weeks, hist_flags)
         historical_predictions = [
             {
                 "week_start": w.strftime("%Y-%m-%d"),
-                "predicted_sales": float(max(0, pred)),
-                "actual_sales": float(actual),
-                "is_holiday_week": int(holiday),
-                "holiday_type": htype,
-                "holiday_names": hnames,
+                "predicted_sales": float(pred),
+                "actual_sales": actual,
+                "is_holiday_week": holiday_weeks[w][0],
+                "holiday_type": holiday_weeks[w][1],
+                "holiday_names": holiday_weeks[w][2],
             }
-            for w, pred, actual, holiday, htype, hnames in zip(
-                df["week"],
-                hist_pred,
-                df["total_sales"],
-                df["is_holiday_week"],
-                df["holiday_type"],
-                df["holiday_names"],
-            )
+            for w, pred, actual in zip(weeks, hist_pred, totals)
         ]
 
         # Forecast for the next N weeks (future)
-        last_week_num = df["week_num"].max()
-        last_week = df["week"].max()
-        forecast_dates = [
-            (last_week + timedelta(weeks=i)) for i in range(1, weeks_ahead + 1)
-        ]
-
-        forecast_X = []
-        forecast_holiday_types = []
-        forecast_holiday_names = []
-        for i, week_start in enumerate(forecast_dates, 1):
-            week_num = last_week_num + i
-            month = week_start.month
-            weekofyear = week_start.isocalendar()[1]
-            week_end = week_start + timedelta(days=6)
-            # Check both official and custom holidays for forecast
-            official_holidays = [
-                h for h in ph_holidays if week_start <= pd.to_datetime(h) <= week_end
-            ]
-            official_holiday_names = [ph_holidays[h] for h in official_holidays]
-
-            custom_holidays = [
-                h
-                for h in custom_holiday_dates
-                if week_start <= pd.to_datetime(h) <= week_end
-            ]
-            custom_holiday_names = [custom_holiday_dict[h] for h in custom_holidays]
-
-            if official_holidays and custom_holidays:
-                is_holiday_week = 1
-                holiday_type = "official"
-                holiday_names = ", ".join(official_holiday_names + custom_holiday_names)
-            elif official_holidays:
-                is_holiday_week = 1
-                holiday_type = "official"
-                holiday_names = ", ".join(official_holiday_names)
-            elif custom_holidays:
-                is_holiday_week = 1
-                holiday_type = "custom"
-                holiday_names = ", ".join(custom_holiday_names)
-            else:
-                is_holiday_week = 0
-                holiday_type = None
-                holiday_names = None
-            forecast_X.append([week_num, month, weekofyear, is_holiday_week])
-            forecast_holiday_types.append(holiday_type)
-            forecast_holiday_names.append(holiday_names)
-        forecast_X = np.array(forecast_X)
-        forecast = model.predict(forecast_X)
-
+        forecast = model.predict(forecast_dates, forecast_flags)
         forecast_results = [
             {
                 "week_start": d.strftime("%Y-%m-%d"),
-                "predicted_sales": float(max(0, pred)),
-                "is_holiday_week": int(x[3]),
-                "holiday_type": htype,
-                "holiday_names": hnames,
+                "predicted_sales": float(pred),
+                "is_holiday_week": holiday_weeks[d][0],
+                "holiday_type": holiday_weeks[d][1],
+                "holiday_names": holiday_weeks[d][2],
             }
-            for d, pred, x, htype, hnames in zip(
-                forecast_dates, forecast, forecast_X, forecast_holiday_types, forecast_holiday_names
-            )
+            for d, pred in zip(forecast_dates, forecast)
         ]
 
         return {
@@ -287,6 +187,7 @@ async def get_weekly_sales_forecast(
 
 @limiter.limit("10/minute")
 @router.get("/sales-summary")
+@cached_response("sales:summary", ttl=60)
 async def get_sales_summary(
     request: Request,
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
@@ -316,25 +217,23 @@ async def get_sales_summary(
         query = text(
             """
             SELECT
-                SUM(quantity) as total_items_sold,
-                SUM(total_price) as total_revenue,
-                AVG(total_price) as avg_order_value,
+                SUM(total_quantity) as total_items_sold,
+                SUM(total_revenue) as total_revenue,
+                SUM(total_revenue) / NULLIF(SUM(row_count), 0) as avg_order_value,
                 COUNT(DISTINCT item_name) as unique_items_sold
-            FROM sales_report
-            WHERE DATE(sale_date) BETWEEN :start_date AND :end_date
+            FROM sales_daily_item
+            WHERE sale_day BETWEEN :start_date AND :end_date
         """
         )
 
         print("[SALES SUMMARY] Start")
-        print("[SALES SUMMARY] Query:", query)
         print(
             "[SALES SUMMARY] Params:",
-            {"start_date": start_datetime, "end_date": end_datetime},
+            {"start_date": start_datetime.date(), "end_date": end_datetime.date()},
         )
-        # Pass as datetime objects (not .date()) to match sales-detailed endpoint
         result = await session.execute(
             query,
-            {"start_date": start_datetime, "end_date": end_datetime},
+            {"start_date": start_datetime.date(), "end_date": end_datetime.date()},
         )
         row = result.fetchone()
         print("[SALES SUMMARY] Row:", row)
@@ -391,6 +290,7 @@ async def get_sales_summary(
 
 @limiter.limit("10/minute")
 @router.get("/sales-by-item")
+@cached_response("sales:by-item", ttl=60)
 async def get_sales_by_item(
     request: Request,
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
@@ -411,19 +311,18 @@ async def get_sales_by_item(
         query = text(
             """
             SELECT
-                sr.item_name,
-                m.category,
-                SUM(sr.quantity) as total_quantity,
-                SUM(sr.total_price) as total_revenue,
-                AVG(sr.unit_price) as avg_price
-            FROM sales_report sr
-            LEFT JOIN menu m ON LOWER(TRIM(sr.item_name)) = LOWER(TRIM(m.dish_name))
-            WHERE DATE(sr.sale_date) BETWEEN :start_date AND :end_date
-            GROUP BY sr.item_name, m.category
+                item_name,
+                MAX(NULLIF(category, '')) as category,
+                SUM(total_quantity) as total_quantity,
+                SUM(total_revenue) as total_revenue,
+                SUM(unit_price_sum) / NULLIF(SUM(unit_price_count), 0) as avg_price
+            FROM sales_daily_item
+            WHERE sale_day BETWEEN :start_date AND :end_date
+            GROUP BY item_name
             ORDER BY total_revenue DESC
             """
         )
-        params = {"start_date": start_datetime, "end_date": end_datetime}
+        params = {"start_date": start_datetime.date(), "end_date": end_datetime.date()}
 
         result = await session.execute(query, params)
 
@@ -454,15 +353,43 @@ async def get_sales_by_item(
         )
 
 
+SALES_DETAIL_BASE_COLUMNS = ["sale_date", "item_name", "category", "quantity", "unit_price", "price", "total_price"]
+SALES_DETAIL_OPTIONAL_COLUMNS = [
+    "order_number", "transaction_number", "receipt_number", "subtotal",
+    "discount_percentage", "dine_type", "order_taker", "cashier",
+    "terminal_no", "member", "itemcode"
+]
+_SALES_DETAIL_FLOAT_COLUMNS = {"unit_price", "price", "subtotal", "discount_percentage", "total_price"}
+
+
+def _sales_detail_formatter(col_name):
+    """Per-column value formatter, chosen once per request instead of per cell."""
+    if col_name == "sale_date":
+        return lambda v: "" if v is None else (v.strftime("%Y-%m-%d %H:%M") if hasattr(v, "strftime") else str(v))
+    if col_name in _SALES_DETAIL_FLOAT_COLUMNS:
+        return lambda v: 0 if v is None else float(v)
+    if col_name == "quantity":
+        return lambda v: 0 if v is None else int(v)
+    return lambda v: "" if v is None else str(v)
+
+
 @limiter.limit("10/minute")
 @router.get("/sales-detailed")
 async def get_sales_detailed(
     request: Request,
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(1000, ge=1, le=5000, description="Rows per page"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
     session: AsyncSession = Depends(get_db),
 ):
-    """Get detailed sales records with all restaurant information (NO aggregation)"""
+    """
+    Get detailed sales records with all restaurant information (NO aggregation)
+
+    Pages are ordered by (sale_date, sales_id) descending. Pass the returned
+    next_cursor to fetch the following page; it is null on the last page.
+    """
     try:
         if not start_date:
             start_date = (datetime.utcnow() - timedelta(days=30)).strftime("%Y-%m-%d")
@@ -473,75 +400,65 @@ async def get_sales_detailed(
         start_datetime = datetime.strptime(start_date, "%Y-%m-%d")
         end_datetime = datetime.strptime(end_date, "%Y-%m-%d")
 
-        # First, check what columns exist in the table
-        check_columns_query = text("""
-            SELECT column_name
-            FROM information_schema.columns
-            WHERE table_name = 'sales_report'
-            ORDER BY ordinal_position
-        """)
-
-        columns_result = await session.execute(check_columns_query)
-        available_columns = [row[0] for row in columns_result.fetchall()]
-
-        print(f"[DEBUG] Available columns in sales_report: {available_columns}")
-
-        # Build dynamic SELECT based on available columns
-        base_columns = ["sale_date", "item_name", "category", "quantity", "unit_price", "price", "total_price"]
-        optional_columns = [
-            "order_number", "transaction_number", "receipt_number", "subtotal",
-            "discount_percentage", "dine_type", "order_taker", "cashier",
-            "terminal_no", "member", "itemcode"
+        # Column list is read from information_schema once and cached
+        available_columns = await table_columns.columns(session, "sales_report")
+        allowed_columns = SALES_DETAIL_BASE_COLUMNS + [
+            col for col in SALES_DETAIL_OPTIONAL_COLUMNS if col in available_columns
         ]
-
-        # Only select columns that exist
-        select_columns = base_columns + [col for col in optional_columns if col in available_columns]
-        select_clause = ", ".join(select_columns)
+        try:
+            select_columns = parse_fields(fields, allowed_columns)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
         # Query with LEFT JOIN to menu to get category if it's empty in sales_report
-        # Uses REPLACE to remove spaces for matching (e.g., "BAGNETSILOG" matches "Bagnet Silog")
+        # menu_id is resolved at import (itemcode / alias / normalized name)
+        select_clause = ", ".join(
+            "COALESCE(NULLIF(sr.category, ''), m.category, '') as category" if col == "category" else f"sr.{col}"
+            for col in select_columns
+        )
+        join_clause = "LEFT JOIN menu m ON m.menu_id = sr.menu_id" if "category" in select_columns else ""
+
+        params = {"start_date": start_datetime, "end_date": end_datetime, "limit": limit + 1}
+        keyset_clause = ""
+        if cursor:
+            try:
+                cursor_date, cursor_id = decode_cursor(cursor, 2)
+                params["cursor_date"], params["cursor_id"] = str(cursor_date), int(cursor_id)
+            except (InvalidCursor, TypeError, ValueError) as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            keyset_clause = "AND (sr.sale_date, sr.sales_id) < (:cursor_date, :cursor_id)"
+
         query = text(f"""
-            SELECT
-                sr.sale_date,
-                sr.item_name,
-                COALESCE(NULLIF(sr.category, ''), m.category, '') as category,
-                sr.quantity,
-                sr.unit_price,
-                sr.price,
-                sr.total_price
-                {', sr.' + ', sr.'.join([col for col in optional_columns if col in available_columns]) if any(col in available_columns for col in optional_columns) else ''}
+            SELECT sr.sale_date AS _cursor_date, sr.sales_id AS _cursor_id, {select_clause}
             FROM sales_report sr
-            LEFT JOIN menu m ON LOWER(REPLACE(TRIM(sr.item_name), ' ', '')) = LOWER(REPLACE(TRIM(m.dish_name), ' ', ''))
+            {join_clause}
             WHERE DATE(sr.sale_date) BETWEEN :start_date AND :end_date
-            ORDER BY sr.sale_date DESC
-            LIMIT 1000
+            {keyset_clause}
+            ORDER BY sr.sale_date DESC, sr.sales_id DESC
+            LIMIT :limit
         """)
 
-        params = {"start_date": start_datetime, "end_date": end_datetime}
         result = await session.execute(query, params)
+        rows = result.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
 
-        sales = []
-        for row in result.fetchall():
-            sale_dict = {}
-            for i, col_name in enumerate(select_columns):
-                value = row[i]
-                if value is not None:
-                    if col_name == "sale_date":
-                        sale_dict[col_name] = value.strftime("%Y-%m-%d %H:%M") if hasattr(value, 'strftime') else str(value)
-                    elif col_name in ["unit_price", "price", "subtotal", "discount_percentage", "total_price"]:
-                        sale_dict[col_name] = float(value)
-                    elif col_name == "quantity":
-                        sale_dict[col_name] = int(value)
-                    else:
-                        sale_dict[col_name] = str(value)
-                else:
-                    sale_dict[col_name] = "" if col_name not in ["quantity", "unit_price", "price", "subtotal", "discount_percentage", "total_price"] else 0
-
-            sales.append(sale_dict)
-
-        print(f"[DEBUG] Returning {len(sales)} sales records")
-        return {"period": f"{start_date} to {end_date}", "sales": sales}
+        formatters = [(col, _sales_detail_formatter(col)) for col in select_columns]
+        sales = [
+            {col: fmt(value) for (col, fmt), value in zip(formatters, row[2:])}
+            for row in rows
+        ]
+        next_cursor = encode_cursor([rows[-1][0], rows[-1][1]]) if has_more else None
+
+        return {
+            "period": f"{start_date} to {end_date}",
+            "sales": sales,
+            "next_cursor": next_cursor,
+            "has_more": has_more,
+        }
 
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         print(f"[ERROR] sales-detailed endpoint error: {str(e)}")
@@ -553,6 +470,7 @@ async def get_sales_detailed(
 
 @limiter.limit("10/minute")
 @router.get("/sales-by-date")
+@cached_response("sales:by-date", ttl=60)
 async def get_sales_by_date(
     request: Request,
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
@@ -573,28 +491,28 @@ async def get_sales_by_date(
 
         # Different groupings for date formatting
         date_format_map = {
-            "daily": "DATE(sale_date)",
-            "weekly": "DATE_TRUNC('week', sale_date)::date",
-            "monthly": "DATE_TRUNC('month', sale_date)::date",
+            "daily": "sale_day",
+            "weekly": "DATE_TRUNC('week', sale_day)::date",
+            "monthly": "DATE_TRUNC('month', sale_day)::date",
         }
 
-        date_format = date_format_map.get(grouping, "DATE(created_at)")
+        date_format = date_format_map.get(grouping, "sale_day")
 
         query = text(
             f"""
-            SELECT 
+            SELECT
                 {date_format} as period,
-                SUM(quantity) as total_items,
-                SUM(total_price) as total_revenue
-            FROM sales_report 
-            WHERE DATE(sale_date) BETWEEN :start_date AND :end_date
+                SUM(total_quantity) as total_items,
+                SUM(total_revenue) as total_revenue
+            FROM sales_daily_item
+            WHERE sale_day BETWEEN :start_date AND :end_date
             GROUP BY {date_format}
             ORDER BY period DESC
         """
         )
 
         result = await session.execute(
-            query, {"start_date": start_datetime, "end_date": end_datetime}
+            query, {"start_date": start_datetime.date(), "end_date": end_datetime.date()}
         )
 
         sales_data = []
@@ -627,6 +545,7 @@ async def get_sales_by_date(
 
 @limiter.limit("10/minute")
 @router.get("/top-performers")
+@cached_response("sales:top-performers", ttl=120)
 async def get_top_performers(
     request: Request,
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
@@ -643,30 +562,38 @@ async def get_top_performers(
             end_date = datetime.utcnow().strftime("%Y-%m-%d")
 
         metric_map = {
-            "revenue": "SUM(total_price)",
-            "quantity": "SUM(quantity)"
+            "revenue": "SUM(total_revenue)",
+            "quantity": "SUM(total_quantity)",
+            "orders": "SUM(row_count)",
         }
 
-        order_by = metric_map.get(metric, "SUM(total_price)")
+        order_by = metric_map.get(metric, "SUM(total_revenue)")
 
         query = text(
             f"""
             SELECT
-    LOWER(TRIM(REGEXP_REPLACE(item_name, '[^a-zA-Z0-9 ]', '', 'g'))) AS normalized_item_name,
-    MAX(category) as category,
-    SUM(quantity) as total_quantity_sold,
-    SUM(total_price) as total_revenue,
-    AVG(unit_price) as avg_price
-FROM sales_report
-WHERE DATE(sale_date) BETWEEN :start_date AND :end_date
-GROUP BY normalized_item_name
-ORDER BY total_revenue DESC
-LIMIT 10
+                LOWER(TRIM(REGEXP_REPLACE(item_name, '[^a-zA-Z0-9 ]', '', 'g'))) AS normalized_item_name,
+                MIN(item_name) as item_name,
+                MAX(category) as category,
+                SUM(total_quantity) as total_quantity,
+                SUM(total_revenue) as total_revenue,
+                SUM(row_count) as orders_count,
+                SUM(unit_price_sum) / NULLIF(SUM(unit_price_count), 0) as avg_price
+            FROM sales_daily_item
+            WHERE sale_day BETWEEN :start_date AND :end_date
+            GROUP BY normalized_item_name
+            ORDER BY {order_by} DESC
+            LIMIT :limit
         """
         )
 
         result = await session.execute(
-            query, {"start_date": start_date, "end_date": end_date, "limit": limit}
+            query,
+            {
+                "start_date": datetime.strptime(start_date, "%Y-%m-%d").date(),
+                "end_date": datetime.strptime(end_date, "%Y-%m-%d").date(),
+                "limit": limit,
+            },
         )
 
         performers = []
@@ -676,9 +603,9 @@ LIMIT 10
                     "item_name": row.item_name,
                     "category": row.category,
                     "total_quantity": row.total_quantity,
-                    "total_revenue": float(row.total_revenue),
+                    "total_revenue": float(row.total_revenue or 0),
                     "orders_count": row.orders_count,
-                    "avg_price": float(row.avg_price),
+                    "avg_price": float(row.avg_price or 0),
                 }
             )
 
@@ -695,6 +622,7 @@ LIMIT 10
 
 @limiter.limit("10/minute")
 @router.get("/hourly-sales")
+@cached_response("sales:hourly", ttl=60)
 async def get_hourly_sales(
     request: Request,
     date: Optional[str] = Query(
@@ -709,18 +637,20 @@ async def get_hourly_sales(
 
         query = text(
             """
-            SELECT 
-                EXTRACT(HOUR FROM sale_date) as hour,
-                SUM(quantity) as total_items,
-                SUM(total_price) as total_revenue
-            FROM sales_report 
-            WHERE DATE(sale_date) = :date
-            GROUP BY EXTRACT(HOUR FROM sale_date)
-            ORDER BY hour
+            SELECT
+                sale_hour as hour,
+                row_count as orders_count,
+                total_quantity as total_items,
+                total_revenue
+            FROM sales_hourly
+            WHERE sale_day = :date
+            ORDER BY sale_hour
         """
         )
 
-        result = await session.execute(query, {"date": date})
+        result = await session.execute(
+            query, {"date": datetime.strptime(date, "%Y-%m-%d").date()}
+        )
 
         hourly_data = []
         for row in result.fetchall():
@@ -743,6 +673,7 @@ async def get_hourly_sales(
 
 @limiter.limit("10/minute")
 @router.get("/sales-comparison")
+@cached_response("sales:comparison", ttl=120)
 async def get_sales_comparison(
     request: Request,
     current_start: str = Query(..., description="Current period start (YYYY-MM-DD)"),
@@ -757,22 +688,28 @@ async def get_sales_comparison(
         current_query = text(
             """
             SELECT
-                SUM(quantity) as total_items,
-                SUM(total_price) as total_revenue,
-                AVG(total_price) as avg_order_value
-            FROM sales_report
-            WHERE DATE(sale_date) BETWEEN :start_date AND :end_date
+                SUM(row_count) as total_orders,
+                SUM(total_quantity) as total_items,
+                SUM(total_revenue) as total_revenue,
+                SUM(total_revenue) / NULLIF(SUM(row_count), 0) as avg_order_value
+            FROM sales_daily_item
+            WHERE sale_day BETWEEN :start_date AND :end_date
         """
         )
 
+        def to_date(val):
+            return datetime.strptime(val, "%Y-%m-%d").date()
+
         current_result = await session.execute(
-            current_query, {"start_date": current_start, "end_date": current_end}
+            current_query,
+            {"start_date": to_date(current_start), "end_date": to_date(current_end)},
         )
         current_row = current_result.fetchone()
 
         # Previous period query
         previous_result = await session.execute(
-            current_query, {"start_date": previous_start, "end_date": previous_end}
+            current_query,
+            {"start_date": to_date(previous_start), "end_date": to_date(previous_end)},
         )
         previous_row = previous_result.fetchone()
 
@@ -830,6 +767,7 @@ async def get_sales_comparison(
 
 @limiter.limit("10/minute")
 @router.get("/comprehensive-sales-analytics")
+@cached_response("sales:comprehensive", ttl=300)
 async def get_comprehensive_sales_analytics(
     request: Request,
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
@@ -853,6 +791,8 @@ async def get_comprehensive_sales_analytics(
     - Implemented unit conversion (g, kg, ml, L, oz, tbsp, tsp, cup, pcs)
     - Adjusted unit costs: assumes inventory unit_cost is per kg/L, divides by 1000 for gram/ml calculations
     - This prevents the 1000x multiplication error that caused COGS to be 73x revenue
+    - Unit costs now come from ingredient_unit_cost (per g/ml/pcs, using the
+      inventory_settings default unit when known); see app/utils/ingredient_cost.py
     """
     try:
         # Default to ALL TIME if no dates provided
@@ -871,13 +811,13 @@ async def get_comprehensive_sales_analytics(
         revenue_query = text(
             """
             SELECT
-                SUM(quantity) as total_items_sold,
-                SUM(total_price) as total_revenue,
-                AVG(unit_price) as avg_unit_cost,
+                SUM(total_quantity) as total_items_sold,
+                SUM(total_revenue) as total_revenue,
+                SUM(unit_price_sum) / NULLIF(SUM(unit_price_count), 0) as avg_unit_cost,
                 COUNT(DISTINCT item_name) as unique_items_sold,
-                COUNT(*) as total_transactions
-            FROM sales_report
-            WHERE DATE(sale_date) BETWEEN :start_date AND :end_date
+                SUM(row_count) as total_transactions
+            FROM sales_daily_item
+            WHERE sale_day BETWEEN :start_date AND :end_date
         """
         )
 
@@ -894,246 +834,89 @@ async def get_comprehensive_sales_analytics(
         avg_unit_cost = float(revenue_row.avg_unit_cost or 0)
 
         # 2. Calculate COGS (Cost of Goods Sold) from menu ingredients
-        # This calculates the cost based on ingredients used for sold menu items
-        # IMPORTANT: Properly aggregates sales by menu item first, then calculates ingredient costs
-        # This prevents double-counting when multiple sales rows exist for the same dish
+        # Sales are aggregated per menu item first (from the rollup) to avoid
+        # double-counting, then joined once to ingredient_unit_cost, which holds
+        # each ingredient's cost already normalized to g / ml / pcs. Recipe
+        # quantities are converted to that same base unit in Python with the
+        # unit converter; lines whose units cannot be reconciled are left out.
+        await ensure_ingredient_unit_costs()
         cogs_query = text(
-            """
-            WITH sales_aggregated AS (
-                -- CRITICAL FIX: Aggregate sales by item FIRST to avoid double-counting
-                -- Each row in sales_report represents ONE item sold, so we SUM the quantities
-                SELECT
-                    sr.item_name,
-                    SUM(sr.quantity) as total_quantity_sold,
-                    m.menu_id
-                FROM sales_report sr
-                LEFT JOIN menu m ON LOWER(TRIM(sr.item_name)) = LOWER(TRIM(m.dish_name))
-                WHERE DATE(sr.sale_date) BETWEEN :start_date AND :end_date
-                  AND m.menu_id IS NOT NULL
-                GROUP BY sr.item_name, m.menu_id
-            ),
-            ingredient_costs AS (
-                SELECT
-                    sa.item_name,
-                    sa.total_quantity_sold,
-                    mi.ingredient_name,
-                    mi.quantity as ingredient_quantity_per_serving,
-                    mi.measurements,
-                    -- Get unit cost from inventory
-                    COALESCE(
-                        (SELECT AVG(it.unit_cost)
-                        FROM inventory_today it
-                        WHERE LOWER(TRIM(it.item_name)) = LOWER(TRIM(mi.ingredient_name))
-                        ),
-                        (SELECT AVG(i.unit_cost)
-                        FROM inventory i
-                        WHERE LOWER(TRIM(i.item_name)) = LOWER(TRIM(mi.ingredient_name))
-                        ),
-                        (SELECT AVG(isp.unit_cost)
-                        FROM inventory_spoilage isp
-                        WHERE LOWER(TRIM(isp.item_name)) = LOWER(TRIM(mi.ingredient_name))
-                        ),
-                        0
-                    ) as inventory_unit_cost,
-                    -- CRITICAL FIX: Determine the correct unit cost based on measurement type
-                    -- If measurements use small units (g, ml) but inventory unit_cost is for large units (kg, L),
-                    -- we need to divide by the appropriate conversion factor to get cost per base unit
-                    CASE
-                        WHEN LOWER(mi.measurements) IN ('g', 'ml', 'oz', 'tbsp', 'tsp', 'cup') THEN
-                            -- For small units, assume inventory unit_cost is per kg/L, so divide by 1000
-                            COALESCE(
-                                (SELECT AVG(it.unit_cost) / 1000.0
-                                FROM inventory_today it
-                                WHERE LOWER(TRIM(it.item_name)) = LOWER(TRIM(mi.ingredient_name))
-                                ),
-                                (SELECT AVG(i.unit_cost) / 1000.0
-                                FROM inventory i
-                                WHERE LOWER(TRIM(i.item_name)) = LOWER(TRIM(mi.ingredient_name))
-                                ),
-                                (SELECT AVG(isp.unit_cost) / 1000.0
-                                FROM inventory_spoilage isp
-                                WHERE LOWER(TRIM(isp.item_name)) = LOWER(TRIM(mi.ingredient_name))
-                                ),
-                                0
-                            )
-                        WHEN LOWER(mi.measurements) IN ('kg', 'l', 'lbs', 'gal', 'gallon') THEN
-                            -- For large units, assume unit_cost is per kg/L/lb/gal, divide by 1000 for gram/ml base
-                            COALESCE(
-                                (SELECT AVG(it.unit_cost) / 1000.0
-                                FROM inventory_today it
-                                WHERE LOWER(TRIM(it.item_name)) = LOWER(TRIM(mi.ingredient_name))
-                                ),
-                                (SELECT AVG(i.unit_cost) / 1000.0
-                                FROM inventory i
-                                WHERE LOWER(TRIM(i.item_name)) = LOWER(TRIM(mi.ingredient_name))
-                                ),
-                                (SELECT AVG(isp.unit_cost) / 1000.0
-                                FROM inventory_spoilage isp
-                                WHERE LOWER(TRIM(isp.item_name)) = LOWER(TRIM(mi.ingredient_name))
-                                ),
-                                0
-                            )
-                        WHEN LOWER(COALESCE(mi.measurements, '')) IN ('pcs', 'pack', 'case', 'sack', 'btl', 'bottle', 'can') THEN
-                            -- For count/container units, use unit_cost as-is (cost per piece/pack/case/etc)
-                            COALESCE(
-                                (SELECT AVG(it.unit_cost)
-                                FROM inventory_today it
-                                WHERE LOWER(TRIM(it.item_name)) = LOWER(TRIM(mi.ingredient_name))
-                                ),
-                                (SELECT AVG(i.unit_cost)
-                                FROM inventory i
-                                WHERE LOWER(TRIM(i.item_name)) = LOWER(TRIM(mi.ingredient_name))
-                                ),
-                                (SELECT AVG(isp.unit_cost)
-                                FROM inventory_spoilage isp
-                                WHERE LOWER(TRIM(isp.item_name)) = LOWER(TRIM(mi.ingredient_name))
-                                ),
-                                0
-                            )
-                        ELSE
-                            -- DEFAULT: For missing/unknown/empty units, assume grams and divide by 1000
-                            -- This is the safe default since inventory unit_cost is per kg
-                            COALESCE(
-                                (SELECT AVG(it.unit_cost) / 1000.0
-                                FROM inventory_today it
-                                WHERE LOWER(TRIM(it.item_name)) = LOWER(TRIM(mi.ingredient_name))
-                                ),
-                                (SELECT AVG(i.unit_cost) / 1000.0
-                                FROM inventory i
-                                WHERE LOWER(TRIM(i.item_name)) = LOWER(TRIM(mi.ingredient_name))
-                                ),
-                                (SELECT AVG(isp.unit_cost) / 1000.0
-                                FROM inventory_spoilage isp
-                                WHERE LOWER(TRIM(isp.item_name)) = LOWER(TRIM(mi.ingredient_name))
-                                ),
-                                0
-                            )
-                    END as unit_cost_adjusted
-                FROM sales_aggregated sa
-                JOIN menu_ingredients mi ON sa.menu_id = mi.menu_id
-                WHERE mi.ingredient_name IS NOT NULL
-            ),
-            ingredient_costs_normalized AS (
-                SELECT
-                    item_name,
-                    total_quantity_sold,
-                    ingredient_name,
-                    ingredient_quantity_per_serving,
-                    measurements,
-                    unit_cost_adjusted,
-                    -- Normalize quantity to base units (grams or ml)
-                    -- Handles ALL measurement units from inventory settings and menu ingredients
-                    CASE
-                        -- Weight conversions to grams
-                        WHEN LOWER(measurements) = 'kg' THEN ingredient_quantity_per_serving * 1000
-                        WHEN LOWER(measurements) = 'g' THEN ingredient_quantity_per_serving
-                        WHEN LOWER(measurements) = 'lbs' THEN ingredient_quantity_per_serving * 453.592  -- pounds to grams
-                        WHEN LOWER(measurements) = 'oz' THEN ingredient_quantity_per_serving * 28.35    -- ounces to grams
-
-                        -- Volume conversions to ml
-                        WHEN LOWER(measurements) = 'l' THEN ingredient_quantity_per_serving * 1000      -- liters to ml
-                        WHEN LOWER(measurements) = 'ml' THEN ingredient_quantity_per_serving            -- already ml
-                        WHEN LOWER(measurements) = 'gal' THEN ingredient_quantity_per_serving * 3785.41 -- gallons to ml
-                        WHEN LOWER(measurements) = 'gallon' THEN ingredient_quantity_per_serving * 3785.41 -- gallons to ml (alt spelling)
-                        WHEN LOWER(measurements) = 'tbsp' THEN ingredient_quantity_per_serving * 15     -- tablespoon to ml
-                        WHEN LOWER(measurements) = 'tsp' THEN ingredient_quantity_per_serving * 5       -- teaspoon to ml
-                        WHEN LOWER(measurements) = 'cup' THEN ingredient_quantity_per_serving * 240     -- cup to ml
-
-                        -- Count/container units (no conversion needed)
-                        WHEN LOWER(measurements) IN ('pcs', 'pack', 'case', 'sack', 'btl', 'bottle', 'can') THEN ingredient_quantity_per_serving
-
-                        ELSE ingredient_quantity_per_serving  -- default: no conversion
-                    END as quantity_in_base_units
-                FROM ingredient_costs
-            )
-            SELECT
-                -- Calculate: (total dishes sold) × (ingredient qty in base units) × (adjusted unit cost)
-                COALESCE(SUM(
-                    total_quantity_sold * quantity_in_base_units * unit_cost_adjusted
-                ), 0) as total_cogs
-            FROM ingredient_costs_normalized
-        """
-        )
-
-        # Debug: First, let's see sample data to understand the issue
-        debug_query = text(
             """
             WITH sales_aggregated AS (
                 SELECT
-                    sr.item_name,
-                    SUM(sr.quantity) as total_quantity_sold,
-                    m.menu_id
-                FROM sales_report sr
-                LEFT JOIN menu m ON LOWER(TRIM(sr.item_name)) = LOWER(TRIM(m.dish_name))
-                WHERE DATE(sr.sale_date) BETWEEN :start_date AND :end_date
-                  AND m.menu_id IS NOT NULL
-                GROUP BY sr.item_name, m.menu_id
-            ),
-            ingredient_costs AS (
-                SELECT
-                    sa.item_name,
-                    sa.total_quantity_sold,
-                    mi.ingredient_name,
-                    mi.quantity as ingredient_quantity_per_serving,
-                    mi.measurements,
-                    COALESCE(
-                        (SELECT AVG(it.unit_cost)
-                        FROM inventory_today it
-                        WHERE LOWER(TRIM(it.item_name)) = LOWER(TRIM(mi.ingredient_name))
-                        ),
-                        (SELECT AVG(i.unit_cost)
-                        FROM inventory i
-                        WHERE LOWER(TRIM(i.item_name)) = LOWER(TRIM(mi.ingredient_name))
-                        ),
-                        0
-                    ) as inventory_unit_cost
-                FROM sales_aggregated sa
-                JOIN menu_ingredients mi ON sa.menu_id = mi.menu_id
-                WHERE mi.ingredient_name IS NOT NULL
+                    sdi.menu_id,
+                    MIN(sdi.item_name) as item_name,
+                    SUM(sdi.total_quantity) as total_quantity_sold
+                FROM sales_daily_item sdi
+                WHERE sdi.sale_day BETWEEN :start_date AND :end_date
+                  AND sdi.menu_id IS NOT NULL
+                GROUP BY sdi.menu_id
             )
             SELECT
-                item_name,
-                ingredient_name,
-                total_quantity_sold,
-                ingredient_quantity_per_serving,
-                measurements,
-                inventory_unit_cost,
-                (total_quantity_sold * ingredient_quantity_per_serving * inventory_unit_cost) as raw_cost
-            FROM ingredient_costs
-            ORDER BY raw_cost DESC
-            LIMIT 5
+                sa.item_name,
+                mi.ingredient_name,
+                sa.total_quantity_sold,
+                mi.quantity as ingredient_quantity_per_serving,
+                mi.measurements,
+                iuc.base_unit,
+                iuc.cost_per_base_unit
+            FROM sales_aggregated sa
+            JOIN menu_ingredients mi ON mi.menu_id = sa.menu_id
+            JOIN ingredient_unit_cost iuc ON iuc.ingredient_key = LOWER(TRIM(mi.ingredient_name))
+            WHERE mi.ingredient_name IS NOT NULL
         """
         )
 
-        debug_result = await session.execute(
-            debug_query,
-            {"start_date": start_datetime.date(), "end_date": end_datetime.date()},
-        )
-
-        for row in debug_result.fetchall():
-            print(f"  {row.item_name} -> {row.ingredient_name}:")
-            print(f"    Sold: {row.total_quantity_sold} | Per serving: {row.ingredient_quantity_per_serving} {row.measurements} | Unit cost: ₱{row.inventory_unit_cost:.4f} | Total: ₱{row.raw_cost:,.2f}")
-
         cogs_result = await session.execute(
             cogs_query,
             {"start_date": start_datetime.date(), "end_date": end_datetime.date()},
         )
-        cogs_row = cogs_result.fetchone()
-        total_cogs = float(cogs_row.total_cogs or 0) if cogs_row else 0.0
-
+        cogs_lines = []
+        unpriced_lines = []
+        for row in cogs_result.fetchall():
+            quantity_in_base_units = recipe_quantity_in_base_units(
+                row.ingredient_quantity_per_serving, row.measurements, row.base_unit
+            )
+            if quantity_in_base_units is None:
+                unpriced_lines.append(row)
+                continue
+            line_cost = (
+                float(row.total_quantity_sold or 0)
+                * quantity_in_base_units
+                * float(row.cost_per_base_unit or 0)
+            )
+            cogs_lines.append((line_cost, row))
+        total_cogs = sum(cost for cost, _ in cogs_lines)
+
+        if unpriced_lines:
+            logger.warning(
+                "COGS skipped %d recipe lines whose unit does not match the ingredient cost unit: %s",
+                len(unpriced_lines),
+                ", ".join(
+                    f"{row.item_name} -> {row.ingredient_name} ({row.measurements} vs {row.base_unit})"
+                    for row in unpriced_lines[:5]
+                ),
+            )
+        # Largest cost lines, to make unit mistakes easy to spot
+        log_payload(
+            logger,
+            "Top COGS lines",
+            [
+                {
+                    "item": row.item_name,
+                    "ingredient": row.ingredient_name,
+                    "sold": row.total_quantity_sold,
+                    "per_serving": f"{row.ingredient_quantity_per_serving} {row.measurements}",
+                    "cost_per_base_unit": f"{row.cost_per_base_unit} / {row.base_unit}",
+                    "total": round(line_cost, 2),
+                }
+                for line_cost, row in sorted(cogs_lines, key=lambda line: line[0], reverse=True)[:5]
+            ],
+        )
         if total_cogs > total_revenue:
-            print(f"[COGS WARNING] COGS is higher than revenue! Check unit conversions and inventory unit_cost values.")
-        print(f"{'='*60}\n")
+            logger.warning("COGS is higher than revenue; check unit conversions and inventory unit_cost values")
 
         # 3. Get Spoilage/Loss Costs
-        print(f"[DEBUG] Querying spoilage data: start={start_datetime.date()}, end={end_datetime.date()}")
-
-        # First check if there's ANY data in inventory_spoilage
-        check_query = text("SELECT COUNT(*), MIN(DATE(spoilage_date)), MAX(DATE(spoilage_date)) FROM inventory_spoilage")
-        check_result = await session.execute(check_query)
-        check_row = check_result.fetchone()
-        print(f"[DEBUG] Spoilage table has {check_row[0]} total records, date range: {check_row[1]} to {check_row[2]}")
-
         spoilage_query = text(
             """
             SELECT
@@ -1157,7 +940,11 @@ async def get_comprehensive_sales_analytics(
         total_spoilage_incidents = spoilage_row.total_spoilage_incidents or 0
         unique_items_spoiled = spoilage_row.unique_items_spoiled or 0
 
-        print(f"[DEBUG] Spoilage query results: cost={total_spoilage_cost}, qty={total_quantity_spoiled}, incidents={total_spoilage_incidents}")
+        logger.debug(
+            "Spoilage %s..%s: cost=%s, qty=%s, incidents=%s",
+            start_datetime.date(), end_datetime.date(),
+            total_spoilage_cost, total_quantity_spoiled, total_spoilage_incidents,
+        )
 
         # 4. Calculate Profitability Metrics
         gross_profit = total_revenue - total_cogs
@@ -1177,15 +964,14 @@ async def get_comprehensive_sales_analytics(
         top_items_query = text(
             """
             SELECT
-                sr.item_name,
-                COALESCE(NULLIF(sr.category, ''), m.category, 'Uncategorized') as category,
-                SUM(sr.quantity) as total_quantity_sold,
-                SUM(sr.total_price) as total_revenue,
-                AVG(sr.unit_price) as avg_price
-            FROM sales_report sr
-            LEFT JOIN menu m ON LOWER(REPLACE(TRIM(sr.item_name), ' ', '')) = LOWER(REPLACE(TRIM(m.dish_name), ' ', ''))
-            WHERE DATE(sr.sale_date) BETWEEN :start_date AND :end_date
-            GROUP BY sr.item_name, COALESCE(NULLIF(sr.category, ''), m.category, 'Uncategorized')
+                item_name,
+                COALESCE(NULLIF(category, ''), 'Uncategorized') as category,
+                SUM(total_quantity) as total_quantity_sold,
+                SUM(total_revenue) as total_revenue,
+                SUM(unit_price_sum) / NULLIF(SUM(unit_price_count), 0) as avg_price
+            FROM sales_daily_item
+            WHERE sale_day BETWEEN :start_date AND :end_date
+            GROUP BY item_name, COALESCE(NULLIF(category, ''), 'Uncategorized')
             ORDER BY total_revenue DESC
             LIMIT 10
         """
@@ -1212,15 +998,14 @@ async def get_comprehensive_sales_analytics(
         category_query = text(
             """
             SELECT
-                COALESCE(NULLIF(sr.category, ''), m.category, 'Uncategorized') as category,
-                SUM(sr.quantity) as total_quantity,
-                SUM(sr.total_price) as total_revenue,
-                COUNT(DISTINCT sr.item_name) as unique_items,
-                AVG(sr.unit_price) as avg_price
-            FROM sales_report sr
-            LEFT JOIN menu m ON LOWER(REPLACE(TRIM(sr.item_name), ' ', '')) = LOWER(REPLACE(TRIM(m.dish_name), ' ', ''))
-            WHERE DATE(sr.sale_date) BETWEEN :start_date AND :end_date
-            GROUP BY COALESCE(NULLIF(sr.category, ''), m.category, 'Uncategorized')
+                COALESCE(NULLIF(category, ''), 'Uncategorized') as category,
+                SUM(total_quantity) as total_quantity,
+                SUM(total_revenue) as total_revenue,
+                COUNT(DISTINCT item_name) as unique_items,
+                SUM(unit_price_sum) / NULLIF(SUM(unit_price_count), 0) as avg_price
+            FROM sales_daily_item
+            WHERE sale_day BETWEEN :start_date AND :end_date
+            GROUP BY COALESCE(NULLIF(category, ''), 'Uncategorized')
             ORDER BY total_revenue DESC
         """
         )
@@ -1290,12 +1075,12 @@ async def get_comprehensive_sales_analytics(
         daily_trend_query = text(
             """
             SELECT
-                DATE(sale_date) as sale_day,
-                SUM(quantity) as daily_items,
-                SUM(total_price) as daily_revenue
-            FROM sales_report
-            WHERE DATE(sale_date) BETWEEN :last_7_start AND :end_date
-            GROUP BY DATE(sale_date)
+                sale_day,
+                SUM(total_quantity) as daily_items,
+                SUM(total_revenue) as daily_revenue
+            FROM sales_daily_item
+            WHERE sale_day BETWEEN :last_7_start AND :end_date
+            GROUP BY sale_day
             ORDER BY sale_day DESC
         """
         )
@@ -1321,6 +1106,7 @@ async def get_comprehensive_sales_analytics(
             "summary": {
                 "total_revenue": round(total_revenue, 2),
                 "total_cogs": round(total_cogs, 2),
+                "cogs_unpriced_lines": len(unpriced_lines),
                 "gross_profit": round(gross_profit, 2),
                 "total_loss": round(total_spoilage_cost, 2),
                 "net_profit": round(net_profit, 2),
@@ -1360,6 +1146,78 @@ async def get_comprehensive_sales_analytics(
         )
 
 
+SALES_EXPORT_COLUMNS = [
+    "sale_date", "item_name", "category", "quantity", "unit_price", "price",
+    "subtotal", "discount_percentage", "total_price", "order_number",
+    "transaction_number", "receipt_number", "dine_type", "order_taker",
+    "cashier", "terminal_no", "member", "itemcode",
+]
+
+
+@limiter.limit("10/minute")
+@router.get("/export-sales/download")
+async def download_sales_export(
+    request: Request,
+    start_date: str = Query(..., description="Start date (YYYY-MM-DD)"),
+    end_date: str = Query(..., description="End date (YYYY-MM-DD)"),
+    format: str = Query("xlsx", description="Export format: csv or xlsx"),
+    user=Depends(require_role("Owner", "General Manager", "Store Manager")),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Stream every sales_report row in the period as CSV or XLSX.
+
+    Unlike /sales-detailed there is no row cap: rows are read through a
+    server-side cursor and written in batches, so memory stays flat.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format: {format}")
+    try:
+        params = {
+            "start_date": datetime.strptime(start_date, "%Y-%m-%d").date(),
+            "end_date": datetime.strptime(end_date, "%Y-%m-%d").date(),
+        }
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD.")
+
+    select_list = ", ".join(
+        "COALESCE(NULLIF(sr.category, ''), m.category, '')" if col == "category" else f"sr.{col}"
+        for col in SALES_EXPORT_COLUMNS
+    )
+    query = f"""
+        SELECT {select_list}
+        FROM sales_report sr
+        LEFT JOIN menu m ON m.menu_id = sr.menu_id
+        WHERE DATE(sr.sale_date) BETWEEN :start_date AND :end_date
+        ORDER BY sr.sale_date DESC, sr.sales_id DESC
+    """
+
+    try:
+        user_row = getattr(user, "user_row", user)
+        new_activity = UserActivityLog(
+            user_id=user_row.get("user_id"),
+            action_type="export sales report",
+            description=f"Downloaded sales report ({format.upper()}) for period: {start_date} to {end_date}",
+            activity_date=datetime.utcnow(),
+            report_date=datetime.utcnow(),
+            user_name=user_row.get("name"),
+            role=user_row.get("user_role"),
+        )
+        db.add(new_activity)
+        await db.flush()
+        await db.commit()
+    except Exception as e:
+        print(f"Failed to record user activity for sales export: {e}")
+
+    return export_response(
+        format,
+        f"Sales_Report_{start_date}_to_{end_date}",
+        SALES_EXPORT_COLUMNS,
+        stream_query_batches(query, params),
+        sheet_name="Sales",
+    )
+
+
 @limiter.limit("10/minute")
 @router.post("/export-sales")
 async def export_sales(
@@ -1421,6 +1279,7 @@ async def export_sales(
 
 @limiter.limit("5/minute")
 @router.post("/clean-sales-report-invalid-dates")
+@invalidates(*SALES_CACHE_GROUPS)
 async def clean_sales_report_invalid_dates(
     request: Request,
     session: AsyncSession = Depends(get_db),
@@ -1455,6 +1314,8 @@ async def clean_sales_report_invalid_dates(
             await session.commit()
             deleted_count = len(delete_ids)
             deleted_ids = delete_ids
+            # Rollups could not be built while unparseable dates were present
+            await refresh_sales_rollups(session)
         return {
             "deleted_count": deleted_count,
             "deleted_ids": deleted_ids,
@@ -1467,6 +1328,7 @@ async def clean_sales_report_invalid_dates(
         raise HTTPException(status_code=500, detail=f"Error cleaning sales_report: {str(e)}")
 
 @router.post("/update-sales-categories")
+@invalidates(*SALES_CACHE_GROUPS)
 async def update_sales_categories(session: AsyncSession = Depends(get_db)):
     """
     Update missing categories in sales_report by joining with menu table.
@@ -1481,8 +1343,36 @@ async def update_sales_categories(session: AsyncSession = Depends(get_db)):
         """)
         result = await session.execute(update_query)
         await session.commit()
+        await refresh_sales_rollups(session)
         return {"message": "Sales categories updated successfully."}
     except Exception as e:
         import traceback
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Error updating sales categories: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error updating sales categories: {str(e)}")
+
+
+@limiter.limit("5/minute")
+@router.post("/resolve-sales-menu-ids")
+@invalidates(*SALES_CACHE_GROUPS)
+async def resolve_sales_menu_ids(
+    request: Request,
+    session: AsyncSession = Depends(get_db),
+):
+    """
+    Backfill sales_report.menu_id for rows imported before resolution existed
+    or that did not match any menu item / alias at import time.
+    """
+    try:
+        updated = await backfill_sales_menu_ids(session)
+        unresolved_result = await session.execute(
+            text("SELECT COUNT(*) FROM sales_report WHERE menu_id IS NULL")
+        )
+        return {
+            "updated": updated,
+            "unresolved": unresolved_result.scalar() or 0,
+            "message": f"Resolved menu_id for {updated} sales_report rows.",
+        }
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Error resolving sales menu ids: {str(e)}")
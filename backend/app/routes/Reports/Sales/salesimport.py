@@ -10,6 +10,9 @@ from app.routes.Inventory.master_inventory import require_role
 from app.routes.Inventory.aggregate_status import update_aggregate_stock_status
 from app.routes.Inventory.AutomationTransferring import fifo_transfer_to_today_with_surplus_first
 from app.routes.General.notification import create_notification
+from app.utils.response_cache import invalidates, SALES_CACHE_GROUPS
+from app.utils.sales_rollup import refresh_sales_rollups_for
+from app.utils.menu_resolver import load_menu_resolver
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -924,6 +927,7 @@ async def auto_deduct_inventory_from_sales(sale_date: str, enable_validation: bo
 
 
 @router.post("/import-sales")
+@invalidates(*SALES_CACHE_GROUPS)
 async def import_sales(
     request: Request,
     user=Depends(require_role("Owner", "General Manager", "Store Manager")),
@@ -936,6 +940,8 @@ async def import_sales(
     # Import rows individually with all detailed fields (NO aggregation)
     imported = 0
     sale_dates = set()
+    imported_sale_datetimes = []
+    resolver = await load_menu_resolver(db)
 
     for row in rows:
         # Extract all fields from Excel import
@@ -966,6 +972,7 @@ async def import_sales(
             "total_price": float(row.get("netamount", row.get("amount", 0))),  # Final price after discount
             "sale_date": sale_datetime,
             "category": row.get("category", ""),
+            "menu_id": resolver.resolve(itemcode, item_name),
 
             # Discount field (sdisc_perc is the discount percentage that has data)
             "discount_percentage": float(row.get("sdisc_perc", 0)),
@@ -988,6 +995,7 @@ async def import_sales(
         res = supabase.table("sales_report").insert(db_row).execute()
         if res.data is not None:
             imported += 1
+            imported_sale_datetimes.append(sale_datetime)
             if date_str:
                 sale_dates.add(date_str)
 
@@ -996,6 +1004,11 @@ async def import_sales(
         "rows": imported
     }
 
+    # Keep the report rollups in step with the imported days
+    rollup_days = await refresh_sales_rollups_for(db, imported_sale_datetimes)
+    if rollup_days:
+        logger.info(f"Sales rollups refreshed for {len(rollup_days)} days ({rollup_days[0]} to {rollup_days[-1]})")
+
     # Automatically deduct inventory if enabled - WITH DATE VALIDATION
     if auto_deduct and sale_dates:
         logger.info(f"AUTO-DEDUCTION ENABLED: Processing {len(sale_dates)} sale dates: {list(sale_dates)}")
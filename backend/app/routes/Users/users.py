@@ -10,8 +10,12 @@ from datetime import datetime
 from app.supabase import supabase, postgrest_client, get_db
 from app.routes.Reports.UserActivity.userActivity import UserActivityLog
 from app.utils.rbac import require_role
+from app.utils.app_logging import log_payload
 from enum import Enum
 import re
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -176,16 +180,11 @@ class UserUpdate(BaseModel):
 @router.get("/users", response_model=List[User])
 def get_users(request: Request):
     try:
-        print("🔍 Starting get_users request...")
-        # Test Supabase connection
         response = postgrest_client.table("users").select("*").execute()
-        print("✅ Raw Supabase response:", response)
-        print("📊 Supabase data:", response.data)
-        print("📊 Data type:", type(response.data))
-        print("📊 Data length:", len(response.data) if response.data else 0)
+        log_payload(logger, "Users response", response.data)
 
         if not response.data:
-            print("⚠️ No users found in database")
+            logger.info("No users found in database")
             return []
 
         users = []
@@ -198,17 +197,17 @@ def get_users(request: Request):
                     user_data["last_login"] = None
                 user_obj = User(**user_data)
                 users.append(user_obj)
-                print(f"✅ Parsed user: {user_obj.name}")
             except Exception as parse_error:
-                print(f"❌ Error parsing user {user}: {parse_error}")
+                logger.warning(
+                    "Skipping unparseable user: %s",
+                    parse_error,
+                    extra={"fields": {"user_id": user.get("user_id")}},
+                )
                 continue
-        print(f"🏁 Returning {len(users)} users")
+        logger.debug("Returning %d users", len(users))
         return users
     except Exception as e:
-        print(f"❌ Error in get_users: {e}")
-        print(f"❌ Error type: {type(e)}")
-        import traceback
-        print(f"❌ Full traceback: {traceback.format_exc()}")
+        logger.exception("Error in get_users")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 
@@ -329,9 +328,9 @@ async def create_user(
             db.add(new_activity)
             await db.flush()
             await db.commit()
-            print("user add activity logged successfully.")
+            logger.debug("User add activity logged")
         except Exception as e:
-            print("Failed to record user add activity:", e)
+            logger.warning("Failed to record user add activity: %s", e)
         return User(**response.data[0])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -389,7 +388,7 @@ async def update_user(
                 )
 
         update_data = user.dict(exclude_unset=True)
-        print("Update payload:", update_data)  # Add this line
+        log_payload(logger, "User update payload", update_data)
         update_data["updated_at"] = datetime.utcnow().isoformat()
         response = (
             postgrest_client.table("users").update(update_data).eq("user_id", user_id).execute()
@@ -401,9 +400,9 @@ async def update_user(
         if auth_id and old_email and new_email and old_email != new_email:
             try:
                 supabase.auth.admin.update_user_by_id(auth_id, {"email": new_email})
-                print(f"Updated auth email for user {auth_id} to {new_email}")
+                logger.info("Updated auth email for user %s", auth_id)
             except Exception as e:
-                print(f"Failed to update auth email: {e}")
+                logger.warning("Failed to update auth email for user %s: %s", auth_id, e)
                 
         try:
             user_row = getattr(user_access, "user_row", user_access)
@@ -421,9 +420,9 @@ async def update_user(
             db.add(new_activity)
             await db.flush()
             await db.commit()
-            print("user update activity logged successfully.")
+            logger.debug("User update activity logged")
         except Exception as e:
-            print("Failed to record user update activity:", e)
+            logger.warning("Failed to record user update activity: %s", e)
 
         return User(**response.data[0])
     except Exception as e:
@@ -445,7 +444,7 @@ async def delete_user(
             .single()
             .execute()
         )
-        print("Delete user lookup result:", user_response.data)  # Debug log
+        log_payload(logger, "Delete user lookup result", user_response.data)
         auth_id = user_response.data.get("auth_id") if user_response.data else None
         target_name = (
             user_response.data.get("name") if user_response.data else "Unknown"
@@ -456,7 +455,7 @@ async def delete_user(
 
         # Delete from users table
         response = postgrest_client.table("users").delete().eq("user_id", user_id).execute()
-        print("Delete users table result:", response.data)  # Debug log
+        log_payload(logger, "Delete users table result", response.data)
         if not response.data:
             raise HTTPException(status_code=404, detail="User not found")
 
@@ -464,9 +463,9 @@ async def delete_user(
         if auth_id:
             try:
                 supabase.auth.admin.delete_user(auth_id)
-                print(f"Deleted user from Supabase Auth: {auth_id}")
+                logger.info("Deleted user from Supabase Auth: %s", auth_id)
             except Exception as auth_err:
-                print(f"Error deleting from Supabase Auth: {auth_err}")
+                logger.warning("Error deleting user %s from Supabase Auth: %s", auth_id, auth_err)
 
         try:
             user_row = getattr(user_access, "user_row", user_access)
@@ -482,13 +481,13 @@ async def delete_user(
             db.add(new_activity)
             await db.flush()
             await db.commit()
-            print("user delete activity logged successfully.")
+            logger.debug("User delete activity logged")
         except Exception as e:
-            print("Failed to record user delete activity:", e)
+            logger.warning("Failed to record user delete activity: %s", e)
 
         return {"status": "success"}
     except Exception as e:
-        print("Error in delete_user:", e)  # Debug log
+        logger.exception("Error in delete_user")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -575,11 +574,11 @@ async def change_user_password(
     # Get admin email and id from session/user_access
     user_row = getattr(user_access, "user_row", user_access)
 
-    print(f"[DEBUG] user_row for admin password check: {user_row}")
+    log_payload(logger, "user_row for admin password check", user_row)
     admin_email = user_row.get("email")
     admin_id = user_row.get("user_id")
     if not admin_email:
-        print(f"[ERROR] Admin email is missing in user_row: {user_row}")
+        logger.error("Admin email is missing in user_row for user %s", user_row.get("user_id"))
         raise HTTPException(status_code=400, detail="Admin email is missing from session. Please re-login or contact support.")
 
     # If the owner is changing their own password, skip admin password confirmation
@@ -619,13 +618,11 @@ async def change_user_password(
             return {"error": "Too many confirmation attempts. Please try again later."}
 
         # Verify admin password (do not log/store password)
-        print(f"[DEBUG] Checking admin password for email: {admin_email}")
-        print(f"[DEBUG] Admin password being checked: {request.admin_password}")
+        logger.debug("Checking admin password for %s", admin_email)
         try:
-            login_result = await login_user(admin_email, request.admin_password)
-            print(f"[DEBUG] Supabase login_user result: {login_result}")
+            await login_user(admin_email, request.admin_password)
         except Exception as e:
-            print(f"[DEBUG] Admin password check failed: {e}")
+            logger.warning("Admin password check failed for %s: %s", admin_email, e)
             _admin_pw_attempts[admin_email].append(now)
             # Audit log failed attempt
             try:
@@ -649,8 +646,7 @@ async def change_user_password(
         _admin_pw_attempts[admin_email] = []
 
     # Proceed to change the user's password
-    print(f"[DEBUG] Attempting password change for auth_id: {request.auth_id}")
-    print(f"[DEBUG] New password: {request.new_password}")
+    logger.info("Changing password for auth_id %s", request.auth_id)
     try:
         # Fetch the user's current email (required by Supabase API)
         user_lookup = postgrest_client.table("users").select("email").eq("auth_id", request.auth_id).single().execute()
@@ -658,17 +654,15 @@ async def change_user_password(
         if user_lookup.data and "email" in user_lookup.data:
             user_email = user_lookup.data["email"]
         if not user_email:
-            print(f"[DEBUG] Could not find email for auth_id {request.auth_id}")
+            logger.warning("Could not find email for auth_id %s", request.auth_id)
             raise HTTPException(status_code=400, detail="User email not found for password update")
         payload = {"password": request.new_password, "email": user_email}
-        print(f"[DEBUG] update_user_by_id payload: {payload}")
         response = supabase.auth.admin.update_user_by_id(request.auth_id, payload)
-        print(f"[DEBUG] Supabase update_user_by_id response: {response}")
         if hasattr(response, "error") and response.error:
-            print(f"[DEBUG] Supabase error: {response.error}")
+            logger.warning("Supabase password update error for auth_id %s: %s", request.auth_id, response.error)
             raise HTTPException(status_code=400, detail=str(response.error))
     except Exception as e:
-        print(f"[DEBUG] Exception during password update: {e}")
+        logger.exception("Exception during password update for auth_id %s", request.auth_id)
         raise HTTPException(status_code=500, detail=f"Exception during password update: {e}")
 
     try:
@@ -709,9 +703,9 @@ async def change_user_password(
         db.add(pw_activity)
         await db.flush()
         await db.commit()
-        print("user change password activity logged successfully.")
+        logger.debug("User change password activity logged")
             # Email notification removed; will use EmailJS from frontend or other service.
     except Exception as e:
-        print("Failed to record user change password activity or send email:", e)
+        logger.warning("Failed to record user change password activity: %s", e)
 
     return {"status": "success"}
@@ -1,29 +1,21 @@
 from fastapi import UploadFile, File, Form
 from apscheduler.schedulers.background import BackgroundScheduler
-import io
-import gzip
-import json
-import pandas as pd
 import os
-import pathlib
-import base64
 import subprocess
 from datetime import datetime, timezone
-from fastapi import APIRouter, HTTPException, Depends, Body
+from fastapi import APIRouter, HTTPException, Depends, Body, Query
 from fastapi.responses import StreamingResponse
-from sqlalchemy.engine import create_engine
 from starlette.concurrency import run_in_threadpool
-from app.supabase import get_db, POSTGRES_URL, SUPABASE_URL, SUPABASE_API_KEY
+from app.supabase import get_db, sync_engine
+from app.utils.backup_chain import INCREMENTAL_TABLES, latest_backup, plan_backup, record_backup
+from app.utils.backup_export import write_backup_file
+from app.utils.backup_retention import apply_retention
+from app.utils.backup_storage import BACKUP_DIR, get_backup_storage
 from app.utils.rbac import require_role
 from app.models.user_activity_log import UserActivityLog
 from fastapi import APIRouter, HTTPException, Depends, Body
 from sqlalchemy import update, insert, Table, Column, Integer, String, MetaData, select, text
-from supabase import create_client, Client
 from apscheduler.schedulers.background import BackgroundScheduler 
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from cryptography.hazmat.backends import default_backend
 import asyncio
 from app.supabase import get_db
 from app.utils.rbac import get_owner_user
@@ -31,22 +23,9 @@ from app.models.user_activity_log import UserActivityLog
 from sqlalchemy.orm import Session
 
 router = APIRouter()
-BACKUP_DIR = str(pathlib.Path.home() / "Documents" / "cardiacdelights_backups")
-SUPABASE_BUCKET = "cardiacdelights-backup"
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_API_KEY)
 scheduler = BackgroundScheduler()
 scheduler.start()
 
-def derive_fernet_key(password: str, salt: bytes = b"cardiacdelights-backup-salt") -> bytes:
-    kdf = PBKDF2HMAC(
-        algorithm=hashes.SHA256(),
-        length=32,
-        salt=salt,
-        iterations=390000,
-        backend=default_backend(),
-    )
-    return base64.urlsafe_b64encode(kdf.derive(password.encode()))
-
 def convert_time_to_12h(time_str: str):
     try:
         dt = datetime.strptime(time_str, "%H:%M")
@@ -81,27 +60,52 @@ def convert_time_to_24h(time_str: str):
         return time_str
     return None
 
-def upload_to_supabase_storage(filepath):
-    """Upload backup file to Supabase storage with error handling"""
+def upload_backup_file(filepath):
+    """Upload (or atomically replace) a backup file in backup storage, streamed from disk"""
     try:
-        with open(filepath, "rb") as f:
-            data = f.read()
         filename = os.path.basename(filepath)
-
-        # Check if file already exists and remove it first
-        try:
-            supabase.storage.from_(SUPABASE_BUCKET).remove([filename])
-        except Exception:
-            pass  # File might not exist, that's okay
-
-        response = supabase.storage.from_(SUPABASE_BUCKET).upload(filename, data)
-        print(f"[Backup] Successfully uploaded {filename} to Supabase storage")
-        return response
+        get_backup_storage().upload(filepath, filename)
+        print(f"[Backup] Successfully uploaded {filename} to backup storage")
     except Exception as e:
-        print(f"[Backup] Error uploading to Supabase storage: {e}")
+        print(f"[Backup] Error uploading to backup storage: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to upload backup to cloud storage: {str(e)}")
 
 
+def create_backup_file(password: str, backup_type: str, incremental: bool = False, user_id=None):
+    """
+    Stream an encrypted backup into BACKUP_DIR, upload it and record it in
+    backup_history. Scheduled backups are incremental on top of the previous
+    scheduled backup until a new full base is due, and are followed by
+    retention pruning (app/utils/backup_retention.py). Blocking; returns
+    (filename, manifest).
+    """
+    plan = plan_backup(latest_backup(sync_engine, backup_type) if incremental else None)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    backup_filename = f"backup_{timestamp}{'_inc' if plan.incremental else ''}.cdb.enc"
+    os.makedirs(BACKUP_DIR, exist_ok=True)
+    local_path = os.path.join(BACKUP_DIR, backup_filename)
+    manifest = write_backup_file(
+        sync_engine,
+        local_path,
+        password,
+        backup_type,
+        tracked=INCREMENTAL_TABLES,
+        since=plan.since,
+        manifest_extra=plan.manifest_fields(),
+    )
+    print(f"[Backup] Saved locally to {local_path} ({manifest['total_records']} records)")
+    upload_backup_file(local_path)
+    record_backup(sync_engine, backup_filename, manifest, os.path.getsize(local_path), user_id)
+    if backup_type == "scheduled":
+        try:
+            retention = apply_retention(sync_engine, get_backup_storage(), BACKUP_DIR)
+            print(f"[Backup] Retention: kept {len(retention['kept'])}, pruned {len(retention['pruned'])} scheduled backups")
+        except Exception as e:
+            # the new backup is safe; pruning is retried after the next one
+            print(f"[Backup] Warning: backup retention failed: {e}")
+    return backup_filename, manifest
+
+
 @router.post("/schedule")
 async def update_schedule(settings: dict, session=Depends(get_db), user=Depends(require_role("Owner"))):
     time_of_day_raw = settings.get("time_of_day", "")
@@ -202,73 +206,19 @@ async def manual_backup(
 ):
     try:
         print("[Backup] Starting manual backup process...")
-        engine = create_engine(POSTGRES_URL.replace("asyncpg", "psycopg2"))
-        from sqlalchemy import inspect
-        insp = inspect(engine)
-        tables = insp.get_table_names()
-
-        if not tables:
-            raise HTTPException(status_code=500, detail="No tables found in database")
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_data = {}
-        schema_info = {}
-
-        # Backup each table with schema information
-        for table in tables:
-            try:
-                df = pd.read_sql_table(table, engine)
-                backup_data[table] = df.to_dict(orient="records")
-
-                # Capture schema information
-                schema_info[table] = {
-                    "columns": list(df.columns),
-                    "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()},
-                    "row_count": len(df)
-                }
-                print(f"[Backup] Backed up table {table}: {len(df)} records")
-            except Exception as e:
-                print(f"[Backup] Warning: Failed to backup table {table}: {e}")
-                continue
-
-        if not backup_data:
-            raise HTTPException(status_code=500, detail="No data was backed up")
-
-        # Add metadata to backup
-        backup_payload = {
-            "version": "1.0",
-            "timestamp": timestamp,
-            "backup_date": datetime.now(timezone.utc).isoformat(),
-            "schema_info": schema_info,
-            "data": backup_data
-        }
-
-        # Encrypt the backup
-        key = derive_fernet_key(password)
-        fernet = Fernet(key)
-        buf = io.BytesIO()
-        with gzip.GzipFile(fileobj=buf, mode="w") as gz_file:
-            gz_file.write(json.dumps(backup_payload, default=str, indent=2).encode("utf-8"))
-        buf.seek(0)
-        encrypted = fernet.encrypt(buf.getvalue())
-
-        # Save locally
-        backup_filename = f"backup_{timestamp}.json.enc"
-        os.makedirs(BACKUP_DIR, exist_ok=True)
-        local_path = os.path.join(BACKUP_DIR, backup_filename)
-        with open(local_path, "wb") as f:
-            f.write(encrypted)
-        print(f"[Backup] Saved locally to {local_path}")
-
-        # Upload to Supabase storage
-        upload_to_supabase_storage(local_path)
+        user_row = getattr(user, "user_row", user) if user else None
+        try:
+            backup_filename, manifest = await run_in_threadpool(
+                create_backup_file, password, "manual", user_id=user_row.get("user_id") if user_row else None
+            )
+        except RuntimeError as e:
+            raise HTTPException(status_code=500, detail=str(e))
 
         # Log the activity
-        user_row = getattr(user, "user_row", user) if user else None
         new_activity = UserActivityLog(
             user_id=user_row.get("user_id") if user_row else None,
             action_type="manual backup",
-            description=f"Backup: triggered manually - {len(backup_data)} tables backed up",
+            description=f"Backup: triggered manually - {len(manifest['tables'])} tables backed up",
             activity_date=datetime.utcnow(),
             report_date=datetime.utcnow(),
             user_name=user_row.get("name") if user_row else None,
@@ -282,9 +232,9 @@ async def manual_backup(
         return {
             "message": "Backup triggered successfully.",
             "filename": backup_filename,
-            "version": "1.0",
-            "tables_backed_up": len(backup_data),
-            "total_records": sum(len(records) for records in backup_data.values()),
+            "version": manifest["version"],
+            "tables_backed_up": len(manifest["tables"]),
+            "total_records": manifest["total_records"],
             "schema_tracked": True
         }
     except HTTPException:
@@ -294,10 +244,17 @@ async def manual_backup(
         raise HTTPException(status_code=500, detail=f"Backup failed: {str(e)}")
 
 @router.get("/list-backups")
-async def list_supabase_backups():
+async def list_supabase_backups(limit: int = Query(100, ge=1, le=1000), offset: int = Query(0, ge=0)):
 	try:
-		files = await run_in_threadpool(lambda: supabase.storage.from_(SUPABASE_BUCKET).list())
-		return {"files": [f["name"] for f in files]}
+		# one extra entry tells whether another page exists
+		files = await run_in_threadpool(get_backup_storage().list, limit + 1, offset)
+		return {
+			"files": [f["name"] for f in files[:limit]],
+			"items": files[:limit],
+			"limit": limit,
+			"offset": offset,
+			"has_more": len(files) > limit,
+		}
 	except Exception as e:
 		print(f"[List Backups Debug] Exception: {e}")
 		raise HTTPException(status_code=500, detail="Failed to list backups")
@@ -347,49 +304,8 @@ def scheduled_backup_job():
 
 # Shared backup logic
 async def _run_scheduled_backup(session, user):
-    from sqlalchemy import create_engine, inspect
-    engine = create_engine(POSTGRES_URL.replace("asyncpg", "psycopg2"))
-    insp = inspect(engine)
-    tables = insp.get_table_names()
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_data = {}
-    schema_info = {}
-
-    # Backup each table with schema information
-    for table in tables:
-        df = pd.read_sql_table(table, engine)
-        backup_data[table] = df.to_dict(orient="records")
-
-        # Capture schema information
-        schema_info[table] = {
-            "columns": list(df.columns),
-            "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()},
-            "row_count": len(df)
-        }
-
-    # Create backup payload with metadata
-    backup_payload = {
-        "version": "1.0",
-        "timestamp": timestamp,
-        "backup_date": datetime.now(timezone.utc).isoformat(),
-        "schema_info": schema_info,
-        "data": backup_data
-    }
-
     password = os.getenv("BACKUP_ENCRYPTION_PASSWORD", "default_password")
-    key = derive_fernet_key(password)
-    fernet = Fernet(key)
-    buf = io.BytesIO()
-    with gzip.GzipFile(fileobj=buf, mode="w") as gz_file:
-        gz_file.write(json.dumps(backup_payload, default=str, indent=2).encode("utf-8"))
-    buf.seek(0)
-    encrypted = fernet.encrypt(buf.getvalue())
-    backup_filename = f"backup_{timestamp}.json.enc"
-    os.makedirs(BACKUP_DIR, exist_ok=True)
-    local_path = os.path.join(BACKUP_DIR, backup_filename)
-    with open(local_path, "wb") as f:
-        f.write(encrypted)
-    upload_to_supabase_storage(local_path)
+    await run_in_threadpool(create_backup_file, password, "scheduled", incremental=True)
     user_row = getattr(user, "user_row", user) if user else None
     new_activity = UserActivityLog(
         user_id=user_row.get("user_id") if user_row else None,
@@ -439,55 +355,9 @@ def reschedule_backup(frequency, day_of_week, day_of_month, time_of_day):
 
 # Synchronous backup logic for scheduled jobs
 def run_scheduled_backup_sync(session, user):
-    from sqlalchemy import create_engine, inspect
-    import gzip, io, json, os
-    from datetime import datetime, timezone
-    engine = create_engine(POSTGRES_URL.replace("asyncpg", "psycopg2"))
-    insp = inspect(engine)
-    tables = insp.get_table_names()
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_data = {}
-    schema_info = {}
-
-    # Backup each table with schema information
-    for table in tables:
-        import pandas as pd
-        df = pd.read_sql_table(table, engine)
-        backup_data[table] = df.to_dict(orient="records")
-
-        # Capture schema information
-        schema_info[table] = {
-            "columns": list(df.columns),
-            "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()},
-            "row_count": len(df)
-        }
-
-    # Create backup payload with metadata
-    backup_payload = {
-        "version": "1.0",
-        "timestamp": timestamp,
-        "backup_date": datetime.now(timezone.utc).isoformat(),
-        "schema_info": schema_info,
-        "data": backup_data
-    }
-
     password = os.getenv("BACKUP_ENCRYPTION_PASSWORD", "default_password")
-    key = derive_fernet_key(password)
-    from cryptography.fernet import Fernet
-    fernet = Fernet(key)
-    buf = io.BytesIO()
-    with gzip.GzipFile(fileobj=buf, mode="w") as gz_file:
-        gz_file.write(json.dumps(backup_payload, default=str, indent=2).encode("utf-8"))
-    buf.seek(0)
-    encrypted = fernet.encrypt(buf.getvalue())
-    backup_filename = f"backup_{timestamp}.json.enc"
-    os.makedirs(BACKUP_DIR, exist_ok=True)
-    local_path = os.path.join(BACKUP_DIR, backup_filename)
-    with open(local_path, "wb") as f:
-        f.write(encrypted)
-    upload_to_supabase_storage(local_path)
+    create_backup_file(password, "scheduled", incremental=True)
     user_row = getattr(user, "user_row", user) if user else None
-    from app.models.user_activity_log import UserActivityLog
     new_activity = UserActivityLog(
         user_id=user_row.get("user_id") if user_row else None,
         action_type="scheduled backup",
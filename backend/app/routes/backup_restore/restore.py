@@ -1,285 +1,166 @@
 from fastapi.responses import StreamingResponse
 import io
-import gzip
-import json
-import base64
 import traceback
 import os
-import pathlib
-from datetime import datetime, timezone
-import pandas as pd
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
-from sqlalchemy import text, create_engine
-from app.supabase import get_db, POSTGRES_URL, SUPABASE_URL, SUPABASE_API_KEY
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Header
+from starlette.concurrency import run_in_threadpool
+from app.supabase import get_db, sync_engine
 from app.utils.rbac import require_role
 from app.models.user_activity_log import UserActivityLog
-from supabase import create_client, Client
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.backends import default_backend
-from cryptography.fernet import Fernet
-
-SUPABASE_BUCKET = "cardiacdelights-backup"
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_API_KEY)
+from app.utils.backup_chain import backup_dependents, mark_backup_deleted, open_backup_chain, record_restore
+from app.utils.backup_export import write_backup_file
+from app.utils.backup_format import BackupDecryptionError, BackupFormatError, open_backup
+from app.utils.backup_storage import (
+    BACKUP_DIR,
+    RangeNotSatisfiable,
+    content_disposition,
+    get_backup_storage,
+    parse_range,
+)
+from app.utils.copy_restore import check_backup_schema, restore_backup_chain
+from app.utils.response_cache import invalidate_all_caches
+from app.utils.sales_rollup import refresh_sales_rollups
+
 router = APIRouter()
 
-def derive_fernet_key(password: str, salt: bytes = b"cardiacdelights-backup-salt") -> bytes:
-    kdf = PBKDF2HMAC(
-        algorithm=hashes.SHA256(),
-        length=32,
-        salt=salt,
-        iterations=390000,
-        backend=default_backend(),
-    )
-    return base64.urlsafe_b64encode(kdf.derive(password.encode()))
-
-async def restore(encrypted_data, password, session, user, activity_type="restore backup", filename="uploaded file", selected_tables=None):
+
+# Primary key mapping - KEEP THIS ACCURATE! (sequence reset after restore)
+PK_MAP = {
+    "suppliers": "supplier_id",
+    "users": "user_id",
+    "user_activity_log": "activity_id",
+    "orders": "order_id",
+    "order_items": "item_id",
+    "top_sales": "id",
+    "roles": "role_id",
+    "custom_holidays": "id",
+    "ph_holidays": "id",
+    "notification": "notification_id",
+    "notification_settings": "user_id",
+    "menu": "menu_id",
+    "menu_ingredients": "id",
+    "ingredients": "id",
+    "inventory": "item_id",
+    "inventory_today": "item_id",
+    "inventory_surplus": "item_id",
+    "inventory_spoilage": "spoilage_id",
+    "inventory_settings": "id",
+    "inventory_log": "id",
+    "backup_history": "id",
+    "backup_schedule": "id",
+    "sales": "sale_id",
+}
+
+
+def open_backup_file(filename: str):
+    """Backup file by name (parent of an incremental backup): local copy first, then storage."""
+    local_path = os.path.join(BACKUP_DIR, os.path.basename(filename))
+    if os.path.exists(local_path):
+        return open(local_path, "rb")
+    return get_backup_storage().open(filename)
+
+
+def create_safety_backup(tables) -> str:
+    """Streamed pre-restore backup of `tables` in BACKUP_DIR. Returns its path."""
+    os.makedirs(BACKUP_DIR, exist_ok=True)
+    safety_path = os.path.join(BACKUP_DIR, f"pre_restore_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.cdb.enc")
+    safety_password = os.getenv("BACKUP_ENCRYPTION_PASSWORD", "default_password")
+    write_backup_file(sync_engine, safety_path, safety_password, "pre_restore_safety", tables=tables)
+    return safety_path
+
+async def restore(backup_file, password, session, user, activity_type="restore backup", filename="uploaded file", selected_tables=None):
+    chain = []
     try:
-        key = derive_fernet_key(password)
-        fernet = Fernet(key)
+        if isinstance(backup_file, (bytes, bytearray)):
+            backup_file = io.BytesIO(backup_file)
         try:
-            decrypted = fernet.decrypt(encrypted_data)
-        except Exception:
-            raise HTTPException(status_code=400, detail="Decryption failed. Check your password and backup file.")
-        buf = io.BytesIO(decrypted)
-        with gzip.GzipFile(fileobj=buf, mode="r") as gz_file:
-            backup_json = gz_file.read().decode("utf-8")
-        backup_data = json.loads(backup_json)
-
-        # Check if backup has new format with metadata
-        backup_version = None
-        schema_info = None
-        actual_data = backup_data
-
-        if isinstance(backup_data, dict):
-            # New format with metadata
-            if "version" in backup_data and "data" in backup_data:
-                backup_version = backup_data.get("version")
-                schema_info = backup_data.get("schema_info", {})
-                actual_data = backup_data.get("data", {})
-                print(f"[Restore] Detected backup version {backup_version}")
-                print(f"[Restore] Backup created at: {backup_data.get('backup_date', 'unknown')}")
-            # Old format - raw table data
-            else:
-                actual_data = backup_data
-                print("[Restore] Using legacy backup format (no version metadata)")
+            chain = await run_in_threadpool(open_backup_chain, backup_file, password, open_backup_file)
+        except BackupDecryptionError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except BackupFormatError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        latest = chain[-1]
+        backup_version = latest.version
+        schema_info = latest.schema_info
+        if backup_version:
+            print(f"[Restore] Detected backup version {backup_version}")
+            print(f"[Restore] Backup created at: {latest.backup_date or 'unknown'}")
+        else:
+            print("[Restore] Using legacy backup format (no version metadata)")
+        if len(chain) > 1:
+            print(f"[Restore] Incremental backup: replaying {len(chain)} backups from {chain[0].manifest.get('timestamp')}")
 
         # Validate backup data before proceeding
-        if not isinstance(actual_data, dict) or len(actual_data) == 0:
+        tables = latest.tables
+        if not tables:
             raise HTTPException(status_code=400, detail="Invalid backup file: No table data found")
 
-        # Schema validation if metadata exists
-        if schema_info:
-            engine_check = create_engine(POSTGRES_URL.replace("asyncpg", "psycopg2"))
-            warnings = []
-            for table_name, info in schema_info.items():
-                try:
-                    current_df = pd.read_sql_table(table_name, engine_check, limit=1)
-                    backup_columns = set(info.get("columns", []))
-                    current_columns = set(current_df.columns)
-
-                    # Check for missing columns
-                    missing_in_current = backup_columns - current_columns
-                    extra_in_current = current_columns - backup_columns
-
-                    if missing_in_current:
-                        warnings.append(f"⚠️ Table '{table_name}': Backup has columns not in current DB: {missing_in_current}")
-                    if extra_in_current:
-                        warnings.append(f"⚠️ Table '{table_name}': Current DB has new columns: {extra_in_current}")
-                except Exception as e:
-                    warnings.append(f"⚠️ Could not validate schema for table '{table_name}': {str(e)}")
-
-            if warnings:
-                print("[Restore] Schema validation warnings:")
-                for warning in warnings:
-                    print(f"  {warning}")
-                # Store warnings for response (don't fail, just warn)
-            engine_check.dispose()
-
-        # Use actual_data for restore
-        backup_data = actual_data
-
         # Filter to selected tables only if specified
         if selected_tables:
-            backup_data = {k: v for k, v in backup_data.items() if k in selected_tables}
-            if not backup_data:
+            tables = [t for t in tables if t in selected_tables]
+            if not tables:
                 raise HTTPException(status_code=400, detail="None of the selected tables found in backup file")
 
-        # SAFETY FEATURE: Create automatic pre-restore backup
-        print("[Restore] Creating automatic safety backup before restore...")
-        try:
-            from sqlalchemy import inspect
-
-            BACKUP_DIR = str(pathlib.Path.home() / "Documents" / "cardiacdelights_backups")
-            safety_engine = create_engine(POSTGRES_URL.replace("asyncpg", "psycopg2"))
-            insp = inspect(safety_engine)
-            tables = insp.get_table_names()
-
-            safety_backup_data = {}
-            safety_schema_info = {}
-
-            for table in tables:
-                try:
-                    df = pd.read_sql_table(table, safety_engine)
-                    safety_backup_data[table] = df.to_dict(orient="records")
-                    safety_schema_info[table] = {
-                        "columns": list(df.columns),
-                        "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()},
-                        "row_count": len(df)
-                    }
-                except Exception as e:
-                    print(f"[Safety Backup] Warning: Could not backup table {table}: {e}")
-
-            safety_payload = {
-                "version": "1.0",
-                "timestamp": datetime.now().strftime("%Y%m%d_%H%M%S"),
-                "backup_date": datetime.now(timezone.utc).isoformat(),
-                "backup_type": "pre_restore_safety",
-                "schema_info": safety_schema_info,
-                "data": safety_backup_data
-            }
+        # Schema validation if metadata exists: one information_schema query for every table
+        schema_diff = {}
+        if schema_info:
+            try:
+                schema_diff = await run_in_threadpool(
+                    check_backup_schema, sync_engine, {t: schema_info[t] for t in tables if t in schema_info}
+                )
+            except Exception as e:
+                print(f"[Restore] Warning: Could not validate schema: {e}")
+            if schema_diff:
+                print("[Restore] Schema validation warnings:")
+                for table_name, diff in schema_diff.items():
+                    print(f"  Table '{table_name}': {diff}")
 
-            # Encrypt and save safety backup
-            safety_password = os.getenv("BACKUP_ENCRYPTION_PASSWORD", "default_password")
-            safety_key = derive_fernet_key(safety_password)
-            safety_fernet = Fernet(safety_key)
-            safety_buf = io.BytesIO()
-            with gzip.GzipFile(fileobj=safety_buf, mode="w") as gz_file:
-                gz_file.write(json.dumps(safety_payload, default=str, indent=2).encode("utf-8"))
-            safety_buf.seek(0)
-            safety_encrypted = safety_fernet.encrypt(safety_buf.getvalue())
-
-            # Save to local directory
-            safety_filename = f"pre_restore_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json.enc"
-            os.makedirs(BACKUP_DIR, exist_ok=True)
-            safety_path = os.path.join(BACKUP_DIR, safety_filename)
-            with open(safety_path, "wb") as f:
-                f.write(safety_encrypted)
-
-            print(f"[Restore] Safety backup created: {safety_filename}")
+        # SAFETY FEATURE: Back up the tables about to be replaced (and only those)
+        print(f"[Restore] Creating automatic safety backup of {len(tables)} table(s) before restore...")
+        try:
+            safety_path = await run_in_threadpool(create_safety_backup, tables)
+            print(f"[Restore] Safety backup created: {os.path.basename(safety_path)}")
             print(f"[Restore] Safety backup location: {safety_path}")
-            safety_engine.dispose()
-
         except Exception as safety_error:
             print(f"[Restore] Warning: Could not create safety backup: {safety_error}")
             print("[Restore] Continuing with restore (safety backup failed)")
             # Don't fail the restore if safety backup fails, just warn
 
-        engine = create_engine(POSTGRES_URL.replace("asyncpg", "psycopg2"))
-
-        # Primary key mapping - KEEP THIS ACCURATE!
-        pk_map = {
-            "suppliers": "supplier_id",
-            "users": "user_id",
-            "user_activity_log": "activity_id",
-            "orders": "order_id",
-            "order_items": "item_id",
-            "top_sales": "id",
-            "roles": "role_id",
-            "custom_holidays": "id",
-            "ph_holidays": "id",
-            "notification": "notification_id",
-            "notification_settings": "user_id",
-            "menu": "menu_id",
-            "menu_ingredients": "id",
-            "ingredients": "id",
-            "inventory": "item_id",
-            "inventory_today": "item_id",
-            "inventory_surplus": "item_id",
-            "inventory_spoilage": "spoilage_id",
-            "inventory_settings": "id",
-            "inventory_log": "id",
-            "backup_history": "id",
-            "backup_schedule": "id",
-            "sales": "sale_id",
-        }
-
-        # Use transaction for safer restore - if anything fails, rollback everything
-        with engine.begin() as conn:
-            # Disable foreign key checks temporarily
-            try:
-                conn.execute(text("SET session_replication_role = 'replica';"))
-                print("[Restore] Disabled foreign key checks")
-            except Exception as e:
-                print(f"[Restore] Warning: Could not disable foreign key checks: {e}")
-
-            for table_name, records in backup_data.items():
-                print(f"\n[Restore] Processing table: {table_name}")
-                df = pd.DataFrame(records)
-
-                if df.empty:
-                    print(f"[Restore] Skipping empty table: {table_name}")
-                    continue
-
-                try:
-                    # DELETE existing data instead of TRUNCATE to preserve sequences
-                    # This maintains auto-increment counters
-                    conn.execute(text(f"DELETE FROM {table_name};"))
-                    print(f"[Restore] Cleared existing data from: {table_name}")
-                except Exception as e:
-                    print(f"[Restore] Warning: Could not clear table {table_name}: {e}")
-
-                pk_col = pk_map.get(table_name)
-
-                # CRITICAL FIX: INSERT DATA WITH PRIMARY KEYS INTACT
-                if not df.empty:
-                    try:
-                        # Clean up NaT/NaN values in date/datetime columns
-                        # Replace pandas NaT and string 'NaT' with None (SQL NULL)
-                        for col in df.columns:
-                            if df[col].dtype == 'object':  # String columns might have 'NaT' as string
-                                df[col] = df[col].replace(['NaT', 'nan', 'NaN'], None)
-                            # Replace pandas NaT/NaN with None for datetime columns
-                            if pd.api.types.is_datetime64_any_dtype(df[col]):
-                                df[col] = df[col].where(pd.notna(df[col]), None)
-
-                        # Temporarily disable triggers to allow primary key insertion
-                        if pk_col and pk_col in df.columns:
-                            # Get the max PK value from backup data
-                            max_pk = df[pk_col].max()
-
-                            # Insert ALL columns including primary key
-                            df.to_sql(table_name, conn, if_exists="append", index=False, method='multi')
-                            print(f"[Restore] Restored {len(df)} records to {table_name} (with primary keys)")
-
-                            # Update sequence to max+1 to prevent future conflicts
-                            sequence_name = f"{table_name}_{pk_col}_seq"
-                            try:
-                                # First check if sequence exists to avoid transaction errors
-                                result = conn.execute(text(
-                                    f"SELECT 1 FROM pg_sequences WHERE schemaname = 'public' AND sequencename = '{sequence_name}'"
-                                ))
-                                sequence_exists = result.fetchone() is not None
-
-                                if sequence_exists:
-                                    conn.execute(text(f"SELECT setval('{sequence_name}', {max_pk}, true);"))
-                                    print(f"[Restore] Updated sequence {sequence_name} to {max_pk}")
-                                else:
-                                    print(f"[Restore] Info: Sequence {sequence_name} does not exist (table may not use auto-increment)")
-                            except Exception as seq_err:
-                                print(f"[Restore] Warning: Could not update sequence {sequence_name}: {seq_err}")
-                        else:
-                            # No primary key defined, insert all data as-is
-                            df.to_sql(table_name, conn, if_exists="append", index=False, method='multi')
-                            print(f"[Restore] Restored {len(df)} records to {table_name}")
-
-                    except Exception as e:
-                        print(f"[Restore] ERROR restoring table {table_name}: {e}")
-                        print(f"[Restore] Traceback: {traceback.format_exc()}")
-                        raise HTTPException(
-                            status_code=500,
-                            detail=f"Failed to restore table {table_name}: {str(e)}"
-                        )
-
-            # Re-enable foreign key checks
+        # Stream every table in with COPY, in one transaction (rolled back on any failure)
+        try:
+            restored = await run_in_threadpool(restore_backup_chain, sync_engine, chain, tables, PK_MAP)
+        except Exception as e:
+            print(f"[Restore] ERROR restoring tables: {e}")
+            print(f"[Restore] Traceback: {traceback.format_exc()}")
+            raise HTTPException(status_code=500, detail=f"Failed to restore tables: {str(e)}")
+        print(f"[Restore] Restored {sum(restored.values())} records across {len(restored)} tables")
+
+        # The report rollups are derived from sales_report (categories from menu)
+        if {"sales_report", "menu"} & set(tables):
             try:
-                conn.execute(text("SET session_replication_role = 'origin';"))
-                print("[Restore] Re-enabled foreign key checks")
-            except Exception as e:
-                print(f"[Restore] Warning: Could not re-enable foreign key checks: {e}")
+                await refresh_sales_rollups(session)
+                print("[Restore] Sales rollups rebuilt")
+            except Exception as rollup_error:
+                await session.rollback()
+                print(f"[Restore] Warning: Could not rebuild sales rollups: {rollup_error}")
+
+        # Cached dashboard/report responses (and derived data) describe the old rows
+        await invalidate_all_caches()
 
-        # Log activity
         user_row = getattr(user, "user_row", user) if user else None
+
+        # Restored rows keep their old updated_at: the next scheduled backup must be a full one
+        try:
+            await run_in_threadpool(
+                record_restore, sync_engine, filename, user_row.get("user_id") if user_row else None
+            )
+        except Exception as history_error:
+            print(f"[Restore] Warning: Could not record restore in backup history: {history_error}")
+
+        # Log activity
         new_activity = UserActivityLog(
             user_id=user_row.get("user_id") if user_row else None,
             action_type=activity_type,
@@ -293,11 +174,14 @@ async def restore(encrypted_data, password, session, user, activity_type="restor
         await session.flush()
         await session.commit()
 
-        return {"message": "Restore completed successfully."}
+        return {"message": "Restore completed successfully.", "schema_differences": schema_diff}
 
     except Exception as e:
         print(f"[Restore Debug] Exception during restore: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Restore failed: {str(e)}")
+    finally:
+        for source in chain:
+            source.close()
 
 @router.post("/preview-backup")
 async def preview_backup_contents(
@@ -306,49 +190,35 @@ async def preview_backup_contents(
     user=Depends(require_role("Owner"))
 ):
     """Preview what tables and data are in a backup file without restoring"""
+    source = None
     try:
-        file_bytes = await file.read()
-        key = derive_fernet_key(password)
-        fernet = Fernet(key)
+        # streaming backups: only the manifest at the front of the file is decrypted
         try:
-            decrypted = fernet.decrypt(file_bytes)
-        except Exception:
-            raise HTTPException(status_code=400, detail="Decryption failed. Check your password and backup file.")
-
-        buf = io.BytesIO(decrypted)
-        with gzip.GzipFile(fileobj=buf, mode="r") as gz_file:
-            backup_json = gz_file.read().decode("utf-8")
-        backup_data = json.loads(backup_json)
-
-        # Check backup format
-        backup_version = None
-        backup_date = None
-        actual_data = backup_data
-
-        if isinstance(backup_data, dict) and "version" in backup_data and "data" in backup_data:
-            backup_version = backup_data.get("version")
-            backup_date = backup_data.get("backup_date")
-            actual_data = backup_data.get("data", {})
+            source = await run_in_threadpool(open_backup, file.file, password)
+        except BackupFormatError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
         # Return table names and record counts
         table_info = {}
-        for table_name, records in actual_data.items():
+        for table_name, record_count in source.row_counts().items():
             table_info[table_name] = {
-                "record_count": len(records),
-                "has_data": len(records) > 0
+                "record_count": record_count,
+                "has_data": record_count > 0
             }
 
         response = {
             "tables": table_info,
-            "total_tables": len(actual_data),
+            "total_tables": len(table_info),
             "filename": getattr(file, "filename", "uploaded file")
         }
 
         # Add version info if available
-        if backup_version:
-            response["version"] = backup_version
-            response["backup_date"] = backup_date
+        if source.version:
+            response["version"] = source.version
+            response["backup_date"] = source.backup_date
             response["has_schema_info"] = True
+            response["incremental"] = bool(source.parent)
+            response["parent"] = source.parent
         else:
             response["version"] = "legacy"
             response["has_schema_info"] = False
@@ -357,6 +227,9 @@ async def preview_backup_contents(
     except Exception as e:
         print("Preview backup error:", traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Failed to preview backup: {str(e)}")
+    finally:
+        if source is not None:
+            source.close()
 
 @router.post("/restore-selective")
 async def restore_selective_tables(
@@ -368,14 +241,13 @@ async def restore_selective_tables(
 ):
     """Restore only selected tables from a backup file"""
     try:
-        file_bytes = await file.read()
         selected_tables = [t.strip() for t in tables.split(",") if t.strip()]
 
         if not selected_tables:
             raise HTTPException(status_code=400, detail="No tables selected for restore")
 
         return await restore(
-            file_bytes,
+            file.file,
             password,
             session,
             user,
@@ -395,9 +267,8 @@ async def restore_local_backup(
     user=Depends(require_role("Owner"))
 ):
     try:
-        file_bytes = await file.read()
         return await restore(
-            file_bytes,
+            file.file,
             password,
             session,
             user,
@@ -416,9 +287,8 @@ async def restore_backup(
     user=Depends(require_role("Owner"))
 ):
     try:
-        file_bytes = await file.read()
         return await restore(
-            file_bytes,
+            file.file,
             password,
             session,
             user,
@@ -432,40 +302,55 @@ async def restore_backup(
 @router.get("/download-backup")
 async def download_backup(
     filename: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
     session=Depends(get_db),
     user=Depends(require_role("Owner"))
 ):
+    """Stream a backup from storage in chunks; a Range header resumes a partial download."""
+    storage = get_backup_storage()
     try:
-        response = supabase.storage.from_(SUPABASE_BUCKET).download(filename)
-        if hasattr(response, "data") and response.data:
-            file_data = response.data
-        else:
-            file_data = response
-        if not file_data:
-            raise HTTPException(status_code=404, detail="Backup file not found in Supabase storage.")
+        size = await run_in_threadpool(storage.size, filename)
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            raise HTTPException(
+                status_code=416, detail="Requested range not satisfiable", headers={"Content-Range": f"bytes */{size}"}
+            )
+        start, end = byte_range or (0, size - 1)
+        _, chunks = await run_in_threadpool(storage.open_range, filename, start, end if byte_range else None)
 
-        user_row = getattr(user, "user_row", user) if user else None
-        new_activity = UserActivityLog(
-            user_id=user_row.get("user_id") if user_row else None,
-            action_type="download backup",
-            description=f"Downloaded backup file: {filename}",
-            activity_date=datetime.utcnow(),
-            report_date=datetime.utcnow(),
-            user_name=user_row.get("name") if user_row else None,
-            role=user_row.get("user_role") if user_row else None,
-        )
+        # a resumed download (later range) is the same download: log it once
+        if start == 0:
+            user_row = getattr(user, "user_row", user) if user else None
+            new_activity = UserActivityLog(
+                user_id=user_row.get("user_id") if user_row else None,
+                action_type="download backup",
+                description=f"Downloaded backup file: {filename}",
+                activity_date=datetime.utcnow(),
+                report_date=datetime.utcnow(),
+                user_name=user_row.get("name") if user_row else None,
+                role=user_row.get("user_role") if user_row else None,
+            )
 
-        session.add(new_activity)
-        await session.flush()
-        await session.commit()
+            session.add(new_activity)
+            await session.flush()
+            await session.commit()
 
+        headers = {
+            "Content-Disposition": content_disposition(filename),
+            "Accept-Ranges": "bytes",
+            "Content-Length": str(end - start + 1),
+        }
+        if byte_range:
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
         return StreamingResponse(
-            io.BytesIO(file_data),
+            chunks,
+            status_code=206 if byte_range else 200,
             media_type="application/octet-stream",
-            headers={
-                "Content-Disposition": f"attachment; filename={filename}"
-            },
+            headers=headers,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"[Download Backup Debug] Exception: {e}")
         raise HTTPException(status_code=404, detail=f"Backup file '{filename}' not found or could not be downloaded.")
@@ -476,26 +361,30 @@ async def delete_backup(
     session=Depends(get_db),
     user=Depends(require_role("Owner"))
 ):
+    dependents = await run_in_threadpool(backup_dependents, sync_engine, filename)
+    if dependents:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Backup file '{filename}' is needed to restore {len(dependents)} later incremental backup(s): "
+            + ", ".join(dependents),
+        )
     try:
-        response = supabase.storage.from_(SUPABASE_BUCKET).remove([filename])
-        if isinstance(response, list) and len(response) == 0:
-            user_row = getattr(user, "user_row", user)
-            new_activity = UserActivityLog(
-                user_id=user_row.get("user_id"),
-                action_type="delete backup",
-                description=f"Deleted backup file: {filename}",
-                activity_date=datetime.utcnow(),
-                report_date=datetime.utcnow(),
-                user_name=user_row.get("name"),
-                role=user_row.get("user_role"),
-            )
-            session.add(new_activity)
-            await session.flush()
-            await session.commit()
-            return {"message": f"Backup file '{filename}' deleted successfully."}
-        if isinstance(response, list) and len(response) > 0:
-            raise HTTPException(status_code=404, detail=f"Supabase error: {response}")
-        return {"message": f"Backup file '{filename}' deleted (unknown status)."}
+        await run_in_threadpool(get_backup_storage().delete, [filename])
+        await run_in_threadpool(mark_backup_deleted, sync_engine, filename)
+        user_row = getattr(user, "user_row", user)
+        new_activity = UserActivityLog(
+            user_id=user_row.get("user_id"),
+            action_type="delete backup",
+            description=f"Deleted backup file: {filename}",
+            activity_date=datetime.utcnow(),
+            report_date=datetime.utcnow(),
+            user_name=user_row.get("name"),
+            role=user_row.get("user_role"),
+        )
+        session.add(new_activity)
+        await session.flush()
+        await session.commit()
+        return {"message": f"Backup file '{filename}' deleted successfully."}
     except Exception as e:
         print(f"[Delete Debug] Exception: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Delete failed: {str(e)}")
@@ -0,0 +1,111 @@
+"""
+Application Logging
+
+Leveled, structured logging for the API in place of print():
+
+- configure_logging() (called once from main.py) installs one handler on the
+  "app" logger. LOG_LEVEL sets the level (default INFO) and LOG_FORMAT=json
+  switches from "key=value" text lines to one JSON object per line.
+- Use logger.debug("... %s", value) with %-style arguments so messages are
+  only formatted when the level is enabled; pass context as
+  extra={"fields": {...}} to have it rendered as structured fields.
+- log_payload() is for dumping raw data (query rows, API responses, chart
+  series). It does nothing unless LOG_PAYLOADS=1 *and* DEBUG is enabled for
+  the logger, and truncates what it prints, so payloads are never
+  stringified on normal requests. Values under secret-looking keys
+  (password, token, secret, api key) are masked. Never pass a secret to a
+  log message directly.
+"""
+
+import json
+import logging
+import os
+import reprlib
+import sys
+from typing import Any, Optional
+
+APP_LOGGER = "app"
+PAYLOAD_REPR_MAX = 2000
+REDACTED = "***"
+_SECRET_KEY_PARTS = ("password", "passwd", "token", "secret", "api_key", "apikey", "authorization")
+
+_payload_repr = reprlib.Repr()
+_payload_repr.maxstring = 200
+_payload_repr.maxlist = 20
+_payload_repr.maxdict = 20
+_payload_repr.maxother = 200
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class StructuredFormatter(logging.Formatter):
+    """`time level logger message k=v ...`, or a JSON object per line."""
+
+    def __init__(self, as_json: bool = False):
+        super().__init__(datefmt="%Y-%m-%dT%H:%M:%S")
+        self.as_json = as_json
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "fields", None) or {}
+        if self.as_json:
+            entry = {
+                "time": self.formatTime(record, self.datefmt),
+                "level": record.levelname,
+                "logger": record.name,
+                "message": record.getMessage(),
+                **fields,
+            }
+            if record.exc_info:
+                entry["exc_info"] = self.formatException(record.exc_info)
+            return json.dumps(entry, default=str)
+
+        line = f"{self.formatTime(record, self.datefmt)} {record.levelname} {record.name}: {record.getMessage()}"
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+def configure_logging(level: Optional[str] = None) -> logging.Logger:
+    """Set up the "app" logger from LOG_LEVEL / LOG_FORMAT. Safe to call twice."""
+    logger = logging.getLogger(APP_LOGGER)
+    logger.setLevel((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+    if not any(getattr(h, "_app_logging", False) for h in logger.handlers):
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(StructuredFormatter(as_json=os.getenv("LOG_FORMAT", "").lower() == "json"))
+        handler._app_logging = True
+        logger.addHandler(handler)
+        logger.propagate = False
+    return logger
+
+
+def payload_logging_enabled(logger: logging.Logger) -> bool:
+    return _env_flag("LOG_PAYLOADS") and logger.isEnabledFor(logging.DEBUG)
+
+
+def _is_secret_key(key: Any) -> bool:
+    return isinstance(key, str) and any(part in key.lower() for part in _SECRET_KEY_PARTS)
+
+
+def redact(payload: Any, depth: int = 0) -> Any:
+    """Copy of `payload` with the values of secret-looking dict keys masked."""
+    if depth > _payload_repr.maxlevel:
+        return payload
+    if isinstance(payload, dict):
+        return {k: REDACTED if _is_secret_key(k) else redact(v, depth + 1) for k, v in payload.items()}
+    if isinstance(payload, (list, tuple)):
+        return [redact(v, depth + 1) for v in payload]
+    return payload
+
+
+def log_payload(logger: logging.Logger, label: str, payload: Any) -> None:
+    """Debug-dump a payload (truncated, secrets masked) only when LOG_PAYLOADS is on."""
+    if not payload_logging_enabled(logger):
+        return
+    text = _payload_repr.repr(redact(payload))
+    if len(text) > PAYLOAD_REPR_MAX:
+        text = text[:PAYLOAD_REPR_MAX] + "..."
+    logger.debug("%s: %s", label, text)
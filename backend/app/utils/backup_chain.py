@@ -0,0 +1,226 @@
+"""
+Incremental Backup Chains
+
+Scheduled backups are incremental. The large, fast-growing tables in
+INCREMENTAL_TABLES (updated_at maintained by trigger, see
+migrations/add_incremental_backup_tracking.sql) export only rows changed
+since the previous scheduled backup plus the list of live primary keys;
+every other table is small and is copied in full each time. A new full base
+is taken every FULL_BACKUP_EVERY scheduled backups (BACKUP_FULL_EVERY), or
+whenever there is no previous backup to build on.
+
+- backup_history holds each backup's parent, base, chain length and
+  high-water marks (max(updated_at) per table), so planning the next backup
+  is one query. Only scheduled backups form chains: they all use
+  BACKUP_ENCRYPTION_PASSWORD, while manual backups may use any password and
+  are always standalone full backups.
+- A delta exports rows with updated_at >= the previous mark. updated_at is
+  set when a row is written but the row only becomes visible when its
+  transaction commits, so the mark is capped at the start of the oldest
+  transaction in flight at the previous snapshot (app/utils/backup_export.py)
+  rather than padded by a fixed overlap: a long transaction's rows are
+  never skipped. Replay is an upsert, so rows copied twice are harmless.
+- open_backup_chain() follows parent links back to the base; restore then
+  replays base + deltas in order (app/utils/copy_restore.py).
+- A restore breaks the chain. It runs with triggers off, so restored rows
+  keep their old updated_at and a delta against the previous mark would miss
+  them; record_restore() adds a backup_type = 'restore' row and the next
+  scheduled backup after it is a full one.
+- A backup deleted by hand is marked backup_status = 'deleted' so it is
+  never chosen as a parent; one that later backups build on
+  (backup_dependents()) must not be deleted.
+"""
+
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+from app.utils.backup_format import BackupFormatError, BackupSource, open_backup
+
+logger = logging.getLogger(__name__)
+
+INCREMENTAL_TABLES = {
+    "sales_report": "updated_at",
+    "user_activity_log": "updated_at",
+    "notification": "updated_at",
+    "inventory_transactions": "updated_at",
+    "sales_daily_item": "updated_at",
+    "sales_hourly": "updated_at",
+}
+FULL_BACKUP_EVERY = int(os.getenv("BACKUP_FULL_EVERY", "7"))
+MAX_CHAIN_LENGTH = 60
+
+
+@dataclass
+class BackupPlan:
+    parent: Optional[str] = None
+    base: Optional[str] = None
+    chain_length: int = 0
+    since: Dict[str, datetime] = field(default_factory=dict)
+
+    @property
+    def incremental(self) -> bool:
+        return self.parent is not None
+
+    def manifest_fields(self) -> Dict[str, Any]:
+        return {
+            "incremental": self.incremental,
+            "parent": self.parent,
+            "base": self.base,
+            "chain_length": self.chain_length,
+        }
+
+
+def _parse_mark(mark: Any) -> Optional[datetime]:
+    if mark is None or isinstance(mark, datetime):
+        return mark
+    try:
+        return datetime.fromisoformat(str(mark))
+    except ValueError:
+        return None
+
+
+def plan_backup(previous: Optional[Dict[str, Any]], full_every: int = FULL_BACKUP_EVERY) -> BackupPlan:
+    """Full backup, or an incremental on top of `previous` (a latest_backup() row)."""
+    if previous is None or previous.get("restored_since") or previous["chain_length"] + 1 >= full_every:
+        return BackupPlan()
+    since = {}
+    for table, mark in (previous.get("high_water_marks") or {}).items():
+        mark = _parse_mark(mark)
+        if table in INCREMENTAL_TABLES and mark is not None:
+            since[table] = mark
+    if not since:
+        return BackupPlan()
+    return BackupPlan(
+        parent=previous["file"],
+        base=previous["base_file"] or previous["file"],
+        chain_length=previous["chain_length"] + 1,
+        since=since,
+    )
+
+
+def latest_backup(engine, backup_type: str = "scheduled") -> Optional[Dict[str, Any]]:
+    with engine.connect() as conn:
+        row = conn.execute(
+            text(
+                """
+                SELECT h.backup_file_path, h.base_file, h.chain_length, h.high_water_marks,
+                       EXISTS (
+                           SELECT 1 FROM backup_history r
+                           WHERE r.backup_type = 'restore' AND r.backup_id > h.backup_id
+                       ) AS restored_since
+                FROM backup_history h
+                WHERE h.backup_status = 'completed' AND h.backup_type = :backup_type
+                ORDER BY h.backup_time DESC, h.backup_id DESC
+                LIMIT 1
+                """
+            ),
+            {"backup_type": backup_type},
+        ).fetchone()
+    if row is None:
+        return None
+    marks = row[3]
+    if isinstance(marks, str):
+        marks = json.loads(marks)
+    return {
+        "file": row[0],
+        "base_file": row[1],
+        "chain_length": row[2] or 0,
+        "high_water_marks": marks or {},
+        "restored_since": bool(row[4]),
+    }
+
+
+def record_restore(engine, filename: str, user_id: Optional[int] = None) -> None:
+    """Note a completed restore in backup_history; the next scheduled backup is a full one."""
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                INSERT INTO backup_history (backup_time, backup_file_path, backup_status, backup_type, user_id, comments)
+                VALUES (CURRENT_TIMESTAMP, :file, 'completed', 'restore', :user_id, 'restored; breaks incremental chains')
+                """
+            ),
+            {"file": filename, "user_id": user_id},
+        )
+
+
+def backup_dependents(engine, filename: str) -> List[str]:
+    """Completed backups that need `filename` to restore (it is their parent or base)."""
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                """
+                SELECT backup_file_path FROM backup_history
+                WHERE backup_status = 'completed' AND backup_file_path <> :file
+                  AND (parent_file = :file OR base_file = :file)
+                ORDER BY backup_id
+                """
+            ),
+            {"file": filename},
+        ).fetchall()
+    return [row[0] for row in rows]
+
+
+def mark_backup_deleted(engine, filename: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            text("UPDATE backup_history SET backup_status = 'deleted' WHERE backup_file_path = :file"),
+            {"file": filename},
+        )
+
+
+def record_backup(engine, filename: str, manifest: Dict[str, Any], size: int, user_id: Optional[int] = None) -> None:
+    """Add a completed backup to backup_history."""
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                INSERT INTO backup_history (
+                    backup_time, backup_file_path, backup_status, backup_size, backup_type, user_id,
+                    comments, parent_file, base_file, chain_length, high_water_marks, total_records
+                )
+                VALUES (
+                    CURRENT_TIMESTAMP, :file, 'completed', :size, :backup_type, :user_id,
+                    :comments, :parent, :base, :chain_length, :high_water_marks, :total_records
+                )
+                """
+            ),
+            {
+                "file": filename,
+                "size": size,
+                "backup_type": manifest.get("backup_type"),
+                "user_id": user_id,
+                "comments": "incremental" if manifest.get("incremental") else "full",
+                "parent": manifest.get("parent"),
+                "base": manifest.get("base") or filename,
+                "chain_length": manifest.get("chain_length", 0),
+                "high_water_marks": json.dumps(manifest.get("high_water_marks", {})),
+                "total_records": manifest.get("total_records"),
+            },
+        )
+
+
+def open_backup_chain(inp, password: str, open_file: Callable[[str], Any]) -> List[BackupSource]:
+    """
+    Open a backup and, if it is incremental, its ancestors by file name.
+    Returns the chain base first, ready for copy_restore.restore_backup_chain().
+    """
+    chain: List[BackupSource] = [open_backup(inp, password)]
+    try:
+        while chain[-1].parent:
+            if len(chain) > MAX_CHAIN_LENGTH:
+                raise BackupFormatError("Backup chain is too long or circular")
+            logger.info("Opening parent backup %s", chain[-1].parent)
+            chain.append(open_backup(open_file(chain[-1].parent), password))
+    except BaseException:
+        for source in chain:
+            source.close()
+        raise
+    chain.reverse()
+    return chain
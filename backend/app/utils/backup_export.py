@@ -0,0 +1,337 @@
+"""
+Parallel Database Export
+
+Writes every table into a backup container (app/utils/backup_format.py)
+without holding a table - or the whole database - in memory:
+
+- One consistent snapshot: a coordinator connection opens a REPEATABLE READ
+  transaction and publishes it with pg_export_snapshot(); every worker
+  connection adopts it with SET TRANSACTION SNAPSHOT before reading, so all
+  tables are captured as of the same instant even though they are read
+  concurrently.
+- Tables are exported in parallel over EXPORT_WORKERS pooled connections
+  (the shared sync_engine pool, not a new engine per backup). Each worker
+  streams its table through a server-side cursor into its own encrypted,
+  compressed segment file, so wall time follows the largest table rather
+  than the sum of all of them.
+- The manifest records, per table, its row count, columns/types and the
+  byte offset (from the end of the manifest), length and SHA-256 of its
+  encrypted segment. It is written at the front of the container, then the
+  segment files are appended after it in table order.
+- Incremental backups (app/utils/backup_chain.py) pass a `since` per table:
+  those tables export only rows with updated_at > since, plus a "keys"
+  segment listing every primary key so deleted rows drop out on replay.
+  For every table with a tracked updated_at column the snapshot's
+  max(updated_at) is recorded as its high-water mark, capped at the start
+  of the oldest transaction still in flight when the snapshot was taken:
+  rows those transactions write are stamped after they start but are not
+  in the snapshot, so the next delta (updated_at >= mark) must reach back
+  to them however long they run.
+- Output goes to a ".part" file that is renamed into place once complete; a
+  failed backup never leaves a truncated file under the final name.
+"""
+
+import logging
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import inspect, text
+
+from app.utils.backup_format import (
+    BackupWriter,
+    backup_key,
+    new_header,
+    new_salt,
+    segment_checksum,
+    table_segment,
+    write_json_segment,
+)
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = 2000
+EXPORT_WORKERS = 4  # sync_engine's pool holds 5: one coordinator + four readers
+BACKUP_VERSION = "2.0"
+
+_SNAPSHOT_ID = re.compile(r"^[0-9A-Fa-f-]+$")
+
+
+def _repeatable_read(conn) -> None:
+    # SQLite (tests, offline use) only knows SERIALIZABLE, which it uses by default
+    if conn.dialect.name == "postgresql":
+        conn.execution_options(isolation_level="REPEATABLE READ")
+
+
+def _in_flight_mark(conn) -> Optional[Any]:
+    """
+    Before the snapshot: the earlier of now and the start of the oldest other
+    open transaction. Any transaction the snapshot will not see started at or
+    after this, so its rows carry updated_at >= it.
+    """
+    mark = conn.execute(
+        text(
+            """
+            SELECT LEAST(clock_timestamp(), MIN(xact_start))
+            FROM pg_stat_activity
+            WHERE xact_start IS NOT NULL AND pid <> pg_backend_pid()
+            """
+        )
+    ).scalar()
+    conn.commit()
+    return mark
+
+
+@contextmanager
+def export_snapshot(engine) -> Iterator[tuple]:
+    """
+    Hold a REPEATABLE READ transaction open and yield (connection,
+    snapshot_id, mark_cap). snapshot_id and mark_cap (see _in_flight_mark)
+    are None on databases without exported snapshots (SQLite).
+    """
+    with engine.connect() as conn:
+        mark_cap = _in_flight_mark(conn) if conn.dialect.name == "postgresql" else None
+        _repeatable_read(conn)
+        with conn.begin():
+            snapshot_id = None
+            if conn.dialect.name == "postgresql":
+                snapshot_id = conn.execute(text("SELECT pg_export_snapshot()")).scalar()
+            yield conn, snapshot_id, mark_cap
+
+
+@dataclass
+class TableExport:
+    table: str
+    segment_no: int
+    hwm_column: Optional[str] = None  # tracked updated_at column
+    since: Optional[Any] = None  # export only rows changed after this (delta)
+    key_columns: Sequence[str] = ()
+
+    @property
+    def is_delta(self) -> bool:
+        return self.since is not None
+
+    @property
+    def segment_count(self) -> int:
+        return 2 if self.is_delta else 1
+
+
+def _high_water_mark(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def _export_table(
+    engine,
+    snapshot_id: Optional[str],
+    plan: TableExport,
+    key: bytes,
+    path: str,
+    batch_size: int,
+    mark_cap: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """Stream one table into the segment file at `path`. Runs in a worker thread."""
+    quote = engine.dialect.identifier_preparer.quote
+    table = quote(plan.table)
+    with engine.connect() as conn, open(path, "wb") as out:
+        _repeatable_read(conn)
+        with conn.begin():
+            try:
+                if snapshot_id is not None:
+                    if not _SNAPSHOT_ID.match(snapshot_id):
+                        raise ValueError(f"Unexpected snapshot id {snapshot_id!r}")
+                    conn.execute(text(f"SET TRANSACTION SNAPSHOT '{snapshot_id}'"))
+                high_water_mark = None
+                if plan.hwm_column:
+                    mark_sql, mark_params = f"MAX({quote(plan.hwm_column)})", {}
+                    if mark_cap is not None:
+                        mark_sql, mark_params = f"LEAST({mark_sql}, :mark_cap)", {"mark_cap": mark_cap}
+                    high_water_mark = conn.execute(text(f"SELECT {mark_sql} FROM {table}"), mark_params).scalar()
+                query, params = f"SELECT * FROM {table}", {}
+                if plan.is_delta:
+                    # >=: rows stamped exactly at the mark may not have been visible
+                    query += f" WHERE {quote(plan.hwm_column)} >= :since"
+                    params["since"] = plan.since
+                result = conn.execution_options(stream_results=True, max_row_buffer=batch_size).execute(
+                    text(query), params
+                )
+            except Exception as e:
+                # nothing written yet: record the table as skipped, keep the numbering
+                logger.warning("Skipping table %s: %s", plan.table, e)
+                for n in range(plan.segment_count):
+                    write_json_segment(
+                        out, key, plan.segment_no + n, {"segment": "skipped", "table": plan.table}, {"error": str(e)}
+                    )
+                return {"skipped": True, "error": str(e)}
+
+            columns = list(result.keys())
+            with table_segment(out, key, plan.segment_no, plan.table, columns) as segment:
+                for batch in result.partitions(batch_size):
+                    segment.write_rows(batch)
+            result.close()
+
+            info = {
+                "skipped": False,
+                "mode": "delta" if plan.is_delta else "full",
+                "columns": columns,
+                "row_count": segment.row_count,
+                "high_water_mark": _high_water_mark(high_water_mark),
+            }
+            if plan.is_delta:
+                key_list = ", ".join(quote(c) for c in plan.key_columns)
+                result = conn.execution_options(stream_results=True, max_row_buffer=batch_size).execute(
+                    text(f"SELECT {key_list} FROM {table}")
+                )
+                with table_segment(out, key, plan.segment_no + 1, plan.table, plan.key_columns, kind="keys") as keys:
+                    for batch in result.partitions(batch_size):
+                        keys.write_rows(batch)
+                result.close()
+                info.update(key_columns=list(plan.key_columns), since=_high_water_mark(plan.since), live_rows=keys.row_count)
+    logger.info("Backed up table %s: %d records (%s)", plan.table, info["row_count"], info["mode"])
+    return info
+
+
+@dataclass
+class TableExports:
+    """Exported segment files, described in schema_info, waiting to be appended."""
+
+    plans: List[TableExport]
+    paths: List[str]
+    schema_info: Dict[str, Dict[str, Any]]
+
+    @property
+    def segment_count(self) -> int:
+        return sum(plan.segment_count for plan in self.plans)
+
+    def append_to(self, writer: BackupWriter) -> None:
+        for plan, path in zip(self.plans, self.paths):
+            with open(path, "rb") as src:
+                writer.append_segments(src, plan.segment_count)
+
+
+@contextmanager
+def export_tables(
+    engine,
+    key: bytes,
+    tables: Optional[Sequence[str]] = None,
+    workers: int = EXPORT_WORKERS,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    work_dir: Optional[str] = None,
+    tracked: Optional[Dict[str, str]] = None,
+    since: Optional[Dict[str, Any]] = None,
+) -> Iterator[TableExports]:
+    """
+    Export tables concurrently from one snapshot into temporary segment
+    files, available until the context exits.
+
+    `tracked` maps table -> updated_at column whose high-water mark is
+    recorded; tables in `since` (with a primary key) are exported as deltas.
+    schema_info: {table: {"columns", "dtypes", "row_count", "mode",
+    "high_water_mark", "offset", "length", "sha256", ...}} for every table
+    that was backed up.
+    """
+    tracked = tracked or {}
+    since = since or {}
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+        with export_snapshot(engine) as (conn, snapshot_id, mark_cap):
+            insp = inspect(conn)
+            existing = insp.get_table_names()
+            tables: List[str] = list(tables) if tables is not None else existing
+            dtypes = {t: {col["name"]: str(col["type"]) for col in insp.get_columns(t)} for t in tables if t in existing}
+
+            plans: List[TableExport] = []
+            segment_no = 0
+            for table in tables:
+                hwm_column = tracked.get(table) if tracked.get(table) in dtypes.get(table, {}) else None
+                key_columns = []
+                if hwm_column is not None:
+                    key_columns = insp.get_pk_constraint(table).get("constrained_columns") or []
+                delta = bool(key_columns) and since.get(table) is not None
+                plan = TableExport(
+                    table,
+                    segment_no,
+                    hwm_column=hwm_column,
+                    since=since[table] if delta else None,
+                    key_columns=key_columns if delta else (),
+                )
+                plans.append(plan)
+                segment_no += plan.segment_count
+            paths = [os.path.join(tmp, f"{i:04d}.seg") for i in range(len(plans))]
+
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(plans)))) as pool:
+                futures = [
+                    pool.submit(_export_table, engine, snapshot_id, plan, key, path, batch_size, mark_cap)
+                    for plan, path in zip(plans, paths)
+                ]
+                results = [future.result() for future in futures]
+
+        schema_info: Dict[str, Dict[str, Any]] = {}
+        offset = 0
+        for plan, path, result in zip(plans, paths, results):
+            with open(path, "rb") as src:
+                location = {"offset": offset, **segment_checksum(src)}
+            offset += location["length"]
+            if result.pop("skipped"):
+                continue
+            schema_info[plan.table] = {"dtypes": dtypes.get(plan.table, {}), **result, **location}
+        yield TableExports(plans, paths, schema_info)
+
+
+def write_backup_file(
+    engine,
+    path: str,
+    password: str,
+    backup_type: str,
+    tables: Optional[Sequence[str]] = None,
+    workers: int = EXPORT_WORKERS,
+    tracked: Optional[Dict[str, str]] = None,
+    since: Optional[Dict[str, Any]] = None,
+    manifest_extra: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Export the database to an encrypted backup at `path`. Returns the manifest."""
+    now = datetime.now()
+    salt = new_salt()
+    key = backup_key(password, salt)
+    partial_path = path + ".part"
+    try:
+        with open(partial_path, "wb") as f, export_tables(
+            engine,
+            key,
+            tables,
+            workers=workers,
+            work_dir=os.path.dirname(path) or None,
+            tracked=tracked,
+            since=since,
+        ) as export:
+            schema_info = export.schema_info
+            if not schema_info:
+                raise RuntimeError("No data was backed up")
+            manifest = {
+                "version": BACKUP_VERSION,
+                "timestamp": now.strftime("%Y%m%d_%H%M%S"),
+                "backup_date": now.astimezone(timezone.utc).isoformat(),
+                "backup_type": backup_type,
+                "tables": list(schema_info),
+                "total_records": sum(info["row_count"] for info in schema_info.values()),
+                "high_water_marks": {
+                    t: info["high_water_mark"] for t, info in schema_info.items() if info["high_water_mark"] is not None
+                },
+                **(manifest_extra or {}),
+                "segment_count": export.segment_count,
+                "schema_info": schema_info,
+            }
+            writer = BackupWriter(f, key, new_header(salt, created_at=now.astimezone(timezone.utc).isoformat()))
+            writer.write_manifest(manifest)
+            export.append_to(writer)
+        os.replace(partial_path, path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    return manifest
@@ -0,0 +1,614 @@
+"""
+Streaming Backup Container
+
+Backups are written and read incrementally so memory use does not grow with
+the database size.
+
+File layout:
+
+    MAGIC                              b"CDBKUP2\\n"
+    header length (4 bytes, big-endian) + header JSON (plaintext: format
+                                        version, cipher, KDF salt/iterations;
+                                        the salt is random per file, see
+                                        app/utils/backup_keys.py)
+    manifest segment                    tables, row counts, schema_info,
+                                        created_at, segment checksums
+    segment, segment, ...
+
+Each segment is an independently encrypted stream holding gzip-compressed
+newline-delimited JSON. The manifest comes first (numbered MANIFEST_SEGMENT
+rather than 0, 1, ...), so preview and schema validation decrypt a few
+kilobytes at the front of the file and never touch the table data. The
+segments after it are numbered from 0; their first line describes them:
+
+    {"segment": "table", "table": "menu", "columns": ["menu_id", ...]}
+    [1, "Bagnet Silog", ...]            <- one JSON array per row
+    ...
+
+    {"segment": "keys", "table": "sales_report", "columns": ["sales_id"]}
+    [48213]                             <- live primary keys (incremental)
+
+    {"segment": "skipped", "table": "..."}   <- table that could not be read
+    {"error": "..."}
+
+Format 2 files (written before the manifest moved to the front) keep it in
+a trailing {"segment": "manifest"} segment; BackupReader reads both.
+
+Segments are split into chunks of up to CHUNK_SIZE plaintext bytes, each
+sealed with AES-256-GCM under a random nonce. A chunk frame is
+length (4 bytes) + flags (1 byte) + nonce + ciphertext; the segment number,
+chunk number and "final" flag are bound in as associated data, so
+reordered, spliced or truncated files fail authentication instead of
+restoring partial data.
+"""
+
+import base64
+import gzip
+import hashlib
+import io
+import json
+import os
+import struct
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from app.utils.backup_keys import (
+    KDF_ITERATIONS,
+    LEGACY_SALT,
+    backup_key,
+    derive_backup_key,
+    legacy_fernet_key,
+    new_salt,
+)
+
+MAGIC = b"CDBKUP2\n"
+FORMAT_VERSION = 3
+READABLE_FORMATS = (2, 3)
+MANIFEST_SEGMENT = 0xFFFFFFFF
+CHUNK_SIZE = 64 * 1024
+NONCE_SIZE = 12
+
+_FRAME = struct.Struct(">IB")  # ciphertext length (incl. nonce), flags
+_FLAG_FINAL = 0x01
+_LENGTH = struct.Struct(">I")
+
+
+class BackupFormatError(ValueError):
+    pass
+
+
+class BackupDecryptionError(BackupFormatError):
+    pass
+
+
+def is_streaming_backup(prefix: bytes) -> bool:
+    return prefix.startswith(MAGIC)
+
+
+def _aad(segment_no: int, chunk_no: int, final: bool) -> bytes:
+    return struct.pack(">IQ?", segment_no, chunk_no, final)
+
+
+def _json_line(value: Any) -> bytes:
+    return json.dumps(value, default=str, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+# --- encryption --------------------------------------------------------------
+
+
+class SegmentEncryptor(io.RawIOBase):
+    """Write-only stream that seals everything written to it as one segment."""
+
+    def __init__(self, out, key: bytes, segment_no: int):
+        self._out = out
+        self._aead = AESGCM(key)
+        self._segment_no = segment_no
+        self._chunk_no = 0
+        self._buffer = bytearray()
+        self._finished = False
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer += data
+        # keep the last (possibly full) chunk buffered: it may be the final one
+        while len(self._buffer) > CHUNK_SIZE:
+            self._emit(bytes(self._buffer[:CHUNK_SIZE]), final=False)
+            del self._buffer[:CHUNK_SIZE]
+        return len(data)
+
+    def _emit(self, plaintext: bytes, final: bool) -> None:
+        nonce = os.urandom(NONCE_SIZE)
+        sealed = self._aead.encrypt(nonce, plaintext, _aad(self._segment_no, self._chunk_no, final))
+        self._out.write(_FRAME.pack(len(sealed) + NONCE_SIZE, _FLAG_FINAL if final else 0))
+        self._out.write(nonce)
+        self._out.write(sealed)
+        self._chunk_no += 1
+
+    def finish(self) -> None:
+        if not self._finished:
+            self._emit(bytes(self._buffer), final=True)
+            self._buffer.clear()
+            self._finished = True
+
+    def close(self) -> None:
+        if not self.closed:
+            self.finish()
+        super().close()
+
+
+def iter_segment_chunks(inp, key: bytes, segment_no: int) -> Iterator[bytes]:
+    """Decrypt one segment chunk by chunk, verifying order and completeness."""
+    aead = AESGCM(key)
+    chunk_no = 0
+    while True:
+        frame = inp.read(_FRAME.size)
+        if len(frame) < _FRAME.size:
+            raise BackupFormatError("Backup file is truncated")
+        length, flags = _FRAME.unpack(frame)
+        body = inp.read(length)
+        if len(body) < length or length < NONCE_SIZE:
+            raise BackupFormatError("Backup file is truncated")
+        final = bool(flags & _FLAG_FINAL)
+        try:
+            yield aead.decrypt(body[:NONCE_SIZE], body[NONCE_SIZE:], _aad(segment_no, chunk_no, final))
+        except InvalidTag:
+            raise BackupDecryptionError("Decryption failed. Check your password and backup file.")
+        if final:
+            return
+        chunk_no += 1
+
+
+def skip_segment(inp) -> int:
+    """Seek past a segment without decrypting it. Returns bytes skipped."""
+    skipped = 0
+    while True:
+        frame = inp.read(_FRAME.size)
+        if len(frame) < _FRAME.size:
+            raise BackupFormatError("Backup file is truncated")
+        length, flags = _FRAME.unpack(frame)
+        inp.seek(length, io.SEEK_CUR)
+        skipped += _FRAME.size + length
+        if flags & _FLAG_FINAL:
+            return skipped
+
+
+class _ChunkReader(io.RawIOBase):
+    """File-like view over decrypted chunks (for gzip.GzipFile)."""
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._pending = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            try:
+                self._pending = next(self._chunks)
+            except StopIteration:
+                return 0
+        n = min(len(buffer), len(self._pending))
+        buffer[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+
+
+def open_segment(inp, key: bytes, segment_no: int) -> io.BufferedReader:
+    """Decrypted, decompressed line reader for one segment."""
+    raw = _ChunkReader(iter_segment_chunks(inp, key, segment_no))
+    return io.BufferedReader(gzip.GzipFile(fileobj=io.BufferedReader(raw), mode="rb"))
+
+
+# --- container ---------------------------------------------------------------
+
+
+def new_header(salt: Optional[bytes] = None, iterations: int = KDF_ITERATIONS, **extra) -> Dict[str, Any]:
+    """Plaintext file header. Without `salt` a fresh random one is used."""
+    if salt is None:
+        salt = new_salt()
+    return {
+        "format": FORMAT_VERSION,
+        "cipher": "AES-256-GCM",
+        "chunk_size": CHUNK_SIZE,
+        "kdf": {
+            "name": "pbkdf2-sha256",
+            "salt": base64.b64encode(salt).decode("ascii"),
+            "iterations": iterations,
+        },
+        **extra,
+    }
+
+
+def header_salt(header: Dict[str, Any]) -> bytes:
+    return base64.b64decode(header["kdf"]["salt"])
+
+
+def header_iterations(header: Dict[str, Any]) -> int:
+    """
+    KDF iterations from the (unauthenticated) header. Every writer uses
+    KDF_ITERATIONS; anything else is refused rather than trusted, so a crafted
+    file cannot make a restore derive with an arbitrary work factor.
+    """
+    iterations = header.get("kdf", {}).get("iterations")
+    if iterations != KDF_ITERATIONS:
+        raise BackupFormatError(f"Unsupported KDF iteration count {iterations!r}")
+    return iterations
+
+
+class _TableSegment:
+    def __init__(self, gz, descriptor_line: bytes):
+        self._gz = gz
+        self.row_count = 0
+        self._gz.write(descriptor_line)
+
+    def write_rows(self, rows: Iterable[Sequence[Any]]) -> None:
+        lines = []
+        for row in rows:
+            lines.append(_json_line(list(row)))
+        self._gz.write(b"".join(lines))
+        self.row_count += len(lines)
+
+
+@contextmanager
+def table_segment(
+    out, key: bytes, segment_no: int, name: str, columns: Sequence[str], kind: str = "table"
+) -> Iterator[_TableSegment]:
+    """
+    Write rows of one table as segment `segment_no` (segments may be built
+    separately and appended). kind="keys" holds the primary keys of every
+    live row, written alongside a delta of an incremental backup.
+    """
+    encryptor = SegmentEncryptor(out, key, segment_no)
+    gz = gzip.GzipFile(fileobj=encryptor, mode="wb", compresslevel=6)
+    yield _TableSegment(gz, _json_line({"segment": kind, "table": name, "columns": list(columns)}))
+    gz.close()
+    encryptor.close()
+
+
+def write_json_segment(out, key: bytes, segment_no: int, descriptor: Dict[str, Any], body: Any) -> None:
+    """A segment holding a descriptor line and one JSON document (manifest, skipped table)."""
+    encryptor = SegmentEncryptor(out, key, segment_no)
+    gz = gzip.GzipFile(fileobj=encryptor, mode="wb", compresslevel=6)
+    gz.write(_json_line(descriptor))
+    gz.write(_json_line(body))
+    gz.close()
+    encryptor.close()
+
+
+def segment_checksum(src) -> Dict[str, Any]:
+    """Length and SHA-256 of the encrypted segment bytes in a file object."""
+    digest = hashlib.sha256()
+    length = 0
+    while True:
+        block = src.read(CHUNK_SIZE)
+        if not block:
+            break
+        digest.update(block)
+        length += len(block)
+    return {"length": length, "sha256": digest.hexdigest()}
+
+
+class BackupWriter:
+    """
+    Write a backup container to a binary file object, one segment at a time.
+
+        salt = new_salt()
+        writer = BackupWriter(f, backup_key(password, salt), new_header(salt))
+        writer.write_manifest(manifest)
+        with writer.table("menu", columns) as segment:
+            segment.write_rows(batch)
+
+    The manifest goes first, so its row counts and checksums must be known
+    before the segments are written: backup_export builds segments in
+    parallel into temporary files (numbered in advance), describes them with
+    segment_checksum() and then adds them in order with append_segments().
+    """
+
+    def __init__(self, out, key: bytes, header: Dict[str, Any]):
+        self._out = out
+        self._key = key
+        self._segment_no = 0
+        self._manifest_written = False
+        header_bytes = json.dumps(header).encode("utf-8")
+        out.write(MAGIC)
+        out.write(_LENGTH.pack(len(header_bytes)))
+        out.write(header_bytes)
+
+    def _next_segment(self) -> int:
+        segment_no = self._segment_no
+        self._segment_no += 1
+        return segment_no
+
+    @contextmanager
+    def table(self, name: str, columns: Sequence[str]) -> Iterator[_TableSegment]:
+        with table_segment(self._out, self._key, self._next_segment(), name, columns) as segment:
+            yield segment
+
+    def append_segments(self, src, count: int = 1) -> None:
+        """Copy `count` already encrypted segments (numbered as the next ones) from a file object."""
+        for _ in range(count):
+            self._next_segment()
+        while True:
+            block = src.read(CHUNK_SIZE)
+            if not block:
+                break
+            self._out.write(block)
+
+    def write_manifest(self, manifest: Dict[str, Any]) -> None:
+        """Seal the manifest at the front of the file; must come before any segment."""
+        if self._segment_no or self._manifest_written:
+            raise BackupFormatError("The manifest must be written once, before any segment")
+        write_json_segment(self._out, self._key, MANIFEST_SEGMENT, {"segment": "manifest"}, manifest)
+        self._manifest_written = True
+
+
+class Segment:
+    def __init__(self, kind: str, descriptor: Dict[str, Any], lines: io.BufferedReader):
+        self.kind = kind
+        self.table: Optional[str] = descriptor.get("table")
+        self.columns: List[str] = descriptor.get("columns", [])
+        self._lines = lines
+
+    def rows(self) -> Iterator[List[Any]]:
+        for line in self._lines:
+            if line.strip():
+                yield json.loads(line)
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        columns = self.columns
+        for row in self.rows():
+            yield dict(zip(columns, row))
+
+    def read_json(self) -> Any:
+        return json.loads(self._lines.readline())
+
+    def drain(self) -> None:
+        while self._lines.read(CHUNK_SIZE):
+            pass
+
+
+def read_header(inp) -> Dict[str, Any]:
+    """The plaintext header at the start of a streaming backup (no password needed)."""
+    if inp.read(len(MAGIC)) != MAGIC:
+        raise BackupFormatError("Not a streaming backup file")
+    (length,) = _LENGTH.unpack(inp.read(_LENGTH.size))
+    return json.loads(inp.read(length))
+
+
+class BackupReader:
+    """Sequential reader for a backup container."""
+
+    def __init__(self, inp, password: Optional[str] = None, key: Optional[bytes] = None):
+        self._inp = inp
+        self.header = read_header(inp)
+        self.format = self.header.get("format")
+        if self.format not in READABLE_FORMATS:
+            raise BackupFormatError(f"Unsupported backup format {self.format}")
+        if key is None:
+            key = backup_key(password, header_salt(self.header), header_iterations(self.header))
+        self._key = key
+        self._manifest: Optional[Dict[str, Any]] = None
+        if self.format >= 3:
+            lines = open_segment(inp, key, MANIFEST_SEGMENT)
+            if json.loads(lines.readline()).get("segment") != "manifest":
+                raise BackupFormatError("Backup file has no manifest")
+            self._manifest = json.loads(lines.readline())
+            while lines.read(CHUNK_SIZE):
+                pass
+        # segment offsets in the manifest are relative to this position
+        self.data_start = inp.tell()
+
+    def manifest(self) -> Dict[str, Any]:
+        """
+        The manifest, decrypted when the file was opened. Format 2 files keep
+        it in the last segment: earlier segments are skipped by their frame
+        lengths without decrypting them.
+        """
+        if self._manifest is not None:
+            return self._manifest
+        self._inp.seek(self.data_start)
+        starts = []
+        while True:
+            position = self._inp.tell()
+            if not self._inp.read(1):
+                break
+            self._inp.seek(position)
+            starts.append(position)
+            skip_segment(self._inp)
+        if not starts:
+            raise BackupFormatError("Backup file has no manifest")
+        self._inp.seek(starts[-1])
+        lines = open_segment(self._inp, self._key, len(starts) - 1)
+        if json.loads(lines.readline()).get("segment") != "manifest":
+            raise BackupFormatError("Backup file has no manifest")
+        self._manifest = json.loads(lines.readline())
+        self._inp.seek(self.data_start)
+        return self._manifest
+
+    def _table_spans(self, tables: Set[str]) -> Optional[List[Tuple[int, int]]]:
+        """Absolute (start, end) of the tables' segments per the manifest, if it records them."""
+        schema_info = (self._manifest or {}).get("schema_info") or {}
+        if self.format < 3 or not all("offset" in info for info in schema_info.values()):
+            return None
+        return [
+            (self.data_start + info["offset"], self.data_start + info["offset"] + info["length"])
+            for table, info in schema_info.items()
+            if table in tables
+        ]
+
+    def segments(self, tables: Optional[Iterable[str]] = None) -> Iterator[Segment]:
+        """
+        Yield segments in file order. A segment's rows must be consumed before
+        the next segment is requested; anything left unread is drained.
+
+        With `tables`, only those tables' segments are yielded. The others
+        are skipped by their frame lengths without decrypting them: located
+        through the manifest's offsets, or (format 2) by reading just the
+        segment's descriptor.
+        """
+        selected = None if tables is None else set(tables)
+        spans = None if selected is None else self._table_spans(selected)
+        self._inp.seek(self.data_start)
+        expected = (self._manifest or {}).get("segment_count")
+        segment_no = 0
+        while True:
+            position = self._inp.tell()
+            if not self._inp.read(1):
+                if expected is not None and segment_no != expected:
+                    raise BackupFormatError("Backup file is truncated")
+                return
+            self._inp.seek(position)
+            if spans is not None and not any(start <= position < end for start, end in spans):
+                skip_segment(self._inp)
+                segment_no += 1
+                continue
+            lines = open_segment(self._inp, self._key, segment_no)
+            descriptor = json.loads(lines.readline())
+            if selected is not None and descriptor.get("table") not in selected:
+                self._inp.seek(position)
+                skip_segment(self._inp)
+                segment_no += 1
+                continue
+            segment = Segment(descriptor.get("segment", ""), descriptor, lines)
+            yield segment
+            segment.drain()
+            segment_no += 1
+
+
+def read_backup_payload(inp, password: str) -> Dict[str, Any]:
+    """
+    Load a streaming backup into the legacy in-memory shape
+    {"version", "backup_date", "schema_info", "data": {table: [records]}}.
+    """
+    reader = BackupReader(inp, password)
+    data: Dict[str, List[Dict[str, Any]]] = {}
+    keys: Dict[str, List[List[Any]]] = {}
+    manifest: Dict[str, Any] = reader.manifest() if reader.format >= 3 else {}
+    for segment in reader.segments():
+        if segment.kind == "table":
+            data[segment.table] = list(segment.records())
+        elif segment.kind == "keys":
+            keys[segment.table] = list(segment.rows())
+        elif segment.kind == "manifest":
+            manifest = segment.read_json()
+    return {
+        "version": manifest.get("version", str(FORMAT_VERSION)),
+        "timestamp": manifest.get("timestamp"),
+        "backup_date": manifest.get("backup_date"),
+        "backup_type": manifest.get("backup_type"),
+        "parent": manifest.get("parent"),
+        "schema_info": manifest.get("schema_info", {}),
+        "data": data,
+        "keys": keys,
+    }
+
+
+def load_backup_payload(data: bytes, password: str) -> Any:
+    """Decrypt and parse a whole backup file of either format into memory."""
+    if is_streaming_backup(data):
+        return read_backup_payload(io.BytesIO(data), password)
+    try:
+        decrypted = Fernet(legacy_fernet_key(password)).decrypt(data)
+    except InvalidToken:
+        raise BackupDecryptionError("Decryption failed. Check your password and backup file.")
+    return json.loads(gzip.decompress(decrypted).decode("utf-8"))
+
+
+class _RecordsSegment:
+    """A table from a version 1 backup, held in memory, with the Segment interface."""
+
+    kind = "table"
+
+    def __init__(self, table: str, records: List[Dict[str, Any]]):
+        self.table = table
+        self.columns: List[str] = list(records[0]) if records else []
+        self._records = records
+
+    def rows(self) -> Iterator[List[Any]]:
+        columns = self.columns
+        for record in self._records:
+            yield [record.get(c) for c in columns]
+
+    def drain(self) -> None:
+        pass
+
+
+class BackupSource:
+    """
+    One backup file opened for restore, in either format. Streaming backups
+    are read segment by segment from the (seekable) file; version 1 files
+    are a single Fernet token and have to be decrypted into memory.
+    """
+
+    def __init__(self, inp, manifest: Dict[str, Any], reader: Optional[BackupReader] = None, data=None):
+        self._inp = inp
+        self.manifest = manifest
+        self._reader = reader
+        self._data = data or {}
+
+    @property
+    def version(self) -> Optional[str]:
+        return self.manifest.get("version")
+
+    @property
+    def backup_date(self) -> Optional[str]:
+        return self.manifest.get("backup_date")
+
+    @property
+    def schema_info(self) -> Dict[str, Any]:
+        return self.manifest.get("schema_info") or {}
+
+    @property
+    def parent(self) -> Optional[str]:
+        return self.manifest.get("parent")
+
+    @property
+    def tables(self) -> List[str]:
+        if self._reader is None:
+            return list(self._data)
+        return list(self.manifest.get("tables") or self.schema_info)
+
+    def row_counts(self) -> Dict[str, int]:
+        """Rows per table, from the manifest (streaming backups) or the loaded data."""
+        if self._reader is None:
+            return {table: len(records) for table, records in self._data.items()}
+        return {table: self.schema_info.get(table, {}).get("row_count", 0) for table in self.tables}
+
+    def segments(self, tables: Optional[Iterable[str]] = None) -> Iterator[Any]:
+        """Segments in file order; with `tables`, only those tables' (see BackupReader.segments)."""
+        if self._reader is not None:
+            yield from self._reader.segments(tables)
+        else:
+            selected = None if tables is None else set(tables)
+            for table, records in self._data.items():
+                if selected is None or table in selected:
+                    yield _RecordsSegment(table, records)
+
+    def close(self) -> None:
+        self._inp.close()
+
+
+def open_backup(inp, password: str) -> BackupSource:
+    """Open a backup file object (seekable) of either format for restore."""
+    start = inp.tell()
+    prefix = inp.read(len(MAGIC))
+    inp.seek(start)
+    if is_streaming_backup(prefix):
+        reader = BackupReader(inp, password)
+        return BackupSource(inp, reader.manifest(), reader=reader)
+
+    payload = load_backup_payload(inp.read(), password)
+    if not isinstance(payload, dict):
+        raise BackupFormatError("Invalid backup file: No table data found")
+    if isinstance(payload, dict) and "version" in payload and "data" in payload:
+        manifest = {k: v for k, v in payload.items() if k != "data"}
+        return BackupSource(inp, manifest, data=payload["data"])
+    # oldest format: {table: [records]} without metadata
+    return BackupSource(inp, {}, data=payload)
@@ -0,0 +1,72 @@
+"""
+Backup Key Service
+
+Backup keys come from the backup password through PBKDF2-HMAC-SHA256 with
+KDF_ITERATIONS iterations, which costs about a third of a second of CPU per
+derivation. So:
+
+- Every new backup file gets its own random salt (new_salt()), stored in its
+  plaintext header; files written before that carry LEGACY_SALT there and
+  still open. Version 1 (Fernet) backups always used LEGACY_SALT.
+- backup_key() keeps recently derived keys in a small in-process LRU
+  (KEY_CACHE_SIZE entries, KEY_CACHE_TTL_SECONDS each) keyed by salt,
+  iterations and an HMAC of the password under a per-process secret, so the
+  password itself is never stored. Preview followed by restore of the same
+  file, or reopening a chain's parents, derives each key once.
+- Derivation is blocking: callers run in the threadpool (run_in_threadpool),
+  never inline in an async handler.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+from app.utils.response_cache import InMemoryLRUBackend
+
+KDF_ITERATIONS = 390000
+LEGACY_SALT = b"cardiacdelights-backup-salt"
+SALT_SIZE = 16
+KEY_CACHE_SIZE = 32
+KEY_CACHE_TTL_SECONDS = int(os.getenv("BACKUP_KEY_CACHE_TTL", "600"))
+
+_cache = InMemoryLRUBackend(max_entries=KEY_CACHE_SIZE)
+_cache_secret = os.urandom(32)
+
+
+def new_salt() -> bytes:
+    return os.urandom(SALT_SIZE)
+
+
+def derive_backup_key(password: str, salt: bytes, iterations: int = KDF_ITERATIONS) -> bytes:
+    """Raw 32-byte AES key from the backup password (PBKDF2-HMAC-SHA256), uncached."""
+    kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=iterations)
+    return kdf.derive(password.encode())
+
+
+def _cache_key(password: str, salt: bytes, iterations: int) -> str:
+    tag = hmac.new(_cache_secret, password.encode(), hashlib.sha256).hexdigest()
+    return f"{base64.b64encode(salt).decode('ascii')}:{iterations}:{tag}"
+
+
+def backup_key(password: str, salt: bytes, iterations: int = KDF_ITERATIONS) -> bytes:
+    """derive_backup_key() through the key cache."""
+    cache_key = _cache_key(password, salt, iterations)
+    hit, key = _cache.get(cache_key)
+    if hit:
+        return key
+    key = derive_backup_key(password, salt, iterations)
+    _cache.set(cache_key, key, KEY_CACHE_TTL_SECONDS)
+    return key
+
+
+def legacy_fernet_key(password: str) -> bytes:
+    """Key for version 1 backups: one Fernet token over the gzipped JSON."""
+    return base64.urlsafe_b64encode(backup_key(password, LEGACY_SALT))
+
+
+def clear_key_cache() -> None:
+    _cache.delete_prefix("")
@@ -0,0 +1,140 @@
+"""
+Backup Retention
+
+After each scheduled backup, older scheduled backups are thinned out
+grandfather-father-son style so storage and listings stay bounded:
+
+- Keep the newest backup of each of the last KEEP_DAILY days, KEEP_WEEKLY ISO
+  weeks and KEEP_MONTHLY months that have backups (BACKUP_KEEP_DAILY /
+  BACKUP_KEEP_WEEKLY / BACKUP_KEEP_MONTHLY). The newest backup is always kept:
+  the next incremental builds on it.
+- A kept incremental backup is only restorable with its parents
+  (app/utils/backup_chain.py), so every ancestor of a kept backup is kept
+  too ("chain").
+- Everything else is deleted from backup storage in batches and from
+  BACKUP_DIR, then marked backup_status = 'pruned' with pruned_at; kept rows
+  get their retention_tier. Files go first: if the database update fails,
+  the next run plans the same deletions again.
+
+Manual and pre-restore safety backups are never pruned here.
+"""
+
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+DELETE_BATCH_SIZE = 100
+
+
+@dataclass
+class RetentionPolicy:
+    daily: int = int(os.getenv("BACKUP_KEEP_DAILY", "7"))
+    weekly: int = int(os.getenv("BACKUP_KEEP_WEEKLY", "4"))
+    monthly: int = int(os.getenv("BACKUP_KEEP_MONTHLY", "6"))
+
+
+_TIERS: Sequence[Tuple[str, Callable[[datetime], Any]]] = (
+    ("daily", lambda t: t.date()),
+    ("weekly", lambda t: t.isocalendar()[:2]),
+    ("monthly", lambda t: (t.year, t.month)),
+)
+
+
+def _backup_time(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+def plan_retention(
+    backups: List[Dict[str, Any]], policy: Optional[RetentionPolicy] = None
+) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Split backups ({"file", "time", "parent"}) into kept {file: tier} and
+    files to prune, oldest first.
+    """
+    policy = policy or RetentionPolicy()
+    newest_first = sorted(backups, key=lambda b: _backup_time(b["time"]), reverse=True)
+    keep: Dict[str, str] = {}
+    if newest_first:
+        keep[newest_first[0]["file"]] = "daily"
+    for tier, bucket_of in _TIERS:
+        limit = getattr(policy, tier)
+        seen = set()
+        for backup in newest_first:
+            bucket = bucket_of(_backup_time(backup["time"]))
+            if bucket in seen:
+                continue
+            if len(seen) >= limit:
+                break
+            seen.add(bucket)
+            keep.setdefault(backup["file"], tier)
+
+    parents = {b["file"]: b.get("parent") for b in backups}
+    for name in list(keep):
+        parent = parents.get(name)
+        while parent and parent not in keep:
+            keep[parent] = "chain"
+            parent = parents.get(parent)
+
+    prune = [b["file"] for b in reversed(newest_first) if b["file"] not in keep]
+    return keep, prune
+
+
+def _completed_backups(engine, backup_type: str) -> List[Dict[str, Any]]:
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                """
+                SELECT backup_file_path, backup_time, parent_file
+                FROM backup_history
+                WHERE backup_status = 'completed' AND backup_type = :backup_type
+                """
+            ),
+            {"backup_type": backup_type},
+        ).fetchall()
+    return [{"file": row[0], "time": row[1], "parent": row[2]} for row in rows if row[0] and row[1]]
+
+
+def apply_retention(
+    engine,
+    storage,
+    local_dir: Optional[str] = None,
+    policy: Optional[RetentionPolicy] = None,
+    backup_type: str = "scheduled",
+) -> Dict[str, Any]:
+    """Prune `backup_type` backups per `policy`. Returns {"kept": {file: tier}, "pruned": [files]}."""
+    keep, prune = plan_retention(_completed_backups(engine, backup_type), policy)
+
+    for i in range(0, len(prune), DELETE_BATCH_SIZE):
+        storage.delete(prune[i:i + DELETE_BATCH_SIZE])
+    if local_dir:
+        for name in prune:
+            try:
+                os.remove(os.path.join(local_dir, os.path.basename(name)))
+            except FileNotFoundError:
+                pass
+
+    with engine.begin() as conn:
+        if keep:
+            conn.execute(
+                text("UPDATE backup_history SET retention_tier = :tier WHERE backup_file_path = :file"),
+                [{"file": name, "tier": tier} for name, tier in keep.items()],
+            )
+        if prune:
+            conn.execute(
+                text(
+                    "UPDATE backup_history SET backup_status = 'pruned', retention_tier = NULL, "
+                    "pruned_at = CURRENT_TIMESTAMP WHERE backup_file_path = :file"
+                ),
+                [{"file": name} for name in prune],
+            )
+    if prune:
+        logger.info("Retention pruned %d %s backups, kept %d", len(prune), backup_type, len(keep))
+    return {"kept": keep, "pruned": prune}
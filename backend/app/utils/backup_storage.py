@@ -0,0 +1,267 @@
+"""
+Backup Storage
+
+Where backup files live once written, behind one small interface so the
+routes never hold a whole backup in memory:
+
+- SupabaseBackupStorage (default): the "cardiacdelights-backup" bucket.
+  Uploads stream the local file through the Storage REST API with
+  x-upsert, which replaces an existing object in one request (no
+  remove-then-upload window where the backup exists nowhere). Downloads are
+  ranged, chunked GETs. Listing and deletion use the supabase client.
+- LocalBackupStorage: a directory, for tests and offline use
+  (BACKUP_STORAGE=local, BACKUP_STORAGE_DIR). Uploads go to a ".part" file
+  renamed into place.
+
+open_range() returns the object size and a chunk iterator, ready for a
+StreamingResponse; parse_range() handles the HTTP Range header so clients can
+resume a download.
+"""
+
+import logging
+import os
+from abc import ABC, abstractmethod
+import pathlib
+import re
+import shutil
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+SUPABASE_BUCKET = "cardiacdelights-backup"
+BACKUP_DIR = str(pathlib.Path.home() / "Documents" / "cardiacdelights_backups")
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+HTTP_TIMEOUT = httpx.Timeout(30.0, read=120.0)
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_CONTENT_RANGE = re.compile(r"/(\d+)$")
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) inclusive for a single "bytes=" range, or None for the whole
+    object (no header, or a form we do not serve such as multiple ranges).
+    """
+    if not header:
+        return None
+    match = _RANGE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        # suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable(header)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable(header)
+    return start, end
+
+
+class BackupStorage(ABC):
+    """Interface shared by the storage backends."""
+
+    @abstractmethod
+    def upload(self, local_path: str, name: Optional[str] = None) -> None:
+        """Store (or replace) a backup under `name` (default: the file's name)."""
+
+    @abstractmethod
+    def open_range(self, name: str, start: int = 0, end: Optional[int] = None) -> Tuple[int, Iterator[bytes]]:
+        """Total size of `name` and an iterator over bytes start..end (inclusive)."""
+
+    @abstractmethod
+    def size(self, name: str) -> int:
+        """Size of `name` in bytes; FileNotFoundError if it does not exist."""
+
+    @abstractmethod
+    def list(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """[{"name", "size", "updated_at"}], newest name first."""
+
+    @abstractmethod
+    def delete(self, names: List[str]) -> None:
+        """Remove the named backups; missing names are ignored."""
+
+    def open(self, name: str):
+        """Seekable binary file with the backup's contents, read in chunks."""
+        _, chunks = self.open_range(name)
+        f = tempfile.TemporaryFile()
+        try:
+            for chunk in chunks:
+                f.write(chunk)
+        except BaseException:
+            f.close()
+            raise
+        f.seek(0)
+        return f
+
+
+def content_disposition(name: str) -> str:
+    """Quoted attachment header for a backup name (escaped; non-ASCII via filename*)."""
+    name = os.path.basename(name).replace("\r", "").replace("\n", "")
+    fallback = name.encode("ascii", "replace").decode("ascii").replace("\\", "\\\\").replace('"', '\\"')
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(name)}"
+
+
+class LocalBackupStorage(BackupStorage):
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, os.path.basename(name))
+
+    def upload(self, local_path: str, name: Optional[str] = None) -> None:
+        target = self._path(name or os.path.basename(local_path))
+        if os.path.abspath(local_path) == os.path.abspath(target):
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with open(local_path, "rb") as src, open(target + ".part", "wb") as dst:
+            shutil.copyfileobj(src, dst, DOWNLOAD_CHUNK_SIZE)
+        os.replace(target + ".part", target)
+
+    def size(self, name: str) -> int:
+        return os.path.getsize(self._path(name))
+
+    def open_range(self, name: str, start: int = 0, end: Optional[int] = None) -> Tuple[int, Iterator[bytes]]:
+        path = self._path(name)
+        total = os.path.getsize(path)
+        end = total - 1 if end is None else end
+
+        def chunks() -> Iterator[bytes]:
+            with open(path, "rb") as f:
+                f.seek(start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    block = f.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+                    if not block:
+                        return
+                    remaining -= len(block)
+                    yield block
+
+        return total, chunks()
+
+    def open(self, name: str):
+        return open(self._path(name), "rb")
+
+    def list(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        if not os.path.isdir(self.directory):
+            return []
+        entries = sorted(
+            (e for e in os.scandir(self.directory) if e.is_file() and not e.name.endswith(".part")),
+            key=lambda e: e.name,
+            reverse=True,
+        )
+        return [
+            {"name": e.name, "size": e.stat().st_size, "updated_at": e.stat().st_mtime}
+            for e in entries[offset:offset + limit]
+        ]
+
+    def delete(self, names: List[str]) -> None:
+        for name in names:
+            try:
+                os.remove(self._path(name))
+            except FileNotFoundError:
+                pass
+
+
+class SupabaseBackupStorage(BackupStorage):
+    def __init__(self, url: str, api_key: str, bucket: str = SUPABASE_BUCKET, client=None, http: Optional[httpx.Client] = None):
+        self.bucket = bucket
+        self._client = client
+        self._object_url = f"{url.rstrip('/')}/storage/v1/object/{bucket}"
+        self._http = http or httpx.Client(timeout=HTTP_TIMEOUT)
+        self._headers = {"apikey": api_key, "Authorization": f"Bearer {api_key}"}
+
+    def _url(self, name: str) -> str:
+        return f"{self._object_url}/{quote(name)}"
+
+    def upload(self, local_path: str, name: Optional[str] = None) -> None:
+        name = name or os.path.basename(local_path)
+        with open(local_path, "rb") as f:
+            response = self._http.post(
+                self._url(name),
+                content=iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""),
+                headers={
+                    **self._headers,
+                    "x-upsert": "true",
+                    "Content-Type": "application/octet-stream",
+                    "Content-Length": str(os.path.getsize(local_path)),
+                },
+            )
+        response.raise_for_status()
+        logger.info("Uploaded %s to bucket %s", name, self.bucket)
+
+    def open_range(self, name: str, start: int = 0, end: Optional[int] = None) -> Tuple[int, Iterator[bytes]]:
+        headers = dict(self._headers)
+        if start or end is not None:
+            headers["Range"] = f"bytes={start}-{'' if end is None else end}"
+        response = self._http.send(self._http.build_request("GET", self._url(name), headers=headers), stream=True)
+        if response.status_code in (400, 404):
+            response.close()
+            raise FileNotFoundError(name)
+        if response.is_error:
+            response.close()
+            response.raise_for_status()
+        content_range = _CONTENT_RANGE.search(response.headers.get("content-range", ""))
+        if content_range:
+            total = int(content_range.group(1))
+        else:
+            total = int(response.headers.get("content-length", 0))
+
+        def chunks() -> Iterator[bytes]:
+            try:
+                yield from response.iter_bytes(DOWNLOAD_CHUNK_SIZE)
+            finally:
+                response.close()
+
+        return total, chunks()
+
+    def size(self, name: str) -> int:
+        response = self._http.head(self._url(name), headers=self._headers)
+        if response.status_code in (400, 404):
+            raise FileNotFoundError(name)
+        response.raise_for_status()
+        return int(response.headers["content-length"])
+
+    def list(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        files = self._client.storage.from_(self.bucket).list(
+            "", {"limit": limit, "offset": offset, "sortBy": {"column": "name", "order": "desc"}}
+        )
+        return [
+            {
+                "name": f["name"],
+                "size": (f.get("metadata") or {}).get("size"),
+                "updated_at": f.get("updated_at"),
+            }
+            for f in files
+        ]
+
+    def delete(self, names: List[str]) -> None:
+        if names:
+            self._client.storage.from_(self.bucket).remove(names)
+
+
+_storage: Optional[BackupStorage] = None
+
+
+def get_backup_storage() -> BackupStorage:
+    """The configured backup storage (BACKUP_STORAGE=supabase|local), created once."""
+    global _storage
+    if _storage is None:
+        if os.getenv("BACKUP_STORAGE", "supabase").lower() == "local":
+            _storage = LocalBackupStorage(os.getenv("BACKUP_STORAGE_DIR", os.path.join(BACKUP_DIR, "storage")))
+        else:
+            from app.supabase import SUPABASE_API_KEY, SUPABASE_URL, supabase
+
+            _storage = SupabaseBackupStorage(SUPABASE_URL, SUPABASE_API_KEY, client=supabase)
+    return _storage
@@ -0,0 +1,133 @@
+"""
+Holiday Calendar
+
+One date-indexed view of official PH holidays (holidays.country_holidays)
+and store-defined custom holidays (custom_holidays table):
+
+- Official holidays are built once per year and kept; they never change.
+- Custom holidays are loaded from the table on first use and reloaded after
+  invalidate_custom() (called by the custom holiday routes) or once
+  CUSTOM_HOLIDAY_MAX_AGE_SECONDS have passed, for edits made by other workers.
+  Callers that persist what they compute pass fresh=True to read the table
+  regardless, so another worker's stale cache never reaches the database.
+- day() and week() are dictionary lookups; week results are memoized per
+  Monday-start week until custom holidays change.
+"""
+
+import logging
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import holidays
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+CUSTOM_HOLIDAY_MAX_AGE_SECONDS = 300
+
+# (is_holiday_week, holiday_type, holiday_names)
+HolidayWeek = Tuple[int, Optional[str], Optional[str]]
+
+
+def as_date(value: Any) -> Optional[date]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+class HolidayCalendar:
+    def __init__(self, country: str = "PH"):
+        self.country = country
+        self._official: Dict[int, Dict[date, List[str]]] = {}
+        self._custom: Optional[Dict[date, List[str]]] = None
+        self._custom_loaded_at = 0.0
+        self._weeks: Dict[date, HolidayWeek] = {}
+
+    # --- sources ---------------------------------------------------------
+
+    def official_year(self, year: int) -> Dict[date, List[str]]:
+        days = self._official.get(year)
+        if days is None:
+            official = holidays.country_holidays(self.country, years=[year])
+            days = {day: [name] for day, name in sorted(official.items())}
+            self._official[year] = days
+        return days
+
+    def set_custom(self, rows: Iterable[Tuple[Any, str]]) -> None:
+        custom: Dict[date, List[str]] = {}
+        for day, name in rows:
+            day = as_date(day)
+            if day is not None:
+                custom.setdefault(day, []).append(name)
+        self._custom = custom
+        self._custom_loaded_at = time.monotonic()
+        self._weeks.clear()
+
+    def invalidate_custom(self) -> None:
+        self._custom = None
+        self._weeks.clear()
+
+    def custom_needs_reload(self, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        return self._custom is None or now - self._custom_loaded_at > CUSTOM_HOLIDAY_MAX_AGE_SECONDS
+
+    async def ensure_custom(self, session, fresh: bool = False) -> None:
+        """Load custom holidays from the database if not cached (or too old, or fresh)."""
+        if fresh or self.custom_needs_reload():
+            result = await session.execute(text("SELECT date, name FROM custom_holidays"))
+            self.set_custom(result.fetchall())
+            logger.info(f"Loaded {sum(len(v) for v in self._custom.values())} custom holidays")
+
+    # --- lookups ---------------------------------------------------------
+
+    def official(self, day: date) -> List[str]:
+        return self.official_year(day.year).get(day, [])
+
+    def custom(self, day: date) -> List[str]:
+        return (self._custom or {}).get(day, [])
+
+    def day(self, day: date) -> List[dict]:
+        """Holidays on a date, official first."""
+        return [{"date": day.isoformat(), "name": n, "type": "official"} for n in self.official(day)] + [
+            {"date": day.isoformat(), "name": n, "type": "custom"} for n in self.custom(day)
+        ]
+
+    def week(self, week_start: date) -> HolidayWeek:
+        """
+        Holiday flag, type and names for week_start .. week_start + 6 days.
+
+        Official holidays take precedence for the type; when a week has both
+        kinds the names are combined, official first.
+        """
+        cached = self._weeks.get(week_start)
+        if cached is not None:
+            return cached
+        days = [week_start + timedelta(days=i) for i in range(7)]
+        official_names = [n for d in days for n in self.official(d)]
+        custom_names = [n for d in days for n in self.custom(d)]
+        if official_names:
+            info = (1, "official", ", ".join(official_names + custom_names))
+        elif custom_names:
+            info = (1, "custom", ", ".join(custom_names))
+        else:
+            info = (0, None, None)
+        self._weeks[week_start] = info
+        return info
+
+    def official_list(self, year: int) -> List[dict]:
+        return [
+            {"date": str(day), "name": name, "type": "official"}
+            for day, names in self.official_year(year).items()
+            for name in names
+        ]
+
+
+holiday_calendar = HolidayCalendar()
@@ -0,0 +1,149 @@
+"""
+Menu Image Pipeline
+
+Streams an uploaded menu image to a spooled temp file, resizes it and builds a
+WebP thumbnail with Pillow in a worker thread, then uploads both renditions to
+storage concurrently so the event loop is never blocked by the transfer.
+"""
+
+import asyncio
+import io
+import logging
+import uuid
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+MENU_IMAGE_BUCKET = "menu-images"
+
+# Read uploads 1 MB at a time; anything up to 2 MB stays in memory
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+SPOOL_MAX_SIZE = 2 * 1024 * 1024
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+
+# Full image is capped at 1600px on its longest side, thumbnail at 320px
+MAX_IMAGE_DIMENSION = 1600
+THUMBNAIL_DIMENSION = 320
+WEBP_QUALITY = 85
+THUMBNAIL_WEBP_QUALITY = 75
+
+# uploader(path, content, content_type) -> public_url
+Uploader = Callable[[str, bytes, str], str]
+
+
+async def stream_upload_to_tempfile(file: UploadFile) -> BinaryIO:
+    """
+    Copy an UploadFile into a SpooledTemporaryFile chunk by chunk.
+
+    Raises HTTPException(413) once MAX_UPLOAD_BYTES is exceeded, so oversized
+    uploads are rejected without buffering the whole body.
+    """
+    spooled = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    total = 0
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > MAX_UPLOAD_BYTES:
+            spooled.close()
+            raise HTTPException(
+                status_code=413,
+                detail=f"Image too large (max {MAX_UPLOAD_BYTES // (1024 * 1024)} MB)",
+            )
+        spooled.write(chunk)
+
+    if total == 0:
+        spooled.close()
+        raise HTTPException(status_code=400, detail="Image upload failed: empty file.")
+
+    spooled.seek(0)
+    return spooled
+
+
+def process_menu_image(source: BinaryIO) -> Tuple[bytes, bytes]:
+    """
+    Resize an image and build its thumbnail (CPU bound - run in a thread).
+
+    Returns (image_webp_bytes, thumbnail_webp_bytes).
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(source) as img:
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+
+            full = img.copy()
+            full.thumbnail((MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION), Image.LANCZOS)
+            full_buffer = io.BytesIO()
+            full.save(full_buffer, format="WEBP", quality=WEBP_QUALITY, method=4)
+
+            thumb = img.copy()
+            thumb.thumbnail((THUMBNAIL_DIMENSION, THUMBNAIL_DIMENSION), Image.LANCZOS)
+            thumb_buffer = io.BytesIO()
+            thumb.save(thumb_buffer, format="WEBP", quality=THUMBNAIL_WEBP_QUALITY, method=4)
+    except (UnidentifiedImageError, OSError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid image file: {e}")
+
+    return full_buffer.getvalue(), thumb_buffer.getvalue()
+
+
+def supabase_uploader(path: str, content: bytes, content_type: str) -> str:
+    """Upload to the Supabase menu-images bucket and return the public URL."""
+    from app.supabase import supabase
+
+    bucket = supabase.storage.from_(MENU_IMAGE_BUCKET)
+    res = bucket.upload(path, content, {"content-type": content_type})
+    if hasattr(res, "error") and res.error:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Image upload failed: {getattr(res.error, 'message', res.error)}",
+        )
+    if hasattr(res, "data") and not res.data:
+        raise HTTPException(
+            status_code=400,
+            detail="Image upload failed: No data returned from upload.",
+        )
+    return bucket.get_public_url(path)
+
+
+async def upload_menu_image(
+    file: UploadFile, uploader: Optional[Uploader] = None
+) -> Dict[str, str]:
+    """
+    Full pipeline: stream -> resize/thumbnail (thread) -> parallel upload.
+
+    Args:
+        file: The incoming UploadFile
+        uploader: Storage callable; defaults to the Supabase bucket. Tests pass a
+            local stand-in with the same (path, content, content_type) signature.
+
+    Returns:
+        {"image_url": ..., "thumbnail_url": ...}
+    """
+    uploader = uploader or supabase_uploader
+    spooled = await stream_upload_to_tempfile(file)
+    try:
+        image_bytes, thumb_bytes = await run_in_threadpool(process_menu_image, spooled)
+    finally:
+        spooled.close()
+
+    image_id = uuid.uuid4()
+    image_path = f"menu/{image_id}.webp"
+    thumb_path = f"menu/thumbnails/{image_id}.webp"
+
+    image_url, thumbnail_url = await asyncio.gather(
+        run_in_threadpool(uploader, image_path, image_bytes, "image/webp"),
+        run_in_threadpool(uploader, thumb_path, thumb_bytes, "image/webp"),
+    )
+    logger.info(
+        f"Uploaded menu image {image_path} ({len(image_bytes)} B) "
+        f"and thumbnail ({len(thumb_bytes)} B)"
+    )
+    return {"image_url": image_url, "thumbnail_url": thumbnail_url}
@@ -0,0 +1,287 @@
+"""
+Ingredient Unit Cost Table
+
+ingredient_unit_cost holds one row per ingredient (keyed on
+LOWER(TRIM(name))) with its average unit_cost already converted to a cost
+per base unit (g, ml or pcs) using the unit converter, so COGS is a single
+join: recipe quantity in base units x cost_per_base_unit. Recipe quantities
+go through the same converter (recipe_quantity_in_base_units()); a recipe
+measured in a different kind of unit than the cost (pcs against a per-kg
+cost) cannot be priced and is left out of COGS.
+
+- Average cost comes from the first table that has one, in the same order
+  the analytics used before: inventory_today, inventory, inventory_spoilage.
+- The cost unit is the ingredient's inventory_settings.default_unit. When
+  that is missing or unknown, the old convention applies: cost is per kg/L
+  for weighed/measured ingredients and per piece for counted ones (judged by
+  how menu_ingredients measure it).
+- Inventory writes mark the table stale (via the response cache's
+  "inventory" invalidation) and schedule a rebuild in the background, so the
+  write path pays for it rather than the next COGS read. A read still
+  rebuilds a stale table, and one older than INGREDIENT_COST_MAX_AGE_SECONDS
+  (changes made by other workers).
+- A rebuild runs in its own transaction, never the caller's session. It
+  holds a transaction-level advisory lock and upserts by ingredient_key,
+  deleting only keys that are gone, so concurrent rebuilds from several
+  workers serialize instead of colliding on the primary key.
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.utils.response_cache import on_invalidate
+from app.utils.unit_converter import (
+    COMPOUND_UNITS,
+    convert_compound_to_base,
+    convert_to_base_unit,
+    get_unit_type,
+    is_compound_unit,
+    normalize_unit,
+)
+
+logger = logging.getLogger(__name__)
+
+INGREDIENT_COST_MAX_AGE_SECONDS = 600
+COST_SOURCES = ("inventory_today", "inventory", "inventory_spoilage")
+
+# Units the old analytics query treated as "cost is per piece/container"
+_LEGACY_COUNT_MEASUREMENTS = {"pcs", "pack", "case", "sack", "btl", "bottle", "can"}
+
+# pg_advisory_xact_lock key shared by every worker rebuilding the table
+REFRESH_LOCK_ID = 4_201_033
+
+_state = {"stale": True, "refreshed_at": 0.0}
+_refresh_lock = asyncio.Lock()
+_background_refresh: Optional[asyncio.Task] = None
+
+
+def mark_ingredient_costs_stale() -> None:
+    _state["stale"] = True
+    _schedule_background_refresh()
+
+
+def _schedule_background_refresh() -> None:
+    """Rebuild after an inventory write, off the request (no-op outside an event loop)."""
+    global _background_refresh
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    if _background_refresh is None or _background_refresh.done():
+        _background_refresh = loop.create_task(_refresh_in_background())
+
+
+async def _refresh_in_background() -> None:
+    try:
+        await ensure_ingredient_unit_costs()
+    except Exception as e:
+        logger.warning(f"Background ingredient_unit_cost refresh failed: {e}")
+
+
+def ingredient_costs_need_refresh(now: Optional[float] = None) -> bool:
+    now = time.monotonic() if now is None else now
+    return _state["stale"] or now - _state["refreshed_at"] > INGREDIENT_COST_MAX_AGE_SECONDS
+
+
+def cost_per_base_unit(
+    avg_unit_cost: float,
+    cost_unit: Optional[str],
+    recipe_measurements: Iterable[str] = (),
+) -> Tuple[float, str, str]:
+    """
+    Normalize an average unit cost to a cost per base unit.
+
+    Returns:
+        (cost_per_base_unit, base_unit, unit_source) where unit_source is
+        "settings" when the inventory default unit was used, else "legacy".
+    """
+    unit = normalize_unit(cost_unit or "")
+    if unit and get_unit_type(unit) is not None:
+        quantity, resolved_unit = 1.0, unit
+        if is_compound_unit(unit):
+            quantity, resolved_unit = convert_compound_to_base(1.0, unit)
+        factor, base_unit = convert_to_base_unit(quantity, resolved_unit)
+        if factor:
+            return avg_unit_cost / factor, base_unit, "settings"
+
+    measurements = [normalize_unit(m) for m in recipe_measurements if m]
+    most_common = Counter(measurements).most_common(1)
+    measurement = most_common[0][0] if most_common else ""
+    if measurement in _LEGACY_COUNT_MEASUREMENTS:
+        return avg_unit_cost, "pcs", "legacy"
+    base_unit = "ml" if get_unit_type(measurement) == "volume" else "g"
+    return avg_unit_cost / 1000.0, base_unit, "legacy"
+
+
+def recipe_quantity_in_base_units(quantity: float, measurement: Optional[str], base_unit: str) -> Optional[float]:
+    """
+    A recipe quantity in `base_unit` (an ingredient_unit_cost.base_unit), or
+    None when the recipe unit is unknown or of another kind. A recipe line
+    without a unit is taken to be in base units already.
+    """
+    quantity = float(quantity or 0)
+    unit = normalize_unit(measurement or "")
+    if not unit:
+        return quantity
+    compound = COMPOUND_UNITS.get(unit)
+    if compound:
+        quantity, unit = quantity * compound["factor"], compound["base_unit"]
+    if get_unit_type(unit) is None:
+        return None
+    converted, recipe_base = convert_to_base_unit(quantity, unit)
+    return converted if recipe_base == base_unit else None
+
+
+def build_ingredient_cost_rows(
+    source_costs: Dict[str, Dict[str, Tuple[str, float]]],
+    default_units: Dict[str, str],
+    recipe_measurements: Dict[str, List[str]],
+) -> List[dict]:
+    """
+    Pick each ingredient's cost by source priority and normalize it.
+
+    Args:
+        source_costs: {source_table: {key: (item_name, avg_unit_cost)}}
+        default_units: {key: inventory_settings.default_unit}
+        recipe_measurements: {key: [menu_ingredients.measurements, ...]}
+    """
+    rows = []
+    seen = set()
+    for source in COST_SOURCES:
+        for key, (item_name, avg_cost) in source_costs.get(source, {}).items():
+            if key in seen or avg_cost is None:
+                continue
+            seen.add(key)
+            per_base, base_unit, unit_source = cost_per_base_unit(
+                float(avg_cost), default_units.get(key), recipe_measurements.get(key, ())
+            )
+            rows.append(
+                {
+                    "ingredient_key": key,
+                    "ingredient_name": item_name,
+                    "avg_unit_cost": float(avg_cost),
+                    "cost_unit": default_units.get(key) or None,
+                    "base_unit": base_unit,
+                    "cost_per_base_unit": per_base,
+                    "unit_source": unit_source,
+                    "cost_source": source,
+                }
+            )
+    return rows
+
+
+async def refresh_ingredient_unit_costs(session_factory=None) -> int:
+    """Rebuild ingredient_unit_cost from current inventory costs in its own transaction."""
+    if session_factory is None:
+        from app.supabase import SessionLocal as session_factory
+
+    # cleared before reading so a write landing mid-rebuild marks it stale again
+    _state["stale"] = False
+    try:
+        async with session_factory() as session, session.begin():
+            await session.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": REFRESH_LOCK_ID})
+            rows = await _build_rows(session)
+            await _upsert_rows(session, rows)
+    except BaseException:
+        _state["stale"] = True
+        raise
+
+    _state["refreshed_at"] = time.monotonic()
+    logger.info(f"Refreshed ingredient_unit_cost ({len(rows)} ingredients)")
+    return len(rows)
+
+
+async def _build_rows(session) -> List[dict]:
+    source_costs: Dict[str, Dict[str, Tuple[str, float]]] = {}
+    for source in COST_SOURCES:
+        result = await session.execute(
+            text(
+                f"""
+                SELECT LOWER(TRIM(item_name)) AS ingredient_key,
+                       MIN(item_name) AS item_name,
+                       AVG(unit_cost) AS avg_unit_cost
+                FROM {source}
+                WHERE item_name IS NOT NULL AND unit_cost IS NOT NULL
+                GROUP BY LOWER(TRIM(item_name))
+                """
+            )
+        )
+        source_costs[source] = {
+            row.ingredient_key: (row.item_name, row.avg_unit_cost) for row in result.fetchall()
+        }
+
+    settings_result = await session.execute(
+        text(
+            "SELECT LOWER(TRIM(name)) AS ingredient_key, default_unit FROM inventory_settings WHERE name IS NOT NULL"
+        )
+    )
+    default_units = {row.ingredient_key: row.default_unit for row in settings_result.fetchall()}
+
+    measurements_result = await session.execute(
+        text(
+            """
+            SELECT LOWER(TRIM(ingredient_name)) AS ingredient_key, measurements
+            FROM menu_ingredients
+            WHERE ingredient_name IS NOT NULL
+            """
+        )
+    )
+    recipe_measurements: Dict[str, List[str]] = defaultdict(list)
+    for row in measurements_result.fetchall():
+        recipe_measurements[row.ingredient_key].append(row.measurements)
+
+    return build_ingredient_cost_rows(source_costs, default_units, recipe_measurements)
+
+
+async def _upsert_rows(session, rows: List[dict]) -> None:
+    if not rows:
+        await session.execute(text("DELETE FROM ingredient_unit_cost"))
+        return
+    await session.execute(
+        text("DELETE FROM ingredient_unit_cost WHERE ingredient_key <> ALL(:keys)"),
+        {"keys": [row["ingredient_key"] for row in rows]},
+    )
+    await session.execute(
+        text(
+            """
+            INSERT INTO ingredient_unit_cost (
+                ingredient_key, ingredient_name, avg_unit_cost, cost_unit,
+                base_unit, cost_per_base_unit, unit_source, cost_source, updated_at
+            )
+            VALUES (
+                :ingredient_key, :ingredient_name, :avg_unit_cost, :cost_unit,
+                :base_unit, :cost_per_base_unit, :unit_source, :cost_source, NOW()
+            )
+            ON CONFLICT (ingredient_key) DO UPDATE SET
+                ingredient_name = EXCLUDED.ingredient_name,
+                avg_unit_cost = EXCLUDED.avg_unit_cost,
+                cost_unit = EXCLUDED.cost_unit,
+                base_unit = EXCLUDED.base_unit,
+                cost_per_base_unit = EXCLUDED.cost_per_base_unit,
+                unit_source = EXCLUDED.unit_source,
+                cost_source = EXCLUDED.cost_source,
+                updated_at = EXCLUDED.updated_at
+            """
+        ),
+        rows,
+    )
+
+
+async def ensure_ingredient_unit_costs(session_factory=None) -> None:
+    """
+    Refresh the cost table first if inventory changed or it is too old. One
+    rebuild at a time per worker; callers queued behind it reuse its result.
+    """
+    if not ingredient_costs_need_refresh():
+        return
+    async with _refresh_lock:
+        if ingredient_costs_need_refresh():
+            await refresh_ingredient_unit_costs(session_factory)
+
+
+on_invalidate("inventory", mark_ingredient_costs_stale)
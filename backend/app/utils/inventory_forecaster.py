@@ -0,0 +1,186 @@
+"""
+Inventory Stock Forecaster
+
+Lightweight per-item forecaster for /inventory-forecast. The default model is
+Holt's linear exponential smoothing over the daily remaining_stock series,
+which fits in microseconds with numpy. Fitted models are cached per item_id
+together with a fingerprint of that item's inventory_log rows (row count +
+latest log_id); a new log row changes the fingerprint, so the next request
+refits. Writers can also drop entries explicitly via invalidate().
+
+Prophet is optional: set INVENTORY_FORECAST_BACKEND=prophet (and have the
+package installed) to use it. It is only imported when actually used.
+"""
+
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = "holt"
+# Smoothing factors for level and trend
+HOLT_ALPHA = 0.5
+HOLT_BETA = 0.2
+# ~95% prediction interval
+INTERVAL_Z = 1.96
+
+Fingerprint = Tuple[int, int]
+
+
+def daily_series(rows: Iterable[Tuple[Any, Any]]) -> Tuple[List[datetime], np.ndarray]:
+    """
+    Collapse (action_date, remaining_stock) rows to one value per day.
+
+    The last reading of each day wins and missing days carry the previous
+    reading forward, so the series has a regular daily step.
+    """
+    by_day: Dict[datetime, float] = {}
+    for action_date, remaining_stock in rows:
+        if action_date is None or remaining_stock is None:
+            continue
+        if isinstance(action_date, str):
+            action_date = datetime.fromisoformat(action_date.replace("Z", "+00:00"))
+        day = datetime(action_date.year, action_date.month, action_date.day)
+        by_day[day] = float(remaining_stock)
+
+    if not by_day:
+        return [], np.array([], dtype=float)
+
+    start, end = min(by_day), max(by_day)
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    values = np.empty(len(days), dtype=float)
+    last = by_day[start]
+    for i, day in enumerate(days):
+        last = by_day.get(day, last)
+        values[i] = last
+    return days, values
+
+
+@dataclass
+class HoltModel:
+    level: float
+    trend: float
+    sigma: float
+    last_date: datetime
+
+    @classmethod
+    def fit(
+        cls,
+        days: Sequence[datetime],
+        values: np.ndarray,
+        alpha: float = HOLT_ALPHA,
+        beta: float = HOLT_BETA,
+    ) -> "HoltModel":
+        level = float(values[0])
+        trend = float(values[1] - values[0]) if len(values) > 1 else 0.0
+        residuals = np.empty(max(len(values) - 1, 0), dtype=float)
+        for i in range(1, len(values)):
+            predicted = level + trend
+            residuals[i - 1] = values[i] - predicted
+            new_level = alpha * values[i] + (1 - alpha) * predicted
+            trend = beta * (new_level - level) + (1 - beta) * trend
+            level = new_level
+        sigma = float(np.std(residuals)) if len(residuals) > 1 else 0.0
+        return cls(level=level, trend=trend, sigma=sigma, last_date=days[-1])
+
+    def predict(self, periods: int) -> List[Dict[str, Any]]:
+        steps = np.arange(1, periods + 1, dtype=float)
+        yhat = self.level + self.trend * steps
+        spread = INTERVAL_Z * self.sigma * np.sqrt(steps)
+        yhat_lower = np.maximum(yhat - spread, 0.0)
+        yhat_upper = np.maximum(yhat + spread, 0.0)
+        yhat = np.maximum(yhat, 0.0)
+        return [
+            {
+                "ds": self.last_date + timedelta(days=int(step)),
+                "yhat": float(yhat[i]),
+                "yhat_lower": float(yhat_lower[i]),
+                "yhat_upper": float(yhat_upper[i]),
+            }
+            for i, step in enumerate(steps)
+        ]
+
+
+@dataclass
+class ProphetModel:
+    model: Any
+
+    @classmethod
+    def fit(cls, days: Sequence[datetime], values: np.ndarray) -> "ProphetModel":
+        import pandas as pd
+        from prophet import Prophet
+
+        model = Prophet()
+        model.fit(pd.DataFrame({"ds": list(days), "y": values}))
+        return cls(model=model)
+
+    def predict(self, periods: int) -> List[Dict[str, Any]]:
+        future = self.model.make_future_dataframe(periods=periods)
+        forecast = self.model.predict(future)
+        return (
+            forecast[["ds", "yhat", "yhat_lower", "yhat_upper"]]
+            .tail(periods)
+            .to_dict(orient="records")
+        )
+
+
+MODEL_BACKENDS = {
+    "holt": HoltModel,
+    "prophet": ProphetModel,
+}
+
+
+@dataclass
+class _CacheEntry:
+    fingerprint: Fingerprint
+    model: Any
+    fitted_at: datetime = field(default_factory=datetime.now)
+
+
+class InventoryForecaster:
+    def __init__(self, backend: Optional[str] = None):
+        backend = (backend or os.getenv("INVENTORY_FORECAST_BACKEND") or DEFAULT_BACKEND).lower()
+        if backend not in MODEL_BACKENDS:
+            logger.warning(f"Unknown forecast backend '{backend}', using {DEFAULT_BACKEND}")
+            backend = DEFAULT_BACKEND
+        self.backend = backend
+        self._models: Dict[int, _CacheEntry] = {}
+        self._lock = threading.Lock()
+
+    def cached_model(self, item_id: int, fingerprint: Fingerprint):
+        """Return the fitted model if the item's log is unchanged, else None."""
+        with self._lock:
+            entry = self._models.get(item_id)
+        if entry is not None and entry.fingerprint == fingerprint:
+            return entry.model
+        return None
+
+    def fit(self, item_id: int, fingerprint: Fingerprint, rows: Iterable[Tuple[Any, Any]]):
+        """Fit and cache a model for item_id; returns None if there is no usable data."""
+        days, values = daily_series(rows)
+        if not days:
+            return None
+        model = MODEL_BACKENDS[self.backend].fit(days, values)
+        with self._lock:
+            self._models[item_id] = _CacheEntry(fingerprint=fingerprint, model=model)
+        logger.info(
+            f"Fitted {self.backend} forecast for item {item_id} on {len(days)} days of history"
+        )
+        return model
+
+    def invalidate(self, item_ids: Optional[Iterable[int]] = None) -> None:
+        with self._lock:
+            if item_ids is None:
+                self._models.clear()
+                return
+            for item_id in item_ids:
+                self._models.pop(item_id, None)
+
+
+inventory_forecaster = InventoryForecaster()
@@ -0,0 +1,95 @@
+"""
+Keyset Pagination Helpers
+
+Cursor tokens are opaque, URL-safe base64 of the sort key of the last row
+on a page (e.g. [sale_date, sales_id]). The next page is fetched with a
+row comparison - WHERE (sort_a, sort_b) < (:a, :b) - so every page costs
+the same index range scan regardless of how deep the client pages, unlike
+OFFSET which re-reads all skipped rows.
+
+TableColumnCache replaces per-request information_schema lookups: a
+table's column list is read once (warmed at startup) and reused.
+"""
+
+import base64
+import binascii
+import json
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps([v if isinstance(v, (int, float)) or v is None else str(v) for v in values])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> List[Any]:
+    """Decode a cursor token into its `size` sort-key values."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise InvalidCursor(f"Malformed cursor: {e}")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("Malformed cursor")
+    return values
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> List[str]:
+    """
+    Resolve a comma-separated `fields=` projection against the allowed columns.
+
+    Returns all allowed columns when no projection is given. Raises
+    ValueError naming any unknown fields.
+    """
+    if not fields:
+        return list(allowed)
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    # keep the canonical column order and drop duplicates
+    return [col for col in allowed if col in requested]
+
+
+class TableColumnCache:
+    def __init__(self):
+        self._columns: Dict[str, List[str]] = {}
+
+    async def columns(self, session, table: str) -> List[str]:
+        cached = self._columns.get(table)
+        if cached is not None:
+            return cached
+        result = await session.execute(
+            text(
+                """
+                SELECT column_name
+                FROM information_schema.columns
+                WHERE table_name = :table
+                ORDER BY ordinal_position
+                """
+            ),
+            {"table": table},
+        )
+        columns = [row[0] for row in result.fetchall()]
+        if columns:
+            self._columns[table] = columns
+            logger.info(f"Cached {len(columns)} columns for {table}")
+        return columns
+
+    def invalidate(self, table: Optional[str] = None) -> None:
+        if table is None:
+            self._columns.clear()
+        else:
+            self._columns.pop(table, None)
+
+
+table_columns = TableColumnCache()
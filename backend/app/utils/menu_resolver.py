@@ -0,0 +1,240 @@
+"""
+Menu Item Resolution for Sales Rows
+
+POS exports identify dishes by itemcode and a free-text item name whose
+spelling drifts ("BAGNETSILOG" vs "Bagnet Silog", typos, abbreviations).
+Sales rows get a resolved sales_report.menu_id at import time so reports
+join menu on an integer key instead of normalized strings.
+
+Resolution order:
+1. menu.itemcode == sales itemcode
+2. menu_item_alias.alias_key == normalized item name (POS spelling variants)
+3. normalized menu.dish_name == normalized item name
+
+normalize_item_key() mirrors the SQL function of the same name created by
+migrations/add_sales_report_menu_id.sql.
+
+Menu and alias writes call relink_sales_menu_ids(): rows linked to the
+changed menu item are unlinked and resolved again together with unmatched
+rows carrying the item's new name or itemcode, so resolutions made through
+a removed alias or an old itemcode do not linger.
+"""
+
+import logging
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_item_key(name: Optional[str]) -> str:
+    """LOWER(REPLACE(TRIM(name), ' ', '')) - same as the SQL normalize_item_key()."""
+    if not name:
+        return ""
+    return name.strip(" ").replace(" ", "").lower()
+
+
+class MenuResolver:
+    def __init__(
+        self,
+        by_itemcode: Dict[str, int],
+        by_alias: Dict[str, int],
+        by_name: Dict[str, int],
+    ):
+        self.by_itemcode = by_itemcode
+        self.by_alias = by_alias
+        self.by_name = by_name
+
+    def resolve(self, itemcode: Optional[str], item_name: Optional[str]) -> Optional[int]:
+        if itemcode:
+            menu_id = self.by_itemcode.get(str(itemcode).strip())
+            if menu_id is not None:
+                return menu_id
+        key = normalize_item_key(item_name)
+        if not key:
+            return None
+        return self.by_alias.get(key) or self.by_name.get(key)
+
+
+async def load_menu_resolver(session) -> MenuResolver:
+    """Load menu itemcodes, names and aliases once per import."""
+    menu_result = await session.execute(
+        text("SELECT menu_id, itemcode, dish_name FROM menu ORDER BY menu_id")
+    )
+    by_itemcode: Dict[str, int] = {}
+    by_name: Dict[str, int] = {}
+    for menu_id, itemcode, dish_name in menu_result.fetchall():
+        if itemcode and str(itemcode).strip():
+            by_itemcode.setdefault(str(itemcode).strip(), menu_id)
+        key = normalize_item_key(dish_name)
+        if key:
+            by_name.setdefault(key, menu_id)
+
+    alias_result = await session.execute(
+        text("SELECT alias_key, menu_id FROM menu_item_alias")
+    )
+    by_alias = {alias_key: menu_id for alias_key, menu_id in alias_result.fetchall()}
+    return MenuResolver(by_itemcode, by_alias, by_name)
+
+
+# Each statement only touches rows that are still unresolved, so the backfill
+# can be re-run safely and earlier (more specific) rules win.
+_BACKFILL_STATEMENTS = (
+    """
+    UPDATE sales_report sr
+    SET menu_id = m.menu_id
+    FROM menu m
+    WHERE sr.menu_id IS NULL
+      AND NULLIF(TRIM(sr.itemcode), '') IS NOT NULL
+      AND TRIM(m.itemcode) = TRIM(sr.itemcode)
+    """,
+    """
+    UPDATE sales_report sr
+    SET menu_id = a.menu_id
+    FROM menu_item_alias a
+    WHERE sr.menu_id IS NULL
+      AND a.alias_key = normalize_item_key(sr.item_name)
+    """,
+    """
+    UPDATE sales_report sr
+    SET menu_id = m.menu_id
+    FROM (
+        SELECT DISTINCT ON (normalize_item_key(dish_name))
+            normalize_item_key(dish_name) AS dish_key, menu_id
+        FROM menu
+        WHERE dish_name IS NOT NULL
+        ORDER BY normalize_item_key(dish_name), menu_id
+    ) m
+    WHERE sr.menu_id IS NULL
+      AND m.dish_key = normalize_item_key(sr.item_name)
+    """,
+)
+
+
+async def backfill_sales_menu_ids(
+    session,
+    item_key: Optional[str] = None,
+    item_keys: Optional[Iterable[str]] = None,
+    itemcodes: Optional[Iterable[str]] = None,
+) -> int:
+    """
+    Resolve menu_id for sales rows that do not have one yet. Commits.
+
+    Args:
+        item_key: Restrict to rows whose normalized item name equals this key
+            (used right after an alias is added).
+        item_keys, itemcodes: Restrict to rows with any of these normalized
+            item names or itemcodes (used after menu and alias changes).
+
+    Returns:
+        Number of sales_report rows updated.
+    """
+    params = {}
+    scope = ""
+    if item_key is not None:
+        scope = " AND normalize_item_key(sr.item_name) = :item_key"
+        params["item_key"] = item_key
+    elif item_keys is not None or itemcodes is not None:
+        scope = " AND (normalize_item_key(sr.item_name) = ANY(:item_keys) OR TRIM(sr.itemcode) = ANY(:itemcodes))"
+        params["item_keys"] = sorted({k for k in item_keys or () if k})
+        params["itemcodes"] = sorted({str(c).strip() for c in itemcodes or () if c and str(c).strip()})
+
+    updated = 0
+    for statement in _BACKFILL_STATEMENTS:
+        result = await session.execute(text(statement + scope), params)
+        updated += result.rowcount or 0
+
+    # Keep the daily rollup's menu_id/category in step with the raw rows
+    # (including rows that were unlinked and stayed unmatched). Category is
+    # derived as refresh_sales_rollups does: the sales rows' own category,
+    # else the newly linked menu item's, never the previous dish's.
+    await session.execute(
+        text(
+            f"""
+            UPDATE sales_daily_item sdi
+            SET menu_id = r.menu_id,
+                category = COALESCE(r.category, m.category, '')
+            FROM (
+                SELECT CAST(sr.sale_date AS DATE) AS sale_day,
+                       COALESCE(sr.item_name, '') AS item_name,
+                       MAX(sr.menu_id) AS menu_id,
+                       MAX(NULLIF(sr.category, '')) AS category
+                FROM sales_report sr
+                WHERE sr.sale_date IS NOT NULL{scope}
+                GROUP BY 1, 2
+            ) r
+            LEFT JOIN menu m ON m.menu_id = r.menu_id
+            WHERE sdi.sale_day = r.sale_day
+              AND sdi.item_name = r.item_name
+              AND sdi.menu_id IS DISTINCT FROM r.menu_id
+            """
+        ),
+        params,
+    )
+    await session.commit()
+    logger.info(f"Resolved menu_id for {updated} sales_report rows")
+    return updated
+
+
+async def unlink_sales_menu_ids(
+    session, menu_id: int, item_key: Optional[str] = None
+) -> Tuple[Set[str], Set[str]]:
+    """
+    Clear menu_id on sales rows linked to `menu_id` (only those with
+    normalized name `item_key` if given). Does not commit.
+
+    Returns:
+        (item_keys, itemcodes) of the unlinked rows, to resolve them again.
+    """
+    condition = "menu_id = :menu_id"
+    params = {"menu_id": menu_id}
+    if item_key is not None:
+        condition += " AND normalize_item_key(item_name) = :item_key"
+        params["item_key"] = item_key
+    result = await session.execute(
+        text(
+            f"""
+            WITH unlinked AS (
+                UPDATE sales_report SET menu_id = NULL
+                WHERE {condition}
+                RETURNING item_name, itemcode
+            )
+            SELECT DISTINCT normalize_item_key(item_name), NULLIF(TRIM(itemcode), '')
+            FROM unlinked
+            """
+        ),
+        params,
+    )
+    item_keys: Set[str] = set()
+    itemcodes: Set[str] = set()
+    for key, code in result.fetchall():
+        if key:
+            item_keys.add(key)
+        if code:
+            itemcodes.add(code)
+    return item_keys, itemcodes
+
+
+async def relink_sales_menu_ids(
+    session,
+    menu_id: int,
+    item_keys: Iterable[str] = (),
+    itemcodes: Iterable[str] = (),
+    unlink_key: Optional[str] = None,
+    unlink: bool = True,
+) -> int:
+    """
+    Re-resolve sales rows after a menu item or alias change. Commits.
+
+    Rows linked to `menu_id` (only those named `unlink_key` if given; none
+    when `unlink` is False, e.g. for a new menu item) are unlinked, then
+    they and the unmatched rows with any of `item_keys` / `itemcodes` are
+    resolved again.
+    """
+    keys, codes = set(item_keys), set(itemcodes)
+    if unlink:
+        unlinked_keys, unlinked_codes = await unlink_sales_menu_ids(session, menu_id, unlink_key)
+        keys |= unlinked_keys
+        codes |= unlinked_codes
+    return await backfill_sales_menu_ids(session, item_keys=keys, itemcodes=codes)
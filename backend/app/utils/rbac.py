@@ -4,6 +4,9 @@ import os
 from dotenv import load_dotenv
 from app.supabase import SessionLocal
 import jwt
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '../../.env'))
@@ -11,17 +14,15 @@ load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '../../.env'))
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 SECRET_KEY = os.getenv("SECRET_KEY")
-print("Loaded SECRET_KEY:", repr(SECRET_KEY), type(SECRET_KEY))
+if not SECRET_KEY:
+    logger.warning("SECRET_KEY is not set; token verification will fail")
 async def get_current_user(token: str = Depends(oauth2_scheme)):
-    print("[RBAC] Token type:", type(token), "value:", token)
     try:
-        print("[RBAC] Incoming token:", token)
         # Decode JWT (adjust for your auth system)
         payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"], audience="authenticated")
-        print("[RBAC] Decoded payload:", payload)
         auth_id = payload.get("sub")  # Supabase UID
         if not auth_id:
-            print("[RBAC] No auth_id in token payload")
+            logger.info("Rejected token without sub claim")
             raise HTTPException(status_code=401, detail="Invalid token")
         # Fetch user from DB by auth_id (using SQLAlchemy text query)
         async with SessionLocal() as session:
@@ -31,9 +32,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
                 {"auth_id": auth_id}
             )
             user = result.fetchone()
-            print("[RBAC] DB lookup result:", user)
             if not user:
-                print("[RBAC] User not found in DB for auth_id:", auth_id)
+                logger.debug("No user for auth_id", extra={"fields": {"auth_id": auth_id}})
                 raise HTTPException(status_code=404, detail="User not found")
             if isinstance(user, tuple):
                 return {"user_id": user[0], "user_role": user[1], "name": user[2], "email": user[3]}
@@ -46,19 +46,18 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
                 }
 
     except jwt.ExpiredSignatureError:
-        print("[RBAC] Token has expired")
+        logger.debug("Rejected expired token")
         raise HTTPException(
             status_code=401,
             detail="Session expired. Please log in again.",
             headers={"X-Session-Expired": "true"}
         )
     except jwt.InvalidTokenError as e:
-        print(f"[RBAC] Invalid token: {str(e)}")
+        logger.info("Rejected invalid token: %s", e)
         raise HTTPException(status_code=401, detail="Invalid token")
     except Exception as e:
-        import traceback
-        print("[RBAC] Exception during authentication:", str(e))
-        traceback.print_exc()
+        # HTTPExceptions above (e.g. unknown user) also end up here as a 401
+        logger.warning("Authentication failed: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
         raise HTTPException(status_code=401, detail="Authentication failed")
 
 def require_role(*roles):
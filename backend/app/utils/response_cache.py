@@ -0,0 +1,328 @@
+"""
+Response Cache for Dashboard and Report GET Endpoints
+
+Short-TTL cache keyed on route namespace + query params so that every open
+dashboard tab (and its auto-refresh) does not recompute the same aggregates.
+
+- In-process LRU by default; set REDIS_URL (and install `redis`) to share the
+  cache between workers. Any client exposing get/setex/delete/scan_iter works,
+  which is how tests plug in a local stand-in.
+- Per-route TTLs via @cached_response(namespace, ttl=...); cache_if=... keeps
+  results it rejects (e.g. partial failures) out of the cache
+- Concurrent misses for the same key share one computation (single-flight)
+- Write handlers use @invalidates(...). Other async code (e.g. restore)
+  awaits response_cache.ainvalidate(...) / invalidate_all_caches(), which run
+  a blocking backend's key scan in the threadpool like every other backend
+  call; the synchronous invalidate() is only for code already off the loop
+- Hit/miss counters per namespace via cache_stats()
+- on_invalidate(group, callback) lets derived data (e.g. ingredient costs)
+  be marked stale by the same writes
+
+Namespaces are "<group>:<route>", e.g. "sales:summary"; invalidating "sales"
+clears every key in that group.
+"""
+
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "respcache:"
+DEFAULT_TTL_SECONDS = 30
+DEFAULT_MAX_ENTRIES = 512
+
+# Which cache groups a write to each domain makes stale
+INVENTORY_CACHE_GROUPS = ("dashboard", "inventory")
+SALES_CACHE_GROUPS = ("sales", "dashboard", "inventory")
+ALL_CACHE_GROUPS = ("sales", "dashboard", "inventory")
+
+_KEY_VALUE_TYPES = (str, int, float, bool, date, datetime, type(None))
+
+_invalidation_hooks: Dict[str, list] = defaultdict(list)
+
+
+class InMemoryLRUBackend:
+    """Thread-safe LRU with per-entry expiry."""
+
+    blocking = False
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+            return True, value
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        with self._lock:
+            self._data[key] = (self._clock() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            keys = [k for k in self._data if k.startswith(prefix)]
+            for k in keys:
+                del self._data[k]
+            return len(keys)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisBackend:
+    """Redis-compatible backend; values are stored as JSON."""
+
+    blocking = True
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        raw = self.client.get(key)
+        if raw is None:
+            return False, None
+        return True, json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        self.client.setex(key, ttl, json.dumps(jsonable_encoder(value)))
+
+    def delete_prefix(self, prefix: str) -> int:
+        keys = list(self.client.scan_iter(match=f"{prefix}*"))
+        if keys:
+            self.client.delete(*keys)
+        return len(keys)
+
+
+def _default_backend():
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        try:
+            import redis
+
+            client = redis.Redis.from_url(redis_url, socket_timeout=0.5)
+            client.ping()
+            logger.info("Response cache using Redis backend")
+            return RedisBackend(client)
+        except Exception as e:
+            logger.warning(f"Redis unavailable ({e}); falling back to in-process LRU cache")
+    return InMemoryLRUBackend()
+
+
+class ResponseCache:
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else _default_backend()
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "misses": 0, "invalidations": 0}
+        )
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def set_backend(self, backend) -> None:
+        self.backend = backend
+        self._inflight.clear()
+
+    async def _call(self, fn, *args):
+        if getattr(self.backend, "blocking", False):
+            return await run_in_threadpool(fn, *args)
+        return fn(*args)
+
+    @staticmethod
+    def build_key(namespace: str, params: Dict[str, Any]) -> str:
+        parts = []
+        for name in sorted(params):
+            value = params[name]
+            if isinstance(value, (date, datetime)):
+                value = value.isoformat()
+            parts.append(f"{name}={value}")
+        return f"{KEY_PREFIX}{namespace}?{'&'.join(parts)}"
+
+    async def get_or_compute(
+        self,
+        namespace: str,
+        params: Dict[str, Any],
+        ttl: int,
+        compute,
+        cache_if: Optional[Callable[[Any], bool]] = None,
+    ):
+        key = self.build_key(namespace, params)
+        try:
+            found, value = await self._call(self.backend.get, key)
+        except Exception as e:
+            logger.warning(f"Cache read failed for {key}: {e}")
+            found, value = False, None
+        if found:
+            self._stats[namespace]["hits"] += 1
+            return value
+
+        # Another request is already computing this key - wait for it
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self._stats[namespace]["hits"] += 1
+            return await asyncio.shield(pending)
+
+        self._stats[namespace]["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await compute()
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody else may be awaiting; mark the exception as retrieved
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        future.set_result(value)
+        if cache_if is not None and not cache_if(value):
+            return value
+        try:
+            await self._call(self.backend.set, key, value, ttl)
+        except Exception as e:
+            logger.warning(f"Cache write failed for {key}: {e}")
+        return value
+
+    def _invalidated(self, group: str) -> None:
+        self._stats[group]["invalidations"] += 1
+        for hook in _invalidation_hooks.get(group, ()):
+            try:
+                hook()
+            except Exception as e:
+                logger.warning(f"Invalidation hook {hook.__name__} failed: {e}")
+
+    def invalidate(self, *groups: str) -> int:
+        """
+        Drop every cached response under the given groups/namespaces.
+        Blocks on the backend: call from sync code, await ainvalidate() on the event loop.
+        """
+        removed = 0
+        for group in groups:
+            try:
+                removed += self.backend.delete_prefix(f"{KEY_PREFIX}{group}")
+            except Exception as e:
+                logger.warning(f"Cache invalidation failed for {group}: {e}")
+            self._invalidated(group)
+        return removed
+
+    async def ainvalidate(self, *groups: str) -> int:
+        """invalidate() for async code: a blocking backend's scan runs in the threadpool."""
+        removed = 0
+        for group in groups:
+            try:
+                removed += await self._call(self.backend.delete_prefix, f"{KEY_PREFIX}{group}")
+            except Exception as e:
+                logger.warning(f"Cache invalidation failed for {group}: {e}")
+            self._invalidated(group)
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        namespaces = {ns: dict(counts) for ns, counts in self._stats.items()}
+        hits = sum(c["hits"] for c in namespaces.values())
+        misses = sum(c["misses"] for c in namespaces.values())
+        total = hits + misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "namespaces": namespaces,
+        }
+
+
+response_cache = ResponseCache()
+
+
+def _cache_params(signature: inspect.Signature, args, kwargs) -> Dict[str, Any]:
+    """Query/path params only - sessions, requests and users are skipped."""
+    bound = signature.bind_partial(*args, **kwargs)
+    return {
+        name: value
+        for name, value in bound.arguments.items()
+        if isinstance(value, _KEY_VALUE_TYPES)
+    }
+
+
+def cached_response(
+    namespace: str, ttl: int = DEFAULT_TTL_SECONDS, cache_if: Optional[Callable[[Any], bool]] = None
+):
+    """
+    Cache an async GET handler's return value for `ttl` seconds; with
+    `cache_if`, only values it accepts are stored.
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            params = _cache_params(signature, args, kwargs)
+            return await response_cache.get_or_compute(
+                namespace, params, ttl, lambda: func(*args, **kwargs), cache_if
+            )
+
+        return wrapper
+
+    return decorator
+
+
+async def invalidate_all_caches() -> int:
+    """After a restore: any table may have changed."""
+    return await response_cache.ainvalidate(*ALL_CACHE_GROUPS)
+
+
+def invalidates(*groups: str):
+    """Invalidate cache groups after a write handler completes successfully."""
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                result = await func(*args, **kwargs)
+                await response_cache.ainvalidate(*groups)
+                return result
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            response_cache.invalidate(*groups)
+            return result
+
+        return sync_wrapper
+
+    return decorator
+
+
+def on_invalidate(group: str, callback: Callable[[], None]) -> None:
+    """Run callback whenever `group` is invalidated."""
+    _invalidation_hooks[group].append(callback)
+
+
+def cache_stats() -> Dict[str, Any]:
+    return response_cache.stats()
@@ -0,0 +1,178 @@
+"""
+Sales Rollup Tables
+
+sales_daily_item holds one row per (sale_day, item_name) and sales_hourly one
+row per (sale_day, sale_hour). The report endpoints aggregate these instead of
+raw sales_report rows, so a year-range report reads ~365 x items rows no
+matter how many transactions were imported. Category falls back to the
+menu item resolved in sales_report.menu_id.
+
+Rollups are rebuilt per day: every import calls refresh_sales_rollups_for()
+with the sale dates it touched, which deletes and re-aggregates just those
+days (consecutive days in one statement, gaps untouched). Days whose
+refresh failed are remembered and retried with the next import's days;
+their reports stay stale until then. Calling refresh_sales_rollups() with
+no range rebuilds everything (used after bulk category fixes, restores
+that include sales_report and for the initial backfill).
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Iterable, List, Optional, Set, Tuple
+
+from dateutil import parser as date_parser
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Days whose rollup refresh failed in this worker, retried on the next refresh
+_failed_days: Set[date] = set()
+
+
+def _range_filter(start_day: Optional[date], end_day: Optional[date]) -> Tuple[str, str]:
+    if start_day is None or end_day is None:
+        return "", ""
+    return (
+        "WHERE sale_day BETWEEN :start_day AND :end_day",
+        "AND CAST(sale_date AS DATE) BETWEEN :start_day AND :end_day",
+    )
+
+
+async def refresh_sales_rollups(
+    session, start_day: Optional[date] = None, end_day: Optional[date] = None
+) -> None:
+    """
+    Re-aggregate sales_report into the rollup tables for [start_day, end_day].
+
+    With no range, both rollup tables are rebuilt from scratch. Commits.
+    """
+    rollup_where, source_where = _range_filter(start_day, end_day)
+    params = {"start_day": start_day, "end_day": end_day} if rollup_where else {}
+
+    await session.execute(text(f"DELETE FROM sales_daily_item {rollup_where}"), params)
+    await session.execute(text(f"DELETE FROM sales_hourly {rollup_where}"), params)
+
+    await session.execute(
+        text(
+            f"""
+            INSERT INTO sales_daily_item (
+                sale_day, item_name, menu_id, category, total_quantity, total_revenue,
+                unit_price_sum, unit_price_count, row_count, updated_at
+            )
+            SELECT
+                s.sale_day,
+                s.item_name,
+                s.menu_id,
+                COALESCE(s.category, m.category, '') AS category,
+                s.total_quantity,
+                s.total_revenue,
+                s.unit_price_sum,
+                s.unit_price_count,
+                s.row_count,
+                NOW()
+            FROM (
+                SELECT
+                    CAST(sale_date AS DATE) AS sale_day,
+                    COALESCE(item_name, '') AS item_name,
+                    MAX(menu_id) AS menu_id,
+                    MAX(NULLIF(category, '')) AS category,
+                    COALESCE(SUM(quantity), 0) AS total_quantity,
+                    COALESCE(SUM(total_price), 0) AS total_revenue,
+                    COALESCE(SUM(unit_price), 0) AS unit_price_sum,
+                    COUNT(unit_price) AS unit_price_count,
+                    COUNT(*) AS row_count
+                FROM sales_report
+                WHERE sale_date IS NOT NULL {source_where}
+                GROUP BY 1, 2
+            ) s
+            LEFT JOIN menu m ON m.menu_id = s.menu_id
+            """
+        ),
+        params,
+    )
+
+    await session.execute(
+        text(
+            f"""
+            INSERT INTO sales_hourly (
+                sale_day, sale_hour, total_quantity, total_revenue, row_count, updated_at
+            )
+            SELECT
+                CAST(sale_date AS DATE) AS sale_day,
+                CAST(EXTRACT(HOUR FROM CAST(sale_date AS TIMESTAMP)) AS SMALLINT) AS sale_hour,
+                COALESCE(SUM(quantity), 0),
+                COALESCE(SUM(total_price), 0),
+                COUNT(*),
+                NOW()
+            FROM sales_report
+            WHERE sale_date IS NOT NULL {source_where}
+            GROUP BY 1, 2
+            """
+        ),
+        params,
+    )
+    await session.commit()
+    logger.info(
+        f"Refreshed sales rollups for {start_day} to {end_day}"
+        if rollup_where
+        else "Rebuilt sales rollups"
+    )
+
+
+def parse_sale_day(value: Any) -> Optional[date]:
+    """Best-effort conversion of an imported sale_date value to a date."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date_parser.parse(str(value)).date()
+    except (ValueError, OverflowError):
+        return None
+
+
+def sale_days(values: Iterable[Any]) -> List[date]:
+    """Distinct days of the given sale dates, sorted."""
+    return sorted({d for d in (parse_sale_day(v) for v in values) if d is not None})
+
+
+def day_runs(days: Iterable[date]) -> List[Tuple[date, date]]:
+    """Group sorted distinct days into (start, end) runs of consecutive days."""
+    runs: List[Tuple[date, date]] = []
+    for day in days:
+        if runs and day == runs[-1][1] + timedelta(days=1):
+            runs[-1] = (runs[-1][0], day)
+        else:
+            runs.append((day, day))
+    return runs
+
+
+def failed_rollup_days() -> List[date]:
+    """Days still waiting for a successful rollup refresh in this worker."""
+    return sorted(_failed_days)
+
+
+async def refresh_sales_rollups_for(session, sale_dates: Iterable[Any]) -> List[date]:
+    """
+    Refresh the distinct days of the given sale dates after an import, plus
+    any days whose earlier refresh failed. Returns the days refreshed.
+
+    Failures are logged and remembered rather than raised, so an import is
+    never rolled back because of the rollup; the next call retries them.
+    """
+    days = sorted(set(sale_days(sale_dates)) | _failed_days)
+    refreshed: List[date] = []
+    for start_day, end_day in day_runs(days):
+        run = [start_day + timedelta(days=n) for n in range((end_day - start_day).days + 1)]
+        try:
+            await refresh_sales_rollups(session, start_day, end_day)
+        except Exception as e:
+            logger.error(f"Sales rollup refresh failed for {start_day} to {end_day}, will retry: {e}")
+            await session.rollback()
+            _failed_days.update(run)
+            continue
+        _failed_days.difference_update(run)
+        refreshed.extend(run)
+    return refreshed
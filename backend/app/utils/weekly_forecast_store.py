@@ -0,0 +1,192 @@
+"""
+Weekly Sales Forecast Model Store
+
+/weekly-sales-forecast fits a linear regression on weekly sales with the
+features (week_num, month, weekofyear, is_holiday_week). Instead of
+refitting on every request:
+
+- Fitted coefficients are persisted in sales_forecast_model, keyed by
+  (item_key, category_key, horizon). Each row stores a fingerprint of the
+  weekly series it was fitted on; the model is refitted only when that
+  series changes (new sales landed or the 8-week window moved).
+- Holiday features live in holiday_week_calendar (one row per week start).
+  Missing weeks are filled from the shared holiday calendar
+  (app/utils/holiday_calendar.py), reloading custom holidays first so a
+  worker's cached copy is never persisted; the table is cleared when custom
+  holidays change.
+
+A forecast is then two small reads plus a dot product per week.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import date
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+from sklearn.linear_model import LinearRegression
+from sqlalchemy import text
+
+from app.utils.holiday_calendar import HolidayWeek, holiday_calendar
+
+logger = logging.getLogger(__name__)
+
+FEATURES = ("week_num", "month", "weekofyear", "is_holiday_week")
+
+
+async def load_holiday_weeks(session, week_starts: Iterable[date]) -> Dict[date, HolidayWeek]:
+    """Read holiday features from holiday_week_calendar, filling in missing weeks."""
+    week_starts = sorted(set(week_starts))
+    if not week_starts:
+        return {}
+    result = await session.execute(
+        text(
+            """
+            SELECT week_start, is_holiday_week, holiday_type, holiday_names
+            FROM holiday_week_calendar
+            WHERE week_start BETWEEN :first AND :last
+            """
+        ),
+        {"first": week_starts[0], "last": week_starts[-1]},
+    )
+    weeks = {row[0]: (int(row[1]), row[2], row[3]) for row in result.fetchall()}
+
+    missing = [w for w in week_starts if w not in weeks]
+    if missing:
+        # these weeks are persisted: read custom holidays now, not from a cache another worker may have outdated
+        await holiday_calendar.ensure_custom(session, fresh=True)
+        computed = {w: holiday_calendar.week(w) for w in missing}
+        await session.execute(
+            text(
+                """
+                INSERT INTO holiday_week_calendar (week_start, is_holiday_week, holiday_type, holiday_names, updated_at)
+                VALUES (:week_start, :is_holiday_week, :holiday_type, :holiday_names, NOW())
+                ON CONFLICT (week_start) DO NOTHING
+                """
+            ),
+            [
+                {"week_start": w, "is_holiday_week": flag, "holiday_type": htype, "holiday_names": names}
+                for w, (flag, htype, names) in computed.items()
+            ],
+        )
+        await session.commit()
+        weeks.update(computed)
+    return {w: weeks[w] for w in week_starts}
+
+
+async def clear_holiday_weeks(session) -> None:
+    """Drop precomputed holiday weeks (after custom holidays change). Commits."""
+    await session.execute(text("DELETE FROM holiday_week_calendar"))
+    await session.commit()
+
+
+def series_fingerprint(weeks: Sequence[date], totals: Sequence[float], holiday_flags: Sequence[int]) -> str:
+    payload = json.dumps(
+        [[w.isoformat(), round(float(t), 4), int(h)] for w, t, h in zip(weeks, totals, holiday_flags)]
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def feature_matrix(weeks: Sequence[date], first_week: date, holiday_flags: Sequence[int]) -> np.ndarray:
+    return np.array(
+        [
+            [(w - first_week).days // 7, w.month, w.isocalendar()[1], int(h)]
+            for w, h in zip(weeks, holiday_flags)
+        ],
+        dtype=float,
+    )
+
+
+class WeeklyModel:
+    def __init__(self, intercept: float, coefficients: Sequence[float], first_week: date, last_week: date):
+        self.intercept = float(intercept)
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        self.first_week = first_week
+        self.last_week = last_week
+
+    @classmethod
+    def fit(cls, weeks: Sequence[date], totals: Sequence[float], holiday_flags: Sequence[int]) -> "WeeklyModel":
+        X = feature_matrix(weeks, weeks[0], holiday_flags)
+        model = LinearRegression()
+        model.fit(X, np.asarray(totals, dtype=float))
+        return cls(model.intercept_, model.coef_, weeks[0], weeks[-1])
+
+    def predict(self, weeks: Sequence[date], holiday_flags: Sequence[int]) -> np.ndarray:
+        X = feature_matrix(weeks, self.first_week, holiday_flags)
+        return np.clip(self.intercept + X @ self.coefficients, 0, None)
+
+
+def _model_key(item_name: Optional[str], category: Optional[str], horizon: int) -> Dict[str, Any]:
+    return {"item_key": item_name or "", "category_key": category or "", "horizon": int(horizon)}
+
+
+async def get_or_fit_model(
+    session,
+    item_name: Optional[str],
+    category: Optional[str],
+    horizon: int,
+    weeks: Sequence[date],
+    totals: Sequence[float],
+    holiday_flags: Sequence[int],
+) -> Tuple[WeeklyModel, bool]:
+    """
+    Stored model for the key if it was fitted on this exact series, else refit
+    and persist. Returns (model, refitted).
+    """
+    key = _model_key(item_name, category, horizon)
+    fingerprint = series_fingerprint(weeks, totals, holiday_flags)
+
+    result = await session.execute(
+        text(
+            """
+            SELECT intercept, coefficients, first_week, last_week
+            FROM sales_forecast_model
+            WHERE item_key = :item_key AND category_key = :category_key
+              AND horizon = :horizon AND data_fingerprint = :fingerprint
+            """
+        ),
+        {**key, "fingerprint": fingerprint},
+    )
+    row = result.fetchone()
+    if row is not None:
+        coefficients = row[1] if isinstance(row[1], list) else json.loads(row[1])
+        return WeeklyModel(row[0], coefficients, row[2], row[3]), False
+
+    model = WeeklyModel.fit(weeks, totals, holiday_flags)
+    await session.execute(
+        text(
+            """
+            INSERT INTO sales_forecast_model (
+                item_key, category_key, horizon, features, intercept, coefficients,
+                first_week, last_week, n_weeks, data_fingerprint, fitted_at
+            )
+            VALUES (
+                :item_key, :category_key, :horizon, :features, :intercept, :coefficients,
+                :first_week, :last_week, :n_weeks, :fingerprint, NOW()
+            )
+            ON CONFLICT (item_key, category_key, horizon) DO UPDATE SET
+                features = EXCLUDED.features,
+                intercept = EXCLUDED.intercept,
+                coefficients = EXCLUDED.coefficients,
+                first_week = EXCLUDED.first_week,
+                last_week = EXCLUDED.last_week,
+                n_weeks = EXCLUDED.n_weeks,
+                data_fingerprint = EXCLUDED.data_fingerprint,
+                fitted_at = EXCLUDED.fitted_at
+            """
+        ),
+        {
+            **key,
+            "features": json.dumps(FEATURES),
+            "intercept": model.intercept,
+            "coefficients": json.dumps(model.coefficients.tolist()),
+            "first_week": model.first_week,
+            "last_week": model.last_week,
+            "n_weeks": len(weeks),
+            "fingerprint": fingerprint,
+        },
+    )
+    await session.commit()
+    logger.info(f"Refitted weekly forecast model {key} on {len(weeks)} weeks")
+    return model, True
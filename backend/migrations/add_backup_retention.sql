@@ -0,0 +1,16 @@
+-- Migration: Backup retention
+-- Description: Scheduled backups are pruned after each backup, keeping the
+--              newest backup of each of the last N days, M weeks and K months
+--              (plus every backup a kept incremental depends on). backup_history
+--              records why each backup is kept, or when it was pruned.
+-- Date: 2026-10-19
+
+ALTER TABLE backup_history ADD COLUMN IF NOT EXISTS retention_tier CHARACTER VARYING;
+ALTER TABLE backup_history ADD COLUMN IF NOT EXISTS pruned_at TIMESTAMP WITH TIME ZONE;
+
+COMMENT ON COLUMN backup_history.retention_tier IS 'Why the backup is kept: daily, weekly, monthly or chain (needed by a kept incremental)';
+COMMENT ON COLUMN backup_history.pruned_at IS 'When retention deleted the file (backup_status = ''pruned'')';
+
+CREATE INDEX IF NOT EXISTS idx_backup_history_type_status_time ON backup_history(backup_type, backup_status, backup_time DESC);
+
+SELECT 'backup retention created successfully' AS status;
@@ -0,0 +1,60 @@
+-- Migration: Track row changes for incremental backups
+-- Description: Scheduled backups copy only rows changed since the previous
+--              backup for the large, fast-growing tables. Those tables get a
+--              trigger-maintained updated_at column (the high-water mark) and
+--              an index on it; backup_history records each backup's chain
+--              position and high-water marks.
+-- Date: 2026-10-19
+
+CREATE OR REPLACE FUNCTION set_row_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := clock_timestamp();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Existing rows get the migration time; the first backup afterwards is a full base.
+ALTER TABLE sales_report ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE user_activity_log ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE notification ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE inventory_transactions ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP;
+
+DROP TRIGGER IF EXISTS trg_sales_report_updated_at ON sales_report;
+CREATE TRIGGER trg_sales_report_updated_at BEFORE INSERT OR UPDATE ON sales_report
+    FOR EACH ROW EXECUTE FUNCTION set_row_updated_at();
+DROP TRIGGER IF EXISTS trg_user_activity_log_updated_at ON user_activity_log;
+CREATE TRIGGER trg_user_activity_log_updated_at BEFORE INSERT OR UPDATE ON user_activity_log
+    FOR EACH ROW EXECUTE FUNCTION set_row_updated_at();
+DROP TRIGGER IF EXISTS trg_notification_updated_at ON notification;
+CREATE TRIGGER trg_notification_updated_at BEFORE INSERT OR UPDATE ON notification
+    FOR EACH ROW EXECUTE FUNCTION set_row_updated_at();
+DROP TRIGGER IF EXISTS trg_inventory_transactions_updated_at ON inventory_transactions;
+CREATE TRIGGER trg_inventory_transactions_updated_at BEFORE INSERT OR UPDATE ON inventory_transactions
+    FOR EACH ROW EXECUTE FUNCTION set_row_updated_at();
+-- rollups already have updated_at, but not every writer sets it
+DROP TRIGGER IF EXISTS trg_sales_daily_item_updated_at ON sales_daily_item;
+CREATE TRIGGER trg_sales_daily_item_updated_at BEFORE INSERT OR UPDATE ON sales_daily_item
+    FOR EACH ROW EXECUTE FUNCTION set_row_updated_at();
+DROP TRIGGER IF EXISTS trg_sales_hourly_updated_at ON sales_hourly;
+CREATE TRIGGER trg_sales_hourly_updated_at BEFORE INSERT OR UPDATE ON sales_hourly
+    FOR EACH ROW EXECUTE FUNCTION set_row_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_sales_report_updated_at ON sales_report(updated_at);
+CREATE INDEX IF NOT EXISTS idx_user_activity_log_updated_at ON user_activity_log(updated_at);
+CREATE INDEX IF NOT EXISTS idx_notification_updated_at ON notification(updated_at);
+CREATE INDEX IF NOT EXISTS idx_inventory_transactions_updated_at ON inventory_transactions(updated_at);
+CREATE INDEX IF NOT EXISTS idx_sales_daily_item_updated_at ON sales_daily_item(updated_at);
+CREATE INDEX IF NOT EXISTS idx_sales_hourly_updated_at ON sales_hourly(updated_at);
+
+ALTER TABLE backup_history ADD COLUMN IF NOT EXISTS parent_file CHARACTER VARYING;
+ALTER TABLE backup_history ADD COLUMN IF NOT EXISTS base_file CHARACTER VARYING;
+ALTER TABLE backup_history ADD COLUMN IF NOT EXISTS chain_length INTEGER DEFAULT 0;
+ALTER TABLE backup_history ADD COLUMN IF NOT EXISTS high_water_marks JSONB;
+ALTER TABLE backup_history ADD COLUMN IF NOT EXISTS total_records BIGINT;
+
+COMMENT ON COLUMN backup_history.parent_file IS 'Backup an incremental backup applies on top of (NULL for full backups)';
+COMMENT ON COLUMN backup_history.base_file IS 'Full backup the chain starts from';
+COMMENT ON COLUMN backup_history.chain_length IS 'Incremental backups since base_file (0 for full backups)';
+COMMENT ON COLUMN backup_history.high_water_marks IS 'max(updated_at) per incremental table in this backup';
+
+SELECT 'incremental backup tracking created successfully' AS status;
@@ -0,0 +1,10 @@
+-- Migration: Index inventory_log by item
+-- Description: /inventory-forecast fingerprints an item's log with
+--              COUNT(*) + MAX(log_id) on every request to decide whether the
+--              cached model is still valid; this keeps that lookup an index scan
+-- Date: 2026-10-19
+
+CREATE INDEX IF NOT EXISTS idx_inventory_log_item_id_log_id
+    ON inventory_log (item_id, log_id);
+
+SELECT 'inventory_log item index created successfully' AS status;
@@ -0,0 +1,10 @@
+-- Migration: Add thumbnail_url to menu
+-- Description: Stores the WebP thumbnail generated by the menu image pipeline so
+--              the menu listing can serve small images instead of full uploads
+-- Date: 2026-10-19
+
+ALTER TABLE menu ADD COLUMN IF NOT EXISTS thumbnail_url TEXT;
+
+COMMENT ON COLUMN menu.thumbnail_url IS 'Public URL of the 320px WebP thumbnail (falls back to image_url when NULL)';
+
+SELECT 'menu.thumbnail_url column added successfully' AS status;
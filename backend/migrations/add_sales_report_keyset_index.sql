@@ -0,0 +1,10 @@
+-- Migration: Keyset index for /sales-detailed paging
+-- Description: /sales-detailed pages with ORDER BY sale_date DESC, sales_id DESC
+--              and a (sale_date, sales_id) < (:cursor_date, :cursor_id) cursor;
+--              this index serves each page as a short backward range scan
+-- Date: 2026-10-19
+
+CREATE INDEX IF NOT EXISTS idx_sales_report_sale_date_sales_id
+    ON sales_report (sale_date, sales_id);
+
+SELECT 'sales_report keyset index created successfully' AS status;
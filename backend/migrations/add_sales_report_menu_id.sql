@@ -0,0 +1,72 @@
+-- Migration: Resolve sales_report rows to menu items by id
+-- Description: Adds sales_report.menu_id (resolved at import time from itemcode,
+--              POS spelling aliases and normalized dish names), the
+--              menu_item_alias table and the normalize_item_key() helper, then
+--              backfills existing rows. Reports join menu on menu_id instead of
+--              LOWER(REPLACE(TRIM(...))) string matching.
+-- Date: 2026-10-19
+
+-- Same normalization the reports used inline; IMMUTABLE so it can be indexed
+CREATE OR REPLACE FUNCTION normalize_item_key(name TEXT)
+RETURNS TEXT
+LANGUAGE SQL
+IMMUTABLE
+AS $$
+    SELECT LOWER(REPLACE(TRIM(name), ' ', ''))
+$$;
+
+ALTER TABLE sales_report
+ADD COLUMN IF NOT EXISTS menu_id INTEGER REFERENCES menu(menu_id) ON DELETE SET NULL;
+
+ALTER TABLE sales_daily_item
+ADD COLUMN IF NOT EXISTS menu_id INTEGER;
+
+CREATE TABLE IF NOT EXISTS menu_item_alias (
+    alias_id SERIAL PRIMARY KEY,
+    alias TEXT NOT NULL,
+    alias_key TEXT NOT NULL UNIQUE,
+    menu_id INTEGER NOT NULL REFERENCES menu(menu_id) ON DELETE CASCADE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_sales_report_menu_id ON sales_report(menu_id);
+CREATE INDEX IF NOT EXISTS idx_sales_report_unresolved_item_key
+    ON sales_report (normalize_item_key(item_name)) WHERE menu_id IS NULL;
+CREATE INDEX IF NOT EXISTS idx_menu_item_key ON menu (normalize_item_key(dish_name));
+CREATE INDEX IF NOT EXISTS idx_menu_item_alias_menu_id ON menu_item_alias(menu_id);
+CREATE INDEX IF NOT EXISTS idx_sales_daily_item_menu_id ON sales_daily_item(menu_id);
+
+COMMENT ON COLUMN sales_report.menu_id IS 'Menu item resolved at import (itemcode, then alias, then normalized name); NULL if unmatched';
+COMMENT ON TABLE menu_item_alias IS 'POS item name spelling variants mapped to a menu item; alias_key = normalize_item_key(alias)';
+
+-- Backfill: itemcode first, then aliases, then normalized dish name
+UPDATE sales_report sr
+SET menu_id = m.menu_id
+FROM menu m
+WHERE sr.menu_id IS NULL
+  AND NULLIF(TRIM(sr.itemcode), '') IS NOT NULL
+  AND TRIM(m.itemcode) = TRIM(sr.itemcode);
+
+UPDATE sales_report sr
+SET menu_id = m.menu_id
+FROM (
+    SELECT DISTINCT ON (normalize_item_key(dish_name))
+        normalize_item_key(dish_name) AS dish_key, menu_id
+    FROM menu
+    WHERE dish_name IS NOT NULL
+    ORDER BY normalize_item_key(dish_name), menu_id
+) m
+WHERE sr.menu_id IS NULL
+  AND m.dish_key = normalize_item_key(sr.item_name);
+
+UPDATE sales_daily_item sdi
+SET menu_id = r.menu_id
+FROM (
+    SELECT item_name, MAX(menu_id) AS menu_id
+    FROM sales_report
+    WHERE menu_id IS NOT NULL
+    GROUP BY item_name
+) r
+WHERE sdi.item_name = r.item_name;
+
+SELECT 'sales_report.menu_id and menu_item_alias added successfully' AS status;
@@ -0,0 +1,27 @@
+-- Migration: Create ingredient_unit_cost table for COGS
+-- Description: One row per ingredient with its average inventory unit_cost
+--              normalized to a cost per base unit (g, ml or pcs). Rebuilt by
+--              app/utils/ingredient_cost.py when inventory costs change, so
+--              comprehensive sales analytics joins it once instead of running
+--              correlated AVG(unit_cost) subqueries per menu ingredient.
+-- Date: 2026-10-19
+
+CREATE TABLE IF NOT EXISTS ingredient_unit_cost (
+    ingredient_key TEXT PRIMARY KEY,
+    ingredient_name TEXT NOT NULL,
+    avg_unit_cost DOUBLE PRECISION NOT NULL DEFAULT 0,
+    cost_unit TEXT,
+    base_unit TEXT NOT NULL,
+    cost_per_base_unit DOUBLE PRECISION NOT NULL DEFAULT 0,
+    unit_source TEXT NOT NULL DEFAULT 'legacy',
+    cost_source TEXT NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE ingredient_unit_cost IS 'Per-ingredient unit cost normalized to g/ml/pcs for COGS';
+COMMENT ON COLUMN ingredient_unit_cost.ingredient_key IS 'LOWER(TRIM(item_name)); joined from menu_ingredients.ingredient_name';
+COMMENT ON COLUMN ingredient_unit_cost.cost_unit IS 'inventory_settings.default_unit the cost is expressed in (NULL if unknown)';
+COMMENT ON COLUMN ingredient_unit_cost.unit_source IS 'settings = converted from cost_unit; legacy = assumed per kg/L (or per piece for counted items)';
+COMMENT ON COLUMN ingredient_unit_cost.cost_source IS 'Inventory table the average cost was taken from';
+
+SELECT 'ingredient_unit_cost table created successfully' AS status;
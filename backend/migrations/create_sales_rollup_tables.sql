@@ -0,0 +1,90 @@
+-- Migration: Create sales rollup tables for report analytics
+-- Description: sales_daily_item (per day + item) and sales_hourly (per day + hour)
+--              pre-aggregate sales_report so the sales report endpoints read a
+--              bounded number of rows regardless of transaction volume.
+--              Rows are refreshed per affected day on every sales import
+--              (see app/utils/sales_rollup.py); this migration backfills history.
+-- Date: 2026-10-19
+
+CREATE TABLE IF NOT EXISTS sales_daily_item (
+    sale_day DATE NOT NULL,
+    item_name TEXT NOT NULL,
+    category TEXT NOT NULL DEFAULT '',
+    total_quantity BIGINT NOT NULL DEFAULT 0,
+    total_revenue DOUBLE PRECISION NOT NULL DEFAULT 0,
+    unit_price_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    unit_price_count BIGINT NOT NULL DEFAULT 0,
+    row_count BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (sale_day, item_name)
+);
+
+CREATE TABLE IF NOT EXISTS sales_hourly (
+    sale_day DATE NOT NULL,
+    sale_hour SMALLINT NOT NULL,
+    total_quantity BIGINT NOT NULL DEFAULT 0,
+    total_revenue DOUBLE PRECISION NOT NULL DEFAULT 0,
+    row_count BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (sale_day, sale_hour)
+);
+
+CREATE INDEX IF NOT EXISTS idx_sales_daily_item_item ON sales_daily_item(item_name);
+CREATE INDEX IF NOT EXISTS idx_sales_daily_item_category ON sales_daily_item(category, sale_day);
+
+COMMENT ON TABLE sales_daily_item IS 'Per-day, per-item rollup of sales_report used by the sales report endpoints';
+COMMENT ON COLUMN sales_daily_item.unit_price_sum IS 'SUM(unit_price); divide by unit_price_count for AVG(unit_price)';
+COMMENT ON COLUMN sales_daily_item.row_count IS 'Number of sales_report rows (transactions) rolled into this row';
+COMMENT ON TABLE sales_hourly IS 'Per-day, per-hour rollup of sales_report used by /hourly-sales';
+
+-- Backfill from existing sales
+INSERT INTO sales_daily_item (
+    sale_day, item_name, category, total_quantity, total_revenue,
+    unit_price_sum, unit_price_count, row_count
+)
+SELECT
+    s.sale_day,
+    s.item_name,
+    COALESCE(s.category, mc.category, ''),
+    s.total_quantity,
+    s.total_revenue,
+    s.unit_price_sum,
+    s.unit_price_count,
+    s.row_count
+FROM (
+    SELECT
+        CAST(sale_date AS DATE) AS sale_day,
+        COALESCE(item_name, '') AS item_name,
+        MAX(NULLIF(category, '')) AS category,
+        COALESCE(SUM(quantity), 0) AS total_quantity,
+        COALESCE(SUM(total_price), 0) AS total_revenue,
+        COALESCE(SUM(unit_price), 0) AS unit_price_sum,
+        COUNT(unit_price) AS unit_price_count,
+        COUNT(*) AS row_count
+    FROM sales_report
+    WHERE sale_date IS NOT NULL
+    GROUP BY 1, 2
+) s
+LEFT JOIN (
+    SELECT DISTINCT ON (LOWER(REPLACE(TRIM(dish_name), ' ', '')))
+        LOWER(REPLACE(TRIM(dish_name), ' ', '')) AS dish_key,
+        category
+    FROM menu
+    WHERE dish_name IS NOT NULL
+    ORDER BY LOWER(REPLACE(TRIM(dish_name), ' ', '')), menu_id
+) mc ON mc.dish_key = LOWER(REPLACE(TRIM(s.item_name), ' ', ''))
+ON CONFLICT (sale_day, item_name) DO NOTHING;
+
+INSERT INTO sales_hourly (sale_day, sale_hour, total_quantity, total_revenue, row_count)
+SELECT
+    CAST(sale_date AS DATE),
+    CAST(EXTRACT(HOUR FROM CAST(sale_date AS TIMESTAMP)) AS SMALLINT),
+    COALESCE(SUM(quantity), 0),
+    COALESCE(SUM(total_price), 0),
+    COUNT(*)
+FROM sales_report
+WHERE sale_date IS NOT NULL
+GROUP BY 1, 2
+ON CONFLICT (sale_day, sale_hour) DO NOTHING;
+
+SELECT 'sales_daily_item and sales_hourly rollup tables created successfully' AS status;
@@ -0,0 +1,39 @@
+-- Migration: Create weekly forecast model store and holiday week calendar
+-- Description: /weekly-sales-forecast keeps fitted regression coefficients in
+--              sales_forecast_model (refitted only when the weekly series it
+--              was fitted on changes) and reads holiday features from
+--              holiday_week_calendar instead of scanning every PH and custom
+--              holiday per week on each request.
+-- Date: 2026-10-19
+
+CREATE TABLE IF NOT EXISTS sales_forecast_model (
+    item_key TEXT NOT NULL DEFAULT '',
+    category_key TEXT NOT NULL DEFAULT '',
+    horizon INTEGER NOT NULL,
+    features JSONB NOT NULL,
+    intercept DOUBLE PRECISION NOT NULL,
+    coefficients JSONB NOT NULL,
+    first_week DATE NOT NULL,
+    last_week DATE NOT NULL,
+    n_weeks INTEGER NOT NULL,
+    data_fingerprint TEXT NOT NULL,
+    fitted_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (item_key, category_key, horizon)
+);
+
+COMMENT ON TABLE sales_forecast_model IS 'Fitted weekly sales regression per (item, category, horizon)';
+COMMENT ON COLUMN sales_forecast_model.item_key IS 'item_name filter, empty string for all items';
+COMMENT ON COLUMN sales_forecast_model.category_key IS 'category filter, empty string for all categories';
+COMMENT ON COLUMN sales_forecast_model.data_fingerprint IS 'SHA-1 of the weekly series the model was fitted on';
+
+CREATE TABLE IF NOT EXISTS holiday_week_calendar (
+    week_start DATE PRIMARY KEY,
+    is_holiday_week SMALLINT NOT NULL DEFAULT 0,
+    holiday_type TEXT,
+    holiday_names TEXT,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE holiday_week_calendar IS 'PH + custom holidays per Monday-start week; cleared when custom holidays change';
+
+SELECT 'weekly forecast tables created successfully' AS status;
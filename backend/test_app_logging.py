@@ -0,0 +1,97 @@
+"""
+Test the structured log formatter and that payload dumps are skipped (not
+even formatted) unless LOG_PAYLOADS and DEBUG are both on
+"""
+import json
+import logging
+import os
+
+from app.utils.app_logging import StructuredFormatter, log_payload
+
+
+class CountingRepr:
+    calls = 0
+
+    def __repr__(self):
+        CountingRepr.calls += 1
+        return "<payload>"
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _logger(level):
+    logger = logging.getLogger("app.test_app_logging")
+    logger.handlers = [ListHandler()]
+    logger.propagate = False
+    logger.setLevel(level)
+    return logger
+
+
+def test_structured_formatter():
+    record = logging.LogRecord("app.sales", logging.INFO, __file__, 1, "Imported %d rows", (42,), None)
+    record.fields = {"user_id": 7, "source": "pos"}
+
+    text_line = StructuredFormatter().format(record)
+    assert text_line.endswith("INFO app.sales: Imported 42 rows user_id=7 source=pos")
+
+    entry = json.loads(StructuredFormatter(as_json=True).format(record))
+    assert entry["message"] == "Imported 42 rows"
+    assert entry["user_id"] == 7 and entry["level"] == "INFO"
+    print("[OK] text and JSON log lines carry structured fields")
+
+
+def test_payload_gated():
+    CountingRepr.calls = 0
+    payload = [CountingRepr()] * 5
+
+    os.environ.pop("LOG_PAYLOADS", None)
+    logger = _logger(logging.DEBUG)
+    log_payload(logger, "rows", payload)
+    assert logger.handlers[0].records == [] and CountingRepr.calls == 0
+
+    os.environ["LOG_PAYLOADS"] = "1"
+    logger = _logger(logging.INFO)
+    log_payload(logger, "rows", payload)
+    assert logger.handlers[0].records == [] and CountingRepr.calls == 0
+
+    logger = _logger(logging.DEBUG)
+    log_payload(logger, "rows", payload)
+    assert CountingRepr.calls == 5
+    assert logger.handlers[0].records[0].getMessage().startswith("rows: [<payload>")
+    os.environ.pop("LOG_PAYLOADS")
+    print("[OK] payloads only formatted with LOG_PAYLOADS=1 at DEBUG")
+
+
+def test_payload_truncated():
+    os.environ["LOG_PAYLOADS"] = "1"
+    logger = _logger(logging.DEBUG)
+    log_payload(logger, "rows", [{"item": "Bagnet Silog", "sales": i} for i in range(10000)])
+    os.environ.pop("LOG_PAYLOADS")
+    message = logger.handlers[0].records[0].getMessage()
+    assert len(message) < 2100
+    print(f"[OK] 10000-row payload logged as {len(message)} chars")
+
+
+def test_payload_secrets_masked():
+    os.environ["LOG_PAYLOADS"] = "1"
+    logger = _logger(logging.DEBUG)
+    log_payload(logger, "payload", {"email": "owner@example.com", "password": "hunter2", "user": {"access_token": "abc"}})
+    os.environ.pop("LOG_PAYLOADS")
+    message = logger.handlers[0].records[0].getMessage()
+    assert "hunter2" not in message and "abc" not in message
+    assert "owner@example.com" in message and "'password': '***'" in message
+    print("[OK] secret values masked in payload dumps")
+
+
+if __name__ == "__main__":
+    test_structured_formatter()
+    test_payload_gated()
+    test_payload_truncated()
+    test_payload_secrets_masked()
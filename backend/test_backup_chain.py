@@ -0,0 +1,187 @@
+"""
+Test incremental backup planning and chain replay: a full base, then
+incrementals holding only changed rows (plus live keys), restored into a
+second database that must end up identical to the source
+"""
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+
+from app.utils.backup_chain import (
+    backup_dependents,
+    latest_backup,
+    mark_backup_deleted,
+    open_backup_chain,
+    plan_backup,
+    record_backup,
+    record_restore,
+)
+from app.utils.backup_export import write_backup_file
+from app.utils.copy_restore import restore_backup_chain
+
+TRACKED = {"sales_report": "updated_at"}
+
+
+def make_database(directory, name="db.sqlite"):
+    engine = create_engine(f"sqlite:///{os.path.join(directory, name)}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE sales_report (sales_id INTEGER PRIMARY KEY, item_name TEXT, quantity INTEGER, updated_at TEXT)"))
+        conn.execute(text("CREATE TABLE menu (menu_id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(
+            text(
+                """
+                CREATE TABLE backup_history (
+                    backup_id INTEGER PRIMARY KEY AUTOINCREMENT, backup_time TEXT, backup_file_path TEXT,
+                    backup_status TEXT, backup_size NUMERIC, backup_type TEXT, user_id INTEGER, comments TEXT,
+                    parent_file TEXT, base_file TEXT, chain_length INTEGER, high_water_marks TEXT, total_records INTEGER
+                )
+                """
+            )
+        )
+        conn.execute(
+            text("INSERT INTO sales_report VALUES (:id, :item, :qty, :updated_at)"),
+            [
+                {"id": i, "item": f"item {i}", "qty": i, "updated_at": str(datetime(2026, 9, 1) + timedelta(hours=i))}
+                for i in range(1, 101)
+            ],
+        )
+        conn.execute(text("INSERT INTO menu VALUES (1, 'Bagnet Silog')"))
+    return engine
+
+
+def run_backup(engine, directory, name):
+    previous = latest_backup(engine)
+    plan = plan_backup(previous)
+    path = os.path.join(directory, name)
+    manifest = write_backup_file(
+        engine, path, "secret", "scheduled", tracked=TRACKED, since=plan.since, manifest_extra=plan.manifest_fields()
+    )
+    record_backup(engine, name, manifest, os.path.getsize(path))
+    return manifest
+
+
+def current_rows(engine, table):
+    with engine.connect() as conn:
+        return [dict(r) for r in conn.execute(text(f"SELECT * FROM {table} ORDER BY 1")).mappings()]
+
+
+def test_plan_backup():
+    assert not plan_backup(None).incremental
+    previous = {
+        "file": "backup_1.cdb.enc",
+        "base_file": "backup_1.cdb.enc",
+        "chain_length": 0,
+        "high_water_marks": {"sales_report": "2026-10-01T10:00:00+00:00", "menu_legacy": "2026-10-01"},
+    }
+    plan = plan_backup(previous, full_every=7)
+    assert plan.incremental and plan.parent == "backup_1.cdb.enc" and plan.chain_length == 1
+    assert list(plan.since) == ["sales_report"]
+    assert plan.since["sales_report"] == datetime.fromisoformat("2026-10-01T10:00:00+00:00")
+    assert not plan_backup({**previous, "chain_length": 6}, full_every=7).incremental
+    assert not plan_backup({**previous, "restored_since": True}, full_every=7).incremental
+    print("[OK] full / incremental planning")
+
+
+def test_incremental_chain_replays_to_current_state():
+    directory = tempfile.mkdtemp()
+    engine = make_database(directory)
+
+    base = run_backup(engine, directory, "backup_1.cdb.enc")
+    assert not base["incremental"] and base["total_records"] == 101
+
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE sales_report SET quantity = 999, updated_at = '2026-10-02 10:00:00' WHERE sales_id = 5"))
+        conn.execute(text("DELETE FROM sales_report WHERE sales_id = 7"))
+        conn.execute(text("INSERT INTO sales_report VALUES (101, 'item 101', 1, '2026-10-02 11:00:00')"))
+    first = run_backup(engine, directory, "backup_2_inc.cdb.enc")
+    assert first["incremental"] and first["parent"] == "backup_1.cdb.enc"
+    assert first["schema_info"]["sales_report"]["mode"] == "delta"
+    # rows 5 and 101, plus row 100 again: it is stamped exactly at the previous mark
+    assert first["schema_info"]["sales_report"]["row_count"] == 3
+    assert first["schema_info"]["menu"]["mode"] == "full"
+
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE sales_report SET item_name = 'renamed', updated_at = '2026-10-03 09:00:00' WHERE sales_id = 101"))
+        conn.execute(text("UPDATE menu SET name = 'Tapsilog'"))
+    second = run_backup(engine, directory, "backup_3_inc.cdb.enc")
+    assert second["parent"] == "backup_2_inc.cdb.enc" and second["base"] == "backup_1.cdb.enc"
+    assert second["schema_info"]["sales_report"]["row_count"] == 1
+
+    def open_file(name):
+        return open(os.path.join(directory, name), "rb")
+
+    target = make_database(directory, "restored.sqlite")
+    chain = open_backup_chain(open_file("backup_3_inc.cdb.enc"), "secret", open_file)
+    assert [source.parent for source in chain] == [None, "backup_1.cdb.enc", "backup_2_inc.cdb.enc"]
+    restored_counts = restore_backup_chain(target, chain, ["sales_report", "menu"], {})
+    for source in chain:
+        source.close()
+
+    restored = current_rows(target, "sales_report")
+    assert restored == current_rows(engine, "sales_report")
+    assert current_rows(target, "menu") == [{"menu_id": 1, "name": "Tapsilog"}]
+    assert restored_counts["sales_report"] == 100 + 3 + 1
+    print(f"[OK] chain of 3 replayed: {len(restored)} sales rows")
+
+
+def open_in(directory):
+    def open_file(name):
+        return open(os.path.join(directory, name), "rb")
+
+    return open_file
+
+
+def test_restore_breaks_the_chain():
+    directory = tempfile.mkdtemp()
+    engine = make_database(directory)
+    open_file = open_in(directory)
+
+    run_backup(engine, directory, "backup_1.cdb.enc")
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE sales_report SET quantity = 999, updated_at = '2026-10-02 10:00:00' WHERE sales_id = 5"))
+        conn.execute(text("DELETE FROM sales_report WHERE sales_id = 7"))
+    run_backup(engine, directory, "backup_2_inc.cdb.enc")
+
+    # restore the base: row 5 goes back to its old updated_at, row 7 returns
+    chain = open_backup_chain(open_file("backup_1.cdb.enc"), "secret", open_file)
+    restore_backup_chain(engine, chain, ["sales_report"], {})
+    for source in chain:
+        source.close()
+    record_restore(engine, "backup_1.cdb.enc")
+    assert latest_backup(engine)["restored_since"]
+
+    after = run_backup(engine, directory, "backup_3.cdb.enc")
+    assert not after["incremental"]
+    assert not latest_backup(engine)["restored_since"]
+
+    target = make_database(directory, "restored.sqlite")
+    chain = open_backup_chain(open_file("backup_3.cdb.enc"), "secret", open_file)
+    restore_backup_chain(target, chain, ["sales_report", "menu"], {})
+    for source in chain:
+        source.close()
+    assert current_rows(target, "sales_report") == current_rows(engine, "sales_report")
+    assert {r["sales_id"]: r["quantity"] for r in current_rows(target, "sales_report")}[5] == 5
+    print("[OK] backup after a restore is a full base and replays to the restored state")
+
+
+def test_deleted_backups_leave_the_chain():
+    directory = tempfile.mkdtemp()
+    engine = make_database(directory)
+    run_backup(engine, directory, "backup_1.cdb.enc")
+    run_backup(engine, directory, "backup_2_inc.cdb.enc")
+    assert backup_dependents(engine, "backup_1.cdb.enc") == ["backup_2_inc.cdb.enc"]
+    assert backup_dependents(engine, "backup_2_inc.cdb.enc") == []
+
+    mark_backup_deleted(engine, "backup_2_inc.cdb.enc")
+    assert latest_backup(engine)["file"] == "backup_1.cdb.enc"
+    assert backup_dependents(engine, "backup_1.cdb.enc") == []
+    print("[OK] deleted backups are never chosen as parents")
+
+
+if __name__ == "__main__":
+    test_plan_backup()
+    test_incremental_chain_replays_to_current_state()
+    test_restore_breaks_the_chain()
+    test_deleted_backups_leave_the_chain()
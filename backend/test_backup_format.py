@@ -0,0 +1,222 @@
+"""
+Test the streaming backup container: chunked encryption round trip, tamper
+and truncation detection, legacy (Fernet) compatibility and the streaming
+table export
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+import tempfile
+
+import pytest
+from cryptography.fernet import Fernet
+from sqlalchemy import create_engine, text
+
+from app.utils import backup_format
+from app.utils.backup_export import write_backup_file
+from app.utils.backup_format import (
+    BackupDecryptionError,
+    BackupFormatError,
+    BackupReader,
+    BackupWriter,
+    legacy_fernet_key,
+    load_backup_payload,
+    open_backup,
+    new_header,
+)
+
+KEY = bytes(range(32))
+
+
+def build_backup(rows_per_table):
+    out = io.BytesIO()
+    writer = BackupWriter(out, KEY, new_header())
+    writer.write_manifest({"version": "2.0", "tables": list(rows_per_table), "segment_count": len(rows_per_table)})
+    for table, rows in rows_per_table.items():
+        with writer.table(table, ["id", "name", "amount"]) as segment:
+            segment.write_rows(rows)
+    return out.getvalue()
+
+
+def test_round_trip_spans_many_chunks():
+    # random-ish text so gzip output exceeds several CHUNK_SIZE chunks
+    big = [[i, os.urandom(40).hex(), i * 1.5] for i in range(20000)]
+    data = build_backup({"sales_report": big, "menu": [[1, "Bagnet Silog", 120.0]], "empty": []})
+    assert len(data) > 3 * backup_format.CHUNK_SIZE
+
+    reader = BackupReader(io.BytesIO(data), key=KEY)
+    assert reader.manifest()["tables"] == ["sales_report", "menu", "empty"]
+    seen = {segment.table: list(segment.rows()) for segment in reader.segments()}
+    assert seen["sales_report"] == big
+    assert seen["menu"] == [[1, "Bagnet Silog", 120.0]]
+    assert seen["empty"] == []
+    print(f"[OK] round trip of {len(data)} bytes")
+
+
+def test_unread_segments_are_skipped():
+    data = build_backup({"a": [[1, "x", 1]] * 1000, "b": [[2, "y", 2]]})
+    reader = BackupReader(io.BytesIO(data), key=KEY)
+    tables = {s.table: (list(s.rows()) if s.table == "b" else None) for s in reader.segments() if s.kind == "table"}
+    assert tables["b"] == [[2, "y", 2]]
+    print("[OK] partially read segments drained")
+
+
+def test_tampering_and_truncation_detected():
+    data = bytearray(build_backup({"menu": [[i, "item", i] for i in range(500)]}))
+    data[-20] ^= 0xFF
+    with pytest.raises(BackupDecryptionError):
+        for segment in BackupReader(io.BytesIO(bytes(data)), key=KEY).segments():
+            segment.drain()
+
+    truncated = build_backup({"menu": [[1, "item", 1]]})[:-30]
+    with pytest.raises(BackupFormatError):
+        for segment in BackupReader(io.BytesIO(truncated), key=KEY).segments():
+            segment.drain()
+    print("[OK] tampered and truncated files rejected")
+
+
+def test_manifest_read_without_table_data():
+    data = bytearray(build_backup({"sales_report": [[i, "x", i] for i in range(5000)], "menu": [[1, "y", 2]]}))
+    start = BackupReader(io.BytesIO(bytes(data)), key=KEY).data_start
+    data[start + 100] ^= 0xFF  # table data is never decrypted for the manifest
+    assert BackupReader(io.BytesIO(bytes(data)), key=KEY).manifest()["tables"] == ["sales_report", "menu"]
+    with pytest.raises(BackupDecryptionError):
+        BackupReader(io.BytesIO(bytes(data)), key=bytes(32))
+
+    # dropping whole trailing segments is caught through the manifest's segment_count
+    one_table = build_backup({"menu": [[1, "y", 2]]})
+    start = BackupReader(io.BytesIO(one_table), key=KEY).data_start
+    with pytest.raises(BackupFormatError):
+        list(BackupReader(io.BytesIO(one_table[:start]), key=KEY).segments())
+    print("[OK] front manifest read alone")
+
+
+def test_header_iterations_not_trusted():
+    out = io.BytesIO()
+    BackupWriter(out, KEY, new_header(iterations=10**9)).write_manifest({"version": "2.0", "tables": []})
+    with pytest.raises(BackupFormatError):
+        BackupReader(io.BytesIO(out.getvalue()), password="secret")
+    print("[OK] header KDF iteration count other than KDF_ITERATIONS refused")
+
+
+def test_format_2_trailing_manifest():
+    out = io.BytesIO()
+    writer = BackupWriter(out, KEY, new_header(format=2))
+    with writer.table("menu", ["id", "name", "amount"]) as segment:
+        segment.write_rows([[1, "Bagnet Silog", 120.0]])
+    backup_format.write_json_segment(out, KEY, 1, {"segment": "manifest"}, {"version": "2.0", "tables": ["menu"]})
+
+    reader = BackupReader(io.BytesIO(out.getvalue()), key=KEY)
+    assert reader.format == 2 and reader.manifest()["tables"] == ["menu"]
+    assert [s.kind for s in reader.segments()] == ["table", "manifest"]
+    print("[OK] format 2 files still read")
+
+
+def test_load_backup_payload_reads_both_formats():
+    legacy = {"version": "1.0", "schema_info": {}, "data": {"menu": [{"menu_id": 1}]}}
+    legacy_bytes = Fernet(legacy_fernet_key("secret")).encrypt(gzip.compress(json.dumps(legacy).encode()))
+    assert load_backup_payload(legacy_bytes, "secret") == legacy
+    with pytest.raises(BackupDecryptionError):
+        load_backup_payload(legacy_bytes, "wrong")
+
+    out = io.BytesIO()
+    salt = backup_format.new_salt()
+    writer = BackupWriter(out, backup_format.derive_backup_key("secret", salt), new_header(salt))
+    writer.write_manifest({"version": "2.0", "schema_info": {"menu": {"columns": ["menu_id", "name"]}}})
+    with writer.table("menu", ["menu_id", "name"]) as segment:
+        segment.write_rows([(1, "Bagnet Silog")])
+    payload = load_backup_payload(out.getvalue(), "secret")
+    assert payload["version"] == "2.0"
+    assert payload["data"] == {"menu": [{"menu_id": 1, "name": "Bagnet Silog"}]}
+    print("[OK] legacy and streaming backups load")
+
+
+def test_write_backup_file_from_database():
+    directory = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'db.sqlite')}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE menu (menu_id INTEGER PRIMARY KEY, name TEXT, price REAL)"))
+        conn.execute(
+            text("INSERT INTO menu VALUES (:id, :name, :price)"),
+            [{"id": i, "name": f"item {i}", "price": i * 10.0} for i in range(1, 5001)],
+        )
+
+    path = os.path.join(directory, "backup.cdb.enc")
+    manifest = write_backup_file(engine, path, "secret", "manual")
+    assert manifest["total_records"] == 5000
+    assert manifest["schema_info"]["menu"]["columns"] == ["menu_id", "name", "price"]
+    assert not os.path.exists(path + ".part")
+
+    with open(path, "rb") as f:
+        payload = load_backup_payload(f.read(), "secret")
+    assert payload["data"]["menu"][-1] == {"menu_id": 5000, "name": "item 5000", "price": 50000.0}
+    print("[OK] database exported through the streaming writer")
+
+
+def test_parallel_export_manifest_checksums():
+    directory = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'db.sqlite')}")
+    with engine.begin() as conn:
+        for table, count in [("sales_report", 3000), ("menu", 40), ("roles", 3)]:
+            conn.execute(text(f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, label TEXT)"))
+            conn.execute(text(f"INSERT INTO {table} VALUES (:id, :label)"), [{"id": i, "label": f"{table}-{i}"} for i in range(count)])
+
+    path = os.path.join(directory, "backup.cdb.enc")
+    manifest = write_backup_file(
+        engine, path, "secret", "manual", tables=["sales_report", "missing_table", "menu", "roles"], workers=3
+    )
+    assert manifest["tables"] == ["sales_report", "menu", "roles"]
+    assert manifest["total_records"] == 3043
+
+    with open(path, "rb") as f:
+        data = f.read()
+    start = BackupReader(io.BytesIO(data), password="secret").data_start
+    for info in manifest["schema_info"].values():
+        segment = data[start + info["offset"]:start + info["offset"] + info["length"]]
+        assert hashlib.sha256(segment).hexdigest() == info["sha256"]
+
+    payload = load_backup_payload(data, "secret")
+    assert set(payload["data"]) == {"sales_report", "menu", "roles"}
+    assert payload["data"]["roles"] == [{"id": i, "label": f"roles-{i}"} for i in range(3)]
+    print("[OK] parallel export: skipped table, offsets and checksums")
+
+
+def test_selected_tables_skip_others_undecrypted():
+    directory = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'db.sqlite')}")
+    with engine.begin() as conn:
+        for table, count in [("sales_report", 3000), ("menu", 40)]:
+            conn.execute(text(f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, label TEXT)"))
+            conn.execute(text(f"INSERT INTO {table} VALUES (:id, :label)"), [{"id": i, "label": f"{table}-{i}"} for i in range(count)])
+    path = os.path.join(directory, "backup.cdb.enc")
+    manifest = write_backup_file(engine, path, "secret", "manual", tables=["sales_report", "menu"])
+
+    with open(path, "rb") as f:
+        data = bytearray(f.read())
+    start = BackupReader(io.BytesIO(bytes(data)), password="secret").data_start
+    # corrupt the last ciphertext byte of sales_report: only decrypting it would notice
+    info = manifest["schema_info"]["sales_report"]
+    data[start + info["offset"] + info["length"] - 1] ^= 0xFF
+
+    source = open_backup(io.BytesIO(bytes(data)), "secret")
+    segments = [(s.kind, s.table, len(list(s.rows()))) for s in source.segments(["menu"])]
+    assert segments == [("table", "menu", 40)]
+    with pytest.raises(BackupDecryptionError):
+        for segment in source.segments(["sales_report"]):
+            list(segment.rows())
+    print("[OK] unselected tables skipped without decrypting")
+
+
+if __name__ == "__main__":
+    test_round_trip_spans_many_chunks()
+    test_unread_segments_are_skipped()
+    test_tampering_and_truncation_detected()
+    test_manifest_read_without_table_data()
+    test_header_iterations_not_trusted()
+    test_format_2_trailing_manifest()
+    test_load_backup_payload_reads_both_formats()
+    test_write_backup_file_from_database()
+    test_parallel_export_manifest_checksums()
+    test_selected_tables_skip_others_undecrypted()
@@ -0,0 +1,53 @@
+"""
+Test the backup key service: random per-file salts and the derived key cache
+"""
+import io
+import os
+import tempfile
+
+from sqlalchemy import create_engine, text
+
+from app.utils import backup_keys
+from app.utils.backup_export import write_backup_file
+from app.utils.backup_format import header_salt, open_backup, read_header
+
+
+def test_key_cache():
+    backup_keys.clear_key_cache()
+    salt = backup_keys.new_salt()
+    key = backup_keys.backup_key("secret", salt, iterations=1000)
+    assert key == backup_keys.derive_backup_key("secret", salt, iterations=1000)
+    assert backup_keys.backup_key("secret", salt, iterations=1000) is key
+    assert len(backup_keys._cache) == 1
+
+    assert backup_keys.backup_key("other", salt, iterations=1000) != key
+    assert backup_keys.backup_key("secret", backup_keys.new_salt(), iterations=1000) != key
+    assert len(backup_keys._cache) == 3
+    # only a keyed hash of the password is kept
+    assert not any("secret" in cache_key for cache_key in backup_keys._cache._data)
+    print("[OK] derived keys cached per (salt, password)")
+
+
+def test_each_backup_has_its_own_salt():
+    directory = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'db.sqlite')}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE menu (menu_id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("INSERT INTO menu VALUES (1, 'Bagnet Silog')"))
+
+    salts = []
+    for name in ("a.cdb.enc", "b.cdb.enc"):
+        path = os.path.join(directory, name)
+        write_backup_file(engine, path, "secret", "manual", workers=1)
+        with open(path, "rb") as f:
+            salts.append(header_salt(read_header(f)))
+        backup_keys.clear_key_cache()
+        with open(path, "rb") as f:
+            assert open_backup(io.BytesIO(f.read()), "secret").tables == ["menu"]
+    assert salts[0] != salts[1] and backup_keys.LEGACY_SALT not in salts
+    print("[OK] random salt per backup file")
+
+
+if __name__ == "__main__":
+    test_key_cache()
+    test_each_backup_has_its_own_salt()
@@ -0,0 +1,105 @@
+"""
+Test tiered backup retention: daily/weekly/monthly selection, incremental
+chains kept intact, and pruning applied to storage, BACKUP_DIR and
+backup_history
+"""
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+
+from app.utils.backup_retention import RetentionPolicy, apply_retention, plan_retention
+from app.utils.backup_storage import LocalBackupStorage
+
+START = datetime(2026, 5, 1, 2, 0)
+
+
+def daily_backups(days, full_every=7):
+    """One scheduled backup a day; every `full_every`th is a full base, the rest incrementals."""
+    backups = []
+    for day in range(days):
+        name = f"backup_{day:03d}.cdb.enc"
+        parent = None if day % full_every == 0 else backups[-1]["file"]
+        backups.append({"file": name, "time": START + timedelta(days=day), "parent": parent})
+    return backups
+
+
+def test_plan_retention_tiers_and_chains():
+    backups = daily_backups(120)
+    keep, prune = plan_retention(backups, RetentionPolicy(daily=7, weekly=4, monthly=3))
+
+    newest = backups[-1]["file"]
+    assert keep[newest] == "daily"
+    for backup in backups[-7:]:
+        assert backup["file"] in keep
+    # every kept incremental can still be restored
+    parents = {b["file"]: b["parent"] for b in backups}
+    for name in keep:
+        parent = parents[name]
+        while parent:
+            assert parent in keep
+            parent = parents[parent]
+    assert set(keep).isdisjoint(prune) and set(keep) | set(prune) == {b["file"] for b in backups}
+    assert len(keep) < 40 and prune[0] == "backup_000.cdb.enc"  # oldest first
+    assert set(keep.values()) == {"daily", "weekly", "monthly", "chain"}
+    print(f"[OK] kept {len(keep)} of {len(backups)} backups")
+
+
+def test_apply_retention():
+    directory = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'db.sqlite')}")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                CREATE TABLE backup_history (
+                    backup_id INTEGER PRIMARY KEY AUTOINCREMENT, backup_time TEXT, backup_file_path TEXT,
+                    backup_status TEXT, backup_type TEXT, parent_file TEXT, retention_tier TEXT, pruned_at TEXT
+                )
+                """
+            )
+        )
+    local_dir = os.path.join(directory, "local")
+    storage = LocalBackupStorage(os.path.join(directory, "bucket"))
+    os.makedirs(local_dir)
+    backups = daily_backups(30)
+    with engine.begin() as conn:
+        for backup in backups:
+            path = os.path.join(local_dir, backup["file"])
+            with open(path, "wb") as f:
+                f.write(b"x")
+            storage.upload(path)
+            conn.execute(
+                text(
+                    "INSERT INTO backup_history (backup_time, backup_file_path, backup_status, backup_type, parent_file) "
+                    "VALUES (:time, :file, 'completed', 'scheduled', :parent)"
+                ),
+                {**backup, "time": str(backup["time"])},
+            )
+        conn.execute(
+            text(
+                "INSERT INTO backup_history (backup_time, backup_file_path, backup_status, backup_type) "
+                "VALUES ('2026-05-01 09:00:00', 'manual.cdb.enc', 'completed', 'manual')"
+            )
+        )
+
+    result = apply_retention(engine, storage, local_dir, RetentionPolicy(daily=3, weekly=2, monthly=1))
+    kept, pruned = result["kept"], result["pruned"]
+    assert pruned and sorted(f["name"] for f in storage.list()) == sorted(kept)
+    assert sorted(os.listdir(local_dir)) == sorted(kept)
+    with engine.connect() as conn:
+        statuses = dict(conn.execute(text("SELECT backup_file_path, backup_status FROM backup_history")).fetchall())
+        tiers = dict(conn.execute(text("SELECT backup_file_path, retention_tier FROM backup_history WHERE retention_tier IS NOT NULL")).fetchall())
+    assert statuses["manual.cdb.enc"] == "completed"
+    assert {f for f, s in statuses.items() if s == "pruned"} == set(pruned)
+    assert tiers == kept
+
+    # nothing more to prune on a second run
+    assert apply_retention(engine, storage, local_dir, RetentionPolicy(daily=3, weekly=2, monthly=1))["pruned"] == []
+    print(f"[OK] pruned {len(pruned)} backups, kept {len(kept)}")
+
+
+if __name__ == "__main__":
+    test_plan_retention_tiers_and_chains()
+    test_apply_retention()
@@ -0,0 +1,115 @@
+"""
+Test backup storage: Range header parsing, the local directory backend and
+the Supabase backend's requests (upsert upload, ranged streaming download)
+"""
+import os
+import tempfile
+
+import httpx
+import pytest
+
+from app.utils.backup_storage import (
+    BackupStorage,
+    LocalBackupStorage,
+    RangeNotSatisfiable,
+    SupabaseBackupStorage,
+    content_disposition,
+    parse_range,
+)
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=100-", 100)
+    print("[OK] Range headers")
+
+
+def test_interface_and_content_disposition():
+    with pytest.raises(TypeError):
+        BackupStorage()
+    assert content_disposition("backup_1.cdb.enc") == (
+        "attachment; filename=\"backup_1.cdb.enc\"; filename*=UTF-8''backup_1.cdb.enc"
+    )
+    assert content_disposition('../a "b";\r\nX: y.enc') == (
+        "attachment; filename=\"a \\\"b\\\";X: y.enc\"; filename*=UTF-8''a%20%22b%22%3BX%3A%20y.enc"
+    )
+    print("[OK] abstract interface, quoted Content-Disposition")
+
+
+def test_local_storage():
+    directory = tempfile.mkdtemp()
+    storage = LocalBackupStorage(os.path.join(directory, "bucket"))
+    source = os.path.join(directory, "backup_1.cdb.enc")
+    with open(source, "wb") as f:
+        f.write(os.urandom(600_000))
+    storage.upload(source)
+    with open(source, "wb") as f:
+        f.write(b"replaced")
+    storage.upload(source)  # replaces in place
+
+    total, chunks = storage.open_range("backup_1.cdb.enc", 2, 5)
+    assert total == 8 and b"".join(chunks) == b"plac"
+    with storage.open("backup_1.cdb.enc") as f:
+        assert f.read() == b"replaced"
+
+    storage.upload(source, "backup_2.cdb.enc")
+    assert [f["name"] for f in storage.list()] == ["backup_2.cdb.enc", "backup_1.cdb.enc"]
+    assert [f["name"] for f in storage.list(limit=1, offset=1)] == ["backup_1.cdb.enc"]
+    storage.delete(["backup_2.cdb.enc", "missing"])
+    assert [f["name"] for f in storage.list()] == ["backup_1.cdb.enc"]
+    print("[OK] local storage")
+
+
+def test_supabase_storage_requests():
+    stored = {}
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append((request.method, request.url.path, dict(request.headers)))
+        name = request.url.path.rsplit("/", 1)[-1]
+        if request.method == "POST":
+            stored[name] = request.read()
+            return httpx.Response(200, json={"Key": name})
+        if name not in stored:
+            return httpx.Response(400, json={"error": "not_found"})
+        data = stored[name]
+        if request.method == "HEAD":
+            return httpx.Response(200, headers={"content-length": str(len(data))})
+        start, end = parse_range(request.headers.get("range"), len(data)) or (0, len(data) - 1)
+        headers = {"content-range": f"bytes {start}-{end}/{len(data)}"} if "range" in request.headers else {}
+        return httpx.Response(206 if headers else 200, content=data[start:end + 1], headers=headers)
+
+    storage = SupabaseBackupStorage(
+        "https://example.supabase.co", "key", http=httpx.Client(transport=httpx.MockTransport(handler))
+    )
+    path = os.path.join(tempfile.mkdtemp(), "backup_1.cdb.enc")
+    with open(path, "wb") as f:
+        f.write(bytes(range(256)) * 4000)
+
+    storage.upload(path)
+    method, url_path, headers = seen[-1]
+    assert (method, url_path) == ("POST", "/storage/v1/object/cardiacdelights-backup/backup_1.cdb.enc")
+    assert headers["x-upsert"] == "true" and headers["authorization"] == "Bearer key"
+
+    assert storage.size("backup_1.cdb.enc") == 1_024_000
+    total, chunks = storage.open_range("backup_1.cdb.enc", 256, 511)
+    assert total == 1_024_000 and b"".join(chunks) == bytes(range(256))
+    assert seen[-1][2]["range"] == "bytes=256-511"
+    with storage.open("backup_1.cdb.enc") as f:
+        assert f.read() == stored["backup_1.cdb.enc"]
+    with pytest.raises(FileNotFoundError):
+        storage.open_range("missing.cdb.enc")
+    print("[OK] supabase storage requests")
+
+
+if __name__ == "__main__":
+    test_parse_range()
+    test_interface_and_content_disposition()
+    test_local_storage()
+    test_supabase_storage_requests()
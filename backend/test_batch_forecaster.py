@@ -0,0 +1,72 @@
+"""
+Test the batched trend forecaster against a per-item LinearRegression fit
+"""
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from app.utils.batch_forecaster import fit_linear_trends, predict_period_totals
+
+
+def _sales_frame(items=300, days=365, seed=7):
+    rng = np.random.default_rng(seed)
+    start = date(2025, 1, 1)
+    rows = []
+    for i in range(items):
+        slope = rng.normal(0, 0.05)
+        base = rng.uniform(2, 40)
+        sold_on = rng.random(days) < rng.uniform(0.02, 0.9)  # sparse and dense items
+        for d in np.flatnonzero(sold_on):
+            qty = max(1, int(base + slope * d + rng.normal(0, 3)))
+            rows.append({"item": f"Item {i}", "date": pd.Timestamp(start + timedelta(days=int(d))), "sales": qty})
+    return pd.DataFrame(rows)
+
+
+def _loop_totals(df, future_days):
+    totals = {}
+    X_future = np.array([d.toordinal() for d in future_days]).reshape(-1, 1)
+    for item in df["item"].unique():
+        item_df = df[df["item"] == item]
+        if len(item_df) < 10:
+            continue
+        daily = item_df.groupby("date")["sales"].sum().reset_index().sort_values("date")
+        X = daily["date"].map(lambda d: d.toordinal()).values.reshape(-1, 1)
+        model = LinearRegression().fit(X, daily["sales"].values)
+        totals[item] = float(np.clip(model.predict(X_future), 0, None).sum())
+    return totals
+
+
+def test_matches_per_item_regression():
+    df = _sales_frame()
+    future_days = [date(2026, 1, 1) + timedelta(days=i) for i in range(31)]
+
+    started = time.perf_counter()
+    predictions = predict_period_totals(fit_linear_trends(df), future_days)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    expected = _loop_totals(df, future_days)
+    assert {p["item"] for p in predictions} == set(expected)
+    for p in predictions:
+        assert abs(p["predicted_sales"] - expected[p["item"]]) < 1e-6 * max(1.0, expected[p["item"]])
+    totals = [p["predicted_sales"] for p in predictions]
+    assert totals == sorted(totals, reverse=True)
+    print(f"[OK] {len(predictions)} items forecast in {elapsed_ms:.1f} ms, matching LinearRegression")
+
+
+def test_single_day_and_too_few_rows():
+    df = pd.DataFrame(
+        [{"item": "Halo-Halo", "date": pd.Timestamp("2025-11-01"), "sales": 4}] * 10
+        + [{"item": "Sisig", "date": pd.Timestamp("2025-11-01"), "sales": 2}]
+    )
+    predictions = predict_period_totals(fit_linear_trends(df), [date(2025, 12, 1), date(2025, 12, 2)])
+    # ten rows on one day -> flat line at the daily total; Sisig has too little data
+    assert predictions == [{"item": "Halo-Halo", "predicted_sales": 80.0}]
+    print("[OK] flat line for a single day, sparse items skipped")
+
+
+if __name__ == "__main__":
+    test_matches_per_item_regression()
+    test_single_day_and_too_few_rows()
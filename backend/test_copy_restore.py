@@ -0,0 +1,87 @@
+"""
+Test the streaming restore engine: COPY CSV encoding, legacy (version 1)
+backups with pandas NaT/nan strings, columns dropped from the schema and
+tables that are empty in the backup
+"""
+import gzip
+import io
+import json
+import os
+import tempfile
+
+from cryptography.fernet import Fernet
+from sqlalchemy import create_engine, text
+
+from app.utils.backup_format import legacy_fernet_key, open_backup
+from app.utils.copy_restore import _CopyStream, check_backup_schema, restore_backup_chain
+
+
+def test_copy_stream_encoding():
+    rows = [[1, "Bagnet, \"crispy\"", None, True, ""], [2, "line\nbreak", 1.5, False, "\\N"]]
+    stream = io.BufferedReader(_CopyStream(iter(rows)), buffer_size=7)
+    assert stream.read().decode() == (
+        '"1","Bagnet, ""crispy""",\\N,"true",""\n'
+        '"2","line\nbreak","1.5","false","\\N"\n'
+    )
+    print("[OK] NULL is unquoted \\N, every value is quoted")
+
+
+def test_restore_legacy_backup():
+    directory = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'db.sqlite')}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE menu (menu_id INTEGER PRIMARY KEY, name TEXT, added_on TEXT)"))
+        conn.execute(text("CREATE TABLE roles (role_id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("INSERT INTO menu VALUES (99, 'old', NULL)"))
+        conn.execute(text("INSERT INTO roles VALUES (1, 'Owner')"))
+
+    legacy = {
+        "version": "1.0",
+        "schema_info": {},
+        "data": {
+            "menu": [
+                {"menu_id": 1, "name": "Bagnet Silog", "added_on": "NaT", "retired_column": "x"},
+                {"menu_id": 2, "name": "Tapsilog", "added_on": "2025-11-02", "retired_column": "y"},
+            ],
+            "roles": [],
+        },
+    }
+    data = Fernet(legacy_fernet_key("secret")).encrypt(gzip.compress(json.dumps(legacy).encode()))
+    source = open_backup(io.BytesIO(data), "secret")
+    assert source.version == "1.0" and source.tables == ["menu", "roles"]
+
+    restored = restore_backup_chain(engine, [source], source.tables, {"menu": "menu_id"})
+    assert restored == {"menu": 2, "roles": 0}
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT * FROM menu ORDER BY menu_id")).fetchall() == [
+            (1, "Bagnet Silog", None),
+            (2, "Tapsilog", "2025-11-02"),
+        ]
+        # empty in the backup: left as it was
+        assert conn.execute(text("SELECT * FROM roles")).fetchall() == [(1, "Owner")]
+    print("[OK] legacy backup restored")
+
+
+def test_schema_differences():
+    directory = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'db.sqlite')}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE menu (menu_id INTEGER PRIMARY KEY, name TEXT, category TEXT)"))
+        conn.execute(text("CREATE TABLE roles (role_id INTEGER PRIMARY KEY, name TEXT)"))
+
+    schema_info = {
+        "menu": {"columns": ["menu_id", "name", "retired_column"]},
+        "roles": {"columns": ["role_id", "name"]},
+        "dropped_table": {"columns": ["id"]},
+    }
+    assert check_backup_schema(engine, schema_info) == {
+        "menu": {"backup_only": ["retired_column"], "database_only": ["category"]},
+        "dropped_table": {"missing_table": True},
+    }
+    print("[OK] schema differences")
+
+
+if __name__ == "__main__":
+    test_copy_stream_encoding()
+    test_restore_legacy_backup()
+    test_schema_differences()
@@ -0,0 +1,79 @@
+"""
+Test the merged PH + custom holiday calendar: day/week lookups and custom
+holiday invalidation
+"""
+import asyncio
+from datetime import date
+
+from app.utils.holiday_calendar import HolidayCalendar
+
+
+class CustomHolidaySession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    async def execute(self, statement, params=None):
+        self.queries += 1
+        rows = list(self.rows)
+
+        class Result:
+            def fetchall(self):
+                return rows
+
+        return Result()
+
+
+def test_day_and_week_lookups():
+    calendar = HolidayCalendar()
+    calendar.set_custom([("2025-11-12", "Store Anniversary"), (date(2025, 12, 24), "Staff Party")])
+
+    assert calendar.day(date(2025, 12, 25))[0]["type"] == "official"
+    assert calendar.day(date(2025, 11, 12)) == [
+        {"date": "2025-11-12", "name": "Store Anniversary", "type": "custom"}
+    ]
+    assert calendar.day(date(2025, 11, 13)) == []
+
+    flag, htype, names = calendar.week(date(2025, 12, 22))
+    assert (flag, htype) == (1, "official")
+    assert "Christmas Day" in names and names.endswith("Staff Party")
+    assert calendar.week(date(2025, 11, 10)) == (1, "custom", "Store Anniversary")
+    assert calendar.week(date(2025, 11, 17)) == (0, None, None)
+    print("[OK] day and week lookups merge official and custom holidays")
+
+
+def test_custom_holidays_reloaded_after_invalidate():
+    calendar = HolidayCalendar()
+    session = CustomHolidaySession([("2025-11-12", "Store Anniversary")])
+
+    asyncio.run(calendar.ensure_custom(session))
+    asyncio.run(calendar.ensure_custom(session))
+    assert session.queries == 1
+    assert calendar.week(date(2025, 11, 10))[1] == "custom"
+
+    session.rows = []
+    calendar.invalidate_custom()
+    asyncio.run(calendar.ensure_custom(session))
+    assert session.queries == 2
+    assert calendar.week(date(2025, 11, 10)) == (0, None, None)
+    print("[OK] custom holidays reloaded only after invalidation")
+
+    session.rows = [("2025-11-12", "Store Anniversary")]
+    asyncio.run(calendar.ensure_custom(session, fresh=True))
+    assert session.queries == 3
+    assert calendar.week(date(2025, 11, 10))[1] == "custom"
+    print("[OK] fresh=True reloads a cached calendar")
+
+
+def test_official_list_cached_per_year():
+    calendar = HolidayCalendar()
+    holidays_2025 = calendar.official_list(2025)
+    assert {"date": "2025-12-25", "name": "Christmas Day", "type": "official"} in holidays_2025
+    assert calendar.official_year(2025) is calendar.official_year(2025)
+    print(f"[OK] {len(holidays_2025)} official holidays for 2025")
+
+
+if __name__ == "__main__":
+    test_day_and_week_lookups()
+    test_custom_holidays_reloaded_after_invalidate()
+    test_official_list_cached_per_year()
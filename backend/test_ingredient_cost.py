@@ -0,0 +1,76 @@
+"""
+Test ingredient unit cost normalization used for COGS
+"""
+from app.utils import ingredient_cost
+from app.utils.ingredient_cost import (
+    build_ingredient_cost_rows,
+    cost_per_base_unit,
+    recipe_quantity_in_base_units,
+)
+from app.utils.response_cache import INVENTORY_CACHE_GROUPS, response_cache
+
+
+def test_cost_per_base_unit_from_settings():
+    assert cost_per_base_unit(300.0, "kg") == (0.3, "g", "settings")
+    assert cost_per_base_unit(90.0, "L") == (0.09, "ml", "settings")
+    assert cost_per_base_unit(8.0, "pcs") == (8.0, "pcs", "settings")
+    # tray of 30 eggs
+    per_egg, base, _ = cost_per_base_unit(240.0, "tray")
+    assert (round(per_egg, 2), base) == (8.0, "pcs")
+    print("[OK] default units converted to g/ml/pcs")
+
+
+def test_cost_per_base_unit_legacy_fallback():
+    # No settings: per kg/L for measured ingredients, per piece for counted ones
+    assert cost_per_base_unit(250.0, None, ["g", "g", "kg"]) == (0.25, "g", "legacy")
+    assert cost_per_base_unit(120.0, "", ["ml"]) == (0.12, "ml", "legacy")
+    assert cost_per_base_unit(15.0, "whatever", ["pcs"]) == (15.0, "pcs", "legacy")
+    assert cost_per_base_unit(500.0, None) == (0.5, "g", "legacy")
+    print("[OK] legacy assumptions preserved")
+
+
+def test_recipe_quantities_match_cost_unit():
+    assert recipe_quantity_in_base_units(0.25, "kg", "g") == 250.0
+    assert recipe_quantity_in_base_units(2, "tbsp", "ml") == 2 * 14.7868
+    assert recipe_quantity_in_base_units(1, "tray", "pcs") == 30.0
+    assert recipe_quantity_in_base_units(1, "sack", "g") == 25000.0
+    assert recipe_quantity_in_base_units(3, "", "pcs") == 3.0
+    # different kinds of unit cannot be priced
+    assert recipe_quantity_in_base_units(2, "pcs", "g") is None
+    assert recipe_quantity_in_base_units(100, "g", "pcs") is None
+    assert recipe_quantity_in_base_units(1, "handful", "g") is None
+    print("[OK] recipe quantities converted to the cost's base unit")
+
+
+def test_source_priority():
+    rows = build_ingredient_cost_rows(
+        source_costs={
+            "inventory_today": {"pork": ("Pork", 320.0)},
+            "inventory": {"pork": ("Pork", 300.0), "rice": ("Rice", 55.0)},
+            "inventory_spoilage": {"rice": ("Rice", 50.0), "egg": ("Egg", 8.0)},
+        },
+        default_units={"pork": "kg", "rice": "kg", "egg": "pcs"},
+        recipe_measurements={},
+    )
+    by_key = {row["ingredient_key"]: row for row in rows}
+    assert by_key["pork"]["cost_source"] == "inventory_today"
+    assert by_key["pork"]["cost_per_base_unit"] == 0.32
+    assert by_key["rice"]["cost_source"] == "inventory"
+    assert by_key["egg"]["cost_source"] == "inventory_spoilage"
+    print("[OK] inventory_today > inventory > inventory_spoilage")
+
+
+def test_inventory_writes_mark_costs_stale():
+    ingredient_cost._state.update(stale=False, refreshed_at=10**9)
+    assert not ingredient_cost.ingredient_costs_need_refresh(now=10**9 + 1)
+    response_cache.invalidate(*INVENTORY_CACHE_GROUPS)
+    assert ingredient_cost.ingredient_costs_need_refresh(now=10**9 + 1)
+    print("[OK] inventory invalidation marks costs stale")
+
+
+if __name__ == "__main__":
+    test_cost_per_base_unit_from_settings()
+    test_cost_per_base_unit_legacy_fallback()
+    test_recipe_quantities_match_cost_unit()
+    test_source_priority()
+    test_inventory_writes_mark_costs_stale()
@@ -0,0 +1,57 @@
+"""
+Test the cached Holt forecaster used by /inventory-forecast
+"""
+import time
+from datetime import datetime, timedelta
+
+from app.utils.inventory_forecaster import InventoryForecaster, daily_series
+
+
+def make_rows(days=60, start_stock=500, daily_use=5):
+    start = datetime(2026, 1, 1, 9, 30)
+    return [
+        ((start + timedelta(days=i)).isoformat(), start_stock - daily_use * i)
+        for i in range(days)
+        if i % 7 != 3  # gaps are carried forward
+    ]
+
+
+def test_daily_series_fills_gaps():
+    days, values = daily_series(make_rows(days=10))
+    assert len(days) == 10
+    assert values[3] == values[2]
+    print("[OK] gaps carried forward")
+
+
+def test_holt_tracks_linear_depletion():
+    forecaster = InventoryForecaster(backend="holt")
+    model = forecaster.fit(1, (60, 60), make_rows())
+    forecast = model.predict(30)
+
+    assert len(forecast) == 30
+    assert forecast[0]["ds"] == datetime(2026, 3, 1)  # day after the last reading
+    assert forecast[0]["yhat"] < 205
+    assert forecast[-1]["yhat"] < forecast[0]["yhat"]
+    assert all(p["yhat_lower"] <= p["yhat"] <= p["yhat_upper"] for p in forecast)
+    assert all(p["yhat_lower"] >= 0 for p in forecast)
+    print(f"[OK] day 1 {forecast[0]['yhat']:.1f}, day 30 {forecast[-1]['yhat']:.1f}")
+
+
+def test_cache_keyed_on_log_fingerprint():
+    forecaster = InventoryForecaster(backend="holt")
+    forecaster.fit(7, (60, 120), make_rows())
+
+    started = time.perf_counter()
+    assert forecaster.cached_model(7, (60, 120)) is not None
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    assert forecaster.cached_model(7, (61, 121)) is None  # new log row
+
+    forecaster.invalidate([7])
+    assert forecaster.cached_model(7, (60, 120)) is None
+    print(f"[OK] warm lookup {elapsed_ms:.3f} ms")
+
+
+if __name__ == "__main__":
+    test_daily_series_fills_gaps()
+    test_holt_tracks_linear_depletion()
+    test_cache_keyed_on_log_fingerprint()
@@ -0,0 +1,74 @@
+"""
+Test cursor tokens, fields= projection and the cached column lookup used by
+/sales-detailed
+"""
+import asyncio
+
+import pytest
+
+from app.utils.keyset_pagination import (
+    InvalidCursor,
+    TableColumnCache,
+    decode_cursor,
+    encode_cursor,
+    parse_fields,
+)
+
+
+class CountingSession:
+    def __init__(self, columns):
+        self.columns = columns
+        self.calls = 0
+
+    async def execute(self, statement, params=None):
+        self.calls += 1
+        columns = self.columns
+
+        class Result:
+            def fetchall(self):
+                return [(c,) for c in columns]
+
+        return Result()
+
+
+def test_cursor_round_trip():
+    token = encode_cursor(["2025-11-02 11:09:12", 48213])
+    assert "=" not in token and "/" not in token
+    assert decode_cursor(token, 2) == ["2025-11-02 11:09:12", 48213]
+    print(f"[OK] cursor round trip: {token}")
+
+
+def test_bad_cursor_rejected():
+    for token in ["not-base64!!", encode_cursor(["2025-11-02"]), encode_cursor([1, 2, 3])]:
+        with pytest.raises(InvalidCursor):
+            decode_cursor(token, 2)
+    print("[OK] malformed cursors rejected")
+
+
+def test_parse_fields():
+    allowed = ["sale_date", "item_name", "category", "quantity", "total_price"]
+    assert parse_fields(None, allowed) == allowed
+    assert parse_fields("total_price, sale_date,sale_date", allowed) == ["sale_date", "total_price"]
+    with pytest.raises(ValueError, match="password"):
+        parse_fields("item_name,password", allowed)
+    print("[OK] fields= projection")
+
+
+def test_columns_read_once():
+    cache = TableColumnCache()
+    session = CountingSession(["sales_id", "sale_date", "item_name"])
+    for _ in range(3):
+        assert asyncio.run(cache.columns(session, "sales_report")) == ["sales_id", "sale_date", "item_name"]
+    assert session.calls == 1
+
+    cache.invalidate("sales_report")
+    asyncio.run(cache.columns(session, "sales_report"))
+    assert session.calls == 2
+    print("[OK] information_schema read once per table")
+
+
+if __name__ == "__main__":
+    test_cursor_round_trip()
+    test_bad_cursor_rejected()
+    test_parse_fields()
+    test_columns_read_once()
@@ -0,0 +1,65 @@
+"""
+Test the menu image pipeline (resize + WebP thumbnail + parallel upload)
+using a local filesystem stand-in for Supabase storage
+"""
+import asyncio
+import io
+import os
+import tempfile
+
+from PIL import Image
+from starlette.datastructures import UploadFile
+
+from app.utils.image_pipeline import (
+    MAX_IMAGE_DIMENSION,
+    THUMBNAIL_DIMENSION,
+    process_menu_image,
+    upload_menu_image,
+)
+
+
+def make_png(width, height):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 40, 40)).save(buffer, format="PNG")
+    buffer.seek(0)
+    return buffer
+
+
+def test_process_menu_image():
+    """Full image is capped, thumbnail is a small WebP"""
+    image_bytes, thumb_bytes = process_menu_image(make_png(3000, 2000))
+
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        assert img.format == "WEBP"
+        assert max(img.size) == MAX_IMAGE_DIMENSION
+    with Image.open(io.BytesIO(thumb_bytes)) as thumb:
+        assert thumb.format == "WEBP"
+        assert max(thumb.size) == THUMBNAIL_DIMENSION
+    assert len(thumb_bytes) < len(image_bytes)
+    print(f"[OK] image={len(image_bytes)} B, thumbnail={len(thumb_bytes)} B")
+
+
+def test_upload_menu_image_local_storage():
+    """Both renditions are written through the uploader"""
+    with tempfile.TemporaryDirectory() as root:
+
+        def local_uploader(path, content, content_type):
+            target = os.path.join(root, path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as f:
+                f.write(content)
+            return f"file://{target}"
+
+        upload = UploadFile(file=make_png(800, 600), filename="dish.png")
+        urls = asyncio.run(upload_menu_image(upload, uploader=local_uploader))
+
+        assert urls["image_url"].endswith(".webp")
+        assert "/thumbnails/" in urls["thumbnail_url"]
+        for url in urls.values():
+            assert os.path.getsize(url[len("file://"):]) > 0
+        print(f"[OK] {urls}")
+
+
+if __name__ == "__main__":
+    test_process_menu_image()
+    test_upload_menu_image_local_storage()
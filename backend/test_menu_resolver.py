@@ -0,0 +1,96 @@
+"""
+Test sales row -> menu_id resolution (itemcode, POS alias, normalized name)
+and the statements issued when a menu item or alias changes
+"""
+import asyncio
+
+from app.utils.menu_resolver import MenuResolver, normalize_item_key, relink_sales_menu_ids
+
+
+class Result:
+    def __init__(self, rows=(), rowcount=0):
+        self._rows = list(rows)
+        self.rowcount = rowcount
+
+    def fetchall(self):
+        return self._rows
+
+
+class RecordingSession:
+    """Unlinking returns rows named "Bagnet Silog" sold under itemcode BS01."""
+
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append((sql, params or {}))
+        if "WITH unlinked" in sql:
+            return Result([("bagnetsilog", "BS01"), ("bgnetsilog", None)])
+        return Result(rowcount=1)
+
+    async def commit(self):
+        self.commits += 1
+
+
+def make_resolver():
+    return MenuResolver(
+        by_itemcode={"BS01": 1},
+        by_alias={"bgnetsilog": 1, "tapsi": 2},
+        by_name={"bagnetsilog": 1, "tapsilog": 2, "halohalo": 3},
+    )
+
+
+def test_normalize_item_key():
+    assert normalize_item_key("  Bagnet Silog ") == "bagnetsilog"
+    assert normalize_item_key("BAGNETSILOG") == "bagnetsilog"
+    assert normalize_item_key(None) == ""
+    print("[OK] names normalized like the SQL function")
+
+
+def test_resolution_order():
+    resolver = make_resolver()
+    # itemcode wins even when the name points elsewhere
+    assert resolver.resolve("BS01", "Tapsilog") == 1
+    # alias handles POS spelling variants
+    assert resolver.resolve(None, "BGNET SILOG") == 1
+    assert resolver.resolve("", "Tapsi") == 2
+    # normalized dish name
+    assert resolver.resolve("UNKNOWN", "Halo Halo") == 3
+    assert resolver.resolve(None, "Sinigang") is None
+    assert resolver.resolve(None, "") is None
+    print("[OK] itemcode > alias > normalized name")
+
+
+def test_alias_removal_relinks_its_rows():
+    session = RecordingSession()
+    relinked = asyncio.run(
+        relink_sales_menu_ids(session, 1, item_keys=["bgnetsilog"], unlink_key="bgnetsilog")
+    )
+    unlink_sql, unlink_params = session.statements[0]
+    assert "SET menu_id = NULL" in unlink_sql and unlink_params == {"menu_id": 1, "item_key": "bgnetsilog"}
+    backfill = session.statements[1:4]
+    for _, params in backfill:
+        assert params == {"item_keys": ["bagnetsilog", "bgnetsilog"], "itemcodes": ["BS01"]}
+    rollup_sql = session.statements[4][0]
+    assert "UPDATE sales_daily_item" in rollup_sql
+    # category recomputed from the sales rows / new menu item, not kept from the old dish
+    assert "COALESCE(r.category, m.category, '')" in rollup_sql and "NULLIF(sdi.category" not in rollup_sql
+    assert relinked == 3 and session.commits == 1
+    print("[OK] rows linked through a removed alias are resolved again")
+
+
+def test_new_menu_item_only_resolves_unmatched_rows():
+    session = RecordingSession()
+    asyncio.run(relink_sales_menu_ids(session, 4, item_keys=["halohalo"], itemcodes=[" HH01 "], unlink=False))
+    assert not any("SET menu_id = NULL" in sql for sql, _ in session.statements)
+    assert session.statements[0][1] == {"item_keys": ["halohalo"], "itemcodes": ["HH01"]}
+    print("[OK] new menu item links unmatched rows by name and itemcode")
+
+
+if __name__ == "__main__":
+    test_normalize_item_key()
+    test_resolution_order()
+    test_alias_removal_relinks_its_rows()
+    test_new_menu_item_only_resolves_unmatched_rows()
@@ -0,0 +1,172 @@
+"""
+Test the dashboard/report response cache: hit/miss, TTL, LRU eviction,
+single-flight and group invalidation, plus a Redis-compatible backend
+using a local dict-based stand-in
+"""
+import asyncio
+import fnmatch
+import threading
+
+from app.utils.response_cache import (
+    InMemoryLRUBackend,
+    RedisBackend,
+    ResponseCache,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class LocalRedis:
+    """Implements the subset of redis-py the cache uses."""
+
+    def __init__(self):
+        self.store = {}
+        self.scan_threads = []
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def setex(self, key, ttl, value):
+        self.store[key] = value
+
+    def scan_iter(self, match):
+        self.scan_threads.append(threading.get_ident())
+        return [k for k in list(self.store) if fnmatch.fnmatch(k, match)]
+
+    def delete(self, *keys):
+        for k in keys:
+            self.store.pop(k, None)
+
+
+def test_hit_miss_and_ttl():
+    clock = FakeClock()
+    cache = ResponseCache(InMemoryLRUBackend(clock=clock))
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return {"total": len(calls)}
+
+    async def run():
+        first = await cache.get_or_compute("sales:summary", {"days": 7}, 30, compute)
+        second = await cache.get_or_compute("sales:summary", {"days": 7}, 30, compute)
+        other = await cache.get_or_compute("sales:summary", {"days": 30}, 30, compute)
+        clock.now += 31
+        expired = await cache.get_or_compute("sales:summary", {"days": 7}, 30, compute)
+        return first, second, other, expired
+
+    first, second, other, expired = asyncio.run(run())
+    assert first == second == {"total": 1}
+    assert other == {"total": 2}
+    assert expired == {"total": 3}
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 3
+    print(f"[OK] {stats}")
+
+
+def test_lru_eviction():
+    backend = InMemoryLRUBackend(max_entries=2)
+    backend.set("a", 1, 60)
+    backend.set("b", 2, 60)
+    backend.get("a")
+    backend.set("c", 3, 60)
+    assert backend.get("a") == (True, 1)
+    assert backend.get("b") == (False, None)
+    assert len(backend) == 2
+    print("[OK] least recently used entry evicted")
+
+
+def test_single_flight():
+    cache = ResponseCache(InMemoryLRUBackend())
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return [1, 2, 3]
+
+    async def run():
+        return await asyncio.gather(
+            *[cache.get_or_compute("dashboard:summary", {}, 30, compute) for _ in range(5)]
+        )
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(r == [1, 2, 3] for r in results)
+    print("[OK] 5 concurrent requests, 1 computation")
+
+
+def test_cache_if_skips_rejected_results():
+    cache = ResponseCache(InMemoryLRUBackend())
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return {"low_stock": None, "errors": {"low_stock": "Failed to load this widget"}} if len(calls) == 1 else {"errors": {}}
+
+    def complete(summary):
+        return not summary.get("errors")
+
+    async def run():
+        for _ in range(3):
+            await cache.get_or_compute("dashboard:summary", {}, 30, compute, complete)
+
+    asyncio.run(run())
+    assert len(calls) == 2  # the partial result was not cached, the complete one was
+    print("[OK] partial results are not cached")
+
+
+def test_group_invalidation_with_redis_backend():
+    cache = ResponseCache(RedisBackend(LocalRedis()))
+
+    async def compute():
+        return {"ok": True}
+
+    async def run():
+        await cache.get_or_compute("sales:summary", {}, 30, compute)
+        await cache.get_or_compute("dashboard:low-stock", {"skip": 0}, 30, compute)
+        await cache.get_or_compute("inventory:analytics", {}, 30, compute)
+        removed = cache.invalidate("sales", "dashboard")
+        await cache.get_or_compute("inventory:analytics", {}, 30, compute)
+        await cache.get_or_compute("sales:summary", {}, 30, compute)
+        return removed
+
+    removed = asyncio.run(run())
+    assert removed == 2
+    stats = cache.stats()
+    assert stats["namespaces"]["inventory:analytics"]["hits"] == 1
+    assert stats["namespaces"]["sales:summary"]["misses"] == 2
+    print(f"[OK] invalidated {removed} keys")
+
+
+def test_async_invalidation_scans_off_the_event_loop():
+    client = LocalRedis()
+    cache = ResponseCache(RedisBackend(client))
+
+    async def compute():
+        return {"ok": True}
+
+    async def run():
+        await cache.get_or_compute("sales:summary", {}, 30, compute)
+        return threading.get_ident(), await cache.ainvalidate("sales")
+
+    loop_thread, removed = asyncio.run(run())
+    assert removed == 1 and client.store == {}
+    assert client.scan_threads and loop_thread not in client.scan_threads
+    assert cache.stats()["namespaces"]["sales"]["invalidations"] == 1
+    print("[OK] Redis key scan ran in the threadpool")
+
+
+if __name__ == "__main__":
+    test_hit_miss_and_ttl()
+    test_lru_eviction()
+    test_single_flight()
+    test_cache_if_skips_rejected_results()
+    test_group_invalidation_with_redis_backend()
+    test_async_invalidation_scans_off_the_event_loop()
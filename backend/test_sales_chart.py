@@ -0,0 +1,68 @@
+"""
+Test the one-pass top sales chart series against the previous per-item
+label mapping
+"""
+from datetime import date, timedelta
+
+import pandas as pd
+
+from app.utils.sales_chart import build_chart_series
+
+
+def _sales_rows():
+    start = date(2025, 10, 1)
+    rows = []
+    for day in range(45):
+        for i, item in enumerate(["Bagnet Silog", "Sisig", "Halo-Halo", "Lechon Kawali"]):
+            if (day + i) % (i + 2) == 0:
+                rows.append({"item": item, "date": (start + timedelta(days=day)).isoformat(), "sales": i + day % 5})
+    return rows
+
+
+def _per_item_series(rows, item, timeframe, all_labels):
+    """Previous approach: filter the whole list per item and map labels."""
+    df = pd.DataFrame([r for r in rows if r["item"] == item])
+    df["date"] = pd.to_datetime(df["date"])
+    if timeframe == "weekly":
+        grouped = df.groupby(df["date"].dt.to_period("W"))["sales"].sum()
+        mapping = {f"Week of {p.start_time.strftime('%b %d')}": float(v) for p, v in grouped.items()}
+    elif timeframe == "monthly":
+        grouped = df.groupby(df["date"].dt.to_period("M"))["sales"].sum()
+        mapping = {p.strftime("%B %Y"): float(v) for p, v in grouped.items()}
+    else:
+        grouped = df.groupby(df["date"].dt.date)["sales"].sum()
+        mapping = {d.strftime("%b %d"): float(v) for d, v in grouped.items()}
+    return [mapping.get(label, 0.0) for label in all_labels]
+
+
+def test_series_match_per_item_mapping():
+    rows = _sales_rows()
+    df = pd.DataFrame(rows)
+    df["date"] = pd.to_datetime(df["date"])
+    items = ["Sisig", "Bagnet Silog", "Lechon Kawali"]
+
+    for timeframe in ("daily", "weekly", "monthly"):
+        all_labels, series = build_chart_series(df, items, timeframe)
+        assert list(series) == items
+        for item in items:
+            assert series[item] == _per_item_series(rows, item, timeframe, all_labels), (timeframe, item)
+        print(f"[OK] {timeframe}: {len(items)} series x {len(all_labels)} labels")
+
+    all_labels, _ = build_chart_series(df, items, "monthly")
+    assert all_labels == ["October 2025", "November 2025"]
+
+
+def test_item_without_sales_is_zero_filled():
+    df = pd.DataFrame(
+        [{"item": "Sisig", "date": "2025-11-01", "sales": 3}, {"item": "Sisig", "date": "2025-11-03", "sales": 1}]
+    )
+    df["date"] = pd.to_datetime(df["date"])
+    all_labels, series = build_chart_series(df, ["Sisig", "Halo-Halo"], "daily")
+    assert all_labels == ["Nov 01", "Nov 03"]
+    assert series == {"Sisig": [3.0, 1.0], "Halo-Halo": [0.0, 0.0]}
+    print("[OK] missing periods filled with 0")
+
+
+if __name__ == "__main__":
+    test_series_match_per_item_mapping()
+    test_item_without_sales_is_zero_filled()
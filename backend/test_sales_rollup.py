@@ -0,0 +1,97 @@
+"""
+Test the sales rollup refresh helpers (day-range detection and the
+statements issued per import) with a recording session stand-in
+"""
+import asyncio
+from datetime import date, datetime
+
+from app.utils import sales_rollup
+from app.utils.sales_rollup import (
+    day_runs,
+    failed_rollup_days,
+    parse_sale_day,
+    refresh_sales_rollups_for,
+    sale_days,
+)
+
+
+class RecordingSession:
+    def __init__(self, fail_on=None):
+        self.statements = []
+        self.commits = 0
+        self.fail_on = fail_on
+
+    async def execute(self, statement, params=None):
+        if self.fail_on and (params or {}).get("start_day") == self.fail_on:
+            raise RuntimeError("statement timeout")
+        self.statements.append((str(statement), params or {}))
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        pass
+
+
+def test_parse_sale_day_formats():
+    assert parse_sale_day("2025-11-02 11:09:12") == date(2025, 11, 2)
+    assert parse_sale_day(datetime(2025, 11, 2, 8, 0)) == date(2025, 11, 2)
+    assert parse_sale_day("11/02/2025") == date(2025, 11, 2)
+    assert parse_sale_day("not a date") is None
+    assert parse_sale_day("") is None
+    print("[OK] sale dates parsed")
+
+
+def test_sale_days_and_runs():
+    assert sale_days(["2025-11-03 10:00", "2025-11-01", "2025-11-01 18:00", None, "bad"]) == [
+        date(2025, 11, 1),
+        date(2025, 11, 3),
+    ]
+    assert sale_days([]) == []
+    days = [date(2025, 11, 1), date(2025, 11, 2), date(2025, 11, 5), date(2025, 12, 1)]
+    assert day_runs(days) == [
+        (date(2025, 11, 1), date(2025, 11, 2)),
+        (date(2025, 11, 5), date(2025, 11, 5)),
+        (date(2025, 12, 1), date(2025, 12, 1)),
+    ]
+    print("[OK] distinct imported days grouped into runs")
+
+
+def test_refresh_only_touches_imported_days():
+    session = RecordingSession()
+    days = asyncio.run(
+        refresh_sales_rollups_for(session, ["2025-11-01 09:00", "2025-11-02 21:30", "2025-12-01 08:00"])
+    )
+
+    assert days == [date(2025, 11, 1), date(2025, 11, 2), date(2025, 12, 1)]
+    assert session.commits == 2
+    sql = [s for s, _ in session.statements]
+    assert sql[0].startswith("DELETE FROM sales_daily_item WHERE sale_day BETWEEN")
+    assert sql[1].startswith("DELETE FROM sales_hourly WHERE sale_day BETWEEN")
+    assert "INSERT INTO sales_daily_item" in sql[2]
+    assert "INSERT INTO sales_hourly" in sql[3]
+    ranges = {(p["start_day"], p["end_day"]) for _, p in session.statements}
+    # the month between the two imports is left alone
+    assert ranges == {(date(2025, 11, 1), date(2025, 11, 2)), (date(2025, 12, 1), date(2025, 12, 1))}
+    print("[OK] refresh scoped to the imported days")
+
+
+def test_failed_days_are_retried():
+    sales_rollup._failed_days.clear()
+    failing = RecordingSession(fail_on=date(2025, 11, 1))
+    days = asyncio.run(refresh_sales_rollups_for(failing, ["2025-11-01 09:00", "2025-11-03 10:00"]))
+    assert days == [date(2025, 11, 3)]
+    assert failed_rollup_days() == [date(2025, 11, 1)]
+
+    session = RecordingSession()
+    days = asyncio.run(refresh_sales_rollups_for(session, ["2025-11-05 12:00"]))
+    assert days == [date(2025, 11, 1), date(2025, 11, 5)]
+    assert failed_rollup_days() == []
+    print("[OK] failed days retried with the next import")
+
+
+if __name__ == "__main__":
+    test_parse_sale_day_formats()
+    test_sale_days_and_runs()
+    test_refresh_only_touches_imported_days()
+    test_failed_days_are_retried()
@@ -0,0 +1,77 @@
+"""
+Test the fingerprinted weekly forecast model store with an in-memory session
+stand-in
+"""
+import asyncio
+import json
+from datetime import date, timedelta
+
+from app.utils.weekly_forecast_store import (
+    WeeklyModel,
+    get_or_fit_model,
+    series_fingerprint,
+)
+
+
+class ModelTableSession:
+    """Just enough of sales_forecast_model for get_or_fit_model."""
+
+    def __init__(self):
+        self.rows = {}
+        self.inserts = 0
+
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        key = (params["item_key"], params["category_key"], params["horizon"])
+        if sql.lstrip().startswith("SELECT"):
+            row = self.rows.get(key)
+            match = row if row and row["fingerprint"] == params["fingerprint"] else None
+
+            class Result:
+                def fetchone(self):
+                    if match is None:
+                        return None
+                    return (match["intercept"], match["coefficients"], match["first_week"], match["last_week"])
+
+            return Result()
+        self.inserts += 1
+        self.rows[key] = dict(params)
+
+    async def commit(self):
+        pass
+
+
+WEEKS = [date(2025, 9, 1) + timedelta(weeks=i) for i in range(8)]
+TOTALS = [12000.0, 12500.0, 11800.0, 13100.0, 13900.0, 13500.0, 14200.0, 15000.0]
+FLAGS = [0, 0, 0, 0, 0, 0, 1, 0]
+
+
+def test_model_refits_only_when_series_changes():
+    session = ModelTableSession()
+    model, refitted = asyncio.run(get_or_fit_model(session, None, None, 4, WEEKS, TOTALS, FLAGS))
+    assert refitted and session.inserts == 1
+    stored = session.rows[("", "", 4)]
+    assert stored["fingerprint"] == series_fingerprint(WEEKS, TOTALS, FLAGS)
+    assert len(json.loads(stored["coefficients"])) == 4
+
+    cached, refitted = asyncio.run(get_or_fit_model(session, None, None, 4, WEEKS, TOTALS, FLAGS))
+    assert not refitted and session.inserts == 1
+    future = [WEEKS[-1] + timedelta(weeks=i) for i in (1, 2)]
+    assert list(cached.predict(future, [0, 1])) == list(model.predict(future, [0, 1]))
+
+    _, refitted = asyncio.run(
+        get_or_fit_model(session, None, None, 4, WEEKS, TOTALS[:-1] + [15800.0], FLAGS)
+    )
+    assert refitted and session.inserts == 2
+    print("[OK] model reused until the weekly series changes")
+
+
+def test_predictions_clipped():
+    model = WeeklyModel(-100.0, [0, 0, 0, 0], WEEKS[0], WEEKS[-1])
+    assert list(model.predict(WEEKS[:2], [0, 0])) == [0.0, 0.0]
+    print("[OK] negative forecasts clipped to 0")
+
+
+if __name__ == "__main__":
+    test_model_refits_only_when_series_changes()
+    test_predictions_clipped()
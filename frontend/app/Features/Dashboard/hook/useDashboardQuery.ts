@@ -1,160 +1,105 @@
 import { useQuery, useQueryClient, useMutation } from "@tanstack/react-query";
 
+// A widget whose query failed server-side is null, with its error in `errors`
+interface DashboardSummary {
+  low_stock: any[] | null;
+  expiring: any[] | null;
+  expired: any[] | null;
+  surplus: any[] | null;
+  out_of_stock: any[] | null;
+  spoilage: any[] | null;
+  errors?: Record<string, string>;
+}
+
+const EMPTY_SUMMARY: DashboardSummary = {
+  low_stock: [],
+  expiring: [],
+  expired: [],
+  surplus: [],
+  out_of_stock: [],
+  spoilage: [],
+};
+
 export function useDashboardQuery() {
   const queryClient = useQueryClient();
   const API_BASE_URL =
     process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
   console.log("API_BASE_URL (runtime):", API_BASE_URL);
-  // Low Stock - AUTO-REFRESHES every 2 minutes for real-time updates!
-  const lowStock = useQuery({
-    queryKey: ["dashboard", "low-stock"],
-    queryFn: async () => {
+  // Dashboard summary - ONE request feeds every widget below.
+  // All widget queries share this key, so React Query fetches it once and
+  // each widget just selects its slice. AUTO-REFRESHES every 2 minutes.
+  const summaryQueryOptions = {
+    queryKey: ["dashboard", "summary"],
+    queryFn: async (): Promise<DashboardSummary> => {
       try {
-        const response = await fetch(
-          `${API_BASE_URL}/api/dashboard/low-stock`,
-          {
-            method: "GET",
-            headers: {
-              "Content-Type": "application/json",
-            },
-          }
-        );
+        const response = await fetch(`${API_BASE_URL}/api/dashboard/summary`, {
+          method: "GET",
+          headers: {
+            "Content-Type": "application/json",
+          },
+        });
 
         if (!response.ok) {
           throw new Error(`HTTP error! status: ${response.status}`);
         }
 
         const data = await response.json();
-        localStorage.setItem("cached_low_stock", JSON.stringify(data));
+        localStorage.setItem("cached_dashboard_summary", JSON.stringify(data));
         return data;
       } catch (error) {
-        console.log("Low stock API failed - using cached data");
-        const cached = localStorage.getItem("cached_low_stock");
-        return cached ? JSON.parse(cached) : [];
+        console.log("Dashboard summary API failed - using cached data");
+        const cached = localStorage.getItem("cached_dashboard_summary");
+        return cached ? JSON.parse(cached) : EMPTY_SUMMARY;
       }
     },
     refetchInterval: 2 * 60 * 1000, // Auto-refresh every 2 minutes
     staleTime: 1 * 60 * 1000, // Consider data fresh for 1 minute
     refetchOnWindowFocus: true, // Refresh when user returns to tab
     refetchOnReconnect: true, // Refresh when internet reconnects
+  };
+
+  const lowStock = useQuery({
+    ...summaryQueryOptions,
+    select: (data: DashboardSummary) => data.low_stock ?? [],
   });
 
-  // Expiring - AUTO-REFRESHES every 2 minutes
   const expiring = useQuery({
-    queryKey: ["dashboard", "expiring"],
-    queryFn: async () => {
-      try {
-        const response = await fetch(
-          `${API_BASE_URL}/api/dashboard/expiring-ingredients`,
-          {
-            method: "GET",
-            headers: {
-              "Content-Type": "application/json",
-            },
-          }
-        );
-
-        if (!response.ok) {
-          throw new Error(`HTTP error! status: ${response.status}`);
-        }
-
-        const data = await response.json();
-        localStorage.setItem("cached_expiring", JSON.stringify(data));
-        return data;
-      } catch (error) {
-        console.log("Expiring ingredients API failed - using cached data");
-        const cached = localStorage.getItem("cached_expiring");
-        return cached ? JSON.parse(cached) : [];
-      }
-    },
-    refetchInterval: 2 * 60 * 1000, // Auto-refresh every 2 minutes
-    staleTime: 1 * 60 * 1000,
-    refetchOnWindowFocus: true,
-    refetchOnReconnect: true,
+    ...summaryQueryOptions,
+    select: (data: DashboardSummary) => data.expiring ?? [],
   });
 
-  // Surplus
   const surplus = useQuery({
-    queryKey: ["dashboard", "surplus"],
-    queryFn: async () => {
-      try {
-        const response = await fetch(
-          `${API_BASE_URL}/api/dashboard/surplus-ingredients`,
-          {
-            method: "GET",
-            headers: {
-              "Content-Type": "application/json",
-            },
-          }
-        );
-
-        if (!response.ok) {
-          throw new Error(`HTTP error! status: ${response.status}`);
-        }
-
-        const data = await response.json();
-        localStorage.setItem("cached_surplus", JSON.stringify(data));
-        return data;
-      } catch (error) {
-        console.log("Surplus ingredients API failed - using cached data");
-        const cached = localStorage.getItem("cached_surplus");
-        return cached ? JSON.parse(cached) : [];
-      }
-    },
-    refetchInterval: 5 * 60 * 1000, // Auto-refresh every 5 minutes (less critical)
-    staleTime: 2 * 60 * 1000,
-    refetchOnWindowFocus: true,
-    refetchOnReconnect: true,
+    ...summaryQueryOptions,
+    select: (data: DashboardSummary) => data.surplus ?? [],
   });
 
-  // Expired - AUTO-REFRESHES every 5 minutes
   const expired = useQuery({
-    queryKey: ["dashboard", "expired"],
-    queryFn: async () => {
-      try {
-        const response = await fetch(
-          `${API_BASE_URL}/api/dashboard/expired-ingredients?skip=0&limit=50`,
-          {
-            method: "GET",
-            headers: {
-              "Content-Type": "application/json",
-            },
-          }
-        );
-
-        if (!response.ok) {
-          throw new Error(`HTTP error! status: ${response.status}`);
-        }
-
-        const data = await response.json();
+    ...summaryQueryOptions,
+    select: (data: DashboardSummary) =>
+      Array.isArray(data.expired)
+        ? data.expired.map((item: any) => ({
+            id: item.id ?? null,
+            item_id: item.item_id ?? null,
+            item_name: item.item_name || "N/A",
+            category: item.category || "N/A",
+            stock: item.stock ?? 0,
+            batch_date: item.batch_date || "N/A",
+            quantity_spoiled: item.quantity_spoiled ?? item.quantity ?? 0,
+            expiration_date: item.expiration_date || "N/A",
+            spoilage_date: item.spoilage_date || "N/A",
+            updated_at: item.updated_at ?? null,
+          }))
+        : [],
+  });
 
-        const formatted = Array.isArray(data)
-          ? data.map((item) => ({
-              id: item.id ?? null,
-              item_id: item.item_id ?? null,
-              item_name: item.item_name || "N/A",
-              category: item.category || "N/A",
-              stock: item.stock ?? 0,
-              batch_date: item.batch_date || "N/A",
-              quantity_spoiled: item.quantity_spoiled ?? item.quantity ?? 0,
-              expiration_date: item.expiration_date || "N/A",
-              spoilage_date: item.spoilage_date || "N/A",
-              updated_at: item.updated_at ?? null,
-            }))
-          : [];
+  const outOfStock = useQuery({
+    ...summaryQueryOptions,
+    select: (data: DashboardSummary) => data.out_of_stock ?? [],
+  });
 
-        localStorage.setItem("cached_expired", JSON.stringify(formatted));
-        return formatted;
-      } catch (error) {
-        console.log("Expired items API failed - using cached data");
-        const cached = localStorage.getItem("cached_expired");
-        return cached ? JSON.parse(cached) : [];
-      }
-    },
-    refetchInterval: 5 * 60 * 1000, // Auto-refresh every 5 minutes
-    staleTime: 2 * 60 * 1000,
-    refetchOnWindowFocus: true,
-    refetchOnReconnect: true,
+  const spoilage = useQuery({
+    ...summaryQueryOptions,
+    select: (data: DashboardSummary) => data.spoilage ?? [],
   });
 
   // Custom Holidays - Refreshes on demand
@@ -268,71 +213,6 @@ export function useDashboardQuery() {
     },
   });
 
-  // Out of Stock - With table parameter for multi-batch support
-  const outOfStock = useQuery({
-    queryKey: ["dashboard", "out-of-stock", "inventory_today"],
-    queryFn: async () => {
-      try {
-        const response = await fetch(
-          `${API_BASE_URL}/api/dashboard/out-of-stock?table=inventory_today`,
-          {
-            method: "GET",
-            headers: {
-              "Content-Type": "application/json",
-            },
-          }
-        );
-
-        if (!response.ok) {
-          throw new Error(`HTTP error! status: ${response.status}`);
-        }
-
-        const data = await response.json();
-        localStorage.setItem("cached_out_of_stock", JSON.stringify(data));
-        return data;
-      } catch (error) {
-        console.log("Out of stock API failed - using cached data");
-        const cached = localStorage.getItem("cached_out_of_stock");
-        return cached ? JSON.parse(cached) : [];
-      }
-    },
-    staleTime: 0, // Always fresh data for inventory changes
-    refetchOnWindowFocus: true,
-    refetchOnReconnect: true,
-    refetchOnMount: true,
-  });
-
-  // Spoilage - AUTO-REFRESHES every 5 minutes
-  const spoilage = useQuery({
-    queryKey: ["dashboard", "spoilage"],
-    queryFn: async () => {
-      try {
-        const response = await fetch(`${API_BASE_URL}/api/dashboard/spoilage`, {
-          method: "GET",
-          headers: {
-            "Content-Type": "application/json",
-          },
-        });
-
-        if (!response.ok) {
-          throw new Error(`HTTP error! status: ${response.status}`);
-        }
-
-        const data = await response.json();
-        localStorage.setItem("cached_spoilage", JSON.stringify(data));
-        return data;
-      } catch (error) {
-        console.log("Spoilage API failed - using cached data");
-        const cached = localStorage.getItem("cached_spoilage");
-        return cached ? JSON.parse(cached) : [];
-      }
-    },
-    refetchInterval: 5 * 60 * 1000, // Auto-refresh every 5 minutes
-    staleTime: 2 * 60 * 1000,
-    refetchOnWindowFocus: true,
-    refetchOnReconnect: true,
-  });
-
   return {
     lowStock,
     outOfStock,
@@ -75,10 +75,7 @@ export function useAddInventory() {
       // Invalidate related queries
       queryClient.invalidateQueries({ queryKey: ["inventory"] });
       queryClient.invalidateQueries({ queryKey: ["masterInventory"] }); // Page uses this key
-      queryClient.invalidateQueries({ queryKey: ["dashboard", "low-stock"] });
-      queryClient.invalidateQueries({
-        queryKey: ["dashboard", "out-of-stock"],
-      });
+      queryClient.invalidateQueries({ queryKey: ["dashboard", "summary"] });
       // Invalidate menu queries (menu stock status depends on inventory)
       queryClient.invalidateQueries({ queryKey: ["menu"] });
       toast.success("Inventory item added successfully!");
@@ -222,7 +219,7 @@ export function useAddTodayInventory() {
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ["inventory-today"] });
       queryClient.invalidateQueries({ queryKey: ["todayInventory"] }); // Page uses this key
-      queryClient.invalidateQueries({ queryKey: ["dashboard", "expiring"] });
+      queryClient.invalidateQueries({ queryKey: ["dashboard", "summary"] });
       // Invalidate menu queries (menu stock status depends on today's inventory)
       queryClient.invalidateQueries({ queryKey: ["menu"] });
       toast.success("Today inventory added successfully!");
@@ -414,7 +411,7 @@ export function useAddSurplusInventory() {
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ["inventory-surplus"] });
       queryClient.invalidateQueries({ queryKey: ["surplusInventory"] }); // Page uses this key
-      queryClient.invalidateQueries({ queryKey: ["dashboard", "surplus"] });
+      queryClient.invalidateQueries({ queryKey: ["dashboard", "summary"] });
       // Invalidate menu queries (menu stock status depends on surplus inventory)
       queryClient.invalidateQueries({ queryKey: ["menu"] });
       toast.success("Surplus inventory added successfully!");
@@ -605,8 +602,7 @@ export function useTransferToSpoilage() {
       queryClient.invalidateQueries({ queryKey: ["todayInventory"] }); // Page uses this key
       queryClient.invalidateQueries({ queryKey: ["inventory-spoilage"] });
       queryClient.invalidateQueries({ queryKey: ["spoilageInventory"] }); // Page uses this key
-      queryClient.invalidateQueries({ queryKey: ["dashboard", "spoilage"] });
-      queryClient.invalidateQueries({ queryKey: ["dashboard", "expired"] });
+      queryClient.invalidateQueries({ queryKey: ["dashboard", "summary"] });
       // Invalidate menu queries (menu stock status depends on inventory)
       queryClient.invalidateQueries({ queryKey: ["menu"] });
       toast.success("Item transferred to spoilage!");
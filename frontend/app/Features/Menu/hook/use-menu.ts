@@ -6,6 +6,7 @@ export interface MenuItem {
   itemcode: string;
   dish_name: string;
   image_url: string;
+  thumbnail_url?: string;
   category: string;
   price: number;
   description?: string;
@@ -599,7 +599,7 @@ const Menu: React.FC = () => {
                                 <figure className="flex items-center">
                                   <div className="relative w-8 h-8 xs:w-10 xs:h-10 sm:w-12 sm:h-12 md:w-12 md:h-12 lg:w-12 lg:h-12 xl:w-12 xl:h-12 2xl:w-12 2xl:h-12">
                                     <Image
-                                      src={dish.image_url}
+                                      src={dish.thumbnail_url || dish.image_url}
                                       alt={dish.dish_name}
                                       fill
                                       sizes="48px"
@@ -40,9 +40,8 @@ import { MdCheckCircle } from "react-icons/md";
 import { GoogleOAuthProvider, useGoogleLogin } from "@react-oauth/google";
 import NavigationBar from "@/app/components/navigation/navigation";
 import ResponsiveMain from "@/app/components/ResponsiveMain";
-import { saveAs } from "file-saver";
+import { downloadExport } from "@/app/utils/downloadExport";
 // (Removed duplicate export default and misplaced logic. All logic is inside the main ReportInventory function below.)
-import ExcelJS from "exceljs";
 
 import {
   FaSearch,
@@ -1046,593 +1045,32 @@ export default function ReportInventory() {
   }, [filtered, spoilageSummary, spoilageLoading]);
 
   const exportExcel = async () => {
-    // Helper function to format dates to MM/DD/YYYY
-    const formatDate = (date: string | Date | null | undefined): string => {
-      if (!date) return "N/A";
-      try {
-        const dateObj = typeof date === "string" ? new Date(date) : date;
-        if (isNaN(dateObj.getTime())) return "N/A";
-        return dateObj.toLocaleDateString("en-US");
-      } catch {
-        return "N/A";
-      }
-    };
-
-    const workbook = new ExcelJS.Workbook();
-
-    // Set workbook properties
-    workbook.creator = "Cardiac Delights Inventory System";
-    workbook.created = new Date();
-    workbook.modified = new Date();
-
-    // ========== MAIN SHEET: INVENTORY REPORT ==========
-    const inventorySheet = workbook.addWorksheet("Inventory Report");
-
-    let currentRow = 1;
-
-    // ===== 1. TITLE SECTION =====
-    inventorySheet.mergeCells(`A${currentRow}:L${currentRow}`);
-    const titleCell = inventorySheet.getCell(`A${currentRow}`);
-    titleCell.value = "INVENTORY REPORT";
-    titleCell.font = { bold: true, size: 20, color: { argb: "FFFFFFFF" } };
-    titleCell.alignment = { horizontal: "center", vertical: "middle" };
-    titleCell.fill = {
-      type: "pattern",
-      pattern: "solid",
-      fgColor: { argb: "FF3B82F6" },
-    };
-    inventorySheet.getRow(currentRow).height = 35;
-    currentRow += 2;
-
-    // ===== 2. REPORT METADATA =====
-    const now = new Date();
-    const totalStockValue = filtered.reduce(
-      (sum, item) => sum + (item.inStock || 0),
-      0
-    );
-
-    inventorySheet.getCell(`A${currentRow}`).value = "Report Generated:";
-    inventorySheet.getCell(`A${currentRow}`).font = { bold: true };
-    inventorySheet.getCell(`B${currentRow}`).value =
-      now.toLocaleString("en-US");
-    currentRow++;
-
-    inventorySheet.getCell(`A${currentRow}`).value = "Total Items:";
-    inventorySheet.getCell(`A${currentRow}`).font = { bold: true };
-    inventorySheet.getCell(`B${currentRow}`).value = filtered.length;
-    currentRow++;
-
-    inventorySheet.getCell(`A${currentRow}`).value = "Total Stock Value:";
-    inventorySheet.getCell(`A${currentRow}`).font = { bold: true };
-    inventorySheet.getCell(`B${currentRow}`).value = `${totalStockValue} units`;
-    currentRow += 2;
-
-    // ===== 3. FILTER SUMMARY =====
-    inventorySheet.mergeCells(`A${currentRow}:L${currentRow}`);
-    const filterHeader = inventorySheet.getCell(`A${currentRow}`);
-    filterHeader.value = "ACTIVE FILTERS";
-    filterHeader.font = { bold: true, size: 12, color: { argb: "FFFFFFFF" } };
-    filterHeader.fill = {
-      type: "pattern",
-      pattern: "solid",
-      fgColor: { argb: "FF6B7280" },
-    };
-    filterHeader.alignment = { horizontal: "center" };
-    inventorySheet.getRow(currentRow).height = 25;
-    currentRow++;
-
-    const filterData = [];
-
-    if (searchQuery) filterData.push(["Search Query", searchQuery]);
-    if (categoryFilter) filterData.push(["Category", categoryFilter]);
-    if (stockStatusFilter) filterData.push(["Stock Status", stockStatusFilter]);
-    if (expirationFilter) filterData.push(["Expiration", expirationFilter]);
-
-    // Show date range for time period filter
-    if (period !== "all") {
-      let rangeLabel = "";
-      let rangeValue = "";
+    let start = startDate;
+    let end = endDate;
+    if (!start && !end && period !== "all" && period !== "custom") {
       const now = dayjs();
-      if (period === "today") {
-        rangeLabel = "Date";
-        rangeValue = now.format("YYYY-MM-DD");
-      } else if (period === "week") {
-        rangeLabel = "Date Range";
-        rangeValue = `${now
-          .subtract(6, "day")
-          .format("YYYY-MM-DD")} to ${now.format("YYYY-MM-DD")}`;
-      } else if (period === "month") {
-        rangeLabel = "Date Range";
-        rangeValue = `${now
-          .subtract(29, "day")
-          .format("YYYY-MM-DD")} to ${now.format("YYYY-MM-DD")}`;
-      } else if (period === "year") {
-        rangeLabel = "Date Range";
-        rangeValue = `${now
-          .startOf("year")
-          .format("YYYY-MM-DD")} to ${now.format("YYYY-MM-DD")}`;
-      } else if (period === "custom" && startDate && endDate) {
-        rangeLabel = "Date Range";
-        rangeValue = `${startDate} to ${endDate}`;
-      } else {
-        rangeLabel = "Period";
-        rangeValue = period;
-      }
-      filterData.push([rangeLabel, rangeValue]);
-    } else if (startDate && endDate) {
-      filterData.push(["Date Range", `${startDate} to ${endDate}`]);
-    }
-
-    if (filterData.length > 0) {
-      filterData.forEach(([label, value]) => {
-        inventorySheet.getCell(`A${currentRow}`).value = label + ":";
-        inventorySheet.getCell(`A${currentRow}`).font = { bold: true };
-        inventorySheet.getCell(`B${currentRow}`).value = value;
-        currentRow++;
-      });
-    } else {
-      inventorySheet.getCell(`A${currentRow}`).value = "No filters applied";
-      inventorySheet.getCell(`A${currentRow}`).font = { italic: true };
-      currentRow++;
-    }
-    currentRow++;
-
-    // ===== 4. SUMMARY STATISTICS =====
-    inventorySheet.mergeCells(`A${currentRow}:L${currentRow}`);
-    const statsHeader = inventorySheet.getCell(`A${currentRow}`);
-    statsHeader.value = "SUMMARY STATISTICS";
-    statsHeader.font = { bold: true, size: 14, color: { argb: "FFFFFFFF" } };
-    statsHeader.fill = {
-      type: "pattern",
-      pattern: "solid",
-      fgColor: { argb: "FF3B82F6" },
-    };
-    statsHeader.alignment = { horizontal: "center" };
-    inventorySheet.getRow(currentRow).height = 28;
-    currentRow++;
-
-    // Calculate statistics
-    const totalStock = filtered.reduce(
-      (sum, item) => sum + (item.inStock || 0),
-      0
-    );
-    const outOfStockCount = filtered.filter(
-      (item) => (item.inStock || 0) === 0
-    ).length;
-
-    const criticalCount = filtered.filter(
-      (item) => item.stock === "Critical"
-    ).length;
-
-    const lowStockCount = filtered.filter(
-      (item) => item.stock === "Low"
-    ).length;
-
-    // Calculate expiration-related stats
-    const today = new Date();
-    const expiringSoonCount = filtered.filter((item) => {
-      if (!item.expiration_date) return false;
-      const expDate = new Date(item.expiration_date);
-      const daysUntilExpiry = Math.ceil(
-        (expDate.getTime() - today.getTime()) / (1000 * 60 * 60 * 24)
-      );
-      return daysUntilExpiry >= 0 && daysUntilExpiry <= 7;
-    }).length;
-
-    const expiredCount = filtered.filter((item) => {
-      if (!item.expiration_date) return false;
-      const expDate = new Date(item.expiration_date);
-      return expDate < today;
-    }).length;
-
-    // Categories breakdown
-    const categories = [
-      ...new Set(filtered.map((item) => item.category)),
-    ].filter(Boolean);
-    const categoryBreakdown = categories.map((cat) => {
-      const count = filtered.filter((item) => item.category === cat).length;
-      return { category: cat, count };
-    });
-
-    // Add statistics rows
-    const statsData = [
-      ["Metric", "Value"],
-      ["Total Items", filtered.length],
-      ["Total Stock Quantity", totalStock],
-      ["Out of Stock", outOfStockCount],
-      ["Critical Stock", criticalCount],
-      ["Low Stock", lowStockCount],
-      ["Expiring Soon (7 days)", expiringSoonCount],
-      ["Expired Items", expiredCount],
-    ];
-
-    statsData.forEach((row) => {
-      inventorySheet.addRow(row);
-    });
-
-    // Style statistics header
-    const statsTableHeaderRow = inventorySheet.getRow(currentRow);
-    statsTableHeaderRow.font = { bold: true, color: { argb: "FFFFFFFF" } };
-    statsTableHeaderRow.fill = {
-      type: "pattern",
-      pattern: "solid",
-      fgColor: { argb: "FF1F2937" },
-    };
-    currentRow++;
-
-    // Color code statistics values
-    for (let i = 0; i < statsData.length - 1; i++) {
-      const valueCell = inventorySheet.getCell(`B${currentRow + i}`);
-      const metric = statsData[i + 1][0];
-
-      if (metric === "Out of Stock" && outOfStockCount > 0) {
-        valueCell.fill = {
-          type: "pattern",
-          pattern: "solid",
-          fgColor: { argb: "FFEF4444" },
-        };
-        valueCell.font = { bold: true, color: { argb: "FFFFFFFF" } };
-      } else if (metric === "Low Stock" && lowStockCount > 0) {
-        valueCell.fill = {
-          type: "pattern",
-          pattern: "solid",
-          fgColor: { argb: "FFF97316" },
-        };
-        valueCell.font = { bold: true };
-      } else if (metric === "Expiring Soon (7 days)" && expiringSoonCount > 0) {
-        valueCell.fill = {
-          type: "pattern",
-          pattern: "solid",
-          fgColor: { argb: "FFF59E0B" },
-        };
-        valueCell.font = { bold: true };
-      } else if (metric === "Expired Items" && expiredCount > 0) {
-        valueCell.fill = {
-          type: "pattern",
-          pattern: "solid",
-          fgColor: { argb: "FFEF4444" },
-        };
-        valueCell.font = { bold: true, color: { argb: "FFFFFFFF" } };
-      }
-    }
-
-    currentRow += statsData.length;
-
-    // Items by Category
-    inventorySheet.getCell(`A${currentRow}`).value = "Items by Category:";
-    inventorySheet.getCell(`A${currentRow}`).font = { bold: true, size: 11 };
-    currentRow++;
-
-    categoryBreakdown.forEach(({ category, count }) => {
-      inventorySheet.getCell(`A${currentRow}`).value = category;
-      inventorySheet.getCell(`B${currentRow}`).value = count;
-      currentRow++;
-    });
-    currentRow++;
-
-    // ===== 5. CRITICAL ALERTS SECTION =====
-    inventorySheet.mergeCells(`A${currentRow}:L${currentRow}`);
-    const alertsHeader = inventorySheet.getCell(`A${currentRow}`);
-    alertsHeader.value = "CRITICAL ALERTS";
-    alertsHeader.font = { bold: true, size: 14, color: { argb: "FFFFFFFF" } };
-    alertsHeader.fill = {
-      type: "pattern",
-      pattern: "solid",
-      fgColor: { argb: "FFEF4444" },
-    };
-    alertsHeader.alignment = { horizontal: "center" };
-    inventorySheet.getRow(currentRow).height = 28;
-    currentRow++;
-
-    // Out of Stock Items
-    const outOfStockItems = filtered.filter(
-      (item) => (item.inStock || 0) === 0
-    );
-    if (outOfStockItems.length > 0) {
-      inventorySheet.getCell(`A${currentRow}`).value = "OUT OF STOCK ITEMS:";
-      inventorySheet.getCell(`A${currentRow}`).font = {
-        bold: true,
-        color: { argb: "FFEF4444" },
-      };
-      currentRow++;
-
-      inventorySheet.addRow(["Item Name", "Category", "Batch ID"]);
-      const outOfStockHeaderRow = inventorySheet.getRow(currentRow);
-      outOfStockHeaderRow.font = { bold: true };
-      outOfStockHeaderRow.fill = {
-        type: "pattern",
-        pattern: "solid",
-        fgColor: { argb: "FFFECACA" },
-      };
-      currentRow++;
-
-      outOfStockItems.forEach((item) => {
-        inventorySheet.addRow([
-          item.name || "Unknown",
-          item.category || "N/A",
-          item.batch_id_display || item.batch_id || "N/A",
-        ]);
-        currentRow++;
-      });
-      currentRow++;
-    } else {
-      inventorySheet.getCell(`A${currentRow}`).value = "No out of stock items";
-      inventorySheet.getCell(`A${currentRow}`).font = {
-        italic: true,
-        color: { argb: "FF10B981" },
-      };
-      currentRow += 2;
+      const days = { today: 0, week: 7, month: 30, year: 365 }[period];
+      start = now.subtract(days, "day").format("YYYY-MM-DD");
+      end = now.format("YYYY-MM-DD");
     }
 
-    // Expiring Soon Items
-    const expiringSoonItems = filtered.filter((item) => {
-      if (!item.expiration_date) return false;
-      const expDate = new Date(item.expiration_date);
-      const daysUntilExpiry = Math.ceil(
-        (expDate.getTime() - today.getTime()) / (1000 * 60 * 60 * 24)
-      );
-      return daysUntilExpiry >= 0 && daysUntilExpiry <= 7;
-    });
-
-    if (expiringSoonItems.length > 0) {
-      inventorySheet.getCell(`A${currentRow}`).value =
-        "EXPIRING SOON (Within 7 Days):";
-      inventorySheet.getCell(`A${currentRow}`).font = {
-        bold: true,
-        color: { argb: "FFF97316" },
-      };
-      currentRow++;
-
-      inventorySheet.addRow([
-        "Item Name",
-        "Category",
-        "Expiration Date",
-        "Days Until Expiry",
-      ]);
-      const expiringSoonHeaderRow = inventorySheet.getRow(currentRow);
-      expiringSoonHeaderRow.font = { bold: true };
-      expiringSoonHeaderRow.fill = {
-        type: "pattern",
-        pattern: "solid",
-        fgColor: { argb: "FFFED7AA" },
-      };
-      currentRow++;
-
-      expiringSoonItems.forEach((item) => {
-        const expDate = item.expiration_date
-          ? new Date(item.expiration_date)
-          : new Date();
-        const daysUntilExpiry = Math.ceil(
-          (expDate.getTime() - today.getTime()) / (1000 * 60 * 60 * 24)
-        );
-        inventorySheet.addRow([
-          item.name || "Unknown",
-          item.category || "N/A",
-          expDate.toLocaleDateString(),
-          daysUntilExpiry,
-        ]);
-        currentRow++;
-      });
-      currentRow++;
-    } else {
-      inventorySheet.getCell(`A${currentRow}`).value = "No items expiring soon";
-      inventorySheet.getCell(`A${currentRow}`).font = {
-        italic: true,
-        color: { argb: "FF10B981" },
-      };
-      currentRow += 2;
-    }
-
-    // ===== 6. DETAILED INVENTORY DATA =====
-    inventorySheet.mergeCells(`A${currentRow}:L${currentRow}`);
-    const detailHeader = inventorySheet.getCell(`A${currentRow}`);
-    detailHeader.value = "DETAILED INVENTORY DATA";
-    detailHeader.font = { bold: true, size: 14, color: { argb: "FFFFFFFF" } };
-    detailHeader.fill = {
-      type: "pattern",
-      pattern: "solid",
-      fgColor: { argb: "FF3B82F6" },
-    };
-    detailHeader.alignment = { horizontal: "center" };
-    inventorySheet.getRow(currentRow).height = 28;
-    currentRow++;
-
-    // Add column headers
-    const headers = [
-      "#",
-      "Item Name",
-      "Category",
-      "Batch ID",
-      "In Stock",
-      "Unit Cost",
-      "Total Value",
-      "Wastage",
-      "Status",
-      "Expiration Date",
-      "Days Until Expiry",
-      "Report Date",
-    ];
-    inventorySheet.addRow(headers);
-    const headerRow = inventorySheet.getRow(currentRow);
-    headerRow.font = { bold: true, color: { argb: "FFFFFFFF" } };
-    headerRow.fill = {
-      type: "pattern",
-      pattern: "solid",
-      fgColor: { argb: "FF3B82F6" },
-    };
-    headerRow.alignment = { horizontal: "center", vertical: "middle" };
-    headerRow.height = 25;
-    currentRow++;
-
-    const dataStartRow = currentRow;
-
-    // Add data rows with continuous numbering
-    filtered.forEach((item, index) => {
-      const expirationDate = item.expiration_date
-        ? new Date(item.expiration_date)
-        : null;
-      const daysUntilExpiry = expirationDate
-        ? Math.ceil(
-            (expirationDate.getTime() - today.getTime()) / (1000 * 60 * 60 * 24)
-          )
-        : null;
-
-      inventorySheet.addRow([
-        index + 1, // Continuous numbering: 1, 2, 3, 4...
-        item.name || "Unknown Item",
-        item.category || "No Category",
-        item.batch_id_display || item.batch_id || "N/A",
-        Number(item.inStock || 0).toFixed(2),
-        item.unit_cost ? `₱${Number(item.unit_cost).toFixed(2)}` : "-",
-        item.unit_cost && item.inStock
-          ? `₱${(Number(item.unit_cost) * Number(item.inStock)).toFixed(2)}`
-          : "-",
-        Number(item.wastage || 0).toFixed(2),
-        item.stock || "Unknown",
-        formatDate(expirationDate),
-        daysUntilExpiry !== null ? daysUntilExpiry : "N/A",
-        formatDate(item.report_date),
-      ]);
-      currentRow++;
-    });
-
-    // ===== 7. STYLING =====
-    // Add borders to all data cells
-    for (let row = dataStartRow; row < currentRow; row++) {
-      for (let col = 1; col <= 10; col++) {
-        const cell = inventorySheet.getCell(row, col);
-        cell.border = {
-          top: { style: "thin", color: { argb: "FFD1D5DB" } },
-          left: { style: "thin", color: { argb: "FFD1D5DB" } },
-          bottom: { style: "thin", color: { argb: "FFD1D5DB" } },
-          right: { style: "thin", color: { argb: "FFD1D5DB" } },
-        };
-
-        // Alternating row colors
-        if ((row - dataStartRow) % 2 === 1) {
-          if (!cell.fill || cell.fill.type !== "pattern") {
-            cell.fill = {
-              type: "pattern",
-              pattern: "solid",
-              fgColor: { argb: "FFF9FAFB" },
-            };
-          }
-        }
-      }
-
-      // Status color coding (column 7)
-      const statusCell = inventorySheet.getCell(row, 7);
-      const status = statusCell.value;
-      if (status === "Low" || (typeof status === "number" && status === 0)) {
-        statusCell.fill = {
-          type: "pattern",
-          pattern: "solid",
-          fgColor: { argb: "FFEF4444" },
-        };
-        statusCell.font = { bold: true, color: { argb: "FFFFFFFF" } };
-      } else if (status === "Normal") {
-        statusCell.fill = {
-          type: "pattern",
-          pattern: "solid",
-          fgColor: { argb: "FFF59E0B" },
-        };
-        statusCell.font = { bold: true };
-      } else if (status === "High") {
-        statusCell.fill = {
-          type: "pattern",
-          pattern: "solid",
-          fgColor: { argb: "FF3B82F6" },
-        };
-        statusCell.font = { bold: true, color: { argb: "FFFFFFFF" } };
-      }
-
-      // Expiration date color coding (column 9)
-      const daysCell = inventorySheet.getCell(row, 9);
-      const days =
-        typeof daysCell.value === "number"
-          ? daysCell.value
-          : parseInt(daysCell.value as string);
-      if (!isNaN(days)) {
-        if (days < 0) {
-          // Expired
-          daysCell.fill = {
-            type: "pattern",
-            pattern: "solid",
-            fgColor: { argb: "FFEF4444" },
-          };
-          daysCell.font = { bold: true, color: { argb: "FFFFFFFF" } };
-        } else if (days <= 7) {
-          // Expiring soon
-          daysCell.fill = {
-            type: "pattern",
-            pattern: "solid",
-            fgColor: { argb: "FFF97316" },
-          };
-          daysCell.font = { bold: true };
-        } else {
-          // Normal
-          daysCell.fill = {
-            type: "pattern",
-            pattern: "solid",
-            fgColor: { argb: "FF10B981" },
-          };
-          daysCell.font = { color: { argb: "FFFFFFFF" } };
-        }
-      }
-    }
-
-    // Set column widths
-    inventorySheet.getColumn(1).width = 8; // #
-    inventorySheet.getColumn(2).width = 25; // Item Name
-    inventorySheet.getColumn(3).width = 20; // Category
-    inventorySheet.getColumn(4).width = 15; // Batch ID
-    inventorySheet.getColumn(5).width = 12; // In Stock
-    inventorySheet.getColumn(6).width = 14; // Unit Cost
-    inventorySheet.getColumn(7).width = 14; // Total Value
-    inventorySheet.getColumn(8).width = 12; // Wastage
-    inventorySheet.getColumn(9).width = 15; // Status
-    inventorySheet.getColumn(10).width = 18; // Expiration Date
-    inventorySheet.getColumn(11).width = 18; // Days Until Expiry
-    inventorySheet.getColumn(12).width = 18; // Report Date
-
-    // ===== 8. FOOTER =====
-    currentRow++;
-    inventorySheet.mergeCells(`A${currentRow}:L${currentRow}`);
-    const footerCell = inventorySheet.getCell(`A${currentRow}`);
-    footerCell.value = `Report generated by Cardiac Delights | ${now.toLocaleString(
-      "en-US"
-    )}`;
-    footerCell.font = { italic: true, size: 10, color: { argb: "FF6B7280" } };
-    footerCell.alignment = { horizontal: "center" };
-
-    // Generate buffer and save
-    const buffer = await workbook.xlsx.writeBuffer();
-    const blob = new Blob([buffer], {
-      type: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    });
-    saveAs(blob, `Inventory_Report_Enhanced_${formatDate(new Date())}.xlsx`);
-    setExportSuccess(true);
-    setShowPopup(false);
-
-    // Log export activity
+    // The backend streams the whole inventory table (no page cap) and logs
+    // the export activity itself.
+    setIsExporting(true);
     try {
-      const token = localStorage.getItem("token");
-      const API_URL =
-        process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
-      await fetch(`${API_URL}/api/log-export`, {
-        method: "POST",
-        headers: {
-          Authorization: `Bearer ${token}`,
-          "Content-Type": "application/json",
-        },
-        body: JSON.stringify({
-          report_type: "inventory report",
-          record_count: paginatedData.length,
-        }),
-      });
+      await downloadExport(
+        "/api/export-inventory",
+        { source: "master", format: "xlsx", start_date: start, end_date: end },
+        `Inventory_master_${dayjs().format("YYYY-MM-DD")}.xlsx`,
+        localStorage.getItem("token")
+      );
+      setExportSuccess(true);
+      setShowPopup(false);
     } catch (error) {
-      console.log("Failed to log export activity:", error);
-      // Don't show error to user, just log it
+      console.error("Inventory export failed:", error);
+      alert("Inventory export failed. Please try again.");
+    } finally {
+      setIsExporting(false);
     }
   };
 
@@ -3578,10 +3016,7 @@ export default function ReportInventory() {
 
                   <div className="space-y-2 xs:space-y-3 sm:space-y-4 pt-1 xs:pt-2">
                     <button
-                      onClick={() => {
-                        exportExcel();
-                        setExportSuccess(true);
-                      }}
+                      onClick={exportExcel}
                       className="w-full bg-gradient-to-r from-green-500 to-green-600 hover:from-green-400 hover:to-green-500 text-white font-semibold px-3 xs:px-4 sm:px-6 py-2.5 xs:py-3 rounded-md xs:rounded-lg sm:rounded-xl transition-all duration-200 hover:shadow-lg flex items-center justify-center gap-1.5 xs:gap-2 text-xs xs:text-sm sm:text-base min-h-[40px] xs:min-h-[44px] touch-manipulation"
                       type="button"
                     >
@@ -1,6 +1,5 @@
 "use client";
 import { useState, useEffect, useMemo, useCallback, useRef } from "react";
-import ExcelJS from "exceljs";
 import * as XLSX from "xlsx";
 import {
   FaSearch,
@@ -33,7 +32,7 @@ import {
 import { useSalesAnalytics } from "../../Dashboard/hook/useSalesPrediction";
 import NavigationBar from "@/app/components/navigation/navigation";
 import ResponsiveMain from "@/app/components/ResponsiveMain";
-import { saveAs } from "file-saver";
+import { downloadExport } from "@/app/utils/downloadExport";
 import { useComprehensiveAnalytics } from "./hooks/useComprehensiveAnalytics";
 import { FaDollarSign, FaExclamationTriangle, FaTrophy } from "react-icons/fa";
 import { MdTrendingDown } from "react-icons/md";
@@ -847,670 +846,38 @@ export default function ReportSales() {
   ];
 
   const exportToExcel = async () => {
-    const API_BASE_URL =
-      process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
-
-    // Helper function to format dates to MM/DD/YYYY
-    const formatDate = (date: string | Date | null | undefined): string => {
-      if (!date) return "N/A";
-      try {
-        const dateObj = typeof date === "string" ? new Date(date) : date;
-        if (isNaN(dateObj.getTime())) return "N/A";
-        return dateObj.toLocaleDateString("en-US");
-      } catch {
-        return "N/A";
-      }
-    };
-
-    const workbook = new ExcelJS.Workbook();
-    const worksheet = workbook.addWorksheet("Sales Report");
-
-    // Set workbook properties
-    workbook.creator = "Cardiac Delights";
-    workbook.created = new Date();
-    workbook.modified = new Date();
-
-    let currentRow = 1;
-
-    // ========== 1. TITLE SECTION ==========
-    worksheet.mergeCells(`A${currentRow}:I${currentRow}`);
-    const titleCell = worksheet.getCell(`A${currentRow}`);
-    titleCell.value = "SALES REPORT";
-    titleCell.font = {
-      name: "Arial",
-      size: 20,
-      bold: true,
-      color: { argb: "FF8B5CF6" },
-    };
-    titleCell.alignment = { horizontal: "center", vertical: "middle" };
-    worksheet.getRow(currentRow).height = 30;
-    currentRow += 2;
-
-    // ========== 2. REPORT METADATA ==========
-    const timestamp = new Date().toLocaleString("en-US", {
-      dateStyle: "full",
-      timeStyle: "medium",
-    });
-    const totalSales = sortedSales.reduce(
-      (sum: number, item: (typeof sortedSales)[0]) => sum + item.quantity,
-      0
-    );
-    const totalRevenue = sortedSales.reduce(
-      (sum: number, item: (typeof sortedSales)[0]) => sum + item.totalRevenue,
-      0
-    );
-
-    worksheet.getCell(`A${currentRow}`).value = "Generated:";
-    worksheet.getCell(`A${currentRow}`).font = { bold: true };
-    worksheet.getCell(`B${currentRow}`).value = timestamp;
-    currentRow++;
-
-    worksheet.getCell(`A${currentRow}`).value = "Total Sales:";
-    worksheet.getCell(`A${currentRow}`).font = { bold: true };
-    worksheet.getCell(`B${currentRow}`).value = `${totalSales} items`;
-    currentRow++;
-
-    worksheet.getCell(`A${currentRow}`).value = "Total Revenue:";
-    worksheet.getCell(`A${currentRow}`).font = { bold: true };
-    worksheet.getCell(`B${currentRow}`).value = `₱${totalRevenue.toLocaleString(
-      "en-US",
-      { minimumFractionDigits: 2, maximumFractionDigits: 2 }
-    )}`;
-    worksheet.getCell(`B${currentRow}`).font = {
-      color: { argb: "FF10B981" },
-      bold: true,
-    };
-    currentRow += 2;
-
-    // ========== 3. FILTER SUMMARY ==========
-    if (
-      searchQuery ||
-      categoryFilter ||
-      priceRangeFilter ||
-      dateRange.start ||
-      dateRange.end
-    ) {
-      worksheet.mergeCells(`A${currentRow}:I${currentRow}`);
-      const filterTitleCell = worksheet.getCell(`A${currentRow}`);
-      filterTitleCell.value = "ACTIVE FILTERS";
-      filterTitleCell.font = { bold: true, size: 12 };
-      filterTitleCell.fill = {
-        type: "pattern",
-        pattern: "solid",
-        fgColor: { argb: "FFE5E7EB" },
-      };
-      currentRow++;
-
-      if (searchQuery) {
-        worksheet.getCell(`A${currentRow}`).value = "Search:";
-        worksheet.getCell(`A${currentRow}`).font = { bold: true };
-        worksheet.getCell(`B${currentRow}`).value = searchQuery;
-        currentRow++;
-      }
-      if (categoryFilter) {
-        worksheet.getCell(`A${currentRow}`).value = "Category:";
-        worksheet.getCell(`A${currentRow}`).font = { bold: true };
-        worksheet.getCell(`B${currentRow}`).value = categoryFilter;
-        currentRow++;
-      }
-      if (priceRangeFilter) {
-        worksheet.getCell(`A${currentRow}`).value = "Price Range:";
-        worksheet.getCell(`A${currentRow}`).font = { bold: true };
-        worksheet.getCell(`B${currentRow}`).value = priceRangeFilter;
-        currentRow++;
-      }
-      if (dateRange.start && dateRange.end) {
-        worksheet.getCell(`A${currentRow}`).value = "Date Range:";
-        worksheet.getCell(`A${currentRow}`).font = { bold: true };
-        worksheet.getCell(
-          `B${currentRow}`
-        ).value = `${dateRange.start} to ${dateRange.end}`;
-        currentRow++;
-      }
-      currentRow++;
-    }
-
-    // ========== 4. SUMMARY STATISTICS SECTION ==========
-    worksheet.mergeCells(`A${currentRow}:I${currentRow}`);
-    const statsHeaderCell = worksheet.getCell(`A${currentRow}`);
-    statsHeaderCell.value = "SUMMARY STATISTICS";
-    statsHeaderCell.font = {
-      bold: true,
-      size: 14,
-      color: { argb: "FFFFFFFF" },
-    };
-    statsHeaderCell.fill = {
-      type: "pattern",
-      pattern: "solid",
-      fgColor: { argb: "FF10B981" },
-    };
-    statsHeaderCell.alignment = { horizontal: "center", vertical: "middle" };
-    worksheet.getRow(currentRow).height = 25;
-    currentRow++;
-
-    const avgSaleValue = totalSales > 0 ? totalRevenue / totalSales : 0;
-    const dateRangeStr =
-      dateRange.start && dateRange.end
-        ? `${dateRange.start} to ${dateRange.end}`
-        : "All Time";
-
-    const statsData = [
-      ["Metric", "Value"],
-      ["Total Sales", `${totalSales} items`],
-      [
-        "Total Revenue",
-        `₱${totalRevenue.toLocaleString("en-US", {
-          minimumFractionDigits: 2,
-          maximumFractionDigits: 2,
-        })}`,
-      ],
-      [
-        "Average Sale Value",
-        `₱${avgSaleValue.toLocaleString("en-US", {
-          minimumFractionDigits: 2,
-          maximumFractionDigits: 2,
-        })}`,
-      ],
-      ["Total Items Sold", `${totalSales} units`],
-      ["Date Range", dateRangeStr],
-    ];
-
-    statsData.forEach((row, idx) => {
-      worksheet.getRow(currentRow).values = row;
-      const rowObj = worksheet.getRow(currentRow);
-      if (idx === 0) {
-        // Header row
-        rowObj.font = { bold: true, color: { argb: "FFFFFFFF" } };
-        rowObj.fill = {
-          type: "pattern",
-          pattern: "solid",
-          fgColor: { argb: "FF10B981" },
-        };
-      } else {
-        // Data rows - alternating colors
-        if (idx % 2 === 0) {
-          rowObj.fill = {
-            type: "pattern",
-            pattern: "solid",
-            fgColor: { argb: "FFF0FDF4" },
-          };
-        }
-        // Color revenue values in green
-        if (row[0].includes("Revenue") || row[0].includes("Value")) {
-          worksheet.getCell(`B${currentRow}`).font = {
-            color: { argb: "FF10B981" },
-            bold: true,
-          };
-        }
-      }
-      rowObj.border = {
-        top: { style: "thin" },
-        left: { style: "thin" },
-        bottom: { style: "thin" },
-        right: { style: "thin" },
-      };
-      currentRow++;
-    });
-    currentRow++;
-
-    // ========== 5A. TOP 5 PERFORMING ITEMS (BY REVENUE) SECTION ==========
-    worksheet.mergeCells(`A${currentRow}:I${currentRow}`);
-    const topRevenueHeaderCell = worksheet.getCell(`A${currentRow}`);
-    topRevenueHeaderCell.value = "🏆 TOP 5 PERFORMING ITEMS (BY REVENUE)";
-    topRevenueHeaderCell.font = {
-      bold: true,
-      size: 14,
-      color: { argb: "FFFFFFFF" },
-    };
-    topRevenueHeaderCell.fill = {
-      type: "pattern",
-      pattern: "solid",
-      fgColor: { argb: "FF10B981" },
-    };
-    topRevenueHeaderCell.alignment = {
-      horizontal: "center",
-      vertical: "middle",
-    };
-    worksheet.getRow(currentRow).height = 25;
-    currentRow++;
-
-    const topPerformersByRevenue = [...sortedSales]
-      .sort((a, b) => b.totalRevenue - a.totalRevenue)
-      .slice(0, 5);
-
-    const topRevenueHeaders = [
-      "Rank",
-      "Item Name",
-      "Category",
-      "Quantity Sold",
-      "Revenue",
-      "Avg Price",
-    ];
-    worksheet.getRow(currentRow).values = topRevenueHeaders;
-    const topRevenueHeaderRow = worksheet.getRow(currentRow);
-    topRevenueHeaderRow.font = { bold: true, color: { argb: "FFFFFFFF" } };
-    topRevenueHeaderRow.fill = {
-      type: "pattern",
-      pattern: "solid",
-      fgColor: { argb: "FF10B981" },
-    };
-    topRevenueHeaderRow.border = {
-      top: { style: "thin" },
-      left: { style: "thin" },
-      bottom: { style: "thin" },
-      right: { style: "thin" },
-    };
-    currentRow++;
-
-    topPerformersByRevenue.forEach((item, idx) => {
-      const avgPrice =
-        item.quantity > 0 ? item.totalRevenue / item.quantity : 0;
-      const rowData = [
-        idx + 1,
-        item.name,
-        item.category || "N/A",
-        item.quantity,
-        `₱${item.totalRevenue.toLocaleString("en-US", {
-          minimumFractionDigits: 2,
-          maximumFractionDigits: 2,
-        })}`,
-        `₱${avgPrice.toLocaleString("en-US", {
-          minimumFractionDigits: 2,
-          maximumFractionDigits: 2,
-        })}`,
-      ];
-      worksheet.getRow(currentRow).values = rowData;
-      const rowObj = worksheet.getRow(currentRow);
-
-      // Alternating row colors
-      if (idx % 2 === 1) {
-        rowObj.fill = {
-          type: "pattern",
-          pattern: "solid",
-          fgColor: { argb: "FFF0FDF4" },
-        };
-      }
-
-      // Revenue and Avg Price in green
-      worksheet.getCell(`E${currentRow}`).font = {
-        color: { argb: "FF10B981" },
-        bold: true,
-      };
-      worksheet.getCell(`F${currentRow}`).font = {
-        color: { argb: "FF10B981" },
-        bold: true,
-      };
-
-      rowObj.border = {
-        top: { style: "thin" },
-        left: { style: "thin" },
-        bottom: { style: "thin" },
-        right: { style: "thin" },
-      };
-      currentRow++;
-    });
-    currentRow++;
-
-    // ========== 5B. TOP 5 SELLING ITEMS (BY QUANTITY) SECTION ==========
-    worksheet.mergeCells(`A${currentRow}:I${currentRow}`);
-    const topQuantityHeaderCell = worksheet.getCell(`A${currentRow}`);
-    topQuantityHeaderCell.value = "📊 TOP 5 SELLING ITEMS (BY QUANTITY)";
-    topQuantityHeaderCell.font = {
-      bold: true,
-      size: 14,
-      color: { argb: "FFFFFFFF" },
-    };
-    topQuantityHeaderCell.fill = {
-      type: "pattern",
-      pattern: "solid",
-      fgColor: { argb: "FF3B82F6" },
-    };
-    topQuantityHeaderCell.alignment = {
-      horizontal: "center",
-      vertical: "middle",
-    };
-    worksheet.getRow(currentRow).height = 25;
-    currentRow++;
-
-    const topSellersByQuantity = [...sortedSales]
-      .sort((a, b) => b.quantity - a.quantity)
-      .slice(0, 5);
-
-    const topQuantityHeaders = [
-      "Rank",
-      "Item Name",
-      "Category",
-      "Quantity Sold",
-      "Revenue",
-      "Avg Price",
-    ];
-    worksheet.getRow(currentRow).values = topQuantityHeaders;
-    const topQuantityHeaderRow = worksheet.getRow(currentRow);
-    topQuantityHeaderRow.font = { bold: true, color: { argb: "FFFFFFFF" } };
-    topQuantityHeaderRow.fill = {
-      type: "pattern",
-      pattern: "solid",
-      fgColor: { argb: "FF3B82F6" },
-    };
-    topQuantityHeaderRow.border = {
-      top: { style: "thin" },
-      left: { style: "thin" },
-      bottom: { style: "thin" },
-      right: { style: "thin" },
-    };
-    currentRow++;
-
-    topSellersByQuantity.forEach((item, idx) => {
-      const avgPrice =
-        item.quantity > 0 ? item.totalRevenue / item.quantity : 0;
-      const rowData = [
-        idx + 1,
-        item.name,
-        item.category || "N/A",
-        item.quantity,
-        `₱${item.totalRevenue.toLocaleString("en-US", {
-          minimumFractionDigits: 2,
-          maximumFractionDigits: 2,
-        })}`,
-        `₱${avgPrice.toLocaleString("en-US", {
-          minimumFractionDigits: 2,
-          maximumFractionDigits: 2,
-        })}`,
-      ];
-      worksheet.getRow(currentRow).values = rowData;
-      const rowObj = worksheet.getRow(currentRow);
-
-      // Alternating row colors with blue tint
-      if (idx % 2 === 1) {
-        rowObj.fill = {
-          type: "pattern",
-          pattern: "solid",
-          fgColor: { argb: "FFDBEAFE" },
-        };
-      }
-
-      // Quantity in blue
-      worksheet.getCell(`D${currentRow}`).font = {
-        color: { argb: "FF3B82F6" },
-        bold: true,
-      };
-
-      rowObj.border = {
-        top: { style: "thin" },
-        left: { style: "thin" },
-        bottom: { style: "thin" },
-        right: { style: "thin" },
-      };
-      currentRow++;
-    });
-    currentRow++;
-
-    // ========== 6. SALES BY CATEGORY SECTION ==========
-    worksheet.mergeCells(`A${currentRow}:I${currentRow}`);
-    const categoryHeaderCell = worksheet.getCell(`A${currentRow}`);
-    categoryHeaderCell.value = "SALES BY CATEGORY";
-    categoryHeaderCell.font = {
-      bold: true,
-      size: 14,
-      color: { argb: "FFFFFFFF" },
-    };
-    categoryHeaderCell.fill = {
-      type: "pattern",
-      pattern: "solid",
-      fgColor: { argb: "FF10B981" },
-    };
-    categoryHeaderCell.alignment = { horizontal: "center", vertical: "middle" };
-    worksheet.getRow(currentRow).height = 25;
-    currentRow++;
-
-    // Group by category
-    const categoryMap: {
-      [key: string]: { quantity: number; revenue: number };
-    } = {};
-    sortedSales.forEach((item: (typeof sortedSales)[0]) => {
-      const cat = item.category || "Uncategorized";
-      if (!categoryMap[cat]) {
-        categoryMap[cat] = { quantity: 0, revenue: 0 };
-      }
-      categoryMap[cat].quantity += item.quantity;
-      categoryMap[cat].revenue += item.totalRevenue;
-    });
-
-    const categoryHeaders = [
-      "Category",
-      "Total Quantity",
-      "Total Revenue",
-      "% of Revenue",
-    ];
-    worksheet.getRow(currentRow).values = categoryHeaders;
-    const catHeaderRow = worksheet.getRow(currentRow);
-    catHeaderRow.font = { bold: true, color: { argb: "FFFFFFFF" } };
-    catHeaderRow.fill = {
-      type: "pattern",
-      pattern: "solid",
-      fgColor: { argb: "FF10B981" },
-    };
-    catHeaderRow.border = {
-      top: { style: "thin" },
-      left: { style: "thin" },
-      bottom: { style: "thin" },
-      right: { style: "thin" },
-    };
-    currentRow++;
-
-    Object.entries(categoryMap).forEach(([category, data], idx) => {
-      const percentage =
-        totalRevenue > 0
-          ? ((data.revenue / totalRevenue) * 100).toFixed(2)
-          : "0.00";
-      const rowData = [
-        category,
-        data.quantity,
-        `₱${data.revenue.toLocaleString("en-US", {
-          minimumFractionDigits: 2,
-          maximumFractionDigits: 2,
-        })}`,
-        `${percentage}%`,
-      ];
-      worksheet.getRow(currentRow).values = rowData;
-      const rowObj = worksheet.getRow(currentRow);
-
-      // Alternating row colors
-      if (idx % 2 === 1) {
-        rowObj.fill = {
-          type: "pattern",
-          pattern: "solid",
-          fgColor: { argb: "FFF0FDF4" },
-        };
-      }
-
-      // Revenue in green
-      worksheet.getCell(`C${currentRow}`).font = {
-        color: { argb: "FF10B981" },
-        bold: true,
-      };
-
-      rowObj.border = {
-        top: { style: "thin" },
-        left: { style: "thin" },
-        bottom: { style: "thin" },
-        right: { style: "thin" },
-      };
-      currentRow++;
-    });
-    currentRow++;
-
-    // ========== 7. DETAILED SALES DATA SECTION ==========
-    worksheet.mergeCells(`A${currentRow}:I${currentRow}`);
-    const detailHeaderCell = worksheet.getCell(`A${currentRow}`);
-    detailHeaderCell.value = "DETAILED SALES DATA";
-    detailHeaderCell.font = {
-      bold: true,
-      size: 14,
-      color: { argb: "FFFFFFFF" },
-    };
-    detailHeaderCell.fill = {
-      type: "pattern",
-      pattern: "solid",
-      fgColor: { argb: "FF10B981" },
-    };
-    detailHeaderCell.alignment = { horizontal: "center", vertical: "middle" };
-    worksheet.getRow(currentRow).height = 25;
-    currentRow++;
-
-    const detailHeaders = [
-      "#",
-      "Item Name",
-      "Category",
-      "Quantity",
-      "Unit Price",
-      "Total Revenue",
-      "Date",
-      "Payment Method",
-    ];
-    worksheet.getRow(currentRow).values = detailHeaders;
-    const detailHeaderRow = worksheet.getRow(currentRow);
-    detailHeaderRow.font = { bold: true, color: { argb: "FFFFFFFF" } };
-    detailHeaderRow.fill = {
-      type: "pattern",
-      pattern: "solid",
-      fgColor: { argb: "FF10B981" },
-    };
-    detailHeaderRow.alignment = { horizontal: "center", vertical: "middle" };
-    detailHeaderRow.height = 20;
-    detailHeaderRow.border = {
-      top: { style: "thin" },
-      left: { style: "thin" },
-      bottom: { style: "thin" },
-      right: { style: "thin" },
-    };
-    currentRow++;
-
-    // Add all sales data with continuous numbering
-    sortedSales.forEach((item: (typeof sortedSales)[0], idx: number) => {
-      const rowData = [
-        idx + 1, // Continuous numbering: 1, 2, 3, 4...
-        item.name,
-        item.category || "N/A",
-        item.quantity,
-        `₱${Number(item.unitPrice).toLocaleString("en-US", {
-          minimumFractionDigits: 2,
-          maximumFractionDigits: 2,
-        })}`,
-        `₱${item.totalRevenue.toLocaleString("en-US", {
-          minimumFractionDigits: 2,
-          maximumFractionDigits: 2,
-        })}`,
-        formatDate(item.sale_date || item.report_date),
-        item.dine_type || "N/A",
-      ];
-      worksheet.getRow(currentRow).values = rowData;
-      const rowObj = worksheet.getRow(currentRow);
-
-      // Alternating row colors
-      if (idx % 2 === 1) {
-        rowObj.fill = {
-          type: "pattern",
-          pattern: "solid",
-          fgColor: { argb: "FFF0FDF4" },
-        };
-      }
-
-      // Revenue values in green
-      worksheet.getCell(`D${currentRow}`).font = {
-        color: { argb: "FF10B981" },
-      };
-      worksheet.getCell(`E${currentRow}`).font = {
-        color: { argb: "FF10B981" },
-        bold: true,
-      };
-
-      rowObj.border = {
-        top: { style: "thin" },
-        left: { style: "thin" },
-        bottom: { style: "thin" },
-        right: { style: "thin" },
-      };
-      currentRow++;
-    });
-    currentRow++;
-
-    // ========== 8. FOOTER ==========
-    worksheet.mergeCells(`A${currentRow}:I${currentRow}`);
-    const footerCell = worksheet.getCell(`A${currentRow}`);
-    footerCell.value = `Report generated by Cardiac Delights | ${new Date().toLocaleString(
-      "en-US"
-    )}`;
-    footerCell.font = { italic: true, size: 10, color: { argb: "FF6B7280" } };
-    footerCell.alignment = { horizontal: "center", vertical: "middle" };
-    currentRow++;
-
-    // ========== 9. COLUMN WIDTHS ==========
-    worksheet.columns = [
-      { width: 8 }, // A - #
-      { width: 25 }, // B - Item Name
-      { width: 18 }, // C - Category
-      { width: 12 }, // D - Quantity
-      { width: 15 }, // E - Unit Price
-      { width: 18 }, // F - Total Revenue
-      { width: 15 }, // G - Date
-      { width: 18 }, // I - Payment Method
-    ];
-
-    // Forecast worksheet (keep existing simple version)
-    const forecastWorksheet = workbook.addWorksheet("Sales Forecast");
-    forecastWorksheet.addRows(forecastTable);
-    const forecastHeaderRow = forecastWorksheet.getRow(1);
-    forecastHeaderRow.font = { bold: true };
-    forecastHeaderRow.fill = {
-      type: "pattern",
-      pattern: "solid",
-      fgColor: { argb: "FFFFCC99" },
+    // Helper to get local date string
+    const getLocalDateStr = (date: Date) => {
+      return (
+        date.getFullYear() +
+        "-" +
+        String(date.getMonth() + 1).padStart(2, "0") +
+        "-" +
+        String(date.getDate()).padStart(2, "0")
+      );
     };
-    forecastWorksheet.columns.forEach((column) => {
-      column.width = 20;
-    });
 
-    // Generate buffer and save
-    const buffer = await workbook.xlsx.writeBuffer();
-    const blob = new Blob([buffer], {
-      type: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    });
-    saveAs(blob, `Sales_Report_${getFormattedDate()}.xlsx`);
-    setExportSuccess(true);
-    setShowPopup(false);
+    const todayStr = getLocalDateStr(new Date());
+    const startDate = dateRange.start || todayStr; // Today as default
+    const endDate = dateRange.end || todayStr;
 
-    // Log export activity to backend
+    // The backend streams every row of the period (no page cap) and logs the
+    // export activity itself.
+    setIsExporting(true);
     try {
-      const token = localStorage.getItem("access_token");
-      // Helper to get local date string
-      const getLocalDateStr = (date: Date) => {
-        return (
-          date.getFullYear() +
-          "-" +
-          String(date.getMonth() + 1).padStart(2, "0") +
-          "-" +
-          String(date.getDate()).padStart(2, "0")
-        );
-      };
-
-      const todayStr = getLocalDateStr(new Date());
-      const startDate = dateRange.start || todayStr; // Today as default
-      const endDate = dateRange.end || todayStr;
-
-      await fetch(
-        `${API_BASE_URL}/api/export-sales?start_date=${startDate}&end_date=${endDate}&export_type=${viewMode}`,
-        {
-          method: "POST",
-          headers: {
-            Authorization: `Bearer ${token}`,
-            "Content-Type": "application/json",
-          },
-        }
+      await downloadExport(
+        "/api/export-sales/download",
+        { start_date: startDate, end_date: endDate, format: "xlsx" },
+        `Sales_Report_${startDate}_to_${endDate}.xlsx`,
+        localStorage.getItem("access_token")
       );
+      setExportSuccess(true);
+      setShowPopup(false);
     } catch (error) {
-      console.warn("Failed to log export activity:", error);
-      // Don't fail the export if logging fails
+      console.error("Sales export failed:", error);
+      alert("Sales export failed. Please try again.");
+    } finally {
+      setIsExporting(false);
     }
   };
 
@@ -0,0 +1,41 @@
+import { saveAs } from "file-saver";
+
+const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
+
+// Filename from `Content-Disposition: attachment; filename="..."`
+const filenameFrom = (disposition: string | null, fallback: string) => {
+  const match = disposition?.match(/filename\*?=(?:UTF-8'')?"?([^";]+)"?/i);
+  return match ? decodeURIComponent(match[1]) : fallback;
+};
+
+/**
+ * Download a server-generated export (CSV/XLSX) and save it.
+ *
+ * The backend streams every row of the period through a server-side
+ * cursor, so the file is complete however large the report is; the page
+ * never pages through the JSON report endpoints to build it.
+ */
+export async function downloadExport(
+  path: string,
+  params: Record<string, string | undefined>,
+  fallbackName: string,
+  token: string | null
+) {
+  const searchParams = new URLSearchParams();
+  Object.entries(params).forEach(([key, value]) => {
+    if (value) searchParams.append(key, value);
+  });
+
+  const response = await fetch(
+    `${API_BASE_URL}${path}?${searchParams.toString()}`,
+    { headers: token ? { Authorization: `Bearer ${token}` } : {} }
+  );
+  if (!response.ok) {
+    throw new Error(`Export failed (${response.status})`);
+  }
+  const blob = await response.blob();
+  saveAs(
+    blob,
+    filenameFrom(response.headers.get("Content-Disposition"), fallbackName)
+  );
+}